@@ -8,11 +8,13 @@ Valida: Requisitos 6.1, 6.2, 6.3, 6.4, 6.5, 6.6, 6.7, 6.8
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import case, desc, func
 from datetime import date as date_type, datetime
-from typing import Optional
+from typing import Dict, Iterable, Optional, Tuple
 import logging
 
+import numpy as np
+
 from app.api.dependencies import get_db
 from app.api.schemas import (
     RankingResponse,
@@ -21,11 +23,18 @@ from app.api.schemas import (
     AssetScore,
     FactorBreakdown,
     ScoreBreakdown,
-    ErrorResponse
+    ErrorResponse,
+    WhatIfRequest,
+    WhatIfResponse,
+    WhatIfScenarioResult,
+    WhatIfEntry,
+    TickerStatsResponse
 )
-from app.models.schemas import ScoreDaily, FeatureDaily, FeatureMonthly, RawPriceDaily
+from app.models.schemas import ScoreDaily, FeatureDaily, FeatureMonthly, RawPriceDaily, TickerStats
 from app.scoring.scoring_engine import ScoreResult
-from app.scoring.ranker import RankingEntry
+from app.scoring.ranker import RankingEntry, IndexedRanking
+from app.scoring.what_if import WhatIfRanker
+from app.scoring.score_service import ScoreService
 from app.report.report_generator import ReportGenerator
 from app.chat.gemini_adapter import GeminiChatAdapter
 from app.config import settings
@@ -37,6 +46,27 @@ router = APIRouter()
 # Cache de sessões de chat (em produção, usar Redis ou similar)
 chat_sessions = {}
 
+# Cache dos sub-scores para re-ranking what-if: (chave da versão, ranker)
+what_if_cache = {}
+
+# Gerador compartilhado: mantém o cache de explicações por (ticker, data)
+report_generator = ReportGenerator()
+
+# Fatores brutos das datas aquecidas em batch: {data: {ticker: fatores}},
+# limitado às MAX_CACHED_DATES datas mais recentes (ordem de inserção)
+raw_factors_cache = {}
+MAX_CACHED_DATES = 8
+
+# Colunas de FeatureDaily e FeatureMonthly retornadas como fatores brutos
+DAILY_RAW_FACTORS = (
+    'return_1m', 'return_6m', 'return_12m', 'momentum_6m_ex_1m',
+    'momentum_12m_ex_1m', 'rsi_14', 'volatility_90d', 'recent_drawdown'
+)
+MONTHLY_RAW_FACTORS = (
+    'roe', 'net_margin', 'revenue_growth_3y', 'debt_to_ebitda',
+    'pe_ratio', 'ev_ebitda', 'pb_ratio'
+)
+
 
 def _get_latest_date(db: Session) -> Optional[date_type]:
     """
@@ -143,16 +173,24 @@ async def get_ranking(
         None,
         description="Data do ranking (formato YYYY-MM-DD). Se não fornecido, usa a data mais recente."
     ),
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        description="Número máximo de ativos a retornar. Se não fornecido, retorna o ranking completo."
+    ),
     db: Session = Depends(get_db)
 ) -> RankingResponse:
     """
     Retorna ranking diário completo ordenado por score.
     
     Se a data não for fornecida, usa a data mais recente disponível no banco.
-    O ranking é ordenado por score final em ordem decrescente (maior score = melhor posição).
+    O ranking é ordenado por score final em ordem decrescente (maior score = melhor posição),
+    com desempate por ticker, via IndexedRanking; com limit, só os primeiros
+    são selecionados (argpartition), sem ordenar o universo inteiro.
     
     Args:
         date: Data do ranking (opcional)
+        limit: Número máximo de ativos (opcional)
         db: Sessão do banco de dados
         
     Returns:
@@ -174,12 +212,10 @@ async def get_ranking(
             )
         logger.info(f"Using latest date: {date}")
     
-    # Buscar todos os scores para a data, ordenados por score final
+    # Buscar todos os scores para a data
     scores = db.query(ScoreDaily).filter(
         ScoreDaily.date == date
-    ).order_by(
-        desc(ScoreDaily.final_score)
-    ).all()
+    ).order_by(ScoreDaily.ticker).all()
     
     if not scores:
         logger.warning(f"No scores found for date {date}")
@@ -188,8 +224,13 @@ async def get_ranking(
             detail=f"Nenhum score encontrado para a data {date}"
         )
     
-    # Converter para ScoreBreakdown
-    score_breakdowns = [_score_daily_to_score_breakdown(score) for score in scores]
+    # Ordenar pelo ranking indexado e converter para ScoreBreakdown
+    ranking = IndexedRanking.from_score_results(scores, date)
+    entries = ranking.top_n(limit) if limit is not None else ranking
+    scores_by_ticker = {score.ticker: score for score in scores}
+    score_breakdowns = [
+        _score_daily_to_score_breakdown(scores_by_ticker[entry.ticker]) for entry in entries
+    ]
     
     logger.info(
         f"Returning ranking for {date} with {len(score_breakdowns)} assets. "
@@ -203,6 +244,253 @@ async def get_ranking(
     )
 
 
+def _get_what_if_ranker(db: Session, score_date: date_type):
+    """
+    Obtém o WhatIfRanker da data, recarregando apenas se os scores mudaram.
+    
+    A versão dos scores é identificada, numa única consulta agregada, por
+    contagem, último calculated_at e somas ponderadas pelo id de cada coluna
+    lida pelo WhatIfRanker (sub-scores, fator de penalidade e elegibilidade).
+    O upsert de ScoreService não atualiza calculated_at, então são as somas
+    que detectam um rescore; a ponderação pelo id também detecta valores
+    trocados entre tickers. Os ranks persistidos são lidos a cada chamada,
+    pois update_ranks os reescreve sem alterar essa versão.
+    
+    Args:
+        db: Sessão do banco de dados
+        score_date: Data dos scores
+        
+    Returns:
+        Tupla (WhatIfRanker, dict ticker -> rank persistido)
+    """
+    version = tuple(db.query(
+        func.count(ScoreDaily.id),
+        func.max(ScoreDaily.calculated_at),
+        func.sum(ScoreDaily.final_score * ScoreDaily.id),
+        func.sum(ScoreDaily.momentum_score * ScoreDaily.id),
+        func.sum(ScoreDaily.quality_score * ScoreDaily.id),
+        func.sum(ScoreDaily.value_score * ScoreDaily.id),
+        func.sum(ScoreDaily.risk_penalty_factor * ScoreDaily.id),
+        func.sum(case((ScoreDaily.passed_eligibility.is_(False), ScoreDaily.id), else_=0))
+    ).filter(ScoreDaily.date == score_date).one())
+    
+    current_ranks = dict(
+        db.query(ScoreDaily.ticker, ScoreDaily.rank).filter(ScoreDaily.date == score_date).all()
+    )
+    
+    cached = what_if_cache.get(score_date)
+    if cached is not None and cached[0] == version:
+        return cached[1], current_ranks
+    
+    ranker = WhatIfRanker.from_db(db, score_date)
+    
+    what_if_cache.clear()
+    what_if_cache[score_date] = (version, ranker)
+    
+    return ranker, current_ranks
+
+
+@router.post(
+    "/ranking/what-if",
+    response_model=WhatIfResponse,
+    summary="Re-ranking com pesos alternativos",
+    description="Recalcula scores finais e ranking em memória para um ou mais vetores de pesos.",
+    responses={
+        200: {"description": "Cenários avaliados com sucesso"},
+        404: {"model": ErrorResponse, "description": "Nenhum dado disponível para a data especificada"}
+    }
+)
+async def what_if_ranking(
+    request: WhatIfRequest,
+    db: Session = Depends(get_db)
+) -> WhatIfResponse:
+    """
+    Recalcula o ranking para pesos alternativos sem reprocessar o pipeline.
+    
+    Os sub-scores (momentum, quality, value) da data ficam em memória e cada
+    cenário aplica a mesma redistribuição de pesos NaN de
+    ScoringEngine.calculate_final_score, mais o fator de penalidade de risco
+    persistido.
+    
+    Args:
+        request: Data, cenários de pesos e top_n opcional
+        db: Sessão do banco de dados
+        
+    Returns:
+        WhatIfResponse com um ranking por cenário
+        
+    Raises:
+        HTTPException 404: Se não houver dados para a data especificada
+    """
+    score_date = request.date
+    if score_date is None:
+        score_date = _get_latest_date(db)
+        if score_date is None:
+            logger.warning("No scores available in database")
+            raise HTTPException(
+                status_code=404,
+                detail="Nenhum score disponível no banco de dados"
+            )
+    
+    ranker, current_ranks = _get_what_if_ranker(db, score_date)
+    
+    if len(ranker) == 0:
+        logger.warning(f"No scores found for date {score_date}")
+        raise HTTPException(
+            status_code=404,
+            detail=f"Nenhum score encontrado para a data {score_date}"
+        )
+    
+    weights = [
+        {
+            'momentum': scenario.momentum_weight,
+            'quality': scenario.quality_weight,
+            'value': scenario.value_weight,
+            'size': scenario.size_weight
+        }
+        for scenario in request.scenarios
+    ]
+    scores, ranks = ranker.evaluate(weights)
+    
+    n = len(ranker) if request.top_n is None else min(request.top_n, len(ranker))
+    
+    results = []
+    for scenario, scenario_scores, scenario_ranks in zip(request.scenarios, scores, ranks):
+        order = scenario_ranks.argsort()[:n]
+        results.append(WhatIfScenarioResult(
+            weights=scenario,
+            rankings=[
+                WhatIfEntry(
+                    ticker=ranker.tickers[i],
+                    final_score=float(scenario_scores[i]),
+                    rank=int(scenario_ranks[i]),
+                    current_rank=current_ranks.get(ranker.tickers[i])
+                )
+                for i in order
+            ]
+        ))
+    
+    logger.info(
+        f"Evaluated {len(results)} what-if scenarios for {score_date} "
+        f"over {len(ranker)} assets"
+    )
+    
+    return WhatIfResponse(
+        date=score_date,
+        total_assets=len(ranker),
+        scenarios=results
+    )
+
+
+def _load_raw_factors(
+    db: Session,
+    score_date: date_type,
+    tickers: Optional[Iterable[str]] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Carrega os fatores brutos (diários + mensais do mês da data) por ticker.
+    
+    Args:
+        db: Sessão do banco de dados
+        score_date: Data dos scores
+        tickers: Restringe aos tickers dados (None = todos da data)
+        
+    Returns:
+        Dict ticker -> {fator: valor}, sem valores None
+    """
+    daily_query = db.query(
+        FeatureDaily.ticker, *[getattr(FeatureDaily, name) for name in DAILY_RAW_FACTORS]
+    ).filter(FeatureDaily.date == score_date)
+    monthly_query = db.query(
+        FeatureMonthly.ticker, *[getattr(FeatureMonthly, name) for name in MONTHLY_RAW_FACTORS]
+    ).filter(FeatureMonthly.month == score_date.replace(day=1))
+    if tickers is not None:
+        tickers = list(tickers)
+        daily_query = daily_query.filter(FeatureDaily.ticker.in_(tickers))
+        monthly_query = monthly_query.filter(FeatureMonthly.ticker.in_(tickers))
+    
+    raw_factors = {}
+    for names, query in ((DAILY_RAW_FACTORS, daily_query), (MONTHLY_RAW_FACTORS, monthly_query)):
+        for row in query.all():
+            factors = raw_factors.setdefault(row[0], {})
+            factors.update((name, value) for name, value in zip(names, row[1:]) if value is not None)
+    
+    return raw_factors
+
+
+def _warm_asset_details(db: Session, score_date: date_type) -> None:
+    """
+    Gera em batch as explicações e os fatores brutos de todos os ativos da data.
+    
+    Usa ReportGenerator.generate_batch_explanations, que guarda as
+    explicações no cache com versão (final_score, rank); os fatores brutos
+    ficam em raw_factors_cache. Ativos sem rank persistido usam a posição do
+    ranking indexado, como get_asset_detail.
+    
+    Args:
+        db: Sessão do banco de dados
+        score_date: Data dos scores
+    """
+    scores = db.query(ScoreDaily).filter(
+        ScoreDaily.date == score_date
+    ).order_by(ScoreDaily.ticker).all()
+    if not scores:
+        return
+    
+    ranking = IndexedRanking.from_score_results(scores, score_date)
+    raw_factors = _load_raw_factors(db, score_date)
+    factor_names = DAILY_RAW_FACTORS + MONTHLY_RAW_FACTORS
+    
+    report_generator.generate_batch_explanations(
+        tickers=[score.ticker for score in scores],
+        factor_matrix=np.array([
+            [raw_factors.get(score.ticker, {}).get(name, np.nan) for name in factor_names]
+            for score in scores
+        ], dtype=float),
+        factor_names=factor_names,
+        final_scores=[score.final_score for score in scores],
+        momentum_scores=[score.momentum_score for score in scores],
+        quality_scores=[score.quality_score for score in scores],
+        value_scores=[score.value_score for score in scores],
+        ranks=[
+            score.rank if score.rank is not None else ranking.rank_of(score.ticker)
+            for score in scores
+        ],
+        score_date=score_date
+    )
+    
+    raw_factors_cache.pop(score_date, None)
+    if len(raw_factors_cache) >= MAX_CACHED_DATES:
+        # Descarta a data aquecida há mais tempo
+        raw_factors_cache.pop(next(iter(raw_factors_cache)))
+    raw_factors_cache[score_date] = raw_factors
+    
+    logger.info(f"Warmed explanation cache for {len(scores)} assets on {score_date}")
+
+
+def _get_cached_asset_detail(
+    ticker: str,
+    score_date: date_type,
+    version: Tuple[float, Optional[int]]
+) -> Tuple[Optional[str], Optional[Dict[str, float]]]:
+    """
+    Busca explicação e fatores brutos em cache para (ticker, data).
+    
+    Args:
+        ticker: Símbolo do ativo
+        score_date: Data do score
+        version: Versão esperada da explicação (final_score, rank)
+        
+    Returns:
+        Tupla (explicação, fatores brutos), ou (None, None) se faltar algum
+    """
+    explanation = report_generator.get_cached_explanation(ticker, score_date, version=version)
+    factors_by_ticker = raw_factors_cache.get(score_date)
+    if explanation is None or factors_by_ticker is None:
+        return None, None
+    return explanation, factors_by_ticker.get(ticker, {})
+
+
 @router.get(
     "/asset/{ticker}",
     response_model=AssetDetailResponse,
@@ -270,76 +558,53 @@ async def get_asset_detail(
     # Converter para ScoreBreakdown
     score_breakdown = _score_daily_to_score_breakdown(score_daily)
     
-    # Buscar fatores brutos (daily + monthly)
-    raw_factors = {}
-    
-    # Fatores diários (momentum)
-    feature_daily = db.query(FeatureDaily).filter(
-        FeatureDaily.ticker == ticker.upper(),
-        FeatureDaily.date == date
-    ).first()
-    
-    if feature_daily:
-        raw_factors.update({
-            'return_1m': feature_daily.return_1m,
-            'return_6m': feature_daily.return_6m,
-            'return_12m': feature_daily.return_12m,
-            'momentum_6m_ex_1m': feature_daily.momentum_6m_ex_1m,
-            'momentum_12m_ex_1m': feature_daily.momentum_12m_ex_1m,
-            'rsi_14': feature_daily.rsi_14,
-            'volatility_90d': feature_daily.volatility_90d,
-            'recent_drawdown': feature_daily.recent_drawdown
-        })
-    
-    # Fatores mensais (fundamentalistas)
-    # Buscar o mês correspondente à data
-    month_start = date.replace(day=1)
-    feature_monthly = db.query(FeatureMonthly).filter(
-        FeatureMonthly.ticker == ticker.upper(),
-        FeatureMonthly.month == month_start
-    ).first()
-    
-    if feature_monthly:
-        raw_factors.update({
-            'roe': feature_monthly.roe,
-            'net_margin': feature_monthly.net_margin,
-            'revenue_growth_3y': feature_monthly.revenue_growth_3y,
-            'debt_to_ebitda': feature_monthly.debt_to_ebitda,
-            'pe_ratio': feature_monthly.pe_ratio,
-            'ev_ebitda': feature_monthly.ev_ebitda,
-            'pb_ratio': feature_monthly.pb_ratio
-        })
-    
-    # Remover valores None
-    raw_factors = {k: v for k, v in raw_factors.items() if v is not None}
-    
-    # Gerar explicação
-    score_result = ScoreResult(
-        ticker=score_daily.ticker,
-        final_score=score_daily.final_score,
-        momentum_score=score_daily.momentum_score,
-        quality_score=score_daily.quality_score,
-        value_score=score_daily.value_score,
-        confidence=score_daily.confidence,
-        raw_factors=raw_factors
-    )
-    
-    ranking_entry = RankingEntry(
-        ticker=score_daily.ticker,
-        score=score_daily.final_score,
-        rank=score_daily.rank,
-        confidence=score_daily.confidence,
-        momentum_score=score_daily.momentum_score,
-        quality_score=score_daily.quality_score,
-        value_score=score_daily.value_score
-    )
-    
-    report_generator = ReportGenerator()
-    explanation = report_generator.generate_asset_explanation(
-        ticker=ticker.upper(),
-        score_result=score_result,
-        ranking_entry=ranking_entry
-    )
+    # Sem rank persistido (update_ranks ainda não rodou), usa a posição por
+    # score no ranking indexado da data
+    if score_breakdown.rank is None:
+        score_breakdown.rank = ScoreService(db).get_indexed_ranking(date).rank_of(score_daily.ticker)
+    
+    # Explicação e fatores brutos em cache por (ticker, data), consultados
+    # antes das features; a versão invalida o texto se o score ou o rank da
+    # data forem recalculados. Na primeira consulta da data, o batch gera os
+    # de todos os ativos de uma vez.
+    explanation_version = (score_daily.final_score, score_breakdown.rank)
+    explanation, raw_factors = _get_cached_asset_detail(ticker.upper(), date, explanation_version)
+    if explanation is None:
+        _warm_asset_details(db, date)
+        explanation, raw_factors = _get_cached_asset_detail(ticker.upper(), date, explanation_version)
+    
+    if explanation is None:
+        # Score regravado durante o batch: gera só a explicação deste ativo
+        raw_factors = _load_raw_factors(db, date, [ticker.upper()]).get(ticker.upper(), {})
+        
+        score_result = ScoreResult(
+            ticker=score_daily.ticker,
+            final_score=score_daily.final_score,
+            momentum_score=score_daily.momentum_score,
+            quality_score=score_daily.quality_score,
+            value_score=score_daily.value_score,
+            confidence=score_daily.confidence,
+            raw_factors=raw_factors
+        )
+        
+        ranking_entry = RankingEntry(
+            ticker=score_daily.ticker,
+            score=score_daily.final_score,
+            rank=score_breakdown.rank,
+            confidence=score_daily.confidence,
+            momentum_score=score_daily.momentum_score,
+            quality_score=score_daily.quality_score,
+            value_score=score_daily.value_score
+        )
+        
+        explanation = report_generator.generate_asset_explanation(
+            ticker=ticker.upper(),
+            score_result=score_result,
+            ranking_entry=ranking_entry
+        )
+        report_generator.cache_explanation(
+            ticker.upper(), date, explanation, version=explanation_version
+        )
     
     logger.info(
         f"Returning details for {ticker} on {date}. "
@@ -519,6 +784,47 @@ async def get_price_history(
 
 
 
+@router.get(
+    "/stats/{ticker}",
+    response_model=TickerStatsResponse,
+    summary="Obter agregados de cobertura e liquidez",
+    description="Retorna cobertura de preços, ADV, volume financeiro médio e períodos fundamentalistas de um ativo.",
+    responses={
+        200: {"description": "Agregados retornados com sucesso"},
+        404: {"model": ErrorResponse, "description": "Ticker sem agregados"}
+    }
+)
+async def get_ticker_stats(
+    ticker: str,
+    db: Session = Depends(get_db)
+) -> TickerStatsResponse:
+    """
+    Retorna os agregados mantidos pela ingestão para um ativo.
+    
+    Lê a tabela ticker_stats com uma consulta indexada por ticker, sem
+    varrer raw_prices_daily ou raw_fundamentals.
+    
+    Args:
+        ticker: Símbolo do ativo
+        db: Sessão do banco de dados
+        
+    Returns:
+        TickerStatsResponse com os agregados
+        
+    Raises:
+        HTTPException 404: Se o ticker não tiver agregados
+    """
+    stats = db.query(TickerStats).filter(TickerStats.ticker == ticker.upper()).first()
+    
+    if stats is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Nenhum agregado encontrado para o ticker {ticker}"
+        )
+    
+    return TickerStatsResponse.model_validate(stats)
+
+
 @router.post(
     "/chat/message",
     summary="Enviar mensagem para o assistente de chat",
@@ -252,6 +252,120 @@ class TopAssetsResponse(BaseModel):
     )
 
 
+class WhatIfWeights(BaseModel):
+    """
+    Vetor de pesos de um cenário what-if.
+    
+    Attributes:
+        momentum_weight: Peso do score de momentum
+        quality_weight: Peso do score de qualidade
+        value_weight: Peso do score de valor
+        size_weight: Peso do score de tamanho
+    """
+    momentum_weight: float = Field(..., ge=0, description="Peso do score de momentum")
+    quality_weight: float = Field(..., ge=0, description="Peso do score de qualidade")
+    value_weight: float = Field(..., ge=0, description="Peso do score de valor")
+    size_weight: float = Field(0.0, ge=0, description="Peso do score de tamanho")
+
+
+class WhatIfRequest(BaseModel):
+    """
+    Requisição do endpoint /ranking/what-if.
+    
+    Attributes:
+        date: Data dos sub-scores (opcional, usa a mais recente)
+        scenarios: Lista de vetores de pesos a avaliar
+        top_n: Número de ativos a retornar por cenário (opcional, todos)
+    """
+    date: Optional[date_type] = Field(None, description="Data dos sub-scores")
+    scenarios: List[WhatIfWeights] = Field(..., min_length=1, description="Cenários de pesos")
+    top_n: Optional[int] = Field(None, ge=1, description="Ativos retornados por cenário")
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "scenarios": [
+                    {"momentum_weight": 0.5, "quality_weight": 0.3, "value_weight": 0.2},
+                    {"momentum_weight": 0.2, "quality_weight": 0.3, "value_weight": 0.5}
+                ],
+                "top_n": 10
+            }
+        }
+    )
+
+
+class WhatIfEntry(BaseModel):
+    """
+    Posição de um ativo num cenário what-if.
+    
+    Attributes:
+        ticker: Símbolo do ativo
+        final_score: Score final recalculado
+        rank: Posição no ranking do cenário
+        current_rank: Posição no ranking persistido (opcional)
+    """
+    ticker: str = Field(..., description="Símbolo do ativo")
+    final_score: float = Field(..., description="Score final recalculado")
+    rank: int = Field(..., description="Posição no ranking do cenário")
+    current_rank: Optional[int] = Field(None, description="Posição no ranking persistido")
+
+
+class WhatIfScenarioResult(BaseModel):
+    """
+    Ranking recalculado para um cenário.
+    
+    Attributes:
+        weights: Pesos do cenário
+        rankings: Ativos ordenados pelo score recalculado
+    """
+    weights: WhatIfWeights = Field(..., description="Pesos do cenário")
+    rankings: List[WhatIfEntry] = Field(..., description="Ativos ordenados pelo score recalculado")
+
+
+class WhatIfResponse(BaseModel):
+    """
+    Resposta do endpoint /ranking/what-if.
+    
+    Attributes:
+        date: Data dos sub-scores
+        total_assets: Número de ativos no ranking
+        scenarios: Resultado de cada cenário, na ordem da requisição
+    """
+    date: date_type = Field(..., description="Data dos sub-scores")
+    total_assets: int = Field(..., description="Número total de ativos")
+    scenarios: List[WhatIfScenarioResult] = Field(..., description="Resultados por cenário")
+
+
+class TickerStatsResponse(BaseModel):
+    """
+    Agregados de cobertura e liquidez de um ativo (tabela ticker_stats).
+    
+    Attributes:
+        ticker: Símbolo do ativo
+        first_price_date: Primeiro pregão com preço
+        last_price_date: Último pregão com preço
+        price_bar_count: Número de pregões com preço
+        adv_window: Número de pregões usados no ADV
+        avg_daily_volume: Volume médio diário (ADV)
+        avg_traded_value: Volume financeiro médio diário
+        fundamental_period_count: Número de períodos fundamentalistas
+        last_fundamental_date: Data do período fundamentalista mais recente
+    """
+    ticker: str = Field(..., description="Símbolo do ativo")
+    first_price_date: Optional[date_type] = Field(None, description="Primeiro pregão com preço")
+    last_price_date: Optional[date_type] = Field(None, description="Último pregão com preço")
+    price_bar_count: int = Field(..., description="Número de pregões com preço")
+    adv_window: Optional[int] = Field(None, description="Pregões usados no ADV")
+    avg_daily_volume: Optional[float] = Field(None, description="Volume médio diário (ADV)")
+    avg_traded_value: Optional[float] = Field(None, description="Volume financeiro médio diário")
+    fundamental_period_count: int = Field(..., description="Número de períodos fundamentalistas")
+    last_fundamental_date: Optional[date_type] = Field(
+        None, description="Data do período fundamentalista mais recente"
+    )
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
 class ErrorResponse(BaseModel):
     """
     Resposta de erro padrão.
@@ -3,34 +3,57 @@ Módulo de backtest para avaliação de estratégias quantitativas.
 
 Componentes:
 - BacktestEngine: Motor de simulação
+- VectorizedBacktest: Núcleo matricial (pesos × retornos de período)
 - Portfolio: Gerenciamento de portfólio
+- PriceProvider: Fontes de preços (banco, com fallback Yahoo)
 - PerformanceMetrics: Cálculo de métricas
 - Models: Persistência de resultados (NOVO)
+- EquityCurveCodec: Equity curve compacta em blob
 - Repository: Operações de banco (NOVO)
 - Service: Orquestração de backtest (NOVO)
+- ParameterSweep: Varredura de parâmetros em paralelo
+- RobustnessAnalysis: Block bootstrap e portfólios placebo sobre os retornos
 """
 
 from app.backtest.backtest_engine import BacktestEngine
+from app.backtest.vectorized import VectorizedBacktest
 from app.backtest.portfolio import Portfolio
+from app.backtest.price_provider import (
+    PriceProvider,
+    DatabasePriceProvider,
+    YahooPriceProvider
+)
 from app.backtest.metrics import PerformanceMetrics
 from app.backtest.models import (
     BacktestRun,
     BacktestNAV,
     BacktestPosition,
-    BacktestMetrics
+    BacktestMetrics,
+    BacktestEquityCurve
 )
+from app.backtest.equity_curve import EquityCurveCodec
 from app.backtest.repository import BacktestRepository
 from app.backtest.service import BacktestService
+from app.backtest.sweep import ParameterSweep
+from app.backtest.robustness import RobustnessAnalysis
 
 __all__ = [
     'BacktestEngine',
+    'VectorizedBacktest',
     'Portfolio',
+    'PriceProvider',
+    'DatabasePriceProvider',
+    'YahooPriceProvider',
     'PerformanceMetrics',
     'BacktestRun',
     'BacktestNAV',
     'BacktestPosition',
     'BacktestMetrics',
+    'BacktestEquityCurve',
+    'EquityCurveCodec',
     'BacktestRepository',
-    'BacktestService'
+    'BacktestService',
+    'ParameterSweep',
+    'RobustnessAnalysis'
 ]
 
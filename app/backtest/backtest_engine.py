@@ -5,7 +5,9 @@ Implementa backtest mensal com:
 - Snapshot mensal do ranking
 - Seleção Top N
 - Equal weight ou score weighted
-- Rebalanceamento mensal
+- Rebalanceamento mensal (núcleo vetorizado; laço de referência em
+  run_backtest_loop)
+- Marcação diária do NAV com custos de transação (run_backtest_daily)
 - Cálculo de métricas (CAGR, Sharpe, Max Drawdown, etc.)
 """
 
@@ -16,12 +18,18 @@ import pandas as pd
 import numpy as np
 import logging
 
+from sqlalchemy import Date, DateTime, and_, func, insert, literal, select, union_all
 from sqlalchemy.orm import Session
 from app.models.schemas import ScoreDaily, RankingHistory, BacktestResult
 from app.models.database import SessionLocal
 from app.backtest.portfolio import Portfolio
 from app.backtest.metrics import PerformanceMetrics
-from app.ingestion.yahoo_client import YahooFinanceClient
+from app.backtest.vectorized import VectorizedBacktest
+from app.backtest.price_provider import (
+    PriceProvider,
+    DatabasePriceProvider,
+    YahooPriceProvider
+)
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +57,10 @@ class BacktestEngine:
         rebalance_frequency: str = 'monthly',
         weight_method: str = 'equal',
         use_smoothing: bool = False,
-        risk_free_rate: float = 0.0
+        risk_free_rate: float = 0.0,
+        transaction_cost: float = 0.0,
+        price_provider: Optional[PriceProvider] = None,
+        use_network_fallback: bool = False
     ):
         """
         Inicializa engine de backtest.
@@ -62,6 +73,11 @@ class BacktestEngine:
             weight_method: Método de ponderação ('equal' ou 'score_weighted')
             use_smoothing: Se usa score suavizado
             risk_free_rate: Taxa livre de risco anualizada (ex: 0.05 para 5%)
+            transaction_cost: Custo por unidade negociada, descontado do
+                retorno do período (ex: 0.001 para 0.1%)
+            price_provider: Fonte de preços (None = raw_prices_daily do banco)
+            use_network_fallback: Se o provider padrão busca no Yahoo Finance
+                os tickers sem preços no banco
         """
         self.start_date = start_date
         self.end_date = end_date
@@ -70,8 +86,10 @@ class BacktestEngine:
         self.weight_method = weight_method
         self.use_smoothing = use_smoothing
         self.risk_free_rate = risk_free_rate
+        self.transaction_cost = transaction_cost
         
-        self.yahoo_client = YahooFinanceClient()
+        self.price_provider = price_provider
+        self.use_network_fallback = use_network_fallback
         
         logger.info(
             f"BacktestEngine initialized: {start_date} to {end_date}, "
@@ -98,66 +116,144 @@ class BacktestEngine:
         
         return dates
     
-    def create_monthly_snapshots(self, db: Session) -> None:
+    def get_price_provider(self, db: Session = None) -> PriceProvider:
+        """
+        Retorna a fonte de preços, criando a padrão na primeira chamada.
+        
+        Args:
+            db: Sessão do banco usada pelo provider padrão (None = o provider
+                abre uma sessão por carga)
+            
+        Returns:
+            PriceProvider do engine
+        """
+        if self.price_provider is None:
+            fallback = YahooPriceProvider() if self.use_network_fallback else None
+            self.price_provider = DatabasePriceProvider(db, fallback=fallback)
+        
+        return self.price_provider
+    
+    def create_monthly_snapshots(
+        self,
+        db: Session,
+        lookback_days: int = 45,
+        chunk_size: int = 24
+    ) -> None:
         """
         Cria snapshots mensais do ranking na tabela ranking_history.
         
-        Para cada último dia útil do mês, copia o ranking mais recente
-        disponível para a tabela de histórico.
+        Para cada data mensal ainda sem snapshot, copia o score mais recente
+        de cada ticker elegível até essa data (dentro de lookback_days) e
+        recalcula o rank do snapshot por final_score. Tudo é feito no banco:
+        um INSERT ... SELECT com janelas por lote de chunk_size datas.
         
         Args:
             db: Sessão do banco de dados
+            lookback_days: Idade máxima, em dias, do score copiado (scores
+                mais antigos indicam ativo fora do universo)
+            chunk_size: Número de datas mensais por comando
         """
         logger.info("Creating monthly snapshots...")
         
         monthly_dates = self.get_monthly_dates()
+        existing = {
+            snapshot_date for (snapshot_date,) in db.query(RankingHistory.date).filter(
+                RankingHistory.date.in_(monthly_dates)
+            ).distinct().all()
+        } if monthly_dates else set()
+        pending = [d for d in monthly_dates if d not in existing]
+        
+        if existing:
+            logger.debug(f"{len(existing)} snapshots already exist, skipping")
+        
         snapshots_created = 0
+        rows_created = 0
         
-        for snapshot_date in monthly_dates:
-            # Verificar se snapshot já existe
-            existing = db.query(RankingHistory).filter(
-                RankingHistory.date == snapshot_date
-            ).first()
-            
-            if existing:
-                logger.debug(f"Snapshot for {snapshot_date} already exists, skipping")
-                continue
-            
-            # Buscar ranking mais recente até essa data
-            scores = db.query(ScoreDaily).filter(
-                ScoreDaily.date <= snapshot_date,
-                ScoreDaily.passed_eligibility == True
-            ).order_by(ScoreDaily.date.desc()).limit(100).all()
-            
-            if not scores:
-                logger.warning(f"No scores found for snapshot date {snapshot_date}")
-                continue
-            
-            # Agrupar por ticker (pegar o mais recente de cada)
-            ticker_scores = {}
-            for score in scores:
-                if score.ticker not in ticker_scores:
-                    ticker_scores[score.ticker] = score
-            
-            # Criar snapshots
-            for ticker, score in ticker_scores.items():
-                snapshot = RankingHistory(
-                    date=snapshot_date,
-                    ticker=ticker,
-                    final_score=score.final_score,
-                    final_score_smoothed=score.final_score_smoothed,
-                    momentum_score=score.momentum_score,
-                    quality_score=score.quality_score,
-                    value_score=score.value_score,
-                    rank=score.rank
-                )
-                db.add(snapshot)
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            rows = db.execute(self._snapshot_insert(chunk, lookback_days)).rowcount
+            created_dates = db.query(RankingHistory.date).filter(
+                RankingHistory.date.in_(chunk)
+            ).distinct().count()
+            
+            missing = len(chunk) - created_dates
+            if missing:
+                logger.warning(f"No scores found for {missing} snapshot dates in {chunk[0]}..{chunk[-1]}")
             
-            snapshots_created += 1
-            logger.info(f"Created snapshot for {snapshot_date} with {len(ticker_scores)} assets")
+            snapshots_created += created_dates
+            rows_created += rows
         
         db.commit()
-        logger.info(f"Created {snapshots_created} monthly snapshots")
+        logger.info(f"Created {snapshots_created} monthly snapshots ({rows_created} rows)")
+    
+    @staticmethod
+    def _snapshot_insert(snapshot_dates: List[date], lookback_days: int):
+        """
+        Monta o INSERT ... SELECT dos snapshots de um lote de datas.
+        
+        Args:
+            snapshot_dates: Datas dos snapshots (sem snapshot existente)
+            lookback_days: Idade máxima do score copiado
+            
+        Returns:
+            Comando INSERT executável
+        """
+        windows = [
+            select(
+                literal(snapshot_date, Date).label('snapshot_date'),
+                literal(snapshot_date - relativedelta(days=lookback_days), Date).label('window_start')
+            )
+            for snapshot_date in snapshot_dates
+        ]
+        month_ends = (
+            union_all(*windows) if len(windows) > 1 else windows[0]
+        ).subquery('month_ends')
+        
+        # Score mais recente de cada ticker até cada data
+        latest = select(
+            month_ends.c.snapshot_date,
+            ScoreDaily.ticker,
+            ScoreDaily.final_score,
+            ScoreDaily.final_score_smoothed,
+            ScoreDaily.momentum_score,
+            ScoreDaily.quality_score,
+            ScoreDaily.value_score,
+            func.row_number().over(
+                partition_by=(month_ends.c.snapshot_date, ScoreDaily.ticker),
+                order_by=ScoreDaily.date.desc()
+            ).label('recency')
+        ).join(
+            ScoreDaily,
+            and_(
+                ScoreDaily.date <= month_ends.c.snapshot_date,
+                ScoreDaily.date > month_ends.c.window_start
+            )
+        ).where(
+            ScoreDaily.passed_eligibility == True
+        ).subquery('latest')
+        
+        ranked = select(
+            latest.c.snapshot_date,
+            latest.c.ticker,
+            latest.c.final_score,
+            latest.c.final_score_smoothed,
+            latest.c.momentum_score,
+            latest.c.quality_score,
+            latest.c.value_score,
+            func.row_number().over(
+                partition_by=latest.c.snapshot_date,
+                order_by=(latest.c.final_score.desc(), latest.c.ticker)
+            ).label('rank'),
+            literal(datetime.utcnow(), DateTime).label('created_at')
+        ).where(latest.c.recency == 1)
+        
+        return insert(RankingHistory).from_select(
+            [
+                'date', 'ticker', 'final_score', 'final_score_smoothed',
+                'momentum_score', 'quality_score', 'value_score', 'rank', 'created_at'
+            ],
+            ranked
+        )
     
     def get_ranking_snapshot(
         self,
@@ -195,11 +291,54 @@ class BacktestEngine:
         
         df = pd.DataFrame(data)
         
+        # Scores nulos viram NaN (coluna só com None ficaria object)
+        for column in ('final_score', 'final_score_smoothed'):
+            df[column] = pd.to_numeric(df[column], errors='coerce')
+        
         # Ordenar por rank
         df = df.sort_values('rank')
         
         return df
     
+    def get_ranking_snapshots(
+        self,
+        db: Session,
+        snapshot_dates: List[date]
+    ) -> pd.DataFrame:
+        """
+        Obtém os snapshots de várias datas numa única consulta.
+        
+        Args:
+            db: Sessão do banco de dados
+            snapshot_dates: Datas dos snapshots
+            
+        Returns:
+            DataFrame longo com colunas ['date', 'ticker', 'final_score',
+            'final_score_smoothed', 'momentum_score', 'quality_score',
+            'value_score', 'rank']
+        """
+        columns = [
+            'date', 'ticker', 'final_score', 'final_score_smoothed',
+            'momentum_score', 'quality_score', 'value_score', 'rank'
+        ]
+        if not snapshot_dates:
+            return pd.DataFrame(columns=columns)
+        
+        rows = db.query(
+            RankingHistory.date,
+            RankingHistory.ticker,
+            RankingHistory.final_score,
+            RankingHistory.final_score_smoothed,
+            RankingHistory.momentum_score,
+            RankingHistory.quality_score,
+            RankingHistory.value_score,
+            RankingHistory.rank
+        ).filter(
+            RankingHistory.date.in_(list(snapshot_dates))
+        ).order_by(RankingHistory.date, RankingHistory.rank, RankingHistory.ticker).all()
+        
+        return pd.DataFrame(rows, columns=columns)
+    
     def get_monthly_returns(
         self,
         tickers: List[str],
@@ -209,6 +348,11 @@ class BacktestEngine:
         """
         Obtém retornos mensais dos ativos.
         
+        Os retornos são fatias da matriz de preços do provider, carregada
+        uma única vez para a janela do backtest. Tickers sem preço no
+        período ficam fora do dicionário (contribuem com retorno zero no
+        portfólio) e são reportados em log pelo provider.
+        
         Args:
             tickers: Lista de tickers
             start_date: Data inicial
@@ -217,38 +361,20 @@ class BacktestEngine:
         Returns:
             Dicionário {ticker: return}
         """
-        returns = {}
-        
-        for ticker in tickers:
-            try:
-                # Buscar preços
-                prices_df = self.yahoo_client.fetch_daily_prices(
-                    ticker,
-                    start_date,
-                    end_date
-                )
-                
-                if prices_df.empty or len(prices_df) < 2:
-                    logger.warning(f"Insufficient price data for {ticker}")
-                    returns[ticker] = 0.0
-                    continue
-                
-                # Calcular retorno
-                start_price = prices_df.iloc[0]['adj_close']
-                end_price = prices_df.iloc[-1]['adj_close']
-                
-                monthly_return = (end_price - start_price) / start_price
-                returns[ticker] = monthly_return
-                
-            except Exception as e:
-                logger.error(f"Error fetching returns for {ticker}: {e}")
-                returns[ticker] = 0.0
-        
-        return returns
+        return self.get_price_provider().get_period_returns(
+            tickers,
+            start_date,
+            end_date
+        )
     
     def run_backtest(self, db: Session = None) -> Dict:
         """
-        Executa backtest completo.
+        Executa backtest completo com o núcleo vetorizado.
+        
+        Monta a matriz de pesos (datas de rebalanceamento × tickers) a partir
+        dos snapshots e a matriz de retornos de período a partir dos preços,
+        e calcula retornos, turnover e custos de todos os períodos de uma vez.
+        O resultado é o mesmo de run_backtest_loop.
         
         Args:
             db: Sessão do banco de dados (opcional, cria nova se None)
@@ -263,15 +389,188 @@ class BacktestEngine:
             close_db = False
         
         try:
-            # Criar snapshots mensais se necessário
-            self.create_monthly_snapshots(db)
+            rebalance_dates = self.prepare_backtest(db)
+            period_starts = rebalance_dates[:-1]
+            
+            logger.info(f"Running vectorized backtest with {len(rebalance_dates)} rebalance periods")
+            
+            score_col = 'final_score_smoothed' if self.use_smoothing else 'final_score'
+            weights = VectorizedBacktest.build_weight_matrix(
+                self.get_ranking_snapshots(db, period_starts),
+                period_starts,
+                self.top_n,
+                self.weight_method,
+                score_col
+            )
+            period_returns = self.get_price_provider(db).get_period_return_matrix(
+                list(weights.columns),
+                rebalance_dates
+            )
+            periods = VectorizedBacktest.simulate(
+                weights,
+                period_returns,
+                self.transaction_cost
+            )
+            
+            skipped = len(period_starts) - len(periods)
+            if skipped:
+                logger.warning(f"{skipped} rebalance periods without ranking or selected assets skipped")
+            
+            return self._build_result(
+                periods['net_return'].tolist(),
+                VectorizedBacktest.to_portfolio_history(weights)
+            )
+            
+        finally:
+            if close_db:
+                db.close()
+    
+    def run_backtest_daily(
+        self,
+        db: Session = None,
+        initial_capital: float = 100000.0,
+        benchmark_ticker: Optional[str] = None
+    ) -> Dict:
+        """
+        Executa backtest com marcação diária do NAV.
+        
+        Usa as mesmas carteiras alvo de run_backtest, mas marca o portfólio
+        a cada pregão da matriz de preços: os pesos derivam entre
+        rebalanceamentos e cada rebalanceamento paga transaction_cost sobre
+        o volume negociado contra os pesos derivados.
+        
+        Args:
+            db: Sessão do banco de dados (opcional, cria nova se None)
+            initial_capital: NAV inicial
+            benchmark_ticker: Ticker cujo adj_close forma o NAV do benchmark
+                (None = sem benchmark)
+            
+        Returns:
+            Dicionário com os campos de run_backtest (retornos diários em
+            daily_returns, métricas com 252 períodos por ano, avg_turnover
+            calculado sobre os pesos derivados e alpha/beta/information_ratio
+            contra o benchmark, se houver), initial_capital e os
+            registros prontos para persistência: nav_records (formato
+            BacktestNAV) e positions (formato BacktestPosition)
+        """
+        if db is None:
+            db = SessionLocal()
+            close_db = True
+        else:
+            close_db = False
+        
+        try:
+            rebalance_dates = self.prepare_backtest(db)
+            period_starts = rebalance_dates[:-1]
+            
+            logger.info(f"Running daily-marked backtest with {len(rebalance_dates)} rebalance periods")
+            
+            score_col = 'final_score_smoothed' if self.use_smoothing else 'final_score'
+            snapshots = self.get_ranking_snapshots(db, period_starts)
+            weights = VectorizedBacktest.build_weight_matrix(
+                snapshots,
+                period_starts,
+                self.top_n,
+                self.weight_method,
+                score_col
+            )
+            
+            tickers = list(weights.columns)
+            provider = self.get_price_provider(db)
+            benchmark = None
+            if rebalance_dates:
+                prices = provider.get_price_matrix(
+                    tickers + ([benchmark_ticker] if benchmark_ticker else []),
+                    rebalance_dates[0],
+                    rebalance_dates[-1]
+                )
+                if benchmark_ticker:
+                    benchmark = prices[benchmark_ticker]
+                prices = prices.reindex(columns=tickers)
+            else:
+                prices = pd.DataFrame(columns=tickers, dtype=float)
+            
+            simulation = VectorizedBacktest.simulate_daily(
+                weights,
+                prices,
+                self.transaction_cost,
+                initial_capital,
+                benchmark
+            )
+            nav = simulation['nav']
+            rebalances = simulation['rebalances']
             
-            # Obter datas de rebalanceamento
-            rebalance_dates = self.get_monthly_dates()
+            scores = pd.DataFrame(index=weights.index, columns=tickers, dtype=float)
+            if not snapshots.empty:
+                scores = snapshots.assign(
+                    date=pd.to_datetime(snapshots['date']),
+                    score=pd.to_numeric(snapshots[score_col], errors='coerce')
+                ).pivot(index='date', columns='ticker', values='score')
+            
+            daily_returns = nav['daily_return'].iloc[1:]
+            portfolio_history = VectorizedBacktest.to_portfolio_history(weights)
+            metrics = PerformanceMetrics.calculate_all_metrics(
+                daily_returns,
+                portfolio_history,
+                self.risk_free_rate,
+                periods_per_year=252,
+                benchmark_returns=nav['benchmark_return'].iloc[1:] if benchmark is not None else None
+            )
+            metrics['avg_turnover'] = (
+                float(rebalances['turnover'].iloc[1:].mean()) * 100
+                if len(rebalances) > 1 else 0.0
+            )
+            metrics['num_rebalances'] = len(portfolio_history)
+            metrics['num_trades'] = sum(len(p) for p in portfolio_history)
+            
+            logger.info(
+                f"Daily backtest completed: {len(nav)} days, CAGR={metrics['cagr']:.2f}%, "
+                f"Sharpe={metrics['sharpe_ratio']:.2f}, MaxDD={metrics['max_drawdown']:.2f}%"
+            )
+            
+            return {
+                'start_date': self.start_date,
+                'end_date': self.end_date,
+                'top_n': self.top_n,
+                'weight_method': self.weight_method,
+                'use_smoothing': self.use_smoothing,
+                'initial_capital': initial_capital,
+                'metrics': metrics,
+                'daily_returns': daily_returns.tolist(),
+                'portfolio_history': portfolio_history,
+                'nav_records': VectorizedBacktest.to_nav_records(nav),
+                'positions': VectorizedBacktest.to_position_records(weights, scores)
+            }
+        
+        finally:
+            if close_db:
+                db.close()
+    
+    def run_backtest_loop(self, db: Session = None) -> Dict:
+        """
+        Executa backtest completo período a período (implementação de referência).
+        
+        Mantido para validar o núcleo vetorizado de run_backtest.
+        
+        Args:
+            db: Sessão do banco de dados (opcional, cria nova se None)
+            
+        Returns:
+            Dicionário com resultados do backtest
+        """
+        if db is None:
+            db = SessionLocal()
+            close_db = True
+        else:
+            close_db = False
+        
+        try:
+            rebalance_dates = self.prepare_backtest(db)
             
             # Inicializar variáveis
             portfolio_history = []
             monthly_returns = []
+            previous_weights = {}
             
             logger.info(f"Running backtest with {len(rebalance_dates)} rebalance periods")
             
@@ -320,11 +619,14 @@ class BacktestEngine:
                     next_rebalance
                 )
                 
-                # Calcular retorno do portfólio
+                # Calcular retorno do portfólio, descontando o custo do volume negociado
                 portfolio_return = portfolio.calculate_portfolio_return(
                     period_returns,
                     weights
                 )
+                traded = 2.0 * PerformanceMetrics.calculate_turnover(previous_weights, weights) / 100
+                portfolio_return -= self.transaction_cost * traded
+                previous_weights = weights
                 
                 monthly_returns.append(portfolio_return)
                 
@@ -333,43 +635,88 @@ class BacktestEngine:
                     f"return={portfolio_return*100:.2f}%, assets={len(selected_tickers)}"
                 )
             
-            # Calcular métricas
-            returns_series = pd.Series(monthly_returns)
-            metrics = PerformanceMetrics.calculate_all_metrics(
-                returns_series,
-                portfolio_history,
-                self.risk_free_rate,
-                periods_per_year=12
-            )
-            
-            # Adicionar estatísticas adicionais
-            metrics['num_rebalances'] = len(portfolio_history)
-            metrics['num_trades'] = sum(len(p) for p in portfolio_history)
-            
-            # Preparar resultado
-            result = {
-                'start_date': self.start_date,
-                'end_date': self.end_date,
-                'top_n': self.top_n,
-                'weight_method': self.weight_method,
-                'use_smoothing': self.use_smoothing,
-                'metrics': metrics,
-                'monthly_returns': monthly_returns,
-                'portfolio_history': portfolio_history
-            }
-            
-            logger.info(
-                f"Backtest completed: CAGR={metrics['cagr']:.2f}%, "
-                f"Sharpe={metrics['sharpe_ratio']:.2f}, "
-                f"MaxDD={metrics['max_drawdown']:.2f}%"
-            )
-            
-            return result
+            return self._build_result(monthly_returns, portfolio_history)
             
         finally:
             if close_db:
                 db.close()
     
+    def prepare_backtest(self, db: Session) -> List[date]:
+        """
+        Cria snapshots e carrega os preços do universo numa única carga.
+        
+        Args:
+            db: Sessão do banco de dados
+            
+        Returns:
+            Datas de rebalanceamento
+        """
+        # Criar snapshots mensais se necessário
+        self.create_monthly_snapshots(db)
+        
+        # Obter datas de rebalanceamento
+        rebalance_dates = self.get_monthly_dates()
+        
+        # Carregar preços de todo o universo dos snapshots de uma vez
+        provider = self.get_price_provider(db)
+        if rebalance_dates:
+            universe = [
+                ticker for (ticker,) in db.query(RankingHistory.ticker).filter(
+                    RankingHistory.date >= rebalance_dates[0],
+                    RankingHistory.date <= rebalance_dates[-1]
+                ).distinct().order_by(RankingHistory.ticker).all()
+            ]
+            provider.load(universe, rebalance_dates[0], rebalance_dates[-1])
+        
+        return rebalance_dates
+    
+    def _build_result(
+        self,
+        monthly_returns: List[float],
+        portfolio_history: List[Dict[str, float]]
+    ) -> Dict:
+        """
+        Calcula as métricas e monta o dicionário de resultado.
+        
+        Args:
+            monthly_returns: Retornos líquidos por período
+            portfolio_history: Pesos {ticker: weight} por período
+            
+        Returns:
+            Dicionário com resultados do backtest
+        """
+        returns_series = pd.Series(monthly_returns, dtype=float)
+        metrics = PerformanceMetrics.calculate_all_metrics(
+            returns_series,
+            portfolio_history,
+            self.risk_free_rate,
+            periods_per_year=12
+        )
+        
+        # Adicionar estatísticas adicionais
+        metrics['num_rebalances'] = len(portfolio_history)
+        metrics['num_trades'] = sum(len(p) for p in portfolio_history)
+        
+        # Preparar resultado
+        result = {
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'top_n': self.top_n,
+            'weight_method': self.weight_method,
+            'use_smoothing': self.use_smoothing,
+            'metrics': metrics,
+            'monthly_returns': monthly_returns,
+            'portfolio_history': portfolio_history
+        }
+        
+        logger.info(
+            f"Backtest completed: CAGR={metrics['cagr']:.2f}%, "
+            f"Sharpe={metrics['sharpe_ratio']:.2f}, "
+            f"MaxDD={metrics['max_drawdown']:.2f}%"
+        )
+        
+        return result
+    
     def save_backtest_result(
         self,
         backtest_name: str,
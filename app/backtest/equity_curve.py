@@ -0,0 +1,172 @@
+"""
+Codificação compacta de equity curves.
+
+Cada curva vira um único blob binário:
+- cabeçalho fixo (assinatura, número de pontos, flags)
+- corpo comprimido com zlib contendo as datas em dias desde 1970-01-01,
+  delta-encoded em int32, e os vetores float64 de NAV e (opcionalmente)
+  NAV do benchmark
+
+Uma curva diária de 10 anos ocupa poucos KB e é lida com uma única linha;
+a decodificação devolve arrays NumPy sem passar por objetos Python.
+"""
+
+from typing import Dict, List, Optional, Sequence
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b'EQC1'
+HEADER = struct.Struct('<4sIB')
+FLAG_BENCHMARK = 1
+
+
+class EquityCurveCodec:
+    """
+    Conversão entre vetores de uma equity curve e o blob armazenado.
+    
+    Example:
+        >>> blob = EquityCurveCodec.encode(dates, nav, benchmark_nav)
+        >>> curve = EquityCurveCodec.decode(blob)
+        >>> curve['nav'][-1]
+        123456.78
+    """
+    
+    @staticmethod
+    def encode(
+        dates: Sequence,
+        nav: Sequence[float],
+        benchmark_nav: Optional[Sequence[float]] = None,
+        level: int = 6
+    ) -> bytes:
+        """
+        Codifica uma equity curve.
+        
+        Args:
+            dates: Datas dos pontos (date, Timestamp ou datetime64)
+            nav: NAV em cada data
+            benchmark_nav: NAV do benchmark em cada data (opcional; NaN =
+                sem valor)
+            level: Nível de compressão do zlib
+            
+        Returns:
+            Blob com cabeçalho e corpo comprimido
+            
+        Raises:
+            ValueError: Se os vetores tiverem tamanhos diferentes
+        """
+        days = EquityCurveCodec._to_days(dates)
+        nav = np.asarray(nav, dtype='<f8')
+        if len(nav) != len(days):
+            raise ValueError(f"nav has {len(nav)} points, dates has {len(days)}")
+        
+        parts = [np.diff(days, prepend=0).astype('<i4').tobytes(), nav.tobytes()]
+        flags = 0
+        if benchmark_nav is not None:
+            benchmark = np.asarray(benchmark_nav, dtype='<f8')
+            if len(benchmark) != len(days):
+                raise ValueError(
+                    f"benchmark_nav has {len(benchmark)} points, dates has {len(days)}"
+                )
+            parts.append(benchmark.tobytes())
+            flags |= FLAG_BENCHMARK
+        
+        return HEADER.pack(MAGIC, len(days), flags) + zlib.compress(b''.join(parts), level)
+    
+    @staticmethod
+    def decode(blob: bytes) -> Dict[str, np.ndarray]:
+        """
+        Decodifica um blob gerado por encode.
+        
+        Args:
+            blob: Conteúdo armazenado
+            
+        Returns:
+            Dict de arrays alinhados: date (datetime64[D]), nav,
+            benchmark_nav (NaN sem benchmark), daily_return e
+            benchmark_return (derivados dos NAVs, como em simulate_daily)
+            
+        Raises:
+            ValueError: Se o blob não tiver a assinatura esperada
+        """
+        magic, n_points, flags = HEADER.unpack_from(blob)
+        if magic != MAGIC:
+            raise ValueError("Not an encoded equity curve")
+        
+        body = zlib.decompress(bytes(blob[HEADER.size:]))
+        offset = 4 * n_points
+        days = np.cumsum(np.frombuffer(body, dtype='<i4', count=n_points), dtype=np.int64)
+        nav = np.frombuffer(body, dtype='<f8', count=n_points, offset=offset)
+        if flags & FLAG_BENCHMARK:
+            benchmark_nav = np.frombuffer(body, dtype='<f8', count=n_points, offset=offset + 8 * n_points)
+        else:
+            benchmark_nav = np.full(n_points, np.nan)
+        
+        return EquityCurveCodec.with_returns(days.astype('datetime64[D]'), nav, benchmark_nav)
+    
+    @staticmethod
+    def with_returns(
+        dates: np.ndarray,
+        nav: np.ndarray,
+        benchmark_nav: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Monta o dict de arrays da curva, derivando os retornos diários.
+        
+        O primeiro retorno do portfólio é zero; o do benchmark é NaN até o
+        primeiro NAV disponível, que tem retorno zero.
+        """
+        nav = np.asarray(nav, dtype=float)
+        benchmark_nav = np.asarray(benchmark_nav, dtype=float)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily_return = np.r_[0.0, nav[1:] / nav[:-1] - 1.0][:len(nav)]
+            benchmark_return = np.r_[np.nan, benchmark_nav[1:] / benchmark_nav[:-1] - 1.0][:len(nav)]
+        valid = np.flatnonzero(~np.isnan(benchmark_nav))
+        if len(valid):
+            benchmark_return[valid[0]] = 0.0
+        
+        return {
+            'date': np.asarray(dates, dtype='datetime64[D]'),
+            'nav': nav,
+            'benchmark_nav': benchmark_nav,
+            'daily_return': daily_return,
+            'benchmark_return': benchmark_return,
+        }
+    
+    @staticmethod
+    def from_records(nav_records: List[Dict]) -> Dict[str, np.ndarray]:
+        """Converte dicts no formato de BacktestNAV (ordenados por data) em vetores."""
+        return {
+            'date': EquityCurveCodec._to_days(
+                [record['date'] for record in nav_records]
+            ).astype('datetime64[D]'),
+            'nav': np.array([record['nav'] for record in nav_records], dtype=float),
+            'benchmark_nav': np.array(
+                [record.get('benchmark_nav') for record in nav_records], dtype=float
+            ),
+        }
+    
+    @staticmethod
+    def to_records(curve: Dict[str, np.ndarray]) -> List[Dict]:
+        """Converte o dict de decode em dicts no formato de BacktestNAV (NaN vira None)."""
+        columns = ['nav', 'benchmark_nav', 'daily_return', 'benchmark_return']
+        values = {
+            column: [None if np.isnan(v) else float(v) for v in curve[column]]
+            for column in columns
+        }
+        return [
+            {'date': day, **{column: values[column][i] for column in columns}}
+            for i, day in enumerate(curve['date'].astype(object))
+        ]
+    
+    @staticmethod
+    def _to_days(dates: Sequence) -> np.ndarray:
+        """Converte datas em dias desde 1970-01-01 (int64)."""
+        if len(dates) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return pd.DatetimeIndex(pd.to_datetime(list(dates))).values.astype(
+            'datetime64[D]'
+        ).astype(np.int64)
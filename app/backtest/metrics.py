@@ -1,10 +1,17 @@
 """
 Cálculo de métricas de performance para backtest.
+
+calculate_metrics_matrix calcula o conjunto completo de métricas para
+várias séries de retorno de uma vez (uma coluna por série), com operações
+de array ao longo do eixo do tempo; calculate_rolling_metrics aplica o
+mesmo cálculo a janelas deslizantes. As funções por métrica continuam
+disponíveis para uso avulso.
 """
 
 import numpy as np
 import pandas as pd
-from typing import List, Dict
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Dict, Optional, Union
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,8 +25,12 @@ class PerformanceMetrics:
     - CAGR (Compound Annual Growth Rate)
     - Volatilidade anualizada
     - Sharpe Ratio
-    - Maximum Drawdown
+    - Sortino Ratio
+    - Maximum Drawdown e sua duração
+    - Calmar Ratio
+    - Hit rate
     - Turnover médio
+    - Alpha, beta e Information Ratio contra um benchmark
     """
     
     @staticmethod
@@ -105,6 +116,41 @@ class PerformanceMetrics:
         
         return sharpe
     
+    @staticmethod
+    def calculate_sortino_ratio(
+        returns: pd.Series,
+        risk_free_rate: float = 0.0,
+        periods_per_year: int = 12
+    ) -> float:
+        """
+        Calcula Sortino Ratio.
+        
+        Como o Sharpe, mas o denominador é o desvio abaixo da taxa livre de
+        risco do período (downside deviation).
+        
+        Args:
+            returns: Série de retornos
+            risk_free_rate: Taxa livre de risco anualizada (ex: 0.05 para 5%)
+            periods_per_year: Número de períodos por ano
+            
+        Returns:
+            Sortino Ratio
+        """
+        if len(returns) == 0:
+            return 0.0
+        
+        # Retorno médio anualizado
+        mean_return = returns.mean() * periods_per_year
+        
+        # Downside deviation anualizada
+        shortfall = np.minimum(returns - risk_free_rate / periods_per_year, 0.0)
+        downside = np.sqrt(np.mean(shortfall ** 2)) * np.sqrt(periods_per_year)
+        
+        if downside == 0:
+            return 0.0
+        
+        return (mean_return - risk_free_rate) / downside
+    
     @staticmethod
     def calculate_max_drawdown(cumulative_returns: pd.Series) -> float:
         """
@@ -162,12 +208,209 @@ class PerformanceMetrics:
         
         return turnover * 100  # Retornar em percentual
     
+    @staticmethod
+    def calculate_metrics_matrix(
+        returns: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+        benchmark_returns: Optional[np.ndarray] = None,
+        risk_free_rate: float = 0.0,
+        periods_per_year: int = 12
+    ) -> Dict[str, np.ndarray]:
+        """
+        Calcula todas as métricas para várias séries de retorno de uma vez.
+        
+        Cada coluna de returns é uma estratégia (ex: uma combinação de uma
+        varredura); as métricas seguem as mesmas convenções das funções por
+        métrica (percentuais, desvio padrão amostral, drawdown sobre o
+        retorno acumulado a partir do primeiro período).
+        
+        Args:
+            returns: Retornos periódicos (períodos,) ou (períodos × séries)
+            weights: Pesos por rebalanceamento (rebalanceamentos × ativos),
+                comum a todas as séries, ou (séries × rebalanceamentos ×
+                ativos); NaN = 0. None = turnover NaN
+            benchmark_returns: Retornos do benchmark (períodos,) ou
+                (períodos × séries); períodos com NaN ficam fora de alpha,
+                beta e Information Ratio. None = essas métricas NaN
+            risk_free_rate: Taxa livre de risco anualizada
+            periods_per_year: Número de períodos por ano
+            
+        Returns:
+            Dict de arrays com um valor por série: total_return, cagr,
+            volatility, sharpe_ratio, sortino_ratio, max_drawdown (%),
+            max_drawdown_duration (períodos abaixo do pico anterior),
+            calmar_ratio, hit_rate (% de períodos positivos), avg_turnover,
+            alpha (% anualizado, de Jensen), beta e information_ratio
+        """
+        returns = np.asarray(returns, dtype=float)
+        if returns.ndim == 1:
+            returns = returns[:, None]
+        n_periods, n_series = returns.shape
+        
+        zeros = np.zeros(n_series)
+        nans = np.full(n_series, np.nan)
+        period_rf = risk_free_rate / periods_per_year
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if n_periods == 0:
+                metrics = {
+                    key: zeros.copy() for key in (
+                        'total_return', 'cagr', 'volatility', 'sharpe_ratio',
+                        'sortino_ratio', 'max_drawdown', 'max_drawdown_duration',
+                        'calmar_ratio', 'hit_rate'
+                    )
+                }
+            else:
+                growth = np.cumprod(1 + returns, axis=0)
+                total_return = growth[-1] - 1
+                cagr = (1 + total_return) ** (periods_per_year / n_periods) - 1
+                
+                # Média e desvio padrão anualizados
+                mean_return = returns.mean(axis=0) * periods_per_year
+                volatility = returns.std(axis=0, ddof=1) * np.sqrt(periods_per_year) if n_periods > 1 else nans
+                shortfall = np.minimum(returns - period_rf, 0.0)
+                downside = np.sqrt(np.mean(shortfall ** 2, axis=0)) * np.sqrt(periods_per_year)
+                
+                # Drawdown e duração (maior sequência de períodos abaixo do pico)
+                drawdown = growth / np.maximum.accumulate(growth, axis=0) - 1
+                max_drawdown = drawdown.min(axis=0)
+                underwater = drawdown < 0
+                count = np.cumsum(underwater, axis=0)
+                last_peak = np.maximum.accumulate(np.where(underwater, 0, count), axis=0)
+                
+                metrics = {
+                    'total_return': total_return * 100,
+                    'cagr': cagr * 100,
+                    'volatility': volatility * 100,
+                    'sharpe_ratio': np.where(volatility == 0, 0.0, (mean_return - risk_free_rate) / volatility),
+                    'sortino_ratio': np.where(downside == 0, 0.0, (mean_return - risk_free_rate) / downside),
+                    'max_drawdown': max_drawdown * 100,
+                    'max_drawdown_duration': (count - last_peak).max(axis=0).astype(float),
+                    'calmar_ratio': np.where(max_drawdown == 0, 0.0, cagr / np.abs(max_drawdown)),
+                    'hit_rate': (returns > 0).mean(axis=0) * 100,
+                }
+            
+            # Turnover = soma das mudanças absolutas de peso / 2
+            if weights is None:
+                metrics['avg_turnover'] = nans.copy()
+            else:
+                weights = np.nan_to_num(np.asarray(weights, dtype=float))
+                if weights.ndim == 2:
+                    weights = weights[None]
+                turnover = np.abs(np.diff(weights, axis=1)).sum(axis=2) / 2.0
+                avg_turnover = turnover.mean(axis=1) * 100 if turnover.shape[1] else np.zeros(len(weights))
+                metrics['avg_turnover'] = np.broadcast_to(avg_turnover, (n_series,)).copy()
+            
+            if benchmark_returns is None or n_periods == 0:
+                metrics.update(alpha=nans.copy(), beta=nans.copy(), information_ratio=nans.copy())
+            else:
+                benchmark = np.asarray(benchmark_returns, dtype=float)
+                if benchmark.ndim == 1:
+                    benchmark = benchmark[:, None]
+                benchmark = np.broadcast_to(benchmark, returns.shape)
+                valid = ~np.isnan(benchmark)
+                n_valid = valid.sum(axis=0)
+                
+                def masked_mean(values):
+                    return np.where(valid, values, 0.0).sum(axis=0) / n_valid
+                
+                portfolio_excess = returns - period_rf
+                benchmark_excess = benchmark - period_rf
+                portfolio_dev = np.where(valid, portfolio_excess - masked_mean(portfolio_excess), 0.0)
+                benchmark_dev = np.where(valid, benchmark_excess - masked_mean(benchmark_excess), 0.0)
+                benchmark_var = (benchmark_dev ** 2).sum(axis=0)
+                beta = np.where(benchmark_var > 0, (portfolio_dev * benchmark_dev).sum(axis=0) / benchmark_var, np.nan)
+                alpha = (masked_mean(portfolio_excess) - beta * masked_mean(benchmark_excess)) * periods_per_year
+                
+                active = returns - benchmark
+                active_mean = masked_mean(active)
+                tracking_error = np.sqrt(
+                    np.where(valid, (active - active_mean) ** 2, 0.0).sum(axis=0) / (n_valid - 1)
+                ) * np.sqrt(periods_per_year)
+                
+                metrics.update(
+                    alpha=alpha * 100,
+                    beta=beta,
+                    information_ratio=np.where(
+                        tracking_error == 0, 0.0, active_mean * periods_per_year / tracking_error
+                    )
+                )
+        
+        return metrics
+    
+    @staticmethod
+    def calculate_rolling_metrics(
+        returns: Union[pd.Series, pd.DataFrame],
+        benchmark_returns: Optional[pd.Series] = None,
+        window: Optional[int] = None,
+        risk_free_rate: float = 0.0,
+        periods_per_year: int = 12
+    ) -> pd.DataFrame:
+        """
+        Calcula as métricas de calculate_metrics_matrix em janelas deslizantes.
+        
+        Todas as janelas (de todas as séries) são avaliadas numa única
+        chamada de calculate_metrics_matrix.
+        
+        Args:
+            returns: Série de retornos, ou DataFrame com uma coluna por série
+            benchmark_returns: Retornos do benchmark alinhados ao índice de
+                returns (opcional)
+            window: Tamanho da janela em períodos (None = periods_per_year,
+                ou seja, 12 meses)
+            risk_free_rate: Taxa livre de risco anualizada
+            periods_per_year: Número de períodos por ano
+            
+        Returns:
+            DataFrame indexado pelo fim de cada janela; colunas = métricas
+            (exceto avg_turnover) para Series, ou MultiIndex (métrica, série)
+            para DataFrame
+        """
+        window = window or periods_per_year
+        frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+        values = frame.to_numpy(dtype=float)
+        n_windows = max(len(frame) - window + 1, 0)
+        n_series = values.shape[1]
+        
+        def stack(matrix: np.ndarray) -> np.ndarray:
+            # (janelas × séries × window) -> (window × janelas·séries)
+            if n_windows == 0:
+                return np.zeros((window, 0))
+            return sliding_window_view(matrix, window, axis=0).reshape(-1, window).T
+        
+        benchmark = None
+        if benchmark_returns is not None:
+            aligned = benchmark_returns.reindex(frame.index).to_numpy(dtype=float)
+            benchmark = stack(np.repeat(aligned[:, None], n_series, axis=1))
+        
+        matrix = PerformanceMetrics.calculate_metrics_matrix(
+            stack(values),
+            benchmark_returns=benchmark,
+            risk_free_rate=risk_free_rate,
+            periods_per_year=periods_per_year
+        )
+        matrix.pop('avg_turnover')
+        
+        index = frame.index[window - 1:]
+        results = {key: metric.reshape(n_windows, n_series) for key, metric in matrix.items()}
+        if isinstance(returns, pd.Series):
+            return pd.DataFrame({key: result[:, 0] for key, result in results.items()}, index=index)
+        
+        return pd.concat(
+            {
+                key: pd.DataFrame(result, index=index, columns=frame.columns)
+                for key, result in results.items()
+            },
+            axis=1
+        )
+    
     @staticmethod
     def calculate_all_metrics(
         returns: pd.Series,
         portfolio_history: List[Dict[str, float]],
         risk_free_rate: float = 0.0,
-        periods_per_year: int = 12
+        periods_per_year: int = 12,
+        benchmark_returns: Optional[pd.Series] = None
     ) -> Dict[str, float]:
         """
         Calcula todas as métricas de performance.
@@ -177,33 +420,28 @@ class PerformanceMetrics:
             portfolio_history: Lista de portfólios {ticker: weight} por período
             risk_free_rate: Taxa livre de risco anualizada
             periods_per_year: Número de períodos por ano
+            benchmark_returns: Retornos do benchmark alinhados ao índice de
+                returns (opcional; sem ele alpha, beta e information_ratio
+                ficam None)
             
         Returns:
-            Dicionário com todas as métricas
-        """
-        # Calcular retornos acumulados
-        cumulative_returns = (1 + returns).cumprod()
-        
-        # Calcular métricas
-        metrics = {
-            'total_return': (cumulative_returns.iloc[-1] - 1) * 100 if len(cumulative_returns) > 0 else 0.0,
-            'cagr': PerformanceMetrics.calculate_cagr(returns, periods_per_year),
-            'volatility': PerformanceMetrics.calculate_volatility(returns, periods_per_year),
-            'sharpe_ratio': PerformanceMetrics.calculate_sharpe_ratio(returns, risk_free_rate, periods_per_year),
-            'max_drawdown': PerformanceMetrics.calculate_max_drawdown(cumulative_returns),
-        }
-        
-        # Calcular turnover médio
-        if len(portfolio_history) > 1:
-            turnovers = []
-            for i in range(1, len(portfolio_history)):
-                turnover = PerformanceMetrics.calculate_turnover(
-                    portfolio_history[i-1],
-                    portfolio_history[i]
-                )
-                turnovers.append(turnover)
-            metrics['avg_turnover'] = np.mean(turnovers) if turnovers else 0.0
-        else:
-            metrics['avg_turnover'] = 0.0
+            Dicionário com todas as métricas (ver calculate_metrics_matrix)
+        """
+        weights = pd.DataFrame(portfolio_history).fillna(0.0).to_numpy(dtype=float)
+        if benchmark_returns is not None:
+            benchmark_returns = benchmark_returns.reindex(returns.index).to_numpy(dtype=float)
+        
+        matrix = PerformanceMetrics.calculate_metrics_matrix(
+            returns.to_numpy(dtype=float),
+            weights,
+            benchmark_returns,
+            risk_free_rate,
+            periods_per_year
+        )
+        
+        metrics = {key: float(values[0]) for key, values in matrix.items()}
+        for key in ('alpha', 'beta', 'information_ratio'):
+            if np.isnan(metrics[key]):
+                metrics[key] = None
         
         return metrics
@@ -6,12 +6,13 @@ Estrutura isolada para armazenar:
 - NAV diário (equity curve)
 - Posições por rebalance
 - Métricas finais
+- Equity curve compacta (um blob por execução)
 
 IMPORTANTE: Estas tabelas são isoladas e NÃO afetam dados de produção.
 """
 
 from sqlalchemy import (
-    Column, Integer, String, Float, Date, DateTime, Text,
+    Column, Integer, String, Float, Date, DateTime, Text, JSON, LargeBinary,
     ForeignKey, Index, UniqueConstraint
 )
 from sqlalchemy.orm import relationship
@@ -39,11 +40,15 @@ class BacktestRun(Base):
     initial_capital = Column(Float, nullable=False, default=100000.0)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     notes = Column(Text, nullable=True)
+    parameters = Column(JSON, nullable=True)  # Parâmetros da estratégia (top_n, weight_method, ...)
+    sweep_id = Column(String(36), nullable=True, index=True)  # Varredura de parâmetros de origem
+    cache_key = Column(String(64), nullable=True, index=True)  # Hash de parâmetros + versão dos dados
     
     # Relacionamentos
     nav_records = relationship("BacktestNAV", back_populates="run", cascade="all, delete-orphan")
     positions = relationship("BacktestPosition", back_populates="run", cascade="all, delete-orphan")
     metrics = relationship("BacktestMetrics", back_populates="run", cascade="all, delete-orphan", uselist=False)
+    equity_curve = relationship("BacktestEquityCurve", back_populates="run", cascade="all, delete-orphan", uselist=False)
     
     __table_args__ = (
         Index('idx_backtest_runs_dates', 'start_date', 'end_date'),
@@ -82,6 +87,30 @@ class BacktestNAV(Base):
         return f"<BacktestNAV(run_id={self.run_id}, date={self.date}, nav={self.nav:.2f})>"
 
 
+class BacktestEquityCurve(Base):
+    """
+    Armazena a equity curve de uma execução num único blob comprimido.
+    
+    Datas (delta-encoded), NAV e NAV do benchmark são codificados por
+    EquityCurveCodec; carregar a curva é a leitura de uma linha. A tabela
+    backtest_nav vira uma materialização opcional.
+    """
+    __tablename__ = "backtest_equity_curves"
+    
+    run_id = Column(String(36), ForeignKey('backtest_runs.id', ondelete='CASCADE'), primary_key=True)
+    num_points = Column(Integer, nullable=False)
+    start_date = Column(Date, nullable=True)
+    end_date = Column(Date, nullable=True)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Relacionamento
+    run = relationship("BacktestRun", back_populates="equity_curve")
+    
+    def __repr__(self):
+        return f"<BacktestEquityCurve(run_id={self.run_id}, points={self.num_points}, bytes={len(self.data)})>"
+
+
 class BacktestPosition(Base):
     """
     Armazena carteira em cada rebalance.
@@ -0,0 +1,381 @@
+"""
+Fontes de preços para o backtest.
+
+O backtest trabalha sobre uma matriz datas × tickers de adj_close carregada
+uma única vez para toda a janela simulada; os retornos de cada período são
+fatias dessa matriz, sem I/O adicional. A fonte padrão é a tabela
+raw_prices_daily (DatabasePriceProvider); o Yahoo Finance é um fallback
+opcional para tickers sem preços no banco (YahooPriceProvider).
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence
+from datetime import date, timedelta
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.schemas import RawPriceDaily
+from app.models.database import SessionLocal
+from app.ingestion.yahoo_client import YahooFinanceClient
+
+logger = logging.getLogger(__name__)
+
+
+class PriceProvider(ABC):
+    """
+    Fonte de preços ajustados com cache em memória.
+    
+    Subclasses implementam _fetch_prices; a classe base mantém a matriz
+    carregada e só volta à fonte quando um ticker ou uma data fora da
+    janela carregada é pedido.
+    
+    Example:
+        >>> provider = DatabasePriceProvider(db)
+        >>> provider.load(tickers, date(2020, 1, 31), date(2024, 12, 31))
+        >>> provider.get_period_returns(['PETR4.SA'], date(2024, 1, 31), date(2024, 2, 29))
+        {'PETR4.SA': 0.0123}
+    """
+    
+    def __init__(self, lookback_days: int = 10):
+        """
+        Inicializa o provider.
+        
+        Args:
+            lookback_days: Dias corridos carregados antes da data inicial, para
+                que rebalanceamentos em dias sem pregão usem o último preço
+        """
+        self.lookback_days = lookback_days
+        self._matrix = pd.DataFrame(dtype=float)
+        self._window: Optional[tuple] = None
+        self._loaded: set = set()
+    
+    def load(
+        self,
+        tickers: Iterable[str],
+        start_date: date,
+        end_date: date
+    ) -> pd.DataFrame:
+        """
+        Garante que a matriz cobre os tickers e a janela informados.
+        
+        Args:
+            tickers: Tickers necessários
+            start_date: Data inicial (o lookback é adicionado automaticamente)
+            end_date: Data final
+            
+        Returns:
+            Matriz carregada (datas × tickers, adj_close; NaN = sem preço)
+        """
+        tickers = list(dict.fromkeys(tickers))
+        window_start = start_date - timedelta(days=self.lookback_days)
+        
+        if (self._window is None
+                or window_start < self._window[0]
+                or end_date > self._window[1]):
+            # Janela nova: recarrega tudo o que já estava carregado de uma vez
+            if self._window is not None:
+                window_start = min(window_start, self._window[0])
+                end_date = max(end_date, self._window[1])
+                tickers = list(self._matrix.columns) + [
+                    t for t in tickers if t not in self._loaded
+                ]
+            self._matrix = self._to_matrix(
+                self._fetch_prices(tickers, window_start, end_date), tickers
+            )
+            self._window = (window_start, end_date)
+            self._loaded = set(tickers)
+        else:
+            missing = [t for t in tickers if t not in self._loaded]
+            if missing:
+                extra = self._to_matrix(
+                    self._fetch_prices(missing, *self._window), missing
+                )
+                self._matrix = pd.concat([self._matrix, extra], axis=1).sort_index()
+                self._loaded.update(missing)
+        
+        return self._matrix
+    
+    def get_price_matrix(
+        self,
+        tickers: Sequence[str],
+        start_date: date,
+        end_date: date
+    ) -> pd.DataFrame:
+        """
+        Retorna a matriz de preços de uma janela, incluindo o lookback.
+        
+        Args:
+            tickers: Colunas desejadas, na ordem do resultado
+            start_date: Data inicial
+            end_date: Data final
+            
+        Returns:
+            DataFrame datas × tickers com adj_close (NaN = sem preço)
+        """
+        matrix = self.load(tickers, start_date, end_date)
+        window_start = pd.Timestamp(start_date - timedelta(days=self.lookback_days))
+        return matrix.loc[window_start:pd.Timestamp(end_date), list(dict.fromkeys(tickers))]
+    
+    def get_period_returns(
+        self,
+        tickers: Sequence[str],
+        start_date: date,
+        end_date: date
+    ) -> Dict[str, float]:
+        """
+        Calcula o retorno de cada ticker entre duas datas de rebalanceamento.
+        
+        Mesma regra de get_period_return_matrix, para um único período.
+        Tickers sem pregão no período ficam fora do resultado e geram um aviso.
+        
+        Args:
+            tickers: Tickers do portfólio
+            start_date: Data do rebalanceamento
+            end_date: Data do próximo rebalanceamento
+            
+        Returns:
+            Dicionário {ticker: return} só com os tickers com preço
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+        
+        period_returns = self.get_period_return_matrix(tickers, [start_date, end_date]).iloc[0]
+        
+        missing = period_returns.index[period_returns.isna()].tolist()
+        if missing:
+            logger.warning(
+                f"No prices for {len(missing)} tickers between {start_date} and "
+                f"{end_date}: {missing}"
+            )
+        
+        return {
+            ticker: float(value)
+            for ticker, value in period_returns.dropna().items()
+        }
+    
+    def get_period_return_matrix(
+        self,
+        tickers: Sequence[str],
+        rebalance_dates: Sequence[date]
+    ) -> pd.DataFrame:
+        """
+        Calcula os retornos de todos os períodos entre rebalanceamentos.
+        
+        O preço inicial de cada período é o último adj_close até a data de
+        rebalanceamento (ou o primeiro após ela, para ativos listados durante
+        o período) e o final é o último adj_close até o próximo
+        rebalanceamento. Períodos sem pregão do ticker ficam NaN.
+        
+        Args:
+            tickers: Colunas do resultado
+            rebalance_dates: Datas de rebalanceamento em ordem crescente
+            
+        Returns:
+            DataFrame (rebalance_dates[:-1] × tickers) com o retorno do
+            período iniciado em cada data
+        """
+        tickers = list(dict.fromkeys(tickers))
+        bounds = pd.DatetimeIndex(pd.to_datetime(list(rebalance_dates)))
+        if len(bounds) < 2:
+            return pd.DataFrame(index=bounds[:0], columns=tickers, dtype=float)
+        if not bounds.is_monotonic_increasing:
+            raise ValueError("rebalance_dates must be in ascending order")
+        
+        prices = self.get_price_matrix(tickers, rebalance_dates[0], rebalance_dates[-1])
+        n_rows = len(prices)
+        if n_rows == 0:
+            return pd.DataFrame(np.nan, index=bounds[:-1], columns=tickers)
+        
+        values = prices.to_numpy(dtype=float)
+        forward = prices.ffill().to_numpy(dtype=float)
+        backward = prices.bfill().to_numpy(dtype=float)
+        # bar_counts[k] = número de pregões nas linhas < k
+        bar_counts = np.vstack([
+            np.zeros((1, values.shape[1])),
+            np.cumsum(~np.isnan(values), axis=0)
+        ])
+        
+        # Última linha até cada data (-1 = nenhuma)
+        positions = prices.index.searchsorted(bounds, side='right') - 1
+        start_pos, end_pos = positions[:-1], positions[1:]
+        
+        def as_of(matrix: np.ndarray, rows: np.ndarray) -> np.ndarray:
+            result = matrix[np.maximum(rows, 0)]
+            result[rows < 0] = np.nan
+            return result
+        
+        start_prices = as_of(forward, start_pos)
+        first_after = backward[np.minimum(start_pos + 1, n_rows - 1)]
+        start_prices = np.where(np.isnan(start_prices), first_after, start_prices)
+        end_prices = as_of(forward, end_pos)
+        has_bar = bar_counts[end_pos + 1] - bar_counts[start_pos + 1] > 0
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            period_returns = np.where(has_bar, end_prices / start_prices - 1.0, np.nan)
+        
+        return pd.DataFrame(period_returns, index=bounds[:-1], columns=tickers)
+    
+    @abstractmethod
+    def _fetch_prices(
+        self,
+        tickers: List[str],
+        start_date: date,
+        end_date: date
+    ) -> pd.DataFrame:
+        """
+        Busca preços na fonte.
+        
+        Returns:
+            DataFrame longo com colunas ['ticker', 'date', 'adj_close']
+        """
+    
+    @staticmethod
+    def _to_matrix(prices: pd.DataFrame, tickers: List[str]) -> pd.DataFrame:
+        """Pivota preços longos em datas × tickers, com preços inválidos como NaN."""
+        if prices.empty:
+            return pd.DataFrame(
+                np.nan, index=pd.DatetimeIndex([], name='date'), columns=tickers
+            )
+        
+        prices = prices.assign(
+            date=pd.to_datetime(prices['date']),
+            adj_close=pd.to_numeric(prices['adj_close'], errors='coerce')
+        )
+        matrix = prices.pivot_table(
+            index='date', columns='ticker', values='adj_close', aggfunc='last'
+        )
+        matrix = matrix.reindex(columns=tickers).sort_index().astype(float)
+        matrix.columns.name = None
+        
+        return matrix.where(matrix > 0)
+
+
+class DatabasePriceProvider(PriceProvider):
+    """
+    Preços da tabela raw_prices_daily, com fallback opcional.
+    
+    Tickers sem nenhum preço no banco dentro da janela são buscados no
+    fallback (ex: YahooPriceProvider), se configurado.
+    """
+    
+    def __init__(
+        self,
+        db_session: Optional[Session] = None,
+        fallback: Optional[PriceProvider] = None,
+        chunk_size: int = 500,
+        lookback_days: int = 10
+    ):
+        """
+        Inicializa o provider.
+        
+        Args:
+            db_session: Sessão do banco (None = abre uma sessão por carga)
+            fallback: Provider consultado para tickers ausentes do banco
+            chunk_size: Número máximo de tickers por consulta
+            lookback_days: Ver PriceProvider
+        """
+        super().__init__(lookback_days=lookback_days)
+        self.db = db_session
+        self.fallback = fallback
+        self.chunk_size = chunk_size
+    
+    def _fetch_prices(
+        self,
+        tickers: List[str],
+        start_date: date,
+        end_date: date
+    ) -> pd.DataFrame:
+        """Carrega adj_close dos tickers na janela, uma consulta por lote."""
+        db = self.db if self.db is not None else SessionLocal()
+        
+        try:
+            rows = []
+            for start in range(0, len(tickers), self.chunk_size):
+                chunk = tickers[start:start + self.chunk_size]
+                rows.extend(db.execute(
+                    select(RawPriceDaily.ticker, RawPriceDaily.date, RawPriceDaily.adj_close)
+                    .where(
+                        RawPriceDaily.ticker.in_(chunk),
+                        RawPriceDaily.date >= start_date,
+                        RawPriceDaily.date <= end_date
+                    )
+                    .order_by(RawPriceDaily.date, RawPriceDaily.ticker)
+                ).all())
+        finally:
+            if self.db is None:
+                db.close()
+        
+        prices = pd.DataFrame(rows, columns=['ticker', 'date', 'adj_close'])
+        logger.info(
+            f"Loaded {len(prices)} price bars for {len(tickers)} tickers "
+            f"from {start_date} to {end_date}"
+        )
+        
+        if self.fallback is not None:
+            missing = sorted(set(tickers) - set(prices['ticker']))
+            if missing:
+                logger.info(f"Fetching {len(missing)} tickers from fallback provider")
+                fallback_prices = self.fallback._fetch_prices(missing, start_date, end_date)
+                if not fallback_prices.empty:
+                    prices = pd.concat(
+                        [frame for frame in (prices, fallback_prices) if not frame.empty],
+                        ignore_index=True
+                    )
+        
+        return prices
+
+
+class YahooPriceProvider(PriceProvider):
+    """
+    Preços do Yahoo Finance, buscados uma vez por ticker para toda a janela.
+    
+    Falhas de rede deixam o ticker sem preços (e geram aviso); o retorno
+    do período correspondente fica ausente em get_period_returns.
+    """
+    
+    def __init__(
+        self,
+        yahoo_client: Optional[YahooFinanceClient] = None,
+        lookback_days: int = 10
+    ):
+        """
+        Inicializa o provider.
+        
+        Args:
+            yahoo_client: Cliente Yahoo (None = cria um novo)
+            lookback_days: Ver PriceProvider
+        """
+        super().__init__(lookback_days=lookback_days)
+        self.yahoo_client = yahoo_client or YahooFinanceClient()
+    
+    def _fetch_prices(
+        self,
+        tickers: List[str],
+        start_date: date,
+        end_date: date
+    ) -> pd.DataFrame:
+        """Busca o histórico de cada ticker na janela inteira."""
+        frames = []
+        
+        for ticker in tickers:
+            try:
+                # yfinance trata end como exclusivo
+                df = self.yahoo_client.fetch_daily_prices(
+                    ticker, start_date, end_date + timedelta(days=1)
+                )
+            except Exception as e:
+                logger.warning(f"Error fetching prices for {ticker}: {e}")
+                continue
+            
+            if not df.empty:
+                frames.append(df[['date', 'adj_close']].assign(ticker=ticker))
+        
+        if not frames:
+            return pd.DataFrame(columns=['ticker', 'date', 'adj_close'])
+        
+        return pd.concat(frames, ignore_index=True)[['ticker', 'date', 'adj_close']]
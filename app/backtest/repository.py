@@ -2,19 +2,31 @@
 Repository para operações de persistência de backtest.
 
 Separa lógica de persistência da lógica de simulação.
+
+NAV e posições são gravados em lote: COPY no PostgreSQL e executemany em
+chunks nos demais dialetos. A equity curve pode ainda ser guardada como um
+blob comprimido por execução (backtest_equity_curves), lido numa única
+linha. A remoção de execuções é feita com DELETEs
+por tabela, sem carregar objetos ORM.
 """
 
-from typing import List, Optional, Dict
+from typing import Any, Iterable, List, Optional, Dict, Sequence, Tuple
 from datetime import date, datetime
+import csv
+import io
+import uuid
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import Table, desc, insert
 
 from app.backtest.models import (
     BacktestRun,
     BacktestNAV,
     BacktestPosition,
-    BacktestMetrics
+    BacktestMetrics,
+    BacktestEquityCurve
 )
+from app.backtest.equity_curve import EquityCurveCodec
 
 
 class BacktestRepository:
@@ -46,7 +58,9 @@ class BacktestRepository:
         top_n: int,
         transaction_cost: float,
         initial_capital: float,
-        notes: Optional[str] = None
+        notes: Optional[str] = None,
+        parameters: Optional[Dict] = None,
+        cache_key: Optional[str] = None
     ) -> BacktestRun:
         """
         Cria nova execução de backtest.
@@ -60,6 +74,8 @@ class BacktestRepository:
             transaction_cost: Custo de transação (ex: 0.001 = 0.1%)
             initial_capital: Capital inicial
             notes: Notas adicionais (opcional)
+            parameters: Parâmetros da estratégia (opcional)
+            cache_key: Chave do cache de resultados (opcional)
             
         Returns:
             BacktestRun criado
@@ -72,7 +88,9 @@ class BacktestRepository:
             top_n=top_n,
             transaction_cost=transaction_cost,
             initial_capital=initial_capital,
-            notes=notes
+            notes=notes,
+            parameters=parameters,
+            cache_key=cache_key
         )
         
         self.db.add(run)
@@ -121,7 +139,7 @@ class BacktestRepository:
     
     def delete_run(self, run_id: str) -> bool:
         """
-        Deleta execução de backtest (cascade delete).
+        Deleta execução de backtest e seus registros filhos.
         
         Args:
             run_id: ID da execução
@@ -129,13 +147,37 @@ class BacktestRepository:
         Returns:
             True se deletado, False se não encontrado
         """
-        run = self.get_run(run_id)
-        if not run:
-            return False
+        return self.delete_runs([run_id]) > 0
+    
+    def delete_runs(self, run_ids: Sequence[str]) -> int:
+        """
+        Deleta várias execuções com um DELETE por tabela.
+        
+        NAV, posições, métricas e equity curve são removidos explicitamente antes das
+        execuções, sem depender do ON DELETE CASCADE do banco (o SQLite só
+        o aplica com foreign keys habilitadas).
+        
+        Args:
+            run_ids: IDs das execuções
+            
+        Returns:
+            Número de execuções deletadas
+        """
+        run_ids = list(dict.fromkeys(run_ids))
+        if not run_ids:
+            return 0
+        
+        for model in (BacktestNAV, BacktestPosition, BacktestMetrics, BacktestEquityCurve):
+            self.db.query(model).filter(
+                model.run_id.in_(run_ids)
+            ).delete(synchronize_session=False)
+        
+        deleted = self.db.query(BacktestRun).filter(
+            BacktestRun.id.in_(run_ids)
+        ).delete(synchronize_session=False)
         
-        self.db.delete(run)
         self.db.commit()
-        return True
+        return deleted
     
     # ========================================================================
     # BacktestNAV Operations
@@ -144,7 +186,8 @@ class BacktestRepository:
     def save_nav_records(
         self,
         run_id: str,
-        nav_records: List[Dict]
+        nav_records: List[Dict],
+        chunk_size: int = 5000
     ) -> int:
         """
         Salva registros de NAV em batch.
@@ -152,26 +195,27 @@ class BacktestRepository:
         Args:
             run_id: ID da execução
             nav_records: Lista de dicts com date, nav, daily_return, etc.
+            chunk_size: Linhas por executemany (ignorado no COPY)
             
         Returns:
             Número de registros salvos
         """
-        records = []
-        for record in nav_records:
-            nav = BacktestNAV(
-                run_id=run_id,
-                date=record['date'],
-                nav=record['nav'],
-                benchmark_nav=record.get('benchmark_nav'),
-                daily_return=record['daily_return'],
-                benchmark_return=record.get('benchmark_return')
-            )
-            records.append(nav)
-        
-        self.db.bulk_save_objects(records)
+        rows = [
+            {
+                'run_id': run_id,
+                'date': record['date'],
+                'nav': record['nav'],
+                'benchmark_nav': record.get('benchmark_nav'),
+                'daily_return': record['daily_return'],
+                'benchmark_return': record.get('benchmark_return')
+            }
+            for record in nav_records
+        ]
+        
+        self._bulk_insert(BacktestNAV.__table__, rows, chunk_size)
         self.db.commit()
         
-        return len(records)
+        return len(rows)
     
     def get_nav_records(
         self,
@@ -199,6 +243,89 @@ class BacktestRepository:
         
         return query.order_by(BacktestNAV.date).all()
     
+    # ========================================================================
+    # BacktestEquityCurve Operations
+    # ========================================================================
+    
+    def save_equity_curve(
+        self,
+        run_id: str,
+        dates: Sequence,
+        nav: Sequence[float],
+        benchmark_nav: Optional[Sequence[float]] = None,
+        materialize_rows: bool = False
+    ) -> BacktestEquityCurve:
+        """
+        Salva a equity curve como blob comprimido, substituindo a anterior.
+        
+        Args:
+            run_id: ID da execução
+            dates: Datas dos pontos, em ordem crescente
+            nav: NAV em cada data
+            benchmark_nav: NAV do benchmark em cada data (opcional)
+            materialize_rows: Se também grava uma linha por ponto em backtest_nav
+            
+        Returns:
+            BacktestEquityCurve criado
+        """
+        blob = EquityCurveCodec.encode(dates, nav, benchmark_nav)
+        curve = EquityCurveCodec.decode(blob)
+        num_points = len(curve['date'])
+        
+        self.db.query(BacktestEquityCurve).filter(
+            BacktestEquityCurve.run_id == run_id
+        ).delete(synchronize_session=False)
+        
+        record = BacktestEquityCurve(
+            run_id=run_id,
+            num_points=num_points,
+            start_date=curve['date'][0].item() if num_points else None,
+            end_date=curve['date'][-1].item() if num_points else None,
+            data=blob
+        )
+        self.db.add(record)
+        
+        if materialize_rows:
+            self._bulk_insert(BacktestNAV.__table__, [
+                {'run_id': run_id, **row} for row in EquityCurveCodec.to_records(curve)
+            ])
+        
+        self.db.commit()
+        return record
+    
+    def get_equity_curve_arrays(
+        self,
+        run_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Carrega a equity curve compacta numa única leitura.
+        
+        Args:
+            run_id: ID da execução
+            start_date: Data inicial (opcional)
+            end_date: Data final (opcional)
+            
+        Returns:
+            Dict de arrays de EquityCurveCodec.decode, ou None se a execução
+            não tiver curva compacta
+        """
+        blob = self.db.query(BacktestEquityCurve.data).filter(
+            BacktestEquityCurve.run_id == run_id
+        ).scalar()
+        if blob is None:
+            return None
+        
+        curve = EquityCurveCodec.decode(blob)
+        if start_date is None and end_date is None:
+            return curve
+        
+        dates = curve['date']
+        lo = 0 if start_date is None else dates.searchsorted(np.datetime64(start_date, 'D'), side='left')
+        hi = len(dates) if end_date is None else dates.searchsorted(np.datetime64(end_date, 'D'), side='right')
+        return {column: values[lo:hi] for column, values in curve.items()}
+    
     # ========================================================================
     # BacktestPosition Operations
     # ========================================================================
@@ -206,7 +333,8 @@ class BacktestRepository:
     def save_positions(
         self,
         run_id: str,
-        positions: List[Dict]
+        positions: List[Dict],
+        chunk_size: int = 5000
     ) -> int:
         """
         Salva posições em batch.
@@ -214,25 +342,26 @@ class BacktestRepository:
         Args:
             run_id: ID da execução
             positions: Lista de dicts com date, ticker, weight, score_at_selection
+            chunk_size: Linhas por executemany (ignorado no COPY)
             
         Returns:
             Número de posições salvas
         """
-        records = []
-        for pos in positions:
-            position = BacktestPosition(
-                run_id=run_id,
-                date=pos['date'],
-                ticker=pos['ticker'],
-                weight=pos['weight'],
-                score_at_selection=pos.get('score_at_selection')
-            )
-            records.append(position)
-        
-        self.db.bulk_save_objects(records)
+        rows = [
+            {
+                'run_id': run_id,
+                'date': pos['date'],
+                'ticker': pos['ticker'],
+                'weight': pos['weight'],
+                'score_at_selection': pos.get('score_at_selection')
+            }
+            for pos in positions
+        ]
+        
+        self._bulk_insert(BacktestPosition.__table__, rows, chunk_size)
         self.db.commit()
         
-        return len(records)
+        return len(rows)
     
     def get_positions(
         self,
@@ -293,7 +422,18 @@ class BacktestRepository:
         Returns:
             BacktestMetrics criado
         """
-        metrics_obj = BacktestMetrics(
+        metrics_obj = self._build_metrics(run_id, metrics)
+        
+        self.db.add(metrics_obj)
+        self.db.commit()
+        self.db.refresh(metrics_obj)
+        
+        return metrics_obj
+    
+    @staticmethod
+    def _build_metrics(run_id: str, metrics: Dict) -> BacktestMetrics:
+        """Cria o objeto BacktestMetrics a partir do dict de métricas."""
+        return BacktestMetrics(
             run_id=run_id,
             total_return=metrics['total_return'],
             cagr=metrics['cagr'],
@@ -306,12 +446,6 @@ class BacktestRepository:
             beta=metrics.get('beta'),
             information_ratio=metrics.get('information_ratio')
         )
-        
-        self.db.add(metrics_obj)
-        self.db.commit()
-        self.db.refresh(metrics_obj)
-        
-        return metrics_obj
     
     def get_metrics(self, run_id: str) -> Optional[BacktestMetrics]:
         """
@@ -327,10 +461,174 @@ class BacktestRepository:
             BacktestMetrics.run_id == run_id
         ).first()
     
+    # ========================================================================
+    # Parameter Sweep Operations
+    # ========================================================================
+    
+    def save_sweep_results(
+        self,
+        sweep_id: str,
+        runs: List[Dict]
+    ) -> int:
+        """
+        Salva as combinações de uma varredura de parâmetros num único commit.
+        
+        Cada combinação vira um BacktestRun (com parameters e sweep_id) e
+        seu BacktestMetrics.
+        
+        Args:
+            sweep_id: ID da varredura
+            runs: Lista de dicts com os campos de create_run, 'parameters'
+                e 'metrics' (dict aceito por save_metrics)
+            
+        Returns:
+            Número de execuções salvas
+        """
+        objects = []
+        for spec in runs:
+            run = BacktestRun(
+                id=str(uuid.uuid4()),
+                name=spec.get('name'),
+                start_date=spec['start_date'],
+                end_date=spec['end_date'],
+                rebalance_frequency=spec.get('rebalance_frequency', 'monthly'),
+                top_n=spec['top_n'],
+                transaction_cost=spec['transaction_cost'],
+                initial_capital=spec.get('initial_capital', 100000.0),
+                notes=spec.get('notes'),
+                parameters=spec.get('parameters'),
+                sweep_id=sweep_id
+            )
+            objects.append(run)
+            objects.append(self._build_metrics(run.id, spec['metrics']))
+        
+        self.db.add_all(objects)
+        self.db.commit()
+        
+        return len(runs)
+    
+    def get_sweep_results(self, sweep_id: str) -> List[Tuple[BacktestRun, BacktestMetrics]]:
+        """
+        Busca as execuções e métricas de uma varredura numa única consulta.
+        
+        Args:
+            sweep_id: ID da varredura
+            
+        Returns:
+            Lista de (BacktestRun, BacktestMetrics) ordenada por nome
+        """
+        return self.db.query(BacktestRun, BacktestMetrics).join(
+            BacktestMetrics, BacktestMetrics.run_id == BacktestRun.id
+        ).filter(
+            BacktestRun.sweep_id == sweep_id
+        ).order_by(BacktestRun.name).all()
+    
+    # ========================================================================
+    # Result Cache Operations
+    # ========================================================================
+    
+    def get_run_by_cache_key(self, cache_key: str) -> Optional[BacktestRun]:
+        """
+        Busca a execução mais recente com a chave de cache, se concluída.
+        
+        Só execuções com métricas gravadas contam como acerto, para que uma
+        execução interrompida no meio não seja reaproveitada.
+        
+        Args:
+            cache_key: Chave calculada por BacktestService.get_cache_key
+            
+        Returns:
+            BacktestRun ou None
+        """
+        return self.db.query(BacktestRun).join(
+            BacktestMetrics, BacktestMetrics.run_id == BacktestRun.id
+        ).filter(
+            BacktestRun.cache_key == cache_key
+        ).order_by(desc(BacktestRun.created_at)).first()
+    
+    def clear_cache_keys(self) -> int:
+        """
+        Remove as chaves de cache de todas as execuções num único UPDATE.
+        
+        As execuções continuam armazenadas, mas deixam de ser devolvidas
+        como acerto de cache.
+        
+        Returns:
+            Número de execuções afetadas
+        """
+        cleared = self.db.query(BacktestRun).filter(
+            BacktestRun.cache_key.isnot(None)
+        ).update({BacktestRun.cache_key: None}, synchronize_session=False)
+        self.db.commit()
+        
+        return cleared
+    
     # ========================================================================
     # Utility Methods
     # ========================================================================
     
+    def _bulk_insert(
+        self,
+        table: Table,
+        rows: List[Dict[str, Any]],
+        chunk_size: int = 5000
+    ) -> None:
+        """
+        Insere linhas sem criar objetos ORM, dentro da transação da sessão.
+        
+        No PostgreSQL usa COPY FROM STDIN; nos demais dialetos, um
+        executemany por chunk de até chunk_size linhas.
+        
+        Args:
+            table: Tabela de destino
+            rows: Valores por coluna (mesmas chaves em todas as linhas)
+            chunk_size: Número máximo de linhas por executemany
+            
+        Raises:
+            ValueError: Se chunk_size não for positivo
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        if not rows:
+            return
+        
+        if self.db.get_bind().dialect.name == 'postgresql':
+            self._copy_rows(table, list(rows[0]), ([row[c] for c in rows[0]] for row in rows))
+            return
+        
+        stmt = insert(table)
+        for start in range(0, len(rows), chunk_size):
+            self.db.execute(stmt, rows[start:start + chunk_size])
+    
+    def _copy_rows(
+        self,
+        table: Table,
+        columns: List[str],
+        values: Iterable[List[Any]]
+    ) -> None:
+        """
+        Grava linhas com COPY ... FROM STDIN (CSV) pela conexão da sessão.
+        
+        Args:
+            table: Tabela de destino
+            columns: Nomes das colunas, na ordem de values
+            values: Linhas de valores (None vira NULL)
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        for row in values:
+            writer.writerow(['' if value is None else value for value in row])
+        buffer.seek(0)
+        
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+    
     def get_run_summary(self, run_id: str) -> Optional[Dict]:
         """
         Retorna resumo completo de uma execução.
@@ -347,6 +645,10 @@ class BacktestRepository:
         
         metrics = self.get_metrics(run_id)
         nav_count = self.db.query(BacktestNAV).filter(BacktestNAV.run_id == run_id).count()
+        if nav_count == 0:
+            nav_count = self.db.query(BacktestEquityCurve.num_points).filter(
+                BacktestEquityCurve.run_id == run_id
+            ).scalar() or 0
         position_count = self.db.query(BacktestPosition).filter(BacktestPosition.run_id == run_id).count()
         rebalance_dates = self.get_rebalance_dates(run_id)
         
@@ -0,0 +1,417 @@
+"""
+Análise de robustez de retornos de backtest por reamostragem.
+
+Trabalha sobre a série de retornos mensais já armazenada, sem rodar o
+engine de novo:
+- block bootstrap circular: reamostra blocos contíguos de retornos,
+  preservando a autocorrelação de curto prazo, e dá intervalos de
+  confiança para Sharpe, CAGR e demais métricas
+- portfólios placebo: a cada rebalanceamento sorteia top_n ativos do
+  snapshot do ranking_history, com pesos iguais, e compara a estratégia
+  com a distribuição resultante
+
+As reamostragens são geradas em lote com um RNG semeado (mesma seed, mesmo
+resultado) e as métricas de todas elas saem de uma única chamada de
+PerformanceMetrics.calculate_metrics_matrix.
+"""
+
+from typing import Any, Dict, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import desc
+from sqlalchemy.orm import Session
+
+from app.models.schemas import BacktestResult
+from app.backtest.backtest_engine import BacktestEngine
+from app.backtest.metrics import PerformanceMetrics
+
+logger = logging.getLogger(__name__)
+
+# Métricas reportadas (as que dependem só da série de retornos)
+RESAMPLED_METRICS = (
+    'total_return',
+    'cagr',
+    'volatility',
+    'sharpe_ratio',
+    'sortino_ratio',
+    'max_drawdown',
+    'max_drawdown_duration',
+    'calmar_ratio',
+    'hit_rate',
+)
+
+# Métricas em que um valor menor é melhor (direção do p-value do placebo)
+LOWER_IS_BETTER = ('volatility', 'max_drawdown_duration')
+
+
+class RobustnessAnalysis:
+    """
+    Intervalos de confiança e testes placebo para retornos de backtest.
+    
+    Example:
+        >>> analysis = RobustnessAnalysis(n_resamples=10000, seed=42)
+        >>> returns = RobustnessAnalysis.load_monthly_returns(db, 'top10_equal')
+        >>> analysis.block_bootstrap(returns, block_size=6)['intervals'].loc['sharpe_ratio']
+        >>> universe = RobustnessAnalysis.load_universe(engine, db)
+        >>> analysis.placebo_test(returns, universe['members'], universe['period_returns'], top_n=10)
+    """
+    
+    def __init__(
+        self,
+        n_resamples: int = 10000,
+        seed: Optional[int] = None,
+        confidence: float = 0.95,
+        risk_free_rate: float = 0.0,
+        periods_per_year: int = 12
+    ):
+        """
+        Inicializa a análise.
+        
+        Args:
+            n_resamples: Número de reamostragens
+            seed: Semente do RNG (None = não determinístico)
+            confidence: Nível dos intervalos de confiança (ex: 0.95)
+            risk_free_rate: Taxa livre de risco anualizada
+            periods_per_year: Número de períodos por ano dos retornos
+            
+        Raises:
+            ValueError: Se n_resamples não for positivo ou confidence não
+                estiver em (0, 1)
+        """
+        if n_resamples < 1:
+            raise ValueError(f"n_resamples must be positive, got {n_resamples}")
+        if not 0 < confidence < 1:
+            raise ValueError(f"confidence must be in (0, 1), got {confidence}")
+        
+        self.n_resamples = n_resamples
+        self.confidence = confidence
+        self.risk_free_rate = risk_free_rate
+        self.periods_per_year = periods_per_year
+        self.rng = np.random.default_rng(seed)
+    
+    @staticmethod
+    def load_monthly_returns(db: Session, backtest_name: str) -> np.ndarray:
+        """
+        Carrega os retornos mensais do BacktestResult mais recente com o nome.
+        
+        Args:
+            db: Sessão do banco de dados
+            backtest_name: Nome usado em BacktestEngine.save_backtest_result
+            
+        Returns:
+            Array de retornos mensais
+            
+        Raises:
+            ValueError: Se não houver resultado com esse nome
+        """
+        row = db.query(BacktestResult.monthly_returns).filter(
+            BacktestResult.backtest_name == backtest_name
+        ).order_by(desc(BacktestResult.created_at), desc(BacktestResult.id)).first()
+        
+        if row is None:
+            raise ValueError(f"No backtest result named {backtest_name!r}")
+        
+        return np.asarray(row.monthly_returns or [], dtype=float)
+    
+    @staticmethod
+    def load_universe(engine: BacktestEngine, db: Session) -> Dict[str, Any]:
+        """
+        Carrega os snapshots do ranking_history e os retornos de período.
+        
+        Períodos sem snapshot ficam de fora, como em BacktestEngine.run_backtest,
+        para que as linhas fiquem alinhadas aos retornos da estratégia.
+        
+        Args:
+            engine: Engine com o período e a fonte de preços do backtest
+            db: Sessão do banco de dados
+            
+        Returns:
+            Dict com 'dates' (início de cada período), 'tickers', 'members'
+            (períodos × tickers, True = no snapshot) e 'period_returns'
+            (períodos × tickers, NaN = sem retorno)
+        """
+        rebalance_dates = engine.prepare_backtest(db)
+        period_starts = rebalance_dates[:-1]
+        snapshots = engine.get_ranking_snapshots(db, period_starts)
+        
+        if snapshots.empty:
+            return {
+                'dates': [],
+                'tickers': [],
+                'members': np.zeros((0, 0), dtype=bool),
+                'period_returns': np.zeros((0, 0)),
+            }
+        
+        tickers = sorted(snapshots['ticker'].unique())
+        members = pd.crosstab(
+            pd.to_datetime(snapshots['date']),
+            snapshots['ticker']
+        ).reindex(
+            index=pd.DatetimeIndex(pd.to_datetime(period_starts)),
+            columns=tickers,
+            fill_value=0
+        ).to_numpy() > 0
+        period_returns = engine.get_price_provider(db).get_period_return_matrix(
+            tickers,
+            rebalance_dates
+        ).to_numpy(dtype=float)
+        
+        active = members.any(axis=1)
+        
+        return {
+            'dates': [d for d, keep in zip(period_starts, active) if keep],
+            'tickers': tickers,
+            'members': members[active],
+            'period_returns': period_returns[active],
+        }
+    
+    def block_bootstrap_indices(self, n_periods: int, block_size: int = 6) -> np.ndarray:
+        """
+        Sorteia os índices do block bootstrap circular.
+        
+        Cada reamostragem concatena blocos de block_size períodos
+        consecutivos (dando a volta no fim da série) com inícios uniformes.
+        
+        Args:
+            n_periods: Tamanho da série
+            block_size: Períodos por bloco
+            
+        Returns:
+            Matriz (n_resamples × n_periods) de índices da série original
+            
+        Raises:
+            ValueError: Se block_size não for positivo
+        """
+        if block_size < 1:
+            raise ValueError(f"block_size must be positive, got {block_size}")
+        
+        n_blocks = -(-n_periods // block_size)
+        starts = self.rng.integers(0, max(n_periods, 1), size=(self.n_resamples, n_blocks))
+        indices = (starts[:, :, None] + np.arange(block_size)) % max(n_periods, 1)
+        
+        return indices.reshape(self.n_resamples, n_blocks * block_size)[:, :n_periods]
+    
+    def block_bootstrap(self, returns: np.ndarray, block_size: int = 6) -> Dict[str, Any]:
+        """
+        Calcula a distribuição das métricas por block bootstrap.
+        
+        Args:
+            returns: Retornos periódicos da estratégia
+            block_size: Períodos por bloco (1 = bootstrap simples)
+            
+        Returns:
+            Dict com 'metrics' (métrica -> array com um valor por
+            reamostragem) e 'intervals' (ver summarize)
+        """
+        returns = np.asarray(returns, dtype=float)
+        indices = self.block_bootstrap_indices(len(returns), block_size)
+        resampled = self._metrics(returns[indices.T])
+        
+        logger.info(
+            f"Block bootstrap: {self.n_resamples} resamples of {len(returns)} periods "
+            f"(block_size={block_size})"
+        )
+        
+        return {
+            'metrics': resampled,
+            'intervals': self.summarize(self._metrics(returns[:, None]), resampled),
+        }
+    
+    def placebo_returns(
+        self,
+        members: np.ndarray,
+        period_returns: np.ndarray,
+        top_n: int,
+        transaction_cost: float = 0.0
+    ) -> np.ndarray:
+        """
+        Simula portfólios placebo com ativos sorteados de cada snapshot.
+        
+        Em cada período sorteia, para todas as reamostragens de uma vez,
+        min(top_n, membros) ativos do snapshot com pesos iguais; o laço é
+        só sobre períodos e posições da carteira. O custo
+        segue VectorizedBacktest.simulate_arrays: transaction_cost sobre o
+        volume negociado contra a carteira anterior (a primeira parte de
+        caixa).
+        
+        Args:
+            members: Matriz (períodos × tickers), True = no snapshot
+            period_returns: Retornos de período alinhados (NaN = 0)
+            top_n: Ativos por carteira
+            transaction_cost: Custo por unidade negociada
+            
+        Returns:
+            Matriz (períodos × n_resamples) de retornos líquidos
+        """
+        members = np.asarray(members, dtype=bool)
+        period_returns = np.nan_to_num(np.asarray(period_returns, dtype=float))
+        n_periods, n_tickers = members.shape
+        offsets = (np.arange(self.n_resamples) * n_tickers)[:, None]
+        
+        net = np.zeros((n_periods, self.n_resamples))
+        current = np.zeros((self.n_resamples, n_tickers), dtype=bool)
+        previous = np.zeros_like(current)
+        previous_chosen = np.zeros((self.n_resamples, 0), dtype=np.intp)
+        
+        for t in range(n_periods):
+            candidates = np.flatnonzero(members[t])
+            k = min(top_n, len(candidates))
+            if k == len(candidates):
+                chosen = np.broadcast_to(candidates, (self.n_resamples, k))
+                current[:, candidates] = True
+            else:
+                chosen = self._sample_candidates(candidates, k, current)
+            
+            if k:
+                net[t] = period_returns[t][chosen].mean(axis=1)
+            
+            if transaction_cost:
+                # Pesos iguais: só a sobreposição com a carteira anterior não é negociada
+                previous_k = previous_chosen.shape[1]
+                overlap = previous.reshape(-1)[offsets + chosen].sum(axis=1)
+                weight = 1.0 / k if k else 0.0
+                previous_weight = 1.0 / previous_k if previous_k else 0.0
+                traded = (
+                    overlap * abs(weight - previous_weight)
+                    + (k - overlap) * weight
+                    + (previous_k - overlap) * previous_weight
+                )
+                net[t] -= transaction_cost * traded
+            
+            # Limpa só as posições marcadas (O(resamples × top_n) por período)
+            previous.reshape(-1)[offsets + previous_chosen] = False
+            previous, current = current, previous
+            previous_chosen = chosen
+        
+        return net
+    
+    def _sample_candidates(
+        self,
+        candidates: np.ndarray,
+        k: int,
+        taken: np.ndarray
+    ) -> np.ndarray:
+        """
+        Sorteia k candidatos distintos por reamostragem (algoritmo de Floyd).
+        
+        Cada passo sorteia um inteiro por reamostragem, com custo
+        O(resamples × k) em vez de ordenar chaves para todos os candidatos.
+        
+        Args:
+            candidates: Índices dos tickers elegíveis no período
+            k: Ativos por carteira (menor que len(candidates))
+            taken: Máscara (resamples × tickers) zerada; recebe os sorteados
+            
+        Returns:
+            Matriz (resamples × k) de índices de tickers
+        """
+        # Índices planos na máscara evitam o custo da indexação 2D
+        flat = taken.reshape(-1)
+        offsets = np.arange(self.n_resamples) * taken.shape[1]
+        chosen = np.empty((self.n_resamples, k), dtype=np.intp)
+        
+        for step, j in enumerate(range(len(candidates) - k, len(candidates))):
+            pick = candidates[self.rng.integers(0, j + 1, size=self.n_resamples)]
+            pick = np.where(flat[offsets + pick], candidates[j], pick)
+            flat[offsets + pick] = True
+            chosen[:, step] = pick
+        
+        return chosen
+    
+    def placebo_test(
+        self,
+        returns: np.ndarray,
+        members: np.ndarray,
+        period_returns: np.ndarray,
+        top_n: int,
+        transaction_cost: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Compara a estratégia com portfólios placebo do mesmo universo.
+        
+        Args:
+            returns: Retornos da estratégia, alinhados às linhas de members
+            members: Matriz (períodos × tickers), True = no snapshot
+            period_returns: Retornos de período alinhados
+            top_n: Ativos por carteira placebo
+            transaction_cost: Custo por unidade negociada
+            
+        Returns:
+            Dict com 'metrics' (métricas de cada placebo) e 'summary'
+            (DataFrame por métrica com strategy, placebo_mean,
+            placebo_lower, placebo_upper, percentile = % de placebos com
+            valor menor que o da estratégia e p_value unilateral = fração de
+            placebos pelo menos tão bons quanto a estratégia; "bom" segue
+            LOWER_IS_BETTER, e max_drawdown, negativo, é melhor quanto maior)
+            
+        Raises:
+            ValueError: Se returns e members tiverem números de períodos
+                diferentes
+        """
+        returns = np.asarray(returns, dtype=float)
+        if len(returns) != len(members):
+            raise ValueError(
+                f"returns has {len(returns)} periods, members has {len(members)}"
+            )
+        
+        placebo = self._metrics(self.placebo_returns(members, period_returns, top_n, transaction_cost))
+        strategy = self._metrics(returns[:, None])
+        
+        stacked = np.vstack([placebo[key] for key in RESAMPLED_METRICS])
+        estimates = np.array([strategy[key][0] for key in RESAMPLED_METRICS])[:, None]
+        summary = self.summarize(strategy, placebo).rename(columns={
+            'estimate': 'strategy',
+            'mean': 'placebo_mean',
+            'lower': 'placebo_lower',
+            'upper': 'placebo_upper',
+        }).drop(columns='std')
+        summary['percentile'] = (stacked < estimates).mean(axis=1) * 100
+        lower_is_better = np.isin(RESAMPLED_METRICS, LOWER_IS_BETTER)[:, None]
+        at_least_as_good = np.where(lower_is_better, stacked <= estimates, stacked >= estimates)
+        summary['p_value'] = (at_least_as_good.sum(axis=1) + 1) / (self.n_resamples + 1)
+        
+        logger.info(
+            f"Placebo test: {self.n_resamples} portfolios of {top_n} assets, "
+            f"Sharpe p-value={summary.loc['sharpe_ratio', 'p_value']:.4f}"
+        )
+        
+        return {'metrics': placebo, 'summary': summary}
+    
+    def summarize(
+        self,
+        estimates: Dict[str, np.ndarray],
+        resampled: Dict[str, np.ndarray]
+    ) -> pd.DataFrame:
+        """
+        Resume a distribuição reamostrada de cada métrica.
+        
+        Args:
+            estimates: Métricas da série original (arrays de um valor)
+            resampled: Métricas das reamostragens
+            
+        Returns:
+            DataFrame indexado por métrica com estimate, mean, std e os
+            percentis lower/upper do intervalo de confiança
+        """
+        stacked = np.vstack([resampled[key] for key in RESAMPLED_METRICS])
+        tail = (1 - self.confidence) / 2 * 100
+        lower, upper = np.nanpercentile(stacked, [tail, 100 - tail], axis=1)
+        
+        return pd.DataFrame({
+            'estimate': [float(estimates[key][0]) for key in RESAMPLED_METRICS],
+            'mean': np.nanmean(stacked, axis=1),
+            'std': np.nanstd(stacked, axis=1, ddof=1),
+            'lower': lower,
+            'upper': upper,
+        }, index=pd.Index(RESAMPLED_METRICS, name='metric'))
+    
+    def _metrics(self, returns: np.ndarray) -> Dict[str, np.ndarray]:
+        """Métricas de RESAMPLED_METRICS para cada coluna de returns."""
+        metrics = PerformanceMetrics.calculate_metrics_matrix(
+            returns,
+            risk_free_rate=self.risk_free_rate,
+            periods_per_year=self.periods_per_year
+        )
+        return {key: metrics[key] for key in RESAMPLED_METRICS}
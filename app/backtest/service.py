@@ -6,14 +6,23 @@ Orquestra lógica de simulação e persistência.
 
 from typing import Optional, Dict, List
 from datetime import date
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+import hashlib
+import json
 import logging
+import numpy as np
 
+from app.backtest.equity_curve import EquityCurveCodec
 from app.backtest.repository import BacktestRepository
 from app.backtest.models import BacktestRun
+from app.models.schemas import ScoreDaily, RawPriceDaily
 
 logger = logging.getLogger(__name__)
 
+# Modos de armazenamento da equity curve
+NAV_STORAGE_MODES = ('rows', 'blob', 'both')
+
 
 class BacktestService:
     """
@@ -41,7 +50,9 @@ class BacktestService:
         top_n: int = 10,
         transaction_cost: float = 0.001,
         initial_capital: float = 100000.0,
-        notes: Optional[str] = None
+        notes: Optional[str] = None,
+        parameters: Optional[Dict] = None,
+        cache_key: Optional[str] = None
     ) -> BacktestRun:
         """
         Cria nova execução de backtest.
@@ -55,6 +66,9 @@ class BacktestService:
             transaction_cost: Custo de transação
             initial_capital: Capital inicial
             notes: Notas adicionais
+            parameters: Parâmetros da estratégia (opcional)
+            cache_key: Chave de get_cache_key, para reaproveitar o resultado
+                em execuções idênticas (opcional)
             
         Returns:
             BacktestRun criado
@@ -69,18 +83,86 @@ class BacktestService:
             top_n=top_n,
             transaction_cost=transaction_cost,
             initial_capital=initial_capital,
-            notes=notes
+            notes=notes,
+            parameters=parameters,
+            cache_key=cache_key
         )
         
         logger.info(f"Backtest run created: {run.id}")
         return run
     
+    def get_data_version(self) -> Dict[str, Optional[date]]:
+        """
+        Retorna a versão dos dados de entrada numa única consulta.
+        
+        Returns:
+            Dict com a data mais recente de scores ('scores') e de preços
+            ('prices'); None se a tabela estiver vazia
+        """
+        latest_score, latest_price = self.db.query(
+            select(func.max(ScoreDaily.date)).scalar_subquery(),
+            select(func.max(RawPriceDaily.date)).scalar_subquery()
+        ).one()
+        
+        return {'scores': latest_score, 'prices': latest_price}
+    
+    def get_cache_key(self, parameters: Dict) -> str:
+        """
+        Calcula a chave de cache de uma execução.
+        
+        A chave é o SHA-256 dos parâmetros (em JSON canônico) mais a versão
+        dos dados, de modo que novos scores ou preços geram outra chave.
+        
+        Args:
+            parameters: Parâmetros que determinam o resultado (datas, top_n,
+                custos, capital, ...); nome e notas não devem entrar
+            
+        Returns:
+            Hash hexadecimal de 64 caracteres
+        """
+        payload = json.dumps(
+            {'parameters': parameters, 'data_version': self.get_data_version()},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get_cached_run(self, cache_key: str) -> Optional[BacktestRun]:
+        """
+        Retorna a execução concluída com a mesma chave de cache.
+        
+        Args:
+            cache_key: Chave de get_cache_key
+            
+        Returns:
+            BacktestRun ou None se não houver acerto
+        """
+        run = self.repository.get_run_by_cache_key(cache_key)
+        if run is not None:
+            logger.info(f"Backtest cache hit: {run.id}")
+        return run
+    
+    def invalidate_cache(self) -> int:
+        """
+        Invalida o cache de resultados.
+        
+        Deve ser chamado sempre que o pipeline grava scores: recalcular
+        scores de uma data existente não muda a versão dos dados.
+        
+        Returns:
+            Número de execuções que deixaram de ser reaproveitáveis
+        """
+        cleared = self.repository.clear_cache_keys()
+        logger.info(f"Invalidated {cleared} cached backtest runs")
+        return cleared
+    
     def save_backtest_results(
         self,
         run_id: str,
         nav_records: List[Dict],
         positions: List[Dict],
-        metrics: Dict
+        metrics: Dict,
+        nav_storage: str = 'rows'
     ) -> bool:
         """
         Salva resultados completos de um backtest.
@@ -90,16 +172,35 @@ class BacktestService:
             nav_records: Lista de registros de NAV
             positions: Lista de posições
             metrics: Dict com métricas finais
+            nav_storage: 'rows' (uma linha por ponto em backtest_nav), 'blob'
+                (curva compacta em backtest_equity_curves) ou 'both'
             
         Returns:
             True se sucesso
+            
+        Raises:
+            ValueError: Se nav_storage for desconhecido
         """
+        if nav_storage not in NAV_STORAGE_MODES:
+            raise ValueError(f"nav_storage must be one of {NAV_STORAGE_MODES}")
+        
         try:
             logger.info(f"Saving backtest results for run {run_id}")
             
             # Salvar NAV
-            nav_count = self.repository.save_nav_records(run_id, nav_records)
-            logger.info(f"Saved {nav_count} NAV records")
+            if nav_storage == 'rows':
+                nav_count = self.repository.save_nav_records(run_id, nav_records)
+            else:
+                curve = EquityCurveCodec.from_records(nav_records)
+                self.repository.save_equity_curve(
+                    run_id,
+                    curve['date'],
+                    curve['nav'],
+                    curve['benchmark_nav'],
+                    materialize_rows=(nav_storage == 'both')
+                )
+                nav_count = len(nav_records)
+            logger.info(f"Saved {nav_count} NAV records ({nav_storage})")
             
             # Salvar posições
             pos_count = self.repository.save_positions(run_id, positions)
@@ -166,6 +267,9 @@ class BacktestService:
         """
         Retorna equity curve formatada.
         
+        Lê a curva compacta quando existe e cai para backtest_nav caso
+        contrário.
+        
         Args:
             run_id: ID da execução
             start_date: Data inicial (opcional)
@@ -174,6 +278,10 @@ class BacktestService:
         Returns:
             Lista de dicts com date, nav, daily_return
         """
+        curve = self.repository.get_equity_curve_arrays(run_id, start_date, end_date)
+        if curve is not None:
+            return EquityCurveCodec.to_records(curve)
+        
         nav_records = self.repository.get_nav_records(run_id, start_date, end_date)
         
         return [
@@ -187,6 +295,36 @@ class BacktestService:
             for record in nav_records
         ]
     
+    def get_equity_curve_arrays(
+        self,
+        run_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Retorna a equity curve como arrays NumPy.
+        
+        Args:
+            run_id: ID da execução
+            start_date: Data inicial (opcional)
+            end_date: Data final (opcional)
+            
+        Returns:
+            Dict com arrays date, nav, benchmark_nav, daily_return e
+            benchmark_return (vazios se a execução não tiver NAV)
+        """
+        curve = self.repository.get_equity_curve_arrays(run_id, start_date, end_date)
+        if curve is not None:
+            return curve
+        
+        nav_records = self.get_equity_curve(run_id, start_date, end_date)
+        curve = EquityCurveCodec.from_records(nav_records)
+        return {
+            **curve,
+            'daily_return': np.array([r['daily_return'] for r in nav_records], dtype=float),
+            'benchmark_return': np.array([r['benchmark_return'] for r in nav_records], dtype=float)
+        }
+    
     def get_portfolio_composition(
         self,
         run_id: str,
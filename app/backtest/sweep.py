@@ -0,0 +1,450 @@
+"""
+Varredura de parâmetros de backtest em paralelo.
+
+Snapshots de ranking e retornos de período são carregados uma única vez,
+copiados para memória compartilhada (multiprocessing.shared_memory) e lidos
+sem cópia por processos de trabalho; cada combinação de parâmetros só
+refaz a seleção, a simulação e as métricas sobre essas matrizes.
+
+Parâmetros suportados por combinação:
+- top_n, weight_method, use_smoothing
+- alpha: suavização exponencial recalculada entre snapshots mensais
+  (None = final_score_smoothed armazenado)
+- factor_weights: {'momentum', 'quality', 'value'} para recombinar o
+  final_score a partir dos scores por fator (None = final_score armazenado)
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from itertools import product
+from multiprocessing import shared_memory
+import json
+import logging
+import os
+import uuid
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.models.database import SessionLocal
+from app.backtest.backtest_engine import BacktestEngine
+from app.backtest.metrics import PerformanceMetrics
+from app.backtest.price_provider import PriceProvider
+from app.backtest.repository import BacktestRepository
+from app.backtest.vectorized import VectorizedBacktest
+from app.scoring.temporal_smoothing import TemporalSmoothing
+
+logger = logging.getLogger(__name__)
+
+# Camadas do tensor de scores, na ordem do eixo 0
+SCORE_FIELDS = (
+    'momentum_score',
+    'quality_score',
+    'value_score',
+    'final_score',
+    'final_score_smoothed',
+)
+
+FACTOR_NAMES = ('momentum', 'quality', 'value')
+
+# Smoothing padrão quando alpha é pedido implicitamente (ver TemporalSmoothing)
+DEFAULT_ALPHA = 0.7
+
+# Matrizes do processo de trabalho, preenchidas pelo initializer do pool
+_WORKER_DATA: Dict[str, np.ndarray] = {}
+_WORKER_SETTINGS: Dict[str, float] = {}
+_WORKER_SEGMENTS: List[shared_memory.SharedMemory] = []
+
+
+class ParameterSweep:
+    """
+    Executa uma grade de combinações de parâmetros sobre os mesmos dados.
+    
+    Example:
+        >>> sweep = ParameterSweep(date(2015, 1, 1), date(2024, 12, 31), transaction_cost=0.001)
+        >>> grid = ParameterSweep.build_grid(top_n=[10, 20], use_smoothing=[False, True],
+        ...                                  alpha=[0.5, 0.7])
+        >>> results = sweep.run(grid, db)
+        >>> sweep_id = sweep.save_results(db, results, name='top_n_vs_alpha')
+    """
+    
+    def __init__(
+        self,
+        start_date: date,
+        end_date: date,
+        risk_free_rate: float = 0.0,
+        transaction_cost: float = 0.0,
+        initial_capital: float = 100000.0,
+        price_provider: Optional[PriceProvider] = None,
+        use_network_fallback: bool = False,
+        max_workers: Optional[int] = None
+    ):
+        """
+        Inicializa a varredura.
+        
+        Args:
+            start_date: Data inicial do backtest
+            end_date: Data final do backtest
+            risk_free_rate: Taxa livre de risco anualizada
+            transaction_cost: Custo por unidade negociada
+            initial_capital: Capital inicial registrado nas execuções salvas
+            price_provider: Fonte de preços (None = banco, ver BacktestEngine)
+            use_network_fallback: Fallback Yahoo do provider padrão
+            max_workers: Processos de trabalho (None = os.cpu_count(); 1 = sem
+                pool, no processo atual)
+        """
+        self.engine = BacktestEngine(
+            start_date=start_date,
+            end_date=end_date,
+            risk_free_rate=risk_free_rate,
+            transaction_cost=transaction_cost,
+            price_provider=price_provider,
+            use_network_fallback=use_network_fallback
+        )
+        self.initial_capital = initial_capital
+        self.max_workers = max_workers or os.cpu_count() or 1
+        
+        self.tickers: List[str] = []
+        self.rebalance_dates: List[date] = []
+        self.data: Optional[Dict[str, np.ndarray]] = None
+    
+    @staticmethod
+    def build_grid(
+        top_n: Sequence[int] = (10,),
+        weight_method: Sequence[str] = ('equal',),
+        use_smoothing: Sequence[bool] = (False,),
+        alpha: Sequence[Optional[float]] = (None,),
+        factor_weights: Sequence[Optional[Mapping[str, float]]] = (None,)
+    ) -> List[Dict[str, Any]]:
+        """
+        Monta o produto cartesiano dos parâmetros.
+        
+        alpha só varia nas combinações com use_smoothing; combinações
+        repetidas são removidas mantendo a ordem.
+        
+        Returns:
+            Lista de dicts de parâmetros
+        """
+        grid = []
+        seen = set()
+        
+        for n, method, smoothing, a, weights in product(
+            top_n, weight_method, use_smoothing, alpha, factor_weights
+        ):
+            params = {
+                'top_n': int(n),
+                'weight_method': method,
+                'use_smoothing': bool(smoothing),
+                'alpha': a if smoothing else None,
+                'factor_weights': dict(weights) if weights is not None else None,
+            }
+            key = json.dumps(params, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                grid.append(params)
+        
+        return grid
+    
+    def load(self, db: Session) -> Dict[str, np.ndarray]:
+        """
+        Carrega snapshots e retornos de período uma única vez.
+        
+        Args:
+            db: Sessão do banco de dados
+            
+        Returns:
+            Dict com 'scores' (campos × datas × tickers), 'ranks'
+            (datas × tickers, NaN = fora do snapshot) e 'period_returns'
+            ((datas - 1) × tickers)
+        """
+        rebalance_dates = self.engine.prepare_backtest(db)
+        snapshots = self.engine.get_ranking_snapshots(db, rebalance_dates)
+        
+        index = pd.DatetimeIndex(pd.to_datetime(rebalance_dates))
+        tickers = sorted(snapshots['ticker'].unique()) if not snapshots.empty else []
+        
+        def layer(column: str) -> np.ndarray:
+            if snapshots.empty:
+                return np.full((len(index), 0), np.nan)
+            frame = snapshots.assign(date=pd.to_datetime(snapshots['date']))
+            values = pd.to_numeric(frame[column], errors='coerce')
+            matrix = frame.assign(value=values).pivot(index='date', columns='ticker', values='value')
+            return matrix.reindex(index=index, columns=tickers).to_numpy(dtype=float)
+        
+        period_returns = self.engine.get_price_provider(db).get_period_return_matrix(
+            tickers,
+            rebalance_dates
+        )
+        
+        self.tickers = tickers
+        self.rebalance_dates = rebalance_dates
+        self.data = {
+            'scores': np.ascontiguousarray(np.stack([layer(f) for f in SCORE_FIELDS])),
+            'ranks': np.ascontiguousarray(layer('rank')),
+            'period_returns': np.ascontiguousarray(
+                period_returns.to_numpy(dtype=float).reshape(max(len(index) - 1, 0), len(tickers))
+            ),
+        }
+        
+        logger.info(
+            f"Sweep data loaded: {len(rebalance_dates)} dates x {len(tickers)} tickers"
+        )
+        
+        return self.data
+    
+    def run(self, grid: Sequence[Mapping[str, Any]], db: Session = None) -> pd.DataFrame:
+        """
+        Avalia todas as combinações e reúne as métricas numa tabela.
+        
+        Args:
+            grid: Combinações de parâmetros (ver build_grid)
+            db: Sessão do banco (opcional, cria nova se None); só usada se os
+                dados ainda não foram carregados
+            
+        Returns:
+            DataFrame com uma linha por combinação, na ordem de grid:
+            parâmetros (factor_weights expandido em <fator>_weight) e métricas
+        """
+        if self.data is None:
+            close_db = db is None
+            db = db or SessionLocal()
+            try:
+                self.load(db)
+            finally:
+                if close_db:
+                    db.close()
+        
+        grid = [dict(params) for params in grid]
+        settings = {
+            'transaction_cost': self.engine.transaction_cost,
+            'risk_free_rate': self.engine.risk_free_rate,
+        }
+        workers = min(self.max_workers, len(grid))
+        
+        logger.info(f"Running sweep with {len(grid)} combinations on {workers} workers")
+        
+        if workers <= 1:
+            results = [evaluate_combination(self.data, params, **settings) for params in grid]
+        else:
+            segments = {name: _share(array) for name, array in self.data.items()}
+            specs = [
+                (name, segments[name].name, array.shape)
+                for name, array in self.data.items()
+            ]
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_attach_worker,
+                    initargs=(specs, settings)
+                ) as pool:
+                    chunksize = max(1, len(grid) // (workers * 4))
+                    results = list(pool.map(_evaluate_in_worker, grid, chunksize=chunksize))
+            finally:
+                for segment in segments.values():
+                    segment.close()
+                    segment.unlink()
+        
+        rows = []
+        for params, metrics in zip(grid, results):
+            weights = params.get('factor_weights') or {}
+            row = {
+                'top_n': params['top_n'],
+                'weight_method': params.get('weight_method', 'equal'),
+                'use_smoothing': params.get('use_smoothing', False),
+                'alpha': params.get('alpha'),
+            }
+            row.update({
+                f'{factor}_weight': weights.get(factor) if weights else None
+                for factor in FACTOR_NAMES
+            })
+            row.update(metrics)
+            rows.append(row)
+        
+        return pd.DataFrame(rows)
+    
+    def save_results(
+        self,
+        db: Session,
+        results: pd.DataFrame,
+        name: Optional[str] = None
+    ) -> str:
+        """
+        Salva a tabela de resultados via BacktestRepository.
+        
+        Args:
+            db: Sessão do banco de dados
+            results: Saída de run
+            name: Prefixo do nome das execuções (None = 'sweep_<id>')
+            
+        Returns:
+            sweep_id gravado nas execuções
+        """
+        sweep_id = str(uuid.uuid4())
+        prefix = name or f"sweep_{sweep_id[:8]}"
+        
+        runs = []
+        for position, row in enumerate(results.to_dict('records')):
+            factor_weights = {
+                factor: row[f'{factor}_weight'] for factor in FACTOR_NAMES
+                if row.get(f'{factor}_weight') is not None and not pd.isna(row[f'{factor}_weight'])
+            }
+            alpha = row.get('alpha')
+            runs.append({
+                'name': f"{prefix}_{position:04d}",
+                'start_date': self.engine.start_date,
+                'end_date': self.engine.end_date,
+                'top_n': int(row['top_n']),
+                'transaction_cost': self.engine.transaction_cost,
+                'initial_capital': self.initial_capital,
+                'parameters': {
+                    'top_n': int(row['top_n']),
+                    'weight_method': row['weight_method'],
+                    'use_smoothing': bool(row['use_smoothing']),
+                    'alpha': None if alpha is None or pd.isna(alpha) else float(alpha),
+                    'factor_weights': factor_weights or None,
+                },
+                'metrics': {
+                    'total_return': row['total_return'],
+                    'cagr': row['cagr'],
+                    'volatility': row['volatility'],
+                    'sharpe_ratio': row['sharpe_ratio'],
+                    'sortino_ratio': row['sortino_ratio'],
+                    'max_drawdown': row['max_drawdown'],
+                    'turnover_avg': row['avg_turnover'],
+                },
+            })
+        
+        saved = BacktestRepository(db).save_sweep_results(sweep_id, runs)
+        logger.info(f"Saved sweep {sweep_id} with {saved} runs")
+        
+        return sweep_id
+
+
+def combination_scores(scores: np.ndarray, params: Mapping[str, Any]) -> np.ndarray:
+    """
+    Calcula a matriz (datas × tickers) de scores de uma combinação.
+    
+    Com factor_weights, o score final é recombinado como em
+    ScoringEngine.calculate_final_score: o peso de um fator sem score (NaN) é
+    redistribuído proporcionalmente entre os fatores disponíveis. Sem nenhum
+    fator disponível (ex.: ticker fora do snapshot) o score fica NaN.
+    
+    Args:
+        scores: Tensor campos × datas × tickers na ordem de SCORE_FIELDS
+        params: Parâmetros da combinação
+        
+    Returns:
+        Matriz de scores usada na seleção e ponderação
+    """
+    layers = dict(zip(SCORE_FIELDS, scores))
+    factor_weights = params.get('factor_weights')
+    alpha = params.get('alpha')
+    
+    if factor_weights:
+        factor_scores = np.stack([layers[f'{factor}_score'] for factor in FACTOR_NAMES])
+        weights = np.array([
+            float(factor_weights.get(factor, 0.0)) for factor in FACTOR_NAMES
+        ])[:, np.newaxis, np.newaxis]
+        available = ~np.isnan(factor_scores)
+        
+        # Normaliza pela soma dos pesos dos fatores disponíveis
+        total_weight = np.where(available, weights, 0.0).sum(axis=0)
+        weighted = np.where(available, weights * factor_scores, 0.0).sum(axis=0)
+        base = np.divide(
+            weighted, total_weight,
+            out=np.full(total_weight.shape, np.nan),
+            where=total_weight > 0
+        )
+    else:
+        base = layers['final_score']
+    
+    if not params.get('use_smoothing', False):
+        return base
+    if alpha is None and not factor_weights:
+        return layers['final_score_smoothed']
+    
+    # Suavização recursiva entre snapshots (score anterior ausente = atual)
+    smoothing = TemporalSmoothing(alpha=DEFAULT_ALPHA if alpha is None else alpha)
+    smoothed = np.array(base, dtype=float, copy=True)
+    for t in range(1, len(smoothed)):
+        smoothed[t] = smoothing.smooth_values(base[t], smoothed[t - 1])
+    
+    return smoothed
+
+
+def evaluate_combination(
+    data: Mapping[str, np.ndarray],
+    params: Mapping[str, Any],
+    transaction_cost: float = 0.0,
+    risk_free_rate: float = 0.0
+) -> Dict[str, float]:
+    """
+    Simula uma combinação sobre as matrizes carregadas e calcula as métricas.
+    
+    Args:
+        data: Saída de ParameterSweep.load
+        params: Parâmetros da combinação
+        transaction_cost: Custo por unidade negociada
+        risk_free_rate: Taxa livre de risco anualizada
+        
+    Returns:
+        Dict de métricas (chaves de PerformanceMetrics.calculate_metrics_matrix,
+        num_rebalances e num_trades)
+    """
+    scores = combination_scores(data['scores'], params)
+    n_periods = data['period_returns'].shape[0]
+    
+    weights = VectorizedBacktest.weights_from_scores(
+        scores[:n_periods],
+        data['ranks'][:n_periods],
+        int(params['top_n']),
+        params.get('weight_method', 'equal')
+    )
+    active = (weights > 0).any(axis=1)
+    weights = weights[active]
+    periods = VectorizedBacktest.simulate_arrays(
+        weights,
+        data['period_returns'][active],
+        transaction_cost
+    )
+    
+    # Sem benchmark na varredura: alpha, beta e information_ratio ficam de fora
+    metrics = PerformanceMetrics.calculate_metrics_matrix(
+        periods['net_return'],
+        weights,
+        risk_free_rate=risk_free_rate
+    )
+    
+    return {
+        **{
+            key: float(values[0]) for key, values in metrics.items()
+            if key not in ('alpha', 'beta', 'information_ratio')
+        },
+        'num_rebalances': int(len(weights)),
+        'num_trades': int((weights > 0).sum()),
+    }
+
+
+def _share(array: np.ndarray) -> shared_memory.SharedMemory:
+    """Copia um array para um novo segmento de memória compartilhada."""
+    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=np.float64, buffer=segment.buf)[...] = array
+    return segment
+
+
+def _attach_worker(specs: List[tuple], settings: Dict[str, float]) -> None:
+    """Initializer do pool: mapeia os segmentos como arrays somente leitura."""
+    for name, segment_name, shape in specs:
+        segment = shared_memory.SharedMemory(name=segment_name)
+        array = np.ndarray(shape, dtype=np.float64, buffer=segment.buf)
+        array.flags.writeable = False
+        _WORKER_SEGMENTS.append(segment)
+        _WORKER_DATA[name] = array
+    _WORKER_SETTINGS.update(settings)
+
+
+def _evaluate_in_worker(params: Dict[str, Any]) -> Dict[str, float]:
+    """Avalia uma combinação no processo de trabalho."""
+    return evaluate_combination(_WORKER_DATA, params, **_WORKER_SETTINGS)
@@ -0,0 +1,421 @@
+"""
+Núcleo vetorizado do backtest.
+
+Trabalha sobre matrizes datas de rebalanceamento × tickers:
+- pesos, montados a partir dos snapshots de ranking
+- retornos de período, montados a partir da matriz de preços do provider
+
+Retorno, turnover e custos de todos os períodos saem de operações de
+array. BacktestEngine.run_backtest_loop mantém o laço original período a
+período como implementação de referência.
+
+simulate_daily marca o portfólio diariamente sobre a matriz de preços:
+os pesos derivam com os preços entre rebalanceamentos e o custo incide
+sobre o volume negociado contra os pesos derivados.
+"""
+
+from typing import Dict, List, Optional, Sequence
+from datetime import date
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_METHODS = ('equal', 'score_weighted')
+
+
+class VectorizedBacktest:
+    """
+    Operações matriciais do backtest.
+    
+    Example:
+        >>> weights = VectorizedBacktest.build_weight_matrix(snapshots, dates[:-1], top_n=10)
+        >>> returns = provider.get_period_return_matrix(weights.columns, dates)
+        >>> periods = VectorizedBacktest.simulate(weights, returns, transaction_cost=0.001)
+    """
+    
+    @staticmethod
+    def build_weight_matrix(
+        snapshots: pd.DataFrame,
+        rebalance_dates: Sequence[date],
+        top_n: int,
+        weight_method: str = 'equal',
+        score_column: str = 'final_score'
+    ) -> pd.DataFrame:
+        """
+        Monta a matriz de pesos alvo a partir dos snapshots de ranking.
+        
+        Segue as regras de Portfolio: Top N por score (empates pelo rank),
+        com scores NaN no fim da fila e tratados como zero; score_weighted
+        usa max(score, 0) normalizado e cai para equal weight quando a soma
+        é zero.
+        
+        Args:
+            snapshots: DataFrame longo com ['date', 'ticker', score_column, 'rank']
+            rebalance_dates: Datas das linhas do resultado
+            top_n: Número de ativos por data
+            weight_method: 'equal' ou 'score_weighted'
+            score_column: Coluna de score usada na seleção e ponderação
+            
+        Returns:
+            DataFrame (rebalance_dates × tickers) com pesos; linhas sem
+            snapshot ficam zeradas
+            
+        Raises:
+            ValueError: Se weight_method for desconhecido
+        """
+        if weight_method not in WEIGHT_METHODS:
+            raise ValueError(f"weight_method must be one of {WEIGHT_METHODS}")
+        
+        index = pd.DatetimeIndex(pd.to_datetime(list(rebalance_dates)))
+        if snapshots.empty:
+            return pd.DataFrame(index=index, columns=[], dtype=float)
+        
+        frame = snapshots[['date', 'ticker', score_column, 'rank']].copy()
+        frame['date'] = pd.to_datetime(frame['date'])
+        frame[score_column] = pd.to_numeric(frame[score_column], errors='coerce')
+        frame = frame[frame['date'].isin(index)]
+        if frame.empty:
+            return pd.DataFrame(index=index, columns=[], dtype=float)
+        
+        tickers = sorted(frame['ticker'].unique())
+        scores = frame.pivot(index='date', columns='ticker', values=score_column)
+        ranks = frame.pivot(index='date', columns='ticker', values='rank')
+        
+        weights = pd.DataFrame(
+            VectorizedBacktest.weights_from_scores(
+                scores.reindex(index=index, columns=tickers).to_numpy(dtype=float),
+                ranks.reindex(index=index, columns=tickers).to_numpy(dtype=float),
+                top_n,
+                weight_method
+            ),
+            index=index,
+            columns=tickers
+        )
+        
+        # Só tickers selecionados em alguma data
+        return weights.loc[:, weights.gt(0).any(axis=0)]
+    
+    @staticmethod
+    def weights_from_scores(
+        scores: np.ndarray,
+        ranks: np.ndarray,
+        top_n: int,
+        weight_method: str = 'equal'
+    ) -> np.ndarray:
+        """
+        Seleciona o Top N e calcula os pesos de todas as datas de uma vez.
+        
+        A ordem de seleção em cada linha é score decrescente (NaN por
+        último), rank e posição da coluna.
+        
+        Args:
+            scores: Matriz (datas × tickers) de scores (NaN = sem score)
+            ranks: Matriz (datas × tickers) de ranks (NaN = fora do snapshot)
+            top_n: Número de ativos por data
+            weight_method: 'equal' ou 'score_weighted'
+            
+        Returns:
+            Matriz de pesos com o mesmo formato (linhas somam 1 ou 0)
+            
+        Raises:
+            ValueError: Se weight_method for desconhecido
+        """
+        if weight_method not in WEIGHT_METHODS:
+            raise ValueError(f"weight_method must be one of {WEIGHT_METHODS}")
+        
+        scores = np.asarray(scores, dtype=float)
+        ranks = np.asarray(ranks, dtype=float)
+        n_tickers = scores.shape[1]
+        
+        present = ~np.isnan(ranks)
+        missing_score = np.isnan(scores)
+        columns = np.broadcast_to(np.arange(n_tickers), scores.shape)
+        
+        # np.lexsort ordena pela última chave primeiro
+        order = np.lexsort((
+            columns,
+            np.where(present, ranks, 0.0),
+            np.where(missing_score, 0.0, -scores),
+            missing_score,
+            ~present,
+        ), axis=-1)
+        position = np.empty_like(order)
+        np.put_along_axis(position, order, columns, axis=-1)
+        selected = present & (position < top_n)
+        
+        if weight_method == 'equal':
+            raw = selected.astype(float)
+        else:
+            raw = np.where(selected & ~missing_score, np.clip(scores, 0.0, None), 0.0)
+        
+        total = raw.sum(axis=1, keepdims=True)
+        count = selected.sum(axis=1, keepdims=True)
+        
+        return np.where(
+            total > 0,
+            raw / np.where(total > 0, total, 1.0),
+            np.where(selected, 1.0 / np.maximum(count, 1), 0.0)
+        )
+    
+    @staticmethod
+    def simulate(
+        weights: pd.DataFrame,
+        period_returns: pd.DataFrame,
+        transaction_cost: float = 0.0
+    ) -> pd.DataFrame:
+        """
+        Calcula retorno, turnover e custo de todos os períodos.
+        
+        Linhas sem pesos (sem snapshot ou sem ativo selecionado) são
+        descartadas, como no laço de referência. Retornos ausentes contam
+        como zero. O custo é transaction_cost × volume negociado
+        (soma de |Δpeso| contra os pesos alvo do período anterior; o
+        primeiro período parte do caixa).
+        
+        Args:
+            weights: Matriz de pesos (datas × tickers)
+            period_returns: Matriz de retornos do período iniciado em cada data
+            transaction_cost: Custo por unidade negociada (ex: 0.001 = 0.1%)
+            
+        Returns:
+            DataFrame indexado pela data de rebalanceamento com as colunas
+            gross_return, traded, turnover, cost e net_return
+        """
+        active = weights.gt(0).any(axis=1)
+        held = weights.loc[active]
+        
+        r = period_returns.reindex(index=held.index, columns=held.columns)
+        periods = VectorizedBacktest.simulate_arrays(
+            held.to_numpy(dtype=float),
+            r.to_numpy(dtype=float),
+            transaction_cost
+        )
+        
+        return pd.DataFrame(periods, index=held.index)
+    
+    @staticmethod
+    def simulate_arrays(
+        weights: np.ndarray,
+        period_returns: np.ndarray,
+        transaction_cost: float = 0.0
+    ) -> Dict[str, np.ndarray]:
+        """
+        Versão em arrays de simulate, para matrizes já alinhadas.
+        
+        Args:
+            weights: Matriz (períodos × tickers) só com períodos investidos
+            period_returns: Matriz de retornos alinhada (NaN = sem retorno)
+            transaction_cost: Custo por unidade negociada
+            
+        Returns:
+            Dict com arrays gross_return, traded, turnover, cost e net_return
+        """
+        w = np.asarray(weights, dtype=float)
+        r = np.asarray(period_returns, dtype=float)
+        r = np.where(np.isnan(r), 0.0, r)
+        
+        gross = (w * r).sum(axis=1)
+        previous = np.vstack([np.zeros((1, w.shape[1])), w[:-1]]) if len(w) else w
+        traded = np.abs(w - previous).sum(axis=1)
+        cost = transaction_cost * traded
+        
+        return {
+            'gross_return': gross,
+            'traded': traded,
+            'turnover': traded / 2.0,
+            'cost': cost,
+            'net_return': gross - cost,
+        }
+    
+    @staticmethod
+    def simulate_daily(
+        weights: pd.DataFrame,
+        prices: pd.DataFrame,
+        transaction_cost: float = 0.0,
+        initial_capital: float = 100000.0,
+        benchmark: Optional[pd.Series] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Marca o portfólio diariamente entre rebalanceamentos.
+        
+        O calendário começa na primeira data de weights e segue os pregões
+        de prices. Cada rebalanceamento acontece no fechamento da data (ou
+        do último pregão até ela); até o próximo, as posições derivam com os
+        preços. Linhas sem pesos não rebalanceiam (as posições seguem
+        derivando) e, antes do primeiro rebalanceamento, o capital fica em
+        caixa. O custo é transaction_cost × soma de |peso alvo − peso
+        derivado| e é descontado do NAV no próprio dia do rebalanceamento.
+        Ativos sem preço contam como retorno zero; ativos listados depois do
+        rebalanceamento passam a render a partir do primeiro pregão.
+        
+        Args:
+            weights: Matriz de pesos alvo (datas de rebalanceamento × tickers)
+            prices: Matriz de preços (pregões × tickers, NaN = sem preço)
+            transaction_cost: Custo por unidade negociada (ex: 0.001 = 0.1%)
+            initial_capital: NAV inicial
+            benchmark: Série de preços do benchmark por pregão (opcional)
+            
+        Returns:
+            Dict com:
+            - 'nav': DataFrame indexado por dia com nav, daily_return,
+              benchmark_nav e benchmark_return (NaN sem benchmark)
+            - 'rebalances': DataFrame indexado pela data de rebalanceamento
+              com traded, turnover e cost
+        """
+        rebalance_index = pd.DatetimeIndex(weights.index)
+        price_index = pd.DatetimeIndex(prices.index)
+        if len(rebalance_index) == 0:
+            return {
+                'nav': pd.DataFrame(
+                    columns=['nav', 'daily_return', 'benchmark_nav', 'benchmark_return'],
+                    index=rebalance_index, dtype=float
+                ),
+                'rebalances': pd.DataFrame(
+                    columns=['traded', 'turnover', 'cost'], index=rebalance_index, dtype=float
+                ),
+            }
+        
+        first = rebalance_index[0]
+        days = price_index[price_index > first].insert(0, first)
+        
+        # Preços (último preço conhecido) em cada dia do calendário
+        tickers = list(weights.columns)
+        asof = prices.reindex(columns=tickers).sort_index().ffill()
+        values = asof.reindex(asof.index.union(days)).ffill().reindex(days).to_numpy(dtype=float)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            daily = values[1:] / values[:-1] - 1.0
+        daily = np.where(np.isnan(daily), 0.0, daily)
+        growth = np.vstack([np.ones((1, len(tickers))), np.cumprod(1.0 + daily, axis=0)])
+        
+        # Rebalanceamentos efetivos, no último pregão até cada data
+        w = weights.to_numpy(dtype=float)
+        active = (w > 0).any(axis=1)
+        positions = days.searchsorted(rebalance_index[active], side='right') - 1
+        w = w[active]
+        # Dois rebalanceamentos no mesmo pregão: vale o último
+        keep = np.r_[positions[1:] != positions[:-1], True][:len(positions)]
+        positions, w = positions[keep], w[keep]
+        
+        n_days = len(days)
+        nav = np.full(n_days, float(initial_capital))
+        traded = np.zeros(len(positions))
+        
+        if len(positions):
+            # segment[t] = rebalanceamento vigente nos retornos do dia t (-1 = caixa)
+            segment = np.searchsorted(positions, np.arange(n_days), side='left') - 1
+            invested = segment >= 0
+            current = np.maximum(segment, 0)
+            
+            relative = growth / growth[positions[current]]
+            value = np.where(invested, (w[current] * relative).sum(axis=1), 1.0)
+            
+            # Pesos derivados no pregão de cada rebalanceamento, antes da troca
+            end_value = value[positions[1:]]
+            drifted = w[:-1] * relative[positions[1:]] / end_value[:, None]
+            traded = np.abs(w - np.vstack([np.zeros((1, len(tickers))), drifted])).sum(axis=1)
+            
+            # NAV logo após cada rebalanceamento, já descontado o custo
+            after_trade = (
+                initial_capital
+                * np.cumprod(1.0 - transaction_cost * traded)
+                * np.r_[1.0, np.cumprod(end_value)]
+            )
+            nav = np.where(invested, after_trade[current] * value, nav)
+            nav[positions] = after_trade
+        
+        cost = transaction_cost * traded
+        
+        daily_return = np.r_[0.0, nav[1:] / nav[:-1] - 1.0]
+        
+        benchmark_nav = np.full(n_days, np.nan)
+        benchmark_return = np.full(n_days, np.nan)
+        if benchmark is not None:
+            series = benchmark.sort_index().ffill()
+            level = series.reindex(series.index.union(days)).ffill().reindex(days).to_numpy(dtype=float)
+            valid = np.flatnonzero(~np.isnan(level))
+            if len(valid):
+                benchmark_nav = initial_capital * level / level[valid[0]]
+                benchmark_return = np.r_[np.nan, benchmark_nav[1:] / benchmark_nav[:-1] - 1.0]
+                benchmark_return[valid[0]] = 0.0
+        
+        return {
+            'nav': pd.DataFrame({
+                'nav': nav,
+                'daily_return': daily_return,
+                'benchmark_nav': benchmark_nav,
+                'benchmark_return': benchmark_return,
+            }, index=days),
+            'rebalances': pd.DataFrame({
+                'traded': traded,
+                'turnover': traded / 2.0,
+                'cost': cost,
+            }, index=days[positions]),
+        }
+    
+    @staticmethod
+    def to_nav_records(nav: pd.DataFrame) -> List[Dict]:
+        """Converte a saída 'nav' de simulate_daily em dicts no formato de BacktestNAV."""
+        frame = nav.astype(object).where(nav.notna(), None)
+        return [
+            {
+                'date': day.date(),
+                'nav': row['nav'],
+                'daily_return': row['daily_return'],
+                'benchmark_nav': row['benchmark_nav'],
+                'benchmark_return': row['benchmark_return'],
+            }
+            for day, row in zip(pd.DatetimeIndex(nav.index), frame.to_dict('records'))
+        ]
+    
+    @staticmethod
+    def to_position_records(
+        weights: pd.DataFrame,
+        scores: Optional[pd.DataFrame] = None
+    ) -> List[Dict]:
+        """
+        Converte a matriz de pesos em dicts no formato de BacktestPosition.
+        
+        Args:
+            weights: Matriz de pesos alvo (datas × tickers)
+            scores: Matriz de scores no momento da seleção (opcional)
+            
+        Returns:
+            Lista de dicts com date, ticker, weight e score_at_selection,
+            só com pesos positivos, ordenada por data e ticker
+        """
+        w = weights.to_numpy(dtype=float)
+        rows, cols = np.nonzero(w > 0)
+        if scores is not None:
+            selected_scores = scores.reindex(
+                index=weights.index, columns=weights.columns
+            ).to_numpy(dtype=float)[rows, cols]
+        else:
+            selected_scores = np.full(len(rows), np.nan)
+        
+        days = pd.DatetimeIndex(weights.index)
+        tickers = list(weights.columns)
+        order = np.lexsort((np.array(tickers, dtype=object)[cols].astype(str), rows))
+        
+        return [
+            {
+                'date': days[row].date(),
+                'ticker': tickers[col],
+                'weight': float(w[row, col]),
+                'score_at_selection': None if np.isnan(score) else float(score),
+            }
+            for row, col, score in zip(rows[order], cols[order], selected_scores[order])
+        ]
+    
+    @staticmethod
+    def to_portfolio_history(weights: pd.DataFrame) -> List[Dict[str, float]]:
+        """Converte as linhas com pesos em dicts {ticker: weight}, sem pesos zero."""
+        history = []
+        for _, row in weights.iterrows():
+            held = row[row > 0]
+            if not held.empty:
+                history.append({ticker: float(w) for ticker, w in held.items()})
+        return history
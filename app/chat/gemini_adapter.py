@@ -11,8 +11,12 @@ from datetime import date, datetime, timedelta
 from google import genai
 from google.genai import types
 from sqlalchemy.orm import Session
+import numpy as np
 import requests
 
+from app.scoring.ranker import IndexedRanking, RankingEntry
+from app.scoring.score_service import ScoreService
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,6 +38,19 @@ def _serialize_dates(obj):
     return obj
 
 
+def _entry_to_dict(entry: RankingEntry) -> Dict[str, Any]:
+    """Converte uma entrada do ranking indexado no formato das respostas de ferramenta."""
+    return {
+        "ticker": entry.ticker,
+        "final_score": entry.score,
+        "rank": entry.rank,
+        "momentum_score": entry.momentum_score,
+        "quality_score": entry.quality_score,
+        "value_score": entry.value_score,
+        "confidence": entry.confidence,
+    }
+
+
 class GeminiChatAdapter:
     """Adaptador para chat com Gemini usando ferramentas do sistema."""
     
@@ -299,6 +316,16 @@ class GeminiChatAdapter:
             )
         ]
     
+    def _latest_ranking(self) -> IndexedRanking:
+        """
+        Carrega o ranking indexado da data mais recente.
+        
+        Returns:
+            IndexedRanking (vazio se não houver scores)
+        """
+        service = ScoreService(self.db)
+        return service.get_indexed_ranking(service.get_latest_date())
+    
     async def _execute_function(self, function_name: str, args: Dict[str, Any]) -> Dict:
         """
         Executa uma função do sistema.
@@ -320,14 +347,12 @@ class GeminiChatAdapter:
         
         try:
             if function_name == "get_ranking":
+                # Limite aplicado pelo ranking indexado (seleção parcial)
                 result = await get_ranking(
                     date=None,
+                    limit=args.get("limit"),
                     db=self.db
                 )
-                # Aplicar limite se fornecido
-                if "limit" in args:
-                    result.rankings = result.rankings[:args["limit"]]
-                    result.total_assets = len(result.rankings)
                 return _serialize_dates(result.dict())
             
             elif function_name == "get_top_stocks":
@@ -362,6 +387,8 @@ class GeminiChatAdapter:
                 tickers = [t.upper() for t in args["tickers"]]
                 comparisons = []
                 
+                # Após o primeiro ativo, explicação e fatores vêm do cache
+                # aquecido em batch para a data
                 for ticker in tickers:
                     try:
                         result = await get_asset_detail(
@@ -377,6 +404,7 @@ class GeminiChatAdapter:
                             "momentum_score": asset_data["score"]["momentum_score"],
                             "quality_score": asset_data["score"]["quality_score"],
                             "value_score": asset_data["score"]["value_score"],
+                            "explanation": asset_data["explanation"],
                         })
                     except Exception as e:
                         comparisons.append({
@@ -387,25 +415,26 @@ class GeminiChatAdapter:
                 return _serialize_dates({"comparison": comparisons})
             
             elif function_name == "search_by_criteria":
-                # Obter ranking completo
-                result = await get_ranking(date=None, db=self.db)
-                rankings = result.dict()["rankings"]
+                ranking = self._latest_ranking()
                 
-                # Filtrar por critérios
-                filtered = []
-                for asset in rankings:
-                    if "min_momentum" in args and asset["momentum_score"] < args["min_momentum"]:
-                        continue
-                    if "min_quality" in args and asset["quality_score"] < args["min_quality"]:
-                        continue
-                    if "min_value" in args and asset["value_score"] < args["min_value"]:
-                        continue
-                    
-                    filtered.append(asset)
+                # Filtrar por critérios sobre os arrays do ranking
+                mask = np.ones(len(ranking), dtype=bool)
+                if "min_momentum" in args:
+                    mask &= ranking.momentum_scores >= args["min_momentum"]
+                if "min_quality" in args:
+                    mask &= ranking.quality_scores >= args["min_quality"]
+                if "min_value" in args:
+                    mask &= ranking.value_scores >= args["min_value"]
+                matching = set(np.asarray(ranking.tickers)[mask])
                 
-                # Aplicar limite
+                # Percorrer em ordem de ranking até o limite
                 max_results = args.get("max_results", 10)
-                filtered = filtered[:max_results]
+                filtered = []
+                for entry in ranking:
+                    if len(filtered) >= max_results:
+                        break
+                    if entry.ticker in matching:
+                        filtered.append(_entry_to_dict(entry))
                 
                 return _serialize_dates({
                     "total_found": len(filtered),
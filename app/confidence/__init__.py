@@ -1,4 +1,4 @@
-"""Motor de confiança (placeholder)."""
+"""Motor de confiança baseado em cobertura de dados."""
 
 from app.confidence.confidence_engine import ConfidenceEngine
 
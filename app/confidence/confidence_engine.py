@@ -1,50 +1,232 @@
 """
 Motor de confiança para cálculo de score de confiabilidade.
 
-Fase 1: Implementação placeholder que retorna valor fixo.
-Fase Futura: Implementar métricas estatísticas como:
-    - Sharpe ratio histórico do fator
-    - Consistência temporal
-    - Cobertura de dados
-    - Dispersão cross-sectional
+A confiança mede a cobertura dos dados que sustentam o score de cada ativo,
+combinando quatro componentes em [0, 1]:
+    - history: profundidade do histórico de preços e de períodos fundamentalistas
+    - completeness: fração dos fatores disponíveis antes da imputação
+    - imputation: 1 - fração dos fatores imputados pelo MissingValueHandler
+    - fundamental: overall_confidence do histórico adaptativo (FeatureMonthly)
+
+O cálculo é feito para o universo inteiro com operações de array, a partir
+de dados já carregados pelo pipeline, sem consultas adicionais. Componentes
+indisponíveis ficam fora da média e seus pesos são redistribuídos; sem
+nenhum componente a confiança é neutra (0.5).
 
 Valida: Requisitos 10.1, 10.2, 10.3
 """
 
-from typing import Dict, Optional
+from typing import Dict, Mapping, Optional, Sequence
 import logging
 
+import numpy as np
+import pandas as pd
+
 logger = logging.getLogger(__name__)
 
+# Confiança atribuída quando não há nenhuma informação de cobertura
+DEFAULT_CONFIDENCE = 0.5
+
+# Colunas de entrada de calculate_universe_confidence
+COVERAGE_COLUMNS = (
+    'price_history_days',
+    'fundamental_periods',
+    'factor_completeness',
+    'imputation_ratio',
+    'overall_confidence',
+)
+
+# Pesos padrão dos componentes de confiança
+CONFIDENCE_COMPONENT_WEIGHTS = {
+    'history': 0.25,
+    'completeness': 0.25,
+    'imputation': 0.25,
+    'fundamental': 0.25,
+}
+
 
 class ConfidenceEngine:
     """
     Motor de confiança para calcular score de confiabilidade das recomendações.
     
-    Esta é uma implementação placeholder para a Fase 1. O método calculate_confidence
-    retorna um valor fixo de 0.5, mas a interface está estruturada para aceitar
-    implementações estatísticas futuras.
-    
-    Fase Futura poderá incluir:
-    - Análise de Sharpe ratio histórico dos fatores
-    - Métricas de consistência temporal
-    - Avaliação de cobertura de dados
-    - Análise de dispersão cross-sectional
-    - Backtesting de performance histórica
+    A confiança é derivada da cobertura de dados de cada ativo (ver docstring
+    do módulo). calculate_universe_confidence é o ponto de entrada em batch;
+    calculate_confidence e calculate_batch_confidence aceitam as mesmas
+    métricas via historical_data e retornam 0.5 quando nenhuma é informada.
     
+    Example:
+        >>> engine = ConfidenceEngine()
+        >>> coverage = ConfidenceEngine.build_coverage_frame(
+        ...     tickers, raw_factors=analysis_df,
+        ...     price_history_days=price_days, imputation_log=summary
+        ... )
+        >>> confidence = engine.calculate_universe_confidence(coverage)
+        
     Valida: Requisitos 10.1, 10.2, 10.3
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        weights: Optional[Mapping[str, float]] = None,
+        target_price_days: int = 252,
+        target_fundamental_periods: int = 3
+    ):
         """
         Inicializa o motor de confiança.
         
+        Args:
+            weights: Pesos por componente (history, completeness, imputation,
+                fundamental); componentes ausentes têm peso zero
+            target_price_days: Pregões de histórico para confiança plena no
+                componente de preços (252 = um ano)
+            target_fundamental_periods: Períodos fundamentalistas para
+                confiança plena (3, como nas métricas de 3 anos)
+            
+        Raises:
+            ValueError: Se algum peso for negativo ou o componente desconhecido
+            
         Valida: Requisito 10.1
         """
-        logger.info("ConfidenceEngine initialized (placeholder mode)")
+        weights = dict(CONFIDENCE_COMPONENT_WEIGHTS if weights is None else weights)
+        unknown = set(weights) - set(CONFIDENCE_COMPONENT_WEIGHTS)
+        if unknown or any(w < 0 for w in weights.values()):
+            raise ValueError(
+                f"Weights must be non-negative and in {tuple(CONFIDENCE_COMPONENT_WEIGHTS)}"
+            )
+        
+        self.weights = np.array(
+            [weights.get(name, 0.0) for name in CONFIDENCE_COMPONENT_WEIGHTS], dtype=float
+        )
+        self.target_price_days = target_price_days
+        self.target_fundamental_periods = target_fundamental_periods
+        
+        logger.info("ConfidenceEngine initialized (data coverage mode)")
+    
+    @staticmethod
+    def build_coverage_frame(
+        tickers: Sequence[str],
+        raw_factors: Optional[pd.DataFrame] = None,
+        feature_columns: Optional[Sequence[str]] = None,
+        price_history_days: Optional[Mapping[str, int]] = None,
+        fundamental_periods: Optional[Mapping[str, int]] = None,
+        imputation_log: Optional[pd.DataFrame] = None,
+        imputable_features: Optional[int] = None,
+        overall_confidence: Optional[Mapping[str, float]] = None
+    ) -> pd.DataFrame:
+        """
+        Monta as métricas de cobertura a partir de dados já carregados.
+        
+        Args:
+            tickers: Universo, na ordem desejada do resultado
+            raw_factors: Fatores ANTES da imputação (NaN = ausente), tickers no
+                índice; usado para factor_completeness e, se presente, para
+                overall_confidence
+            feature_columns: Colunas de raw_factors que contam na completude
+                (None = todas as numéricas, exceto overall_confidence)
+            price_history_days: Pregões de preço carregados por ticker
+            fundamental_periods: Períodos fundamentalistas carregados por ticker
+            imputation_log: Saída de MissingValueHandler.get_imputation_summary
+            imputable_features: Número de fatores sujeitos à imputação por
+                ticker (denominador de imputation_ratio)
+            overall_confidence: overall_confidence por ticker (sobrepõe a
+                coluna de raw_factors)
+            
+        Returns:
+            DataFrame indexado por ticker com COVERAGE_COLUMNS (NaN = indisponível)
+        """
+        index = pd.Index(list(tickers))
+        coverage = pd.DataFrame(np.nan, index=index, columns=list(COVERAGE_COLUMNS))
+        
+        if price_history_days is not None:
+            coverage['price_history_days'] = pd.Series(price_history_days, dtype=float)
+        if fundamental_periods is not None:
+            coverage['fundamental_periods'] = pd.Series(fundamental_periods, dtype=float)
+        
+        if raw_factors is not None and len(raw_factors.columns) > 0:
+            raw = raw_factors.reindex(index)
+            if feature_columns is None:
+                feature_columns = [
+                    col for col in raw.columns
+                    if col != 'overall_confidence'
+                    and pd.to_numeric(raw[col], errors='coerce').notna().sum() == raw[col].notna().sum()
+                ]
+            if feature_columns:
+                present = raw[list(feature_columns)].notna().to_numpy()
+                completeness = present.mean(axis=1)
+                # Tickers fora de raw_factors não têm informação de completude
+                completeness[~index.isin(raw_factors.index)] = np.nan
+                coverage['factor_completeness'] = completeness
+            if 'overall_confidence' in raw.columns:
+                coverage['overall_confidence'] = pd.to_numeric(
+                    raw['overall_confidence'], errors='coerce'
+                )
+        
+        if imputation_log is not None and imputable_features:
+            counts = (
+                imputation_log.groupby('ticker').size()
+                if not imputation_log.empty else pd.Series(dtype=float)
+            )
+            imputed = counts.reindex(index, fill_value=0).to_numpy(dtype=float)
+            coverage['imputation_ratio'] = np.minimum(imputed / imputable_features, 1.0)
+        
+        if overall_confidence is not None:
+            values = pd.Series(overall_confidence, dtype=float).reindex(index)
+            coverage['overall_confidence'] = values.fillna(coverage['overall_confidence'])
+        
+        return coverage
+    
+    def calculate_universe_confidence(self, coverage: pd.DataFrame) -> pd.Series:
+        """
+        Calcula a confiança de todos os ativos com operações de array.
+        
+        Args:
+            coverage: DataFrame indexado por ticker com qualquer subconjunto
+                de COVERAGE_COLUMNS (NaN = indisponível)
+            
+        Returns:
+            Series ticker -> confiança em [0, 1]
+            
+        Valida: Requisito 10.2
+        """
+        n_assets = len(coverage)
+        
+        def column(name: str) -> np.ndarray:
+            if name not in coverage.columns:
+                return np.full(n_assets, np.nan)
+            return pd.to_numeric(coverage[name], errors='coerce').to_numpy(dtype=float)
+        
+        price_depth = np.clip(column('price_history_days') / self.target_price_days, 0.0, 1.0)
+        fundamental_depth = np.clip(
+            column('fundamental_periods') / self.target_fundamental_periods, 0.0, 1.0
+        )
+        depth = np.column_stack([price_depth, fundamental_depth])
+        depth_count = np.sum(~np.isnan(depth), axis=1)
+        history = np.where(
+            depth_count > 0, np.nansum(depth, axis=1) / np.maximum(depth_count, 1), np.nan
+        )
+        
+        # Componentes na ordem de CONFIDENCE_COMPONENT_WEIGHTS
+        components = np.column_stack([
+            history,
+            np.clip(column('factor_completeness'), 0.0, 1.0),
+            1.0 - np.clip(column('imputation_ratio'), 0.0, 1.0),
+            np.clip(column('overall_confidence'), 0.0, 1.0),
+        ]) if n_assets else np.empty((0, len(self.weights)))
+        
+        available = ~np.isnan(components)
+        weights = np.where(available, self.weights, 0.0)
+        total_weight = weights.sum(axis=1)
+        weighted = np.where(available, components, 0.0) * weights
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            confidence = np.where(
+                total_weight > 0, weighted.sum(axis=1) / total_weight, DEFAULT_CONFIDENCE
+            )
+        
+        return pd.Series(confidence, index=coverage.index, name='confidence')
     
     def calculate_confidence(
-        self, 
+        self,
         ticker: str,
         score_result: Optional[Dict] = None,
         historical_data: Optional[Dict] = None
@@ -52,29 +234,26 @@ class ConfidenceEngine:
         """
         Calcula score de confiança para uma recomendação.
         
-        Fase 1 (Atual): Retorna valor fixo de 0.5 como placeholder.
-        
-        Fase Futura: Implementará cálculo estatístico baseado em:
-        - score_result: Resultado do scoring com breakdown de fatores
-        - historical_data: Dados históricos para análise de consistência
+        Atalho de calculate_universe_confidence para um único ativo.
+        Para o universo inteiro use calculate_universe_confidence.
         
         Args:
             ticker: Símbolo do ativo
-            score_result: Resultado do scoring (não usado na Fase 1)
-            historical_data: Dados históricos (não usado na Fase 1)
+            score_result: Resultado do scoring (não usado no cálculo)
+            historical_data: Métricas de cobertura do ativo, com chaves de
+                COVERAGE_COLUMNS (demais chaves são ignoradas)
             
         Returns:
-            Score de confiança entre 0 e 1.
-            Fase 1: Sempre retorna 0.5
+            Score de confiança entre 0 e 1 (0.5 sem métricas de cobertura)
             
         Valida: Requisitos 10.1, 10.2
         """
-        # Fase 1: Retornar valor fixo
-        confidence = 0.5
-        
-        logger.debug(
-            f"Calculated confidence for {ticker}: {confidence} (placeholder mode)"
+        coverage = pd.DataFrame(
+            [self._coverage_record(historical_data)], index=[ticker]
         )
+        confidence = float(self.calculate_universe_confidence(coverage).iloc[0])
+        
+        logger.debug(f"Calculated confidence for {ticker}: {confidence}")
         
         return confidence
     
@@ -86,30 +265,33 @@ class ConfidenceEngine:
         """
         Calcula scores de confiança para múltiplos ativos.
         
-        Fase 1: Retorna 0.5 para todos os ativos.
-        Fase Futura: Poderá usar análise cross-sectional para ajustar confiança.
-        
         Args:
             score_results: Dicionário {ticker: score_result}
-            historical_data: Dados históricos (não usado na Fase 1)
+            historical_data: Dicionário {ticker: métricas de cobertura}
+                (ver calculate_confidence)
             
         Returns:
             Dicionário {ticker: confidence_score}
             
         Valida: Requisito 10.2
         """
-        confidence_scores = {}
-        
-        for ticker in score_results.keys():
-            confidence_scores[ticker] = self.calculate_confidence(
-                ticker=ticker,
-                score_result=score_results.get(ticker),
-                historical_data=historical_data
-            )
-        
-        logger.info(
-            f"Calculated confidence for {len(confidence_scores)} assets "
-            f"(placeholder mode)"
+        historical_data = historical_data or {}
+        coverage = pd.DataFrame(
+            [self._coverage_record(historical_data.get(ticker)) for ticker in score_results],
+            index=list(score_results),
+            columns=list(COVERAGE_COLUMNS)
         )
+        confidence_scores = self.calculate_universe_confidence(coverage).to_dict()
+        
+        logger.info(f"Calculated confidence for {len(confidence_scores)} assets")
         
         return confidence_scores
+    
+    @staticmethod
+    def _coverage_record(data: Optional[Mapping]) -> Dict[str, float]:
+        """Extrai as métricas de cobertura conhecidas de um dict (None = NaN)."""
+        data = data if isinstance(data, Mapping) else {}
+        return {
+            name: np.nan if data.get(name) is None else data[name]
+            for name in COVERAGE_COLUMNS
+        }
@@ -39,6 +39,9 @@ class Settings(BaseSettings):
     winsorize_lower_pct: float = 0.05  # 5th percentile
     winsorize_upper_pct: float = 0.95  # 95th percentile
     
+    # Normalization Parameters
+    normalization_method: str = "percentile_rank"  # percentile_rank, rank_gaussian, robust_zscore
+    
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
@@ -7,13 +7,12 @@ Valida: Requisitos 2.9, 3.7
 import logging
 from datetime import date
 from typing import Dict, List, Tuple, Any
-import pandas as pd
 import numpy as np
 
 from sqlalchemy.orm import Session
 
-from app.models.schemas import FeatureDaily, FeatureMonthly, RawPriceDaily, RawFundamental
-from app.filters.eligibility_filter import EligibilityFilter
+from app.models.schemas import FeatureDaily, FeatureMonthly
+from app.filters.eligibility_filter import EligibilityFilter, load_eligibility_frame
 from app.config import Settings
 
 logger = logging.getLogger(__name__)
@@ -438,77 +437,17 @@ class FeatureService:
         """
         logger.info(f"Filtering {len(tickers)} assets for eligibility on {reference_date}")
         
-        assets_data = {}
+        # Uma única consulta agrega fundamentos, histórico de lucro e volume
+        # de todo o universo; as regras são aplicadas numa passada vetorizada
+        eligibility_frame = load_eligibility_frame(self.db, tickers, reference_date)
         
-        for ticker in tickers:
-            try:
-                # Buscar dados fundamentalistas mais recentes
-                fundamentals_query = self.db.query(RawFundamental).filter(
-                    RawFundamental.ticker == ticker,
-                    RawFundamental.period_end_date <= reference_date
-                ).order_by(RawFundamental.period_end_date.desc()).first()
-                
-                if not fundamentals_query:
-                    logger.warning(f"No fundamental data found for {ticker}")
-                    assets_data[ticker] = {
-                        'fundamentals': None,
-                        'volume_data': None
-                    }
-                    continue
-                
-                # Extrair dados fundamentalistas
-                fundamentals = {
-                    'shareholders_equity': fundamentals_query.shareholders_equity,
-                    'ebitda': fundamentals_query.ebitda,
-                    'revenue': fundamentals_query.revenue,
-                    'net_income_last_year': fundamentals_query.net_income,
-                    'net_debt_to_ebitda': fundamentals_query.total_debt / fundamentals_query.ebitda if (
-                        fundamentals_query.total_debt is not None and 
-                        fundamentals_query.ebitda is not None and 
-                        fundamentals_query.ebitda != 0
-                    ) else None
-                }
-                
-                # Buscar histórico de lucro líquido dos últimos 3 anos
-                net_income_history_query = self.db.query(RawFundamental).filter(
-                    RawFundamental.ticker == ticker,
-                    RawFundamental.period_end_date <= reference_date
-                ).order_by(RawFundamental.period_end_date.desc()).limit(3).all()
-                
-                fundamentals['net_income_history'] = [
-                    f.net_income for f in net_income_history_query if f.net_income is not None
-                ]
-                
-                # Buscar dados de volume (últimos 90 dias)
-                volume_query = self.db.query(RawPriceDaily).filter(
-                    RawPriceDaily.ticker == ticker,
-                    RawPriceDaily.date <= reference_date
-                ).order_by(RawPriceDaily.date.desc()).limit(90).all()
-                
-                if not volume_query:
-                    logger.warning(f"No volume data found for {ticker}")
-                    volume_data = None
-                else:
-                    volume_data = pd.DataFrame([
-                        {'date': p.date, 'volume': p.volume}
-                        for p in volume_query
-                    ])
-                
-                assets_data[ticker] = {
-                    'fundamentals': fundamentals,
-                    'volume_data': volume_data
-                }
-                
-            except Exception as e:
-                logger.error(f"Error gathering data for {ticker}: {e}")
-                assets_data[ticker] = {
-                    'fundamentals': None,
-                    'volume_data': None
-                }
-                continue
+        missing = eligibility_frame.index[~eligibility_frame['has_fundamentals']]
+        if len(missing) > 0:
+            logger.warning(f"No fundamental data found for {len(missing)} tickers")
         
-        # Aplicar filtro de elegibilidade
-        eligible_tickers, exclusion_reasons = self.eligibility_filter.filter_universe(assets_data)
+        eligible_tickers, exclusion_reasons = self.eligibility_filter.filter_frame(
+            eligibility_frame
+        )
         
         logger.info(
             f"Eligibility filter results: {len(eligible_tickers)} eligible, "
@@ -4,7 +4,7 @@ Cálculo de fatores fundamentalistas mensais.
 Valida: Requisitos 2.1, 2.2, 2.3, 2.4, 2.5, 2.6, 2.7
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Mapping, Optional, Tuple
 from app.core.exceptions import InsufficientDataError, CalculationError
 import logging
 import pandas as pd
@@ -19,10 +19,19 @@ class FundamentalFactorCalculator:
     Valida: Requisitos 2.1, 2.2, 2.3, 2.4, 2.5, 2.6, 2.7
     """
     
-    def __init__(self):
-        """Inicializa o calculador de fatores fundamentalistas."""
+    def __init__(self, sector_map: Optional[Mapping] = None):
+        """
+        Inicializa o calculador de fatores fundamentalistas.
+        
+        Args:
+            sector_map: Mapa imutável ticker -> SectorClassification carregado uma
+                        vez por execução (AssetInfoService.load_sector_classifications).
+                        Quando fornecido, a detecção de instituição financeira não
+                        faz nenhuma consulta ao banco ou ao Yahoo Finance.
+        """
         from app.factor_engine.normalizer import CrossSectionalNormalizer
         self.normalizer = CrossSectionalNormalizer()
+        self.sector_map = sector_map
     
     def _calculate_confidence_factor(self, periods_available: int, periods_ideal: int = 3) -> float:
         """
@@ -900,8 +909,9 @@ class FundamentalFactorCalculator:
         Detecta se o ativo é uma instituição financeira.
         
         Critérios:
-        1. Se temos db_session, usar AssetInfoService para verificar setor
-        2. Caso contrário, usar heurística: não tem EBITDA mas tem revenue e equity
+        1. Se temos sector_map com setor conhecido para o ticker, usá-lo
+        2. Se temos db_session (e nenhum sector_map), usar AssetInfoService
+        3. Caso contrário, usar heurística: não tem EBITDA mas tem revenue e equity
         
         Args:
             ticker: Símbolo do ativo
@@ -911,8 +921,14 @@ class FundamentalFactorCalculator:
         Returns:
             True se for instituição financeira
         """
-        # Método 1: Usar AssetInfoService se temos sessão do banco
-        if db_session is not None:
+        # Método 1: Classificação pré-carregada (sem consultas no loop)
+        if self.sector_map is not None:
+            classification = self.sector_map.get(ticker)
+            if classification is not None and classification.is_financial is not None:
+                return classification.is_financial
+        
+        # Método 2: Usar AssetInfoService se temos sessão do banco
+        elif db_session is not None:
             try:
                 from app.ingestion.asset_info_service import AssetInfoService
                 asset_service = AssetInfoService(db_session)
@@ -921,7 +937,7 @@ class FundamentalFactorCalculator:
                 logger.warning(f"Could not use AssetInfoService for {ticker}: {e}")
                 # Fallback para heurística
         
-        # Método 2: Heurística baseada nos dados
+        # Método 3: Heurística baseada nos dados
         ebitda = fundamentals_data.get('ebitda')
         revenue = fundamentals_data.get('revenue')
         shareholders_equity = fundamentals_data.get('shareholders_equity')
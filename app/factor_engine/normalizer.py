@@ -4,7 +4,7 @@ Normalização cross-sectional de fatores.
 Valida: Requisitos 2.8, 3.6
 """
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import pandas as pd
 import numpy as np
 import logging
@@ -12,6 +12,167 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _nan_quantiles(
+    sorted_values: np.ndarray,
+    valid_counts: np.ndarray,
+    quantiles: Tuple[float, ...],
+    axis: int = 0
+) -> np.ndarray:
+    """
+    Calcula quantis (interpolação linear) sobre valores já ordenados com NaN no fim.
+    
+    Equivale a np.nanpercentile(method='linear') e a pd.Series.quantile, mas
+    sem o apply_along_axis por coluna que o numpy usa quando há NaN.
+    
+    Args:
+        sorted_values: Array ordenado ao longo de `axis` (NaN ao final)
+        valid_counts: Número de valores não-nulos por fatia (shape sem `axis`)
+        quantiles: Quantis desejados em [0, 1]
+        axis: Eixo ordenado
+        
+    Returns:
+        Array com shape (len(quantiles), *valid_counts.shape); NaN onde não há dados
+    """
+    counts = np.expand_dims(valid_counts, axis)
+    last = np.maximum(counts - 1, 0)
+    results = []
+    
+    for q in quantiles:
+        position = q * last
+        lower_idx = np.floor(position).astype(np.intp)
+        upper_idx = np.minimum(lower_idx + 1, last)
+        weight = position - lower_idx
+        
+        below = np.take_along_axis(sorted_values, lower_idx, axis=axis)
+        above = np.take_along_axis(sorted_values, upper_idx, axis=axis)
+        
+        # Mesma fórmula de interpolação do numpy (_lerp) para resultados idênticos
+        diff = above - below
+        value = np.where(weight >= 0.5, above - diff * (1 - weight), below + diff * weight)
+        value = np.where(counts > 0, value, np.nan)
+        results.append(np.squeeze(value, axis=axis))
+    
+    return np.stack(results)
+
+
+# Métodos de normalização selecionáveis via Settings.normalization_method
+NORMALIZATION_METHODS = ('percentile_rank', 'rank_gaussian', 'robust_zscore')
+RANK_BASED_METHODS = ('percentile_rank', 'rank_gaussian')
+
+# Fator de consistência do MAD com o desvio padrão de uma normal
+MAD_SCALE = 1.4826
+
+
+def _norm_ppf(p: np.ndarray) -> np.ndarray:
+    """
+    Inversa da CDF normal padrão (algoritmo de Acklam, erro relativo < 1.2e-9).
+    
+    Implementação vetorizada para evitar dependência de scipy.
+    
+    Args:
+        p: Probabilidades em (0, 1)
+        
+    Returns:
+        Quantis da normal padrão (NaN onde p é NaN)
+    """
+    a = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+         1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+         6.680131188771972e+01, -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+         -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+         3.754408661907416e+00)
+    
+    p = np.asarray(p, dtype=float)
+    result = np.full(p.shape, np.nan)
+    p_low = 0.02425
+    
+    low = p < p_low
+    high = p > 1 - p_low
+    central = (p >= p_low) & (p <= 1 - p_low)
+    
+    q = np.sqrt(-2 * np.log(p[low]))
+    result[low] = (((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) / \
+        ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1)
+    
+    q = np.sqrt(-2 * np.log(1 - p[high]))
+    result[high] = -(((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) / \
+        ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1)
+    
+    q = p[central] - 0.5
+    r = q * q
+    result[central] = (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q / \
+        (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1)
+    
+    return result
+
+
+def _build_group_cube(values: np.ndarray, codes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Espalha uma matriz longa (linhas x fatores) em um cubo (grupos x linhas x fatores).
+    
+    Args:
+        values: Matriz (n_linhas, n_fatores)
+        codes: Código inteiro do grupo de cada linha (0..n_grupos-1)
+        
+    Returns:
+        Tupla (cube, positions) onde positions é a posição de cada linha dentro
+        do seu grupo; posições vazias do cubo são NaN
+    """
+    group_sizes = np.bincount(codes)
+    order = np.argsort(codes, kind='stable')
+    group_starts = np.concatenate(([0], np.cumsum(group_sizes)[:-1]))
+    positions = np.empty(len(codes), dtype=np.intp)
+    positions[order] = np.arange(len(codes)) - group_starts[codes[order]]
+    
+    cube = np.full((len(group_sizes), group_sizes.max(), values.shape[1]), np.nan)
+    cube[codes, positions] = values
+    
+    return cube, positions
+
+
+def _average_ranks(cube: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ranks médios (empates recebem a média das posições) ao longo do eixo 1.
+    
+    Equivale a pd.Series.rank(method='average', na_option='keep') aplicado a
+    cada fatia (grupo, fator), com um único argsort para o cubo inteiro.
+    
+    Args:
+        cube: Array (grupos x ativos x fatores) com NaN para valores ausentes
+        
+    Returns:
+        Tupla (ranks, valid_counts): ranks 1..n com NaN preservado e número
+        de valores válidos por (grupo, fator)
+    """
+    order = np.argsort(cube, axis=1, kind='stable')
+    sorted_values = np.take_along_axis(cube, order, axis=1)
+    valid = ~np.isnan(sorted_values)
+    
+    size = cube.shape[1]
+    idx = np.arange(size).reshape(1, size, 1)
+    
+    # Início e fim de cada sequência de valores iguais
+    new_run = np.ones(sorted_values.shape, dtype=bool)
+    new_run[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    run_end = np.ones(sorted_values.shape, dtype=bool)
+    run_end[:, :-1] = new_run[:, 1:]
+    
+    run_start = np.maximum.accumulate(np.where(new_run, idx, 0), axis=1)
+    run_stop = np.flip(
+        np.minimum.accumulate(np.flip(np.where(run_end, idx, size - 1), axis=1), axis=1),
+        axis=1
+    )
+    
+    sorted_ranks = np.where(valid, (run_start + run_stop) / 2.0 + 1.0, np.nan)
+    
+    ranks = np.empty_like(sorted_ranks)
+    np.put_along_axis(ranks, order, sorted_ranks, axis=1)
+    
+    return ranks, valid.sum(axis=1)
+
+
 class CrossSectionalNormalizer:
     """
     Normaliza fatores usando ranking percentual cross-sectional.
@@ -186,6 +347,135 @@ class CrossSectionalNormalizer:
         # Delegate to existing winsorize method
         return self.winsorize(series, lower_pct, upper_pct)
     
+    def winsorize_matrix(
+        self,
+        values: np.ndarray,
+        lower_pct: float = 0.05,
+        upper_pct: float = 0.95
+    ) -> np.ndarray:
+        """
+        Winsorize every column of a factor matrix in a single pass.
+        
+        Lower and upper percentiles are computed for all columns at once
+        (one sort along the asset axis) and values are clipped with one
+        vectorized operation. NaN values are ignored and preserved.
+        
+        Args:
+            values: 2D array with assets as rows and factors as columns
+            lower_pct: Lower percentile (default 5%)
+            upper_pct: Upper percentile (default 95%)
+        
+        Returns:
+            Winsorized copy of the matrix (float64)
+            
+        Raises:
+            ValueError: If percentiles are invalid or the array is not 2D
+            
+        Example:
+            >>> values = np.array([[1.0, 10.0], [2.0, 20.0], [100.0, 30.0]])
+            >>> normalizer = CrossSectionalNormalizer()
+            >>> clipped = normalizer.winsorize_matrix(values, 0.05, 0.95)
+        """
+        self._validate_percentiles(lower_pct, upper_pct)
+        
+        matrix = np.asarray(values, dtype=float)
+        if matrix.ndim != 2:
+            raise ValueError(f"Expected a 2D factor matrix, got {matrix.ndim} dimensions")
+        
+        if matrix.size == 0:
+            return matrix.copy()
+        
+        valid_counts = np.sum(~np.isnan(matrix), axis=0)
+        bounds = _nan_quantiles(
+            np.sort(matrix, axis=0), valid_counts, (lower_pct, upper_pct), axis=0
+        )
+        
+        return np.clip(matrix, bounds[0], bounds[1])
+    
+    def winsorize_frame(
+        self,
+        factors_df: pd.DataFrame,
+        factor_columns: List[str],
+        lower_pct: float = 0.05,
+        upper_pct: float = 0.95,
+        group_col: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Winsorize several factor columns at once, optionally per group.
+        
+        Without `group_col` the percentiles are cross-sectional over the whole
+        frame (same result as calling winsorize_series column by column).
+        With `group_col` (e.g. "date" for historical backfills in long format)
+        each group is clipped to its own percentiles. Groups are scattered into
+        a (groups x assets x factors) cube so that all percentiles are computed
+        with one sort, without a Python loop over groups.
+        
+        Args:
+            factors_df: DataFrame with factors (and group column, if used)
+            factor_columns: Columns to winsorize
+            lower_pct: Lower percentile (default 5%)
+            upper_pct: Upper percentile (default 95%)
+            group_col: Optional column defining independent cross-sections
+        
+        Returns:
+            Copy of the DataFrame with winsorized factor columns
+            
+        Raises:
+            ValueError: If columns don't exist or percentiles are invalid
+            
+        Example:
+            >>> normalizer = CrossSectionalNormalizer()
+            >>> clipped = normalizer.winsorize_frame(
+            ...     history_df, ['roe', 'pe_ratio'], group_col='date'
+            ... )
+        """
+        missing_cols = [col for col in factor_columns if col not in factors_df.columns]
+        if missing_cols:
+            raise ValueError(f"Columns not found in DataFrame: {missing_cols}")
+        if group_col is not None and group_col not in factors_df.columns:
+            raise ValueError(f"Group column '{group_col}' not found in DataFrame")
+        
+        self._validate_percentiles(lower_pct, upper_pct)
+        
+        winsorized_df = factors_df.copy()
+        if not factor_columns or factors_df.empty:
+            return winsorized_df
+        
+        values = factors_df[factor_columns].to_numpy(dtype=float)
+        
+        all_nan_cols = [
+            col for col, has_data in zip(factor_columns, (~np.isnan(values)).any(axis=0))
+            if not has_data
+        ]
+        for col in all_nan_cols:
+            logger.warning(f"Column '{col}' has all NaN values, skipping winsorization")
+        
+        if group_col is None:
+            clipped = self.winsorize_matrix(values, lower_pct, upper_pct)
+        else:
+            codes, _ = pd.factorize(factors_df[group_col], use_na_sentinel=False)
+            cube, _ = _build_group_cube(values, codes)
+            
+            valid_counts = np.sum(~np.isnan(cube), axis=1)
+            bounds = _nan_quantiles(
+                np.sort(cube, axis=1), valid_counts, (lower_pct, upper_pct), axis=1
+            )
+            
+            clipped = np.clip(values, bounds[0][codes], bounds[1][codes])
+        
+        winsorized_df[factor_columns] = clipped
+        
+        return winsorized_df
+    
+    @staticmethod
+    def _validate_percentiles(lower_pct: float, upper_pct: float) -> None:
+        """Valida que 0 <= lower < upper <= 1."""
+        if not (0 <= lower_pct < upper_pct <= 1):
+            raise ValueError(
+                f"Invalid percentiles: lower={lower_pct}, upper={upper_pct}. "
+                f"Must satisfy 0 <= lower < upper <= 1"
+            )
+    
     def normalize_factors_with_winsorization(
         self,
         factors_df: pd.DataFrame,
@@ -198,7 +488,7 @@ class CrossSectionalNormalizer:
         Normalize factors with optional winsorization using percentile ranking.
         
         Steps:
-        1. Apply winsorization to each factor (if enabled)
+        1. Apply winsorization to all factors in one pass (if enabled)
         2. Calculate cross-sectional percentile ranks and normalize to [-1, +1]
         
         Args:
@@ -235,20 +525,14 @@ class CrossSectionalNormalizer:
         # Criar cópia para não modificar o original
         processed_df = factors_df.copy()
         
-        # Step 1: Apply winsorization to each factor (if enabled)
+        # Step 1: Apply winsorization to all factors in one pass (if enabled)
         if winsorize:
-            for col in factor_columns:
-                # Pular se a coluna tem todos valores nulos
-                if processed_df[col].isna().all():
-                    logger.warning(f"Column '{col}' has all NaN values, skipping winsorization")
-                    continue
-                
-                # Aplicar winsorização
-                processed_df[col] = self.winsorize_series(
-                    processed_df[col],
-                    lower_pct=lower_pct,
-                    upper_pct=upper_pct
-                )
+            processed_df = self.winsorize_frame(
+                processed_df,
+                factor_columns,
+                lower_pct=lower_pct,
+                upper_pct=upper_pct
+            )
         
         # Step 2: Calculate cross-sectional percentile ranks
         normalized_df = processed_df.copy()
@@ -519,16 +803,12 @@ class CrossSectionalNormalizer:
         
         # Step 2: Aplicar winsorização (se habilitado)
         if winsorize:
-            for col in factor_columns:
-                if processed_df[col].isna().all():
-                    logger.warning(f"Column '{col}' has all NaN values, skipping winsorization")
-                    continue
-                
-                processed_df[col] = self.winsorize_series(
-                    processed_df[col],
-                    lower_pct=lower_pct,
-                    upper_pct=upper_pct
-                )
+            processed_df = self.winsorize_frame(
+                processed_df,
+                factor_columns,
+                lower_pct=lower_pct,
+                upper_pct=upper_pct
+            )
         
         # Step 3: Calcular z-score setorial para cada fator
         normalized_df = processed_df.copy()
@@ -556,3 +836,177 @@ class CrossSectionalNormalizer:
                     normalized_df[col] = 0.0
         
         return normalized_df
+    
+    def normalize_matrix(
+        self,
+        values: np.ndarray,
+        method: str = 'percentile_rank',
+        groups: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Normaliza todas as colunas de uma matriz de fatores de uma só vez.
+        
+        Métodos disponíveis:
+        - percentile_rank: 2 * rank(x) / N - 1, valores em [-1, +1]
+        - rank_gaussian: Φ⁻¹((rank(x) - 0.5) / N), ranks mapeados para normal padrão
+        - robust_zscore: (x - mediana) / (1.4826 * MAD)
+        
+        Os ranks são calculados com um único argsort sobre o cubo
+        (grupos x ativos x fatores), sem loop por coluna ou por grupo.
+        Fatias com um único valor válido ou sem dispersão recebem 0.0.
+        
+        Args:
+            values: Matriz 2D com ativos nas linhas e fatores nas colunas
+            method: Método de normalização (ver NORMALIZATION_METHODS)
+            groups: Rótulo de grupo por linha (ex: data, setor); None = um único corte
+            
+        Returns:
+            Matriz normalizada (float64) com NaN preservado
+            
+        Raises:
+            ValueError: Se o método é desconhecido ou a matriz não é 2D
+        """
+        if method not in NORMALIZATION_METHODS:
+            raise ValueError(
+                f"Unknown normalization method '{method}'. "
+                f"Expected one of {NORMALIZATION_METHODS}"
+            )
+        
+        matrix = np.asarray(values, dtype=float)
+        if matrix.ndim != 2:
+            raise ValueError(f"Expected a 2D factor matrix, got {matrix.ndim} dimensions")
+        
+        if matrix.size == 0:
+            return matrix.copy()
+        
+        if groups is None:
+            codes = np.zeros(matrix.shape[0], dtype=np.intp)
+        else:
+            codes, _ = pd.factorize(pd.Series(np.asarray(groups)), use_na_sentinel=False)
+        
+        cube, positions = _build_group_cube(matrix, codes)
+        
+        if method in RANK_BASED_METHODS:
+            ranks, valid_counts = _average_ranks(cube)
+            counts = valid_counts[:, np.newaxis, :]
+            
+            if method == 'percentile_rank':
+                normalized = 2 * (ranks / counts) - 1
+            else:
+                normalized = _norm_ppf((ranks - 0.5) / counts)
+            
+            # Sem dispersão: todos os valores válidos iguais
+            degenerate = np.fmin.reduce(cube, axis=1) == np.fmax.reduce(cube, axis=1)
+        else:
+            sorted_cube = np.sort(cube, axis=1)
+            valid_counts = np.sum(~np.isnan(cube), axis=1)
+            median = _nan_quantiles(sorted_cube, valid_counts, (0.5,), axis=1)[0]
+            
+            deviations = np.abs(cube - median[:, np.newaxis, :])
+            mad = _nan_quantiles(
+                np.sort(deviations, axis=1), valid_counts, (0.5,), axis=1
+            )[0]
+            
+            scale = MAD_SCALE * mad
+            with np.errstate(divide='ignore', invalid='ignore'):
+                normalized = (cube - median[:, np.newaxis, :]) / scale[:, np.newaxis, :]
+            
+            # MAD numericamente nulo frente aos desvios também é degenerado
+            # (a divisão estouraria para inf)
+            max_deviation = np.fmax.reduce(deviations, axis=1)
+            degenerate = ~(scale > np.finfo(float).eps * max_deviation)
+        
+        # Cortes sem dispersão ou com um único valor: normalizar para zero
+        degenerate = degenerate | (valid_counts <= 1)
+        normalized = np.where(
+            degenerate[:, np.newaxis, :] & ~np.isnan(cube), 0.0, normalized
+        )
+        
+        return normalized[codes, positions]
+    
+    def normalize_factors_by_method(
+        self,
+        factors_df: pd.DataFrame,
+        factor_columns: List[str],
+        method: Optional[str] = None,
+        group_cols: Optional[List[str]] = None,
+        winsorize: bool = False,
+        lower_pct: float = 0.05,
+        upper_pct: float = 0.95
+    ) -> pd.DataFrame:
+        """
+        Normaliza fatores com o método configurado em Settings.normalization_method.
+        
+        Métodos rank-based (percentile_rank, rank_gaussian) são invariantes a
+        outliers, então a winsorização é ignorada para eles. Para robust_zscore
+        a winsorização pode ser aplicada antes (winsorize=True).
+        
+        Args:
+            factors_df: DataFrame com fatores (e colunas de grupo, se usadas)
+            factor_columns: Colunas a normalizar
+            method: Método de normalização; None usa settings.normalization_method
+            group_cols: Colunas que definem cortes independentes
+                        (ex: ['date'] para backfills, ['date', 'sector'] para setorial)
+            winsorize: Aplicar winsorização antes (apenas robust_zscore)
+            lower_pct: Percentil inferior para winsorização
+            upper_pct: Percentil superior para winsorização
+            
+        Returns:
+            Cópia do DataFrame com fatores normalizados
+            
+        Raises:
+            ValueError: Se colunas não existem ou o método é desconhecido
+            
+        Example:
+            >>> normalizer = CrossSectionalNormalizer()
+            >>> normalized = normalizer.normalize_factors_by_method(
+            ...     history_df, ['roe', 'pe_ratio'],
+            ...     method='rank_gaussian', group_cols=['date', 'sector']
+            ... )
+        """
+        if method is None:
+            from app.config import settings
+            method = settings.normalization_method
+        
+        missing_cols = [col for col in factor_columns if col not in factors_df.columns]
+        if missing_cols:
+            raise ValueError(f"Columns not found in DataFrame: {missing_cols}")
+        
+        group_cols = group_cols or []
+        missing_groups = [col for col in group_cols if col not in factors_df.columns]
+        if missing_groups:
+            raise ValueError(f"Group columns not found in DataFrame: {missing_groups}")
+        
+        if method not in NORMALIZATION_METHODS:
+            raise ValueError(
+                f"Unknown normalization method '{method}'. "
+                f"Expected one of {NORMALIZATION_METHODS}"
+            )
+        
+        normalized_df = factors_df.copy()
+        if not factor_columns or factors_df.empty:
+            return normalized_df
+        
+        groups = None
+        if group_cols:
+            groups = factors_df.groupby(group_cols, sort=False, dropna=False).ngroup().to_numpy()
+        
+        if winsorize and method in RANK_BASED_METHODS:
+            logger.debug(f"Skipping winsorization for rank-based method '{method}'")
+        elif winsorize:
+            group_key = '__normalization_group__'
+            normalized_df = self.winsorize_frame(
+                normalized_df.assign(**{group_key: 0 if groups is None else groups}),
+                factor_columns,
+                lower_pct=lower_pct,
+                upper_pct=upper_pct,
+                group_col=group_key
+            ).drop(columns=[group_key])
+        
+        normalized_df[factor_columns] = self.normalize_matrix(
+            normalized_df[factor_columns].to_numpy(dtype=float),
+            method=method,
+            groups=groups
+        )
+        
+        return normalized_df
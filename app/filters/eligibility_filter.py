@@ -15,13 +15,35 @@ Architecture:
 Validates: Requirements 1.1, 1.2, 1.3, 1.4, 1.5, 1.6
 """
 
-from typing import Dict, List, Tuple
+from datetime import date
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
 import pandas as pd
 import logging
+from sqlalchemy import Float, and_, case, cast, func, select, union
+from sqlalchemy.orm import Session
 from app.config import Settings
+from app.models.schemas import RawFundamental, RawPriceDaily
 
 logger = logging.getLogger(__name__)
 
+# Columns of the per-ticker frame consumed by EligibilityFilter.filter_frame.
+# Missing numeric values are NaN; has_fundamentals=False means no fundamental
+# record at all (the "fundamentals is None" case of is_eligible).
+ELIGIBILITY_FRAME_COLUMNS = (
+    'has_fundamentals',
+    'shareholders_equity',
+    'ebitda',
+    'revenue',
+    'net_income_last_year',
+    'net_income_years',
+    'negative_income_years',
+    'net_debt_to_ebitda',
+    'volume_days',
+    'has_volume_column',
+    'avg_volume',
+)
+
 
 class EligibilityFilter:
     """
@@ -194,18 +216,287 @@ class EligibilityFilter:
         
         Validates: Requirements 1.1, 1.6
         """
-        eligible_tickers = []
-        exclusion_reasons_by_ticker = {}
+        return self.filter_frame(self.assets_to_frame(assets_data))
+    
+    @staticmethod
+    def assets_to_frame(assets_data: Dict[str, Dict]) -> pd.DataFrame:
+        """
+        Reduce the per-ticker dicts of filter_universe to an eligibility frame.
+        
+        Only the aggregates the rules need are kept: the latest fundamentals,
+        the length and negative count of net_income_history and the volume
+        row count and mean. None values become NaN.
+        
+        Args:
+            assets_data: Dict mapping ticker to {'fundamentals', 'volume_data'}
+        
+        Returns:
+            DataFrame indexed by ticker with ELIGIBILITY_FRAME_COLUMNS
+        """
+        records = []
         
         for ticker, data in assets_data.items():
             fundamentals = data.get('fundamentals')
             volume_data = data.get('volume_data')
+            record = {'ticker': ticker, 'has_fundamentals': fundamentals is not None}
             
-            is_eligible, reasons = self.is_eligible(ticker, fundamentals, volume_data)
+            if fundamentals is not None:
+                history = fundamentals.get('net_income_history') or []
+                for key in ('shareholders_equity', 'ebitda', 'revenue',
+                            'net_income_last_year', 'net_debt_to_ebitda'):
+                    record[key] = fundamentals.get(key)
+                record['net_income_years'] = len(history)
+                record['negative_income_years'] = sum(
+                    1 for ni in history if ni is not None and ni < 0
+                )
             
-            if is_eligible:
-                eligible_tickers.append(ticker)
+            if volume_data is None or volume_data.empty:
+                record['volume_days'] = 0
             else:
-                exclusion_reasons_by_ticker[ticker] = reasons
+                record['volume_days'] = len(volume_data)
+                record['has_volume_column'] = 'volume' in volume_data.columns
+                if record['has_volume_column']:
+                    record['avg_volume'] = volume_data['volume'].mean()
+            
+            records.append(record)
+        
+        frame = pd.DataFrame.from_records(
+            records, columns=('ticker',) + ELIGIBILITY_FRAME_COLUMNS
+        )
+        return frame.set_index('ticker')
+    
+    def filter_frame(
+        self,
+        frame: pd.DataFrame
+    ) -> Tuple[List[str], Dict[str, List[str]]]:
+        """
+        Apply all structural criteria of is_eligible to a frame in one pass.
+        
+        Every rule is evaluated as a boolean column over the whole universe;
+        exclusion reasons are produced in the same order as is_eligible.
+        NaN is treated as a missing value (None in is_eligible).
+        
+        Args:
+            frame: DataFrame indexed by ticker with ELIGIBILITY_FRAME_COLUMNS
+                   (absent columns are treated as missing data, except
+                   has_fundamentals and has_volume_column, which default to True)
+        
+        Returns:
+            Tuple of (eligible_tickers, exclusion_reasons_by_ticker), in frame order
+        
+        Validates: Requirements 1.1, 1.2, 1.3, 1.4, 1.5, 1.6
+        """
+        n_assets = len(frame)
+        
+        def numeric(name: str) -> np.ndarray:
+            if name not in frame.columns:
+                return np.full(n_assets, np.nan)
+            return pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype=float)
+        
+        def flag(name: str) -> np.ndarray:
+            if name not in frame.columns:
+                return np.ones(n_assets, dtype=bool)
+            return frame[name].astype('boolean').fillna(True).to_numpy(dtype=bool)
+        
+        has_fundamentals = flag('has_fundamentals')
+        equity = numeric('shareholders_equity')
+        ebitda = numeric('ebitda')
+        revenue = numeric('revenue')
+        net_income_last_year = numeric('net_income_last_year')
+        net_income_years = np.nan_to_num(numeric('net_income_years'))
+        negative_income_years = np.nan_to_num(numeric('negative_income_years'))
+        net_debt_to_ebitda = numeric('net_debt_to_ebitda')
+        volume_days = np.nan_to_num(numeric('volume_days'))
+        has_volume_column = flag('has_volume_column')
+        avg_volume = numeric('avg_volume')
+        
+        has_valid_equity = equity > 0
+        has_valid_ebitda = ebitda > 0
+        has_valid_revenue = revenue > 0
+        is_likely_financial_institution = ~has_valid_ebitda & has_valid_revenue & has_valid_equity
+        ebitda_required = ~has_valid_ebitda & ~is_likely_financial_institution
+        has_volume_rows = volume_days > 0
+        
+        # Same rules and order as is_eligible
+        checks = [
+            ("missing_shareholders_equity", np.isnan(equity)),
+            ("negative_or_zero_equity", ~has_valid_equity & ~np.isnan(equity)),
+            ("missing_revenue", np.isnan(revenue)),
+            ("negative_or_zero_revenue", ~has_valid_revenue & ~np.isnan(revenue)),
+            ("missing_ebitda", ebitda_required & np.isnan(ebitda)),
+            ("negative_or_zero_ebitda", ebitda_required & ~np.isnan(ebitda)),
+            ("negative_net_income_last_year", net_income_last_year < 0),
+            ("negative_net_income_2_of_3_years",
+             (net_income_years >= 3) & (negative_income_years >= 2)),
+            ("excessive_leverage_debt_to_ebitda_gt_8",
+             ~is_likely_financial_institution & (net_debt_to_ebitda > 8)),
+            ("insufficient_volume_data", ~has_volume_rows),
+            ("missing_volume_column", has_volume_rows & ~has_volume_column),
+            ("low_volume",
+             has_volume_rows & has_volume_column & ~(avg_volume >= self.minimum_volume)),
+        ]
+        
+        reason_names = ["insufficient_data"] + [name for name, _ in checks]
+        violations = np.column_stack(
+            [~has_fundamentals] + [mask & has_fundamentals for _, mask in checks]
+        ) if n_assets else np.zeros((0, len(reason_names)), dtype=bool)
+        
+        excluded = violations.any(axis=1)
+        tickers = frame.index.tolist()
+        
+        eligible_tickers = [tickers[i] for i in np.flatnonzero(~excluded)]
+        exclusion_reasons_by_ticker = {
+            tickers[i]: [reason_names[j] for j in np.flatnonzero(violations[i])]
+            for i in np.flatnonzero(excluded)
+        }
+        
+        logger.debug(
+            f"Financial institutions exempt from EBITDA checks: "
+            f"{int((is_likely_financial_institution & has_fundamentals).sum())}"
+        )
         
         return eligible_tickers, exclusion_reasons_by_ticker
+    
+    def filter_universe_db(
+        self,
+        db: Session,
+        tickers: Iterable[str],
+        reference_date: date
+    ) -> Tuple[List[str], Dict[str, List[str]]]:
+        """
+        Filter a universe straight from the raw tables.
+        
+        Loads the eligibility frame with a single SQL query
+        (load_eligibility_frame) and applies filter_frame once.
+        
+        Args:
+            db: Database session
+            tickers: Asset symbols to filter
+            reference_date: Only data up to this date is considered
+        
+        Returns:
+            Tuple of (eligible_tickers, exclusion_reasons_by_ticker)
+        
+        Validates: Requirements 1.1, 1.6
+        """
+        return self.filter_frame(load_eligibility_frame(db, tickers, reference_date))
+
+
+def load_eligibility_frame(
+    db: Session,
+    tickers: Iterable[str],
+    reference_date: date,
+    volume_window: int = 90,
+    income_periods: int = 3
+) -> pd.DataFrame:
+    """
+    Build the eligibility frame for a universe with one SQL query.
+    
+    Window functions pick, per ticker, the latest fundamental record and the
+    last income_periods periods (net income history) up to reference_date,
+    and the last volume_window price rows (average volume). The leverage
+    ratio total_debt / ebitda is computed in SQL as well. Tickers without
+    any data are kept, with has_fundamentals=False and no volume rows.
+    
+    Args:
+        db: Database session
+        tickers: Asset symbols
+        reference_date: Only data up to this date is considered
+        volume_window: Number of most recent price rows used for avg volume
+        income_periods: Number of most recent periods in the income history
+    
+    Returns:
+        DataFrame indexed by ticker with ELIGIBILITY_FRAME_COLUMNS
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return pd.DataFrame(
+            columns=ELIGIBILITY_FRAME_COLUMNS, index=pd.Index([], name='ticker')
+        )
+    
+    period_rank = func.row_number().over(
+        partition_by=RawFundamental.ticker,
+        order_by=(RawFundamental.period_end_date.desc(), RawFundamental.id.desc())
+    ).label('period_rank')
+    ranked_fundamentals = select(
+        RawFundamental.ticker,
+        RawFundamental.shareholders_equity,
+        RawFundamental.ebitda,
+        RawFundamental.revenue,
+        RawFundamental.net_income,
+        RawFundamental.total_debt,
+        period_rank
+    ).where(
+        RawFundamental.ticker.in_(tickers),
+        RawFundamental.period_end_date <= reference_date
+    ).subquery()
+    
+    rf = ranked_fundamentals.c
+    is_latest = rf.period_rank == 1
+    in_history = rf.period_rank <= income_periods
+    fundamentals = select(
+        rf.ticker,
+        func.max(case((is_latest, rf.shareholders_equity))).label('shareholders_equity'),
+        func.max(case((is_latest, rf.ebitda))).label('ebitda'),
+        func.max(case((is_latest, rf.revenue))).label('revenue'),
+        func.max(case((is_latest, rf.net_income))).label('net_income_last_year'),
+        func.max(case(
+            (and_(is_latest, rf.ebitda != 0), cast(rf.total_debt, Float) / rf.ebitda)
+        )).label('net_debt_to_ebitda'),
+        func.count(case((in_history, rf.net_income))).label('net_income_years'),
+        func.count(case((and_(in_history, rf.net_income < 0), 1))).label('negative_income_years')
+    ).group_by(rf.ticker).subquery()
+    
+    day_rank = func.row_number().over(
+        partition_by=RawPriceDaily.ticker,
+        order_by=RawPriceDaily.date.desc()
+    ).label('day_rank')
+    ranked_prices = select(
+        RawPriceDaily.ticker,
+        RawPriceDaily.volume,
+        day_rank
+    ).where(
+        RawPriceDaily.ticker.in_(tickers),
+        RawPriceDaily.date <= reference_date
+    ).subquery()
+    
+    volumes = select(
+        ranked_prices.c.ticker,
+        func.count().label('volume_days'),
+        cast(func.avg(ranked_prices.c.volume), Float).label('avg_volume')
+    ).where(
+        ranked_prices.c.day_rank <= volume_window
+    ).group_by(ranked_prices.c.ticker).subquery()
+    
+    universe = union(
+        select(fundamentals.c.ticker),
+        select(volumes.c.ticker)
+    ).subquery()
+    
+    statement = select(
+        universe.c.ticker,
+        fundamentals.c.ticker.label('fundamentals_ticker'),
+        fundamentals.c.shareholders_equity,
+        fundamentals.c.ebitda,
+        fundamentals.c.revenue,
+        fundamentals.c.net_income_last_year,
+        fundamentals.c.net_income_years,
+        fundamentals.c.negative_income_years,
+        fundamentals.c.net_debt_to_ebitda,
+        volumes.c.volume_days,
+        volumes.c.avg_volume
+    ).select_from(
+        universe
+        .outerjoin(fundamentals, fundamentals.c.ticker == universe.c.ticker)
+        .outerjoin(volumes, volumes.c.ticker == universe.c.ticker)
+    )
+    
+    result = db.execute(statement)
+    frame = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+    frame = frame.set_index('ticker').reindex(pd.Index(tickers, name='ticker'))
+    
+    frame['has_fundamentals'] = frame.pop('fundamentals_ticker').notna()
+    frame['volume_days'] = pd.to_numeric(frame['volume_days']).fillna(0)
+    frame['has_volume_column'] = True
+    
+    return frame[list(ELIGIBILITY_FRAME_COLUMNS)]
@@ -3,7 +3,9 @@ Serviço para buscar e armazenar informações de ativos (setor, indústria, etc
 """
 
 import logging
-from typing import Dict, Optional
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 import yfinance as yf
@@ -13,6 +15,52 @@ from app.core.exceptions import DataFetchError
 
 logger = logging.getLogger(__name__)
 
+# Setores tratados como instituições financeiras (scoring de bancos)
+FINANCIAL_SECTORS = (
+    'Financial Services',
+    'Financial',
+    'Banks',
+    'Insurance',
+    'Real Estate'
+)
+
+
+def is_financial_sector_name(sector: Optional[str]) -> bool:
+    """
+    Verifica se o nome de setor corresponde a um setor financeiro.
+    
+    Args:
+        sector: Nome do setor (ex: "Financial Services")
+        
+    Returns:
+        True se for setor financeiro, False caso contrário (ou se None)
+    """
+    if not sector:
+        return False
+    return any(fs.lower() in sector.lower() for fs in FINANCIAL_SECTORS)
+
+
+@dataclass(frozen=True)
+class SectorClassification:
+    """
+    Classificação setorial imutável de um ativo.
+    
+    Attributes:
+        ticker: Símbolo do ativo
+        sector: Setor (None se desconhecido)
+        industry: Indústria (None se desconhecida)
+        is_financial: True/False se o setor é conhecido, None se desconhecido
+                      (consumidores devem usar suas heurísticas nesse caso)
+    """
+    ticker: str
+    sector: Optional[str]
+    industry: Optional[str]
+    is_financial: Optional[bool]
+
+
+# Mapa imutável ticker -> SectorClassification, carregado uma vez por execução
+SectorClassificationMap = Mapping[str, SectorClassification]
+
 
 class AssetInfoService:
     """
@@ -114,6 +162,64 @@ class AssetInfoService:
             logger.error(error_msg)
             raise DataFetchError(error_msg) from e
     
+    def load_sector_classifications(
+        self,
+        tickers: Iterable[str],
+        fetch_missing: bool = False
+    ) -> SectorClassificationMap:
+        """
+        Carrega a classificação setorial de todos os tickers de uma só vez.
+        
+        Faz uma única query em asset_info para o universo inteiro, sem acesso
+        à rede por padrão: tickers sem setor no banco recebem classificação
+        desconhecida (is_financial=None), e os consumidores recorrem às suas
+        heurísticas. O resultado é um mapa imutável a ser injetado em
+        FundamentalFactorCalculator e ScoringEngine, de modo que o loop de
+        fatores não faça nenhuma consulta de setor por ticker.
+        
+        Args:
+            tickers: Tickers do universo
+            fetch_missing: Se True, busca no Yahoo Finance os tickers sem setor
+                (uma requisição por ticker; opt-in, para execuções que aceitam
+                esse custo)
+            
+        Returns:
+            Mapa imutável ticker -> SectorClassification
+        """
+        tickers = list(dict.fromkeys(tickers))
+        
+        rows = self.db.query(AssetInfo).filter(AssetInfo.ticker.in_(tickers)).all() if tickers else []
+        info_by_ticker = {row.ticker: row for row in rows}
+        
+        missing = [
+            ticker for ticker in tickers
+            if ticker not in info_by_ticker or not info_by_ticker[ticker].sector
+        ]
+        
+        if missing and fetch_missing:
+            logger.info(f"Resolving sector info for {len(missing)} tickers before factor calculation")
+            for ticker in missing:
+                try:
+                    info_by_ticker[ticker] = self.fetch_and_store_asset_info(ticker)
+                except DataFetchError:
+                    logger.warning(f"Could not determine sector for {ticker}")
+        
+        classifications = {}
+        for ticker in tickers:
+            info = info_by_ticker.get(ticker)
+            sector = info.sector if info else None
+            classifications[ticker] = SectorClassification(
+                ticker=ticker,
+                sector=sector,
+                industry=info.industry if info else None,
+                is_financial=is_financial_sector_name(sector) if sector else None
+            )
+        
+        known = sum(1 for c in classifications.values() if c.is_financial is not None)
+        logger.info(f"Loaded sector classification for {known}/{len(tickers)} tickers")
+        
+        return MappingProxyType(classifications)
+    
     def is_financial_sector(self, ticker: str) -> bool:
         """
         Verifica se o ativo pertence ao setor financeiro.
@@ -135,18 +241,7 @@ class AssetInfoService:
                 return False
         
         # Verificar se é setor financeiro
-        financial_sectors = [
-            'Financial Services',
-            'Financial',
-            'Banks',
-            'Insurance',
-            'Real Estate'
-        ]
-        
-        if asset_info.sector:
-            return any(fs.lower() in asset_info.sector.lower() for fs in financial_sectors)
-        
-        return False
+        return is_financial_sector_name(asset_info.sector)
     
     def get_sector_info(self, ticker: str) -> Dict[str, Optional[str]]:
         """
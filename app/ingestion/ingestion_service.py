@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.core.exceptions import DataFetchError
 from app.ingestion.yahoo_client import YahooFinanceClient
 from app.ingestion.yahoo_finance_client import YahooFinanceClient as YahooFundamentalsClient
+from app.ingestion.ticker_stats_service import TickerStatsService
 from app.models.schemas import RawPriceDaily, RawFundamental
 
 logger = logging.getLogger(__name__)
@@ -34,6 +35,7 @@ class IngestionService:
         self.yahoo_client = yahoo_client
         self.yahoo_fundamentals_client = yahoo_fundamentals_client
         self.db = db_session
+        self.stats_service = TickerStatsService(db_session)
 
     def ingest_prices(
         self, 
@@ -131,6 +133,9 @@ class IngestionService:
                 self.db.rollback()
                 continue
         
+        # Atualiza os agregados (ticker_stats) apenas dos tickers ingeridos
+        self.refresh_stats(self.stats_service.refresh_prices, results["success"])
+        
         logger.info(
             f"Price ingestion complete: {len(results['success'])} succeeded, "
             f"{len(results['failed'])} failed, {results['total_records']} total records"
@@ -242,6 +247,9 @@ class IngestionService:
                 self.db.rollback()
                 continue
         
+        # Atualiza os agregados (ticker_stats) apenas dos tickers ingeridos
+        self.refresh_stats(self.stats_service.refresh_fundamentals, results["success"])
+        
         logger.info(
             f"Fundamentals ingestion complete: {len(results['success'])} succeeded, "
             f"{len(results['failed'])} failed, {results['total_records']} total records"
@@ -330,3 +338,21 @@ class IngestionService:
         # Metrics - Do Yahoo Finance info
         record.market_cap = metrics.get("marketCap")
         record.enterprise_value = metrics.get("enterpriseValue")
+
+    def refresh_stats(self, refresh, tickers: List[str]):
+        """
+        Atualiza ticker_stats após uma ingestão sem interromper o processo.
+        
+        Args:
+            refresh: Método de TickerStatsService a chamar
+            tickers: Tickers ingeridos com sucesso
+        """
+        if not tickers:
+            return
+        
+        try:
+            refresh(tickers)
+            self.db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to refresh ticker stats for {len(tickers)} tickers: {e}")
+            self.db.rollback()
@@ -0,0 +1,249 @@
+"""
+Serviço de manutenção dos agregados por ticker (tabela ticker_stats).
+
+Os agregados são recalculados apenas para os tickers tocados por uma
+ingestão, com uma consulta agregada por lote de tickers, e gravados com
+upsert. Consumidores (elegibilidade, seleção de universo, API) leem a
+tabela com uma consulta indexada por ticker.
+
+Valida: Requisitos 8.1, 8.2, 8.7
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.orm import Session
+
+from app.models.schemas import RawFundamental, RawPriceDaily, TickerStats
+
+logger = logging.getLogger(__name__)
+
+PRICE_STATS_COLUMNS = (
+    'first_price_date',
+    'last_price_date',
+    'price_bar_count',
+    'adv_window',
+    'avg_daily_volume',
+    'avg_traded_value',
+)
+
+FUNDAMENTAL_STATS_COLUMNS = (
+    'fundamental_period_count',
+    'last_fundamental_date',
+)
+
+
+class TickerStatsService:
+    """Mantém e consulta a tabela ticker_stats."""
+    
+    def __init__(self, db_session: Session, adv_window: int = 90, chunk_size: int = 500):
+        """
+        Inicializa o serviço de agregados.
+        
+        Args:
+            db_session: Sessão do banco de dados
+            adv_window: Número de pregões mais recentes usados no ADV e no
+                volume financeiro médio (90, como no filtro de elegibilidade)
+            chunk_size: Número máximo de tickers por consulta agregada
+        """
+        self.db = db_session
+        self.adv_window = adv_window
+        self.chunk_size = chunk_size
+    
+    def refresh_prices(self, tickers: Optional[Iterable[str]] = None) -> int:
+        """
+        Recalcula os agregados de preços dos tickers informados.
+        
+        Primeira/última data e número de pregões cobrem todo o histórico; ADV
+        e volume financeiro médio usam os últimos adv_window pregões. Não faz
+        commit: a transação pertence ao chamador.
+        
+        Args:
+            tickers: Tickers a atualizar (None = todos com preços)
+            
+        Returns:
+            Número de tickers atualizados
+        """
+        updated = 0
+        
+        for chunk in self._chunks(tickers):
+            bar_rank = func.row_number().over(
+                partition_by=RawPriceDaily.ticker,
+                order_by=RawPriceDaily.date.desc()
+            ).label('bar_rank')
+            query = select(
+                RawPriceDaily.ticker,
+                RawPriceDaily.date,
+                RawPriceDaily.close,
+                RawPriceDaily.volume,
+                bar_rank
+            )
+            if chunk is not None:
+                query = query.where(RawPriceDaily.ticker.in_(chunk))
+            ranked = query.subquery()
+            
+            in_window = ranked.c.bar_rank <= self.adv_window
+            rows = self.db.execute(
+                select(
+                    ranked.c.ticker,
+                    func.min(ranked.c.date),
+                    func.max(ranked.c.date),
+                    func.count(),
+                    func.avg(case((in_window, ranked.c.volume))),
+                    func.avg(case((in_window, ranked.c.close * ranked.c.volume)))
+                ).group_by(ranked.c.ticker)
+            ).all()
+            
+            self._upsert([
+                {
+                    'ticker': ticker,
+                    'first_price_date': first_date,
+                    'last_price_date': last_date,
+                    'price_bar_count': bar_count,
+                    'adv_window': self.adv_window,
+                    'avg_daily_volume': float(adv) if adv is not None else None,
+                    'avg_traded_value': float(traded) if traded is not None else None,
+                }
+                for ticker, first_date, last_date, bar_count, adv, traded in rows
+            ], PRICE_STATS_COLUMNS)
+            updated += len(rows)
+        
+        logger.debug(f"Refreshed price stats for {updated} tickers")
+        return updated
+    
+    def refresh_fundamentals(self, tickers: Optional[Iterable[str]] = None) -> int:
+        """
+        Recalcula os agregados de fundamentos dos tickers informados.
+        
+        Conta datas de período distintas (anual e trimestral na mesma data
+        contam uma vez). Não faz commit: a transação pertence ao chamador.
+        
+        Args:
+            tickers: Tickers a atualizar (None = todos com fundamentos)
+            
+        Returns:
+            Número de tickers atualizados
+        """
+        updated = 0
+        
+        for chunk in self._chunks(tickers):
+            query = select(
+                RawFundamental.ticker,
+                func.count(RawFundamental.period_end_date.distinct()),
+                func.max(RawFundamental.period_end_date)
+            ).group_by(RawFundamental.ticker)
+            if chunk is not None:
+                query = query.where(RawFundamental.ticker.in_(chunk))
+            rows = self.db.execute(query).all()
+            
+            self._upsert([
+                {
+                    'ticker': ticker,
+                    'fundamental_period_count': period_count,
+                    'last_fundamental_date': last_date,
+                }
+                for ticker, period_count, last_date in rows
+            ], FUNDAMENTAL_STATS_COLUMNS)
+            updated += len(rows)
+        
+        logger.debug(f"Refreshed fundamental stats for {updated} tickers")
+        return updated
+    
+    def refresh(self, tickers: Optional[Iterable[str]] = None) -> int:
+        """
+        Recalcula todos os agregados e faz commit.
+        
+        Usado no backfill inicial (tickers=None) e em correções pontuais.
+        
+        Args:
+            tickers: Tickers a atualizar (None = todos)
+            
+        Returns:
+            Número de tickers com agregados de preços atualizados
+        """
+        if tickers is not None:
+            tickers = list(tickers)
+        
+        updated = self.refresh_prices(tickers)
+        self.refresh_fundamentals(tickers)
+        self.db.commit()
+        
+        return updated
+    
+    def get_stats(self, tickers: Optional[Iterable[str]] = None) -> Dict[str, TickerStats]:
+        """
+        Retorna os agregados dos tickers numa única consulta.
+        
+        Args:
+            tickers: Tickers desejados (None = todos)
+            
+        Returns:
+            Dict ticker -> TickerStats; tickers sem agregados ficam de fora
+        """
+        query = self.db.query(TickerStats)
+        if tickers is not None:
+            query = query.filter(TickerStats.ticker.in_(list(tickers)))
+        
+        return {stats.ticker: stats for stats in query.all()}
+    
+    def _chunks(self, tickers: Optional[Iterable[str]]) -> Iterable[Optional[List[str]]]:
+        """Divide os tickers em lotes de chunk_size (None = sem filtro)."""
+        if tickers is None:
+            yield None
+            return
+        
+        tickers = list(dict.fromkeys(tickers))
+        for start in range(0, len(tickers), self.chunk_size):
+            yield tickers[start:start + self.chunk_size]
+    
+    def _upsert(self, rows: List[Dict[str, Any]], columns: Iterable[str]) -> None:
+        """
+        Grava linhas de TickerStats com upsert em ticker.
+        
+        Só as colunas informadas são atualizadas em tickers existentes, de
+        modo que preços e fundamentos podem ser atualizados separadamente.
+        
+        Args:
+            rows: Valores por ticker
+            columns: Colunas a atualizar em caso de conflito
+        """
+        if not rows:
+            return
+        
+        now = datetime.utcnow()
+        rows = [{**row, 'updated_at': now} for row in rows]
+        columns = list(columns) + ['updated_at']
+        dialect = self.db.get_bind().dialect.name
+        
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            
+            stmt = insert(TickerStats).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['ticker'],
+                set_={column: stmt.excluded[column] for column in columns}
+            )
+            self.db.execute(stmt)
+            return
+        
+        existing_ids = dict(
+            self.db.query(TickerStats.ticker, TickerStats.id).filter(
+                TickerStats.ticker.in_([row['ticker'] for row in rows])
+            ).all()
+        )
+        
+        updates = [
+            {**row, 'id': existing_ids[row['ticker']]}
+            for row in rows if row['ticker'] in existing_ids
+        ]
+        inserts = [row for row in rows if row['ticker'] not in existing_ids]
+        
+        if updates:
+            self.db.bulk_update_mappings(TickerStats, updates)
+        if inserts:
+            self.db.bulk_insert_mappings(TickerStats, inserts)
@@ -6,7 +6,8 @@ from app.models.schemas import (
     RawFundamental,
     FeatureDaily,
     FeatureMonthly,
-    ScoreDaily
+    ScoreDaily,
+    TickerStats
 )
 
 __all__ = [
@@ -19,4 +20,5 @@ __all__ = [
     "FeatureDaily",
     "FeatureMonthly",
     "ScoreDaily",
+    "TickerStats",
 ]
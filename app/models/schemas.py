@@ -85,6 +85,38 @@ class RawFundamental(Base):
         return f"<RawFundamental(ticker={self.ticker}, period_end_date={self.period_end_date})>"
 
 
+class TickerStats(Base):
+    """
+    Agregados por ticker mantidos durante a ingestão (cobertura e liquidez).
+    
+    Evita recalcular a partir das tabelas brutas a cobertura de preços, o
+    volume médio (ADV) e a contagem de períodos fundamentalistas.
+    
+    Valida: Requisitos 8.1, 8.2, 8.7
+    """
+    __tablename__ = "ticker_stats"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    ticker = Column(String(10), nullable=False, unique=True, index=True)
+    
+    # Preços
+    first_price_date = Column(Date)
+    last_price_date = Column(Date)
+    price_bar_count = Column(Integer, default=0, nullable=False)
+    adv_window = Column(Integer)  # Número de pregões usados no ADV
+    avg_daily_volume = Column(Float)  # ADV dos últimos adv_window pregões
+    avg_traded_value = Column(Float)  # Média de close * volume na mesma janela
+    
+    # Fundamentos
+    fundamental_period_count = Column(Integer, default=0, nullable=False)
+    last_fundamental_date = Column(Date)
+    
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<TickerStats(ticker={self.ticker}, bars={self.price_bar_count}, adv={self.avg_daily_volume})>"
+
+
 class AssetInfo(Base):
     """
     Tabela para armazenar informações básicas dos ativos (setor, indústria, etc).
@@ -4,9 +4,12 @@ Gerador de explicações automáticas para scores de ativos.
 Valida: Requisitos 7.1, 7.2, 7.3, 7.4
 """
 
-from typing import List, Tuple, Dict
+from datetime import date
+from typing import Any, List, Optional, Sequence, Tuple, Dict
 import logging
 
+import numpy as np
+
 from app.scoring.scoring_engine import ScoreResult
 from app.scoring.ranker import RankingEntry
 
@@ -54,6 +57,27 @@ class ReportGenerator:
         'pb_ratio'
     }
     
+    # Limites de |valor normalizado| para leve, moderado, forte e excepcional
+    INTENSITY_LEVELS = ('leve', 'moderado', 'forte', 'excepcional')
+    INTENSITY_THRESHOLDS = (0.5, 1.0, 2.0)
+    
+    # Templates usados pelo modo batch (mesmo texto de generate_asset_explanation)
+    HEADER_TEMPLATE = "{ticker} possui score de {score:.2f}, ocupando a {rank}ª posição no ranking."
+    EXPLANATION_TEMPLATE = "{header}\n\nPontos Fortes:\n{strengths}\nPontos de Atenção:\n{weaknesses}\n{conclusion}"
+    
+    def __init__(self, max_cache_size: int = 10000):
+        """
+        Inicializa o gerador de relatórios.
+        
+        Args:
+            max_cache_size: Número máximo de explicações mantidas em cache
+                por (ticker, data do score); as mais antigas são descartadas
+        """
+        self.max_cache_size = max_cache_size
+        self._explanation_cache: Dict[Tuple[str, date], Tuple[Any, str]] = {}
+        self._description_tables: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._conclusion_table: Optional[List[str]] = None
+    
     def generate_asset_explanation(
         self, 
         ticker: str,
@@ -319,6 +343,25 @@ class ReportGenerator:
         neutral_categories = [name for name, score in categories.items() 
                             if -0.5 <= score <= 0.5]
         
+        return self._build_conclusion(strong_categories, weak_categories, neutral_categories)
+    
+    @staticmethod
+    def _build_conclusion(
+        strong_categories: List[str],
+        weak_categories: List[str],
+        neutral_categories: List[str]
+    ) -> str:
+        """
+        Monta o texto da conclusão a partir das categorias classificadas.
+        
+        Args:
+            strong_categories: Categorias com score > 0.5
+            weak_categories: Categorias com score < -0.5
+            neutral_categories: Categorias com score em [-0.5, 0.5]
+            
+        Returns:
+            String com conclusão interpretativa
+        """
         # Construir conclusão
         conclusion = "Conclusão: Ativo com "
         
@@ -341,3 +384,260 @@ class ReportGenerator:
         conclusion += "."
         
         return conclusion
+    
+    def generate_batch_explanations(
+        self,
+        tickers: Sequence[str],
+        factor_matrix: np.ndarray,
+        factor_names: Sequence[str],
+        final_scores: Sequence[float],
+        momentum_scores: Sequence[float],
+        quality_scores: Sequence[float],
+        value_scores: Sequence[float],
+        ranks: Sequence[int],
+        score_date: Optional[date] = None,
+        n: int = 3
+    ) -> Dict[str, str]:
+        """
+        Gera explicações para o universo inteiro a partir da matriz de fatores.
+        
+        Produz o mesmo texto de generate_asset_explanation: os top/bottom n
+        fatores de cada ticker são escolhidos com argpartition (empates
+        resolvidos pela ordem das colunas, como a ordenação estável) e o texto
+        é montado a partir de descrições pré-compiladas por fator e
+        intensidade. Fatores NaN são tratados como ausentes.
+        
+        Se score_date for informado, as explicações são guardadas no cache
+        por (ticker, score_date), com versão (final_score, rank).
+        
+        Args:
+            tickers: Símbolos dos ativos (linhas da matriz)
+            factor_matrix: Matriz (n_ativos, n_fatores) de fatores normalizados
+            factor_names: Nomes das colunas da matriz
+            final_scores: Score final por ativo
+            momentum_scores: Score de momentum por ativo
+            quality_scores: Score de qualidade por ativo
+            value_scores: Score de valor por ativo
+            ranks: Posição no ranking por ativo
+            score_date: Data dos scores (None = não usa o cache)
+            n: Número de fatores em cada seção
+            
+        Returns:
+            Dicionário {ticker: explicação}
+            
+        Valida: Requisitos 7.1, 7.2, 7.3, 7.4
+        """
+        factor_names = tuple(factor_names)
+        values = np.asarray(factor_matrix, dtype=float).reshape(len(tickers), len(factor_names))
+        
+        inverted = np.array([name in self.INVERTED_FACTORS for name in factor_names], dtype=bool)
+        adjusted = np.where(inverted, -values, values)
+        missing = np.isnan(values)
+        
+        # Top: maiores valores ajustados; bottom: menores. NaN vai para o fim.
+        top_idx, top_valid = self._select_k(np.where(missing, -np.inf, adjusted), missing, n)
+        bottom_idx, bottom_valid = self._select_k(np.where(missing, -np.inf, -adjusted), missing, n)
+        
+        intensity = np.searchsorted(self.INTENSITY_THRESHOLDS, np.abs(values), side='left')
+        descriptions = self._description_table(factor_names)
+        
+        rows = np.arange(len(tickers))[:, np.newaxis]
+        top_text = descriptions[1, top_idx, intensity[rows, top_idx]]
+        bottom_text = descriptions[0, bottom_idx, intensity[rows, bottom_idx]]
+        
+        conclusions = self._conclusion_codes(momentum_scores, quality_scores, value_scores)
+        conclusion_table = self._conclusion_lookup()
+        
+        explanations = {}
+        for i, ticker in enumerate(tickers):
+            header = self.HEADER_TEMPLATE.format(
+                ticker=ticker, score=float(final_scores[i]), rank=int(ranks[i])
+            )
+            explanations[ticker] = self.EXPLANATION_TEMPLATE.format(
+                header=header,
+                strengths="".join(f"- {text}\n" for text in top_text[i][top_valid[i]]),
+                weaknesses="".join(f"- {text}\n" for text in bottom_text[i][bottom_valid[i]]),
+                conclusion=conclusion_table[conclusions[i]]
+            )
+            if score_date is not None:
+                self.cache_explanation(
+                    ticker, score_date, explanations[ticker],
+                    version=(float(final_scores[i]), int(ranks[i]))
+                )
+        
+        logger.debug(f"Generated {len(explanations)} explanations in batch")
+        
+        return explanations
+    
+    def get_cached_explanation(
+        self,
+        ticker: str,
+        score_date: date,
+        version: Any = None
+    ) -> Optional[str]:
+        """
+        Retorna a explicação em cache para (ticker, score_date).
+        
+        Args:
+            ticker: Símbolo do ativo
+            score_date: Data do score
+            version: Versão esperada (ex.: (final_score, rank)); None aceita
+                qualquer versão
+            
+        Returns:
+            Explicação ou None se ausente ou de outra versão
+        """
+        cached = self._explanation_cache.get((ticker, score_date))
+        if cached is None or (version is not None and cached[0] != version):
+            return None
+        return cached[1]
+    
+    def cache_explanation(
+        self,
+        ticker: str,
+        score_date: date,
+        explanation: str,
+        version: Any = None
+    ) -> None:
+        """
+        Guarda uma explicação no cache por (ticker, score_date).
+        
+        Args:
+            ticker: Símbolo do ativo
+            score_date: Data do score
+            explanation: Texto da explicação
+            version: Versão dos dados que geraram o texto
+        """
+        key = (ticker, score_date)
+        self._explanation_cache.pop(key, None)
+        if len(self._explanation_cache) >= self.max_cache_size:
+            # Descarta a entrada mais antiga (ordem de inserção)
+            self._explanation_cache.pop(next(iter(self._explanation_cache)))
+        self._explanation_cache[key] = (version, explanation)
+    
+    def clear_cache(self, score_date: Optional[date] = None) -> None:
+        """
+        Remove explicações do cache.
+        
+        Args:
+            score_date: Remove apenas as desta data (None = todas)
+        """
+        if score_date is None:
+            self._explanation_cache.clear()
+            return
+        for key in [key for key in self._explanation_cache if key[1] == score_date]:
+            del self._explanation_cache[key]
+    
+    @staticmethod
+    def _select_k(
+        keys: np.ndarray,
+        missing: np.ndarray,
+        n: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Seleciona, por linha, as n colunas de maior chave.
+        
+        Empates são resolvidos pela menor coluna, reproduzindo a ordenação
+        estável de _identify_top_factors/_identify_bottom_factors.
+        
+        Args:
+            keys: Matriz (n_ativos, n_fatores); -inf = ausente
+            missing: Máscara de fatores ausentes
+            n: Número de colunas por linha
+            
+        Returns:
+            Tupla (índices (n_ativos, k) em ordem decrescente de chave,
+            máscara de índices válidos)
+        """
+        n_rows, n_cols = keys.shape
+        k = min(n, n_cols)
+        if k == 0:
+            empty = np.zeros((n_rows, 0), dtype=np.intp)
+            return empty, empty.astype(bool)
+        
+        if k < n_cols:
+            # k-ésima maior chave por linha; estritamente maiores entram todas,
+            # as iguais ao limite entram pela ordem das colunas
+            kth = -np.partition(-keys, k - 1, axis=1)[:, k - 1:k]
+            above = keys > kth
+            tied = keys == kth
+            room = k - above.sum(axis=1, keepdims=True)
+            chosen = above | (tied & (np.cumsum(tied, axis=1) <= room))
+            candidates = np.nonzero(chosen)[1].reshape(n_rows, k)
+        else:
+            candidates = np.broadcast_to(np.arange(n_cols), (n_rows, n_cols))
+        
+        # Ordena os k escolhidos por chave decrescente e coluna crescente
+        chosen_keys = np.take_along_axis(keys, candidates, axis=1)
+        order = np.lexsort((candidates, -chosen_keys), axis=1)
+        selected = np.take_along_axis(candidates, order, axis=1)
+        
+        valid = ~np.take_along_axis(missing, selected, axis=1)
+        return selected, valid
+    
+    def _description_table(self, factor_names: Tuple[str, ...]) -> np.ndarray:
+        """
+        Pré-compila as descrições de _format_factor_description.
+        
+        Args:
+            factor_names: Nomes das colunas da matriz de fatores
+            
+        Returns:
+            Array (2, n_fatores, n_intensidades) de strings; o primeiro eixo
+            é is_positive (0 = ponto fraco, 1 = ponto forte)
+        """
+        table = self._description_tables.get(factor_names)
+        if table is None:
+            # Valores representativos de cada faixa de intensidade
+            level_values = (0.0, 0.75, 1.5, 3.0)
+            table = np.array([
+                [
+                    [
+                        self._format_factor_description(name, value, is_positive)
+                        for value in level_values
+                    ]
+                    for name in factor_names
+                ]
+                for is_positive in (False, True)
+            ], dtype=object).reshape(2, len(factor_names), len(level_values))
+            self._description_tables[factor_names] = table
+        return table
+    
+    @staticmethod
+    def _conclusion_codes(
+        momentum_scores: Sequence[float],
+        quality_scores: Sequence[float],
+        value_scores: Sequence[float]
+    ) -> np.ndarray:
+        """
+        Codifica a classificação das três categorias num índice de 0 a 63.
+        
+        Cada categoria vale 0 (ausente/NaN), 1 (neutra), 2 (forte) ou
+        3 (fraca), com momentum no dígito menos significativo.
+        """
+        codes = np.zeros(len(momentum_scores), dtype=np.intp)
+        for position, scores in enumerate((momentum_scores, quality_scores, value_scores)):
+            scores = np.asarray(scores, dtype=float)
+            state = np.select(
+                [scores > 0.5, scores < -0.5, (scores >= -0.5) & (scores <= 0.5)],
+                [2, 3, 1],
+                default=0
+            )
+            codes += state * 4 ** position
+        return codes
+    
+    def _conclusion_lookup(self) -> List[str]:
+        """Pré-compila as 64 conclusões possíveis de _generate_conclusion."""
+        if self._conclusion_table is None:
+            names = ('momentum', 'qualidade', 'valor')
+            table = []
+            for code in range(4 ** len(names)):
+                states = [(code // 4 ** position) % 4 for position in range(len(names))]
+                table.append(self._build_conclusion(
+                    [name for name, state in zip(names, states) if state == 2],
+                    [name for name, state in zip(names, states) if state == 3],
+                    [name for name, state in zip(names, states) if state == 1]
+                ))
+            self._conclusion_table = table
+        return self._conclusion_table
+
@@ -20,7 +20,7 @@ sys.path.insert(0, str(root_dir))
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from datetime import date, datetime, timedelta
+from datetime import date, datetime
 from dateutil.relativedelta import relativedelta
 import logging
 
@@ -112,6 +112,23 @@ def run_backtest_ui(
             # Criar backtest run
             service = BacktestService(db)
             
+            # Parâmetros que determinam o resultado (nome e notas ficam de fora)
+            parameters = {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'top_n': top_n,
+                'rebalance_frequency': 'monthly',
+                'weight_method': 'equal',
+                'use_smoothing': use_smoothing,
+                'transaction_cost': transaction_cost / 100.0,
+                'initial_capital': initial_capital
+            }
+            cache_key = service.get_cache_key(parameters)
+            cached_run = service.get_cached_run(cache_key)
+            if cached_run is not None:
+                st.info("♻️ Mesmos parâmetros e dados: reaproveitando resultado salvo")
+                return cached_run.id
+            
             run = service.create_backtest_run(
                 name=name if name else None,
                 start_date=start_date,
@@ -120,12 +137,14 @@ def run_backtest_ui(
                 top_n=top_n,
                 transaction_cost=transaction_cost / 100.0,  # Converter % para decimal
                 initial_capital=initial_capital,
-                notes=f"Smoothing: {use_smoothing}, Alpha: {alpha_smoothing if use_smoothing else 'N/A'}"
+                notes=f"Smoothing: {use_smoothing}, Alpha: {alpha_smoothing if use_smoothing else 'N/A'}",
+                parameters=parameters,
+                cache_key=cache_key
             )
             
             logger.info(f"Created backtest run: {run.id}")
             
-            # Executar backtest engine
+            # Executar backtest engine com NAV diário
             engine = BacktestEngine(
                 start_date=start_date,
                 end_date=end_date,
@@ -133,68 +152,28 @@ def run_backtest_ui(
                 rebalance_frequency='monthly',
                 weight_method='equal',
                 use_smoothing=use_smoothing,
-                risk_free_rate=0.0
+                risk_free_rate=0.0,
+                transaction_cost=transaction_cost / 100.0
             )
             
-            # Simular backtest (aqui você integraria com o engine real)
-            # Por enquanto, vamos gerar dados dummy para demonstração
             logger.info("Running backtest simulation...")
+            result = engine.run_backtest_daily(db, initial_capital=initial_capital)
+            nav_records = result['nav_records']
+            positions = result['positions']
             
-            # Gerar NAV records dummy
-            nav_records = []
-            current_date = start_date
-            nav = initial_capital
-            
-            while current_date <= end_date:
-                import random
-                daily_return = random.uniform(-0.02, 0.02)
-                nav = nav * (1 + daily_return)
-                
-                nav_records.append({
-                    'date': current_date,
-                    'nav': nav,
-                    'benchmark_nav': initial_capital * 1.1,  # Dummy benchmark
-                    'daily_return': daily_return,
-                    'benchmark_return': 0.0003  # Dummy
-                })
-                
-                current_date += timedelta(days=1)
-            
-            # Gerar posições dummy
-            positions = []
-            tickers = ['PETR4.SA', 'VALE3.SA', 'ITUB4.SA', 'BBDC4.SA', 'ABEV3.SA']
-            current_date = start_date
-            
-            while current_date <= end_date:
-                if current_date.day == 1:  # Primeiro dia do mês
-                    weight = 1.0 / top_n
-                    for i in range(top_n):
-                        positions.append({
-                            'date': current_date,
-                            'ticker': tickers[i % len(tickers)],
-                            'weight': weight,
-                            'score_at_selection': random.uniform(0.5, 2.0)
-                        })
-                
-                current_date += timedelta(days=1)
-            
-            # Calcular métricas
-            total_return = (nav - initial_capital) / initial_capital
-            days = (end_date - start_date).days
-            years = days / 365.25
-            cagr = (1 + total_return) ** (1 / years) - 1
-            
+            # BacktestMetrics guarda frações; o engine reporta percentuais
+            engine_metrics = result['metrics']
             metrics = {
-                'total_return': total_return,
-                'cagr': cagr,
-                'volatility': 0.15,
-                'sharpe_ratio': 1.2,
-                'sortino_ratio': 1.5,
-                'max_drawdown': -0.12,
-                'turnover_avg': 0.25,
-                'alpha': 0.03,
-                'beta': 0.95,
-                'information_ratio': 0.8
+                'total_return': engine_metrics['total_return'] / 100,
+                'cagr': engine_metrics['cagr'] / 100,
+                'volatility': engine_metrics['volatility'] / 100,
+                'sharpe_ratio': engine_metrics['sharpe_ratio'],
+                'sortino_ratio': engine_metrics['sortino_ratio'],
+                'max_drawdown': engine_metrics['max_drawdown'] / 100,
+                'turnover_avg': engine_metrics['avg_turnover'] / 100,
+                'alpha': engine_metrics['alpha'] / 100 if engine_metrics['alpha'] is not None else None,
+                'beta': engine_metrics['beta'],
+                'information_ratio': engine_metrics['information_ratio']
             }
             
             # Salvar resultados
@@ -203,7 +182,8 @@ def run_backtest_ui(
                 run_id=run.id,
                 nav_records=nav_records,
                 positions=positions,
-                metrics=metrics
+                metrics=metrics,
+                nav_storage='blob'
             )
             
             logger.info(f"Backtest completed: {run.id}")
@@ -5,7 +5,9 @@ Valida: Requisitos 4.1, 4.2, 4.3, 4.4, 4.5, 4.6, 4.7, 5.1, 5.2, 5.3, 5.4, 5.5
 """
 
 from app.scoring.scoring_engine import ScoringEngine, ScoreResult
+from app.scoring.score_batch import ScoreBatch
 from app.scoring.score_service import ScoreService
-from app.scoring.ranker import Ranker, RankingEntry
+from app.scoring.ranker import Ranker, RankingEntry, IndexedRanking
+from app.scoring.what_if import WhatIfRanker
 
-__all__ = ['ScoringEngine', 'ScoreResult', 'ScoreService', 'Ranker', 'RankingEntry']
+__all__ = ['ScoringEngine', 'ScoreResult', 'ScoreBatch', 'ScoreService', 'Ranker', 'RankingEntry', 'IndexedRanking', 'WhatIfRanker']
@@ -4,10 +4,13 @@ Gerador de rankings a partir de scores.
 Valida: Requisitos 5.1, 5.2, 5.3, 5.4, 5.5
 """
 
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Union
 from dataclasses import dataclass
 from datetime import date
 import logging
+import math
+
+import numpy as np
 
 from app.scoring.scoring_engine import ScoreResult
 
@@ -37,6 +40,234 @@ class RankingEntry:
     value_score: float
 
 
+class IndexedRanking(Sequence):
+    """
+    Ranking indexado sobre arrays NumPy.
+    
+    Guarda os scores em arrays e um índice ticker -> posição, de forma que
+    consultas por ticker são O(1) e o top-N usa seleção parcial
+    (argpartition) sem ordenar o universo inteiro. A ordenação completa só é
+    calculada quando necessária, e as entradas RankingEntry são
+    materializadas sob demanda (e reaproveitadas).
+    
+    Também se comporta como uma sequência de RankingEntry em ordem de
+    ranking, então pode ser usado onde uma lista de entradas é esperada.
+    
+    Empates são ordenados pela ordem de entrada, como no sorted estável de
+    Ranker.generate_ranking.
+    """
+    
+    def __init__(
+        self,
+        tickers: Sequence[str],
+        scores: Sequence[float],
+        confidences: Sequence[float],
+        momentum_scores: Sequence[float],
+        quality_scores: Sequence[float],
+        value_scores: Sequence[float],
+        ranking_date: Optional[date] = None
+    ):
+        """
+        Inicializa o ranking indexado.
+        
+        Args:
+            tickers: Símbolos dos ativos
+            scores: Scores finais
+            confidences: Scores de confiança
+            momentum_scores: Scores de momentum
+            quality_scores: Scores de qualidade
+            value_scores: Scores de valor
+            ranking_date: Data do ranking (informativo)
+        """
+        self.tickers: List[str] = list(tickers)
+        self.ranking_date = ranking_date
+        
+        self.scores = np.asarray(scores, dtype=float)
+        self.confidences = np.asarray(confidences, dtype=float)
+        self.momentum_scores = np.asarray(momentum_scores, dtype=float)
+        self.quality_scores = np.asarray(quality_scores, dtype=float)
+        self.value_scores = np.asarray(value_scores, dtype=float)
+        
+        # NaN vai para o fim do ranking
+        self._sort_key = np.where(np.isnan(self.scores), -np.inf, self.scores)
+        
+        self._index: Dict[str, int] = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._order: Optional[np.ndarray] = None
+        self._ranks: Optional[np.ndarray] = None
+        self._entries: Dict[int, RankingEntry] = {}
+    
+    @classmethod
+    def from_score_results(
+        cls,
+        scores: Sequence[ScoreResult],
+        ranking_date: Optional[date] = None
+    ) -> 'IndexedRanking':
+        """
+        Cria o ranking a partir de uma lista de ScoreResult.
+        
+        Aceita qualquer objeto com os mesmos atributos (ticker, final_score,
+        confidence e scores por fator), como linhas de ScoreDaily.
+        
+        Args:
+            scores: Lista de ScoreResult ou linhas equivalentes
+            ranking_date: Data do ranking
+        
+        Returns:
+            IndexedRanking com os scores
+        """
+        return cls(
+            tickers=[s.ticker for s in scores],
+            scores=[s.final_score for s in scores],
+            confidences=[s.confidence for s in scores],
+            momentum_scores=[s.momentum_score for s in scores],
+            quality_scores=[s.quality_score for s in scores],
+            value_scores=[s.value_score for s in scores],
+            ranking_date=ranking_date
+        )
+    
+    def _ensure_order(self) -> None:
+        """Calcula a ordenação completa (argsort estável) na primeira vez."""
+        if self._order is None:
+            self._order = np.argsort(-self._sort_key, kind='stable')
+            self._ranks = np.empty(len(self.tickers), dtype=np.int64)
+            self._ranks[self._order] = np.arange(1, len(self.tickers) + 1)
+    
+    def _entry(self, position: int, rank: int) -> RankingEntry:
+        """Materializa (com cache) a entrada do ativo na posição dada."""
+        entry = self._entries.get(position)
+        if entry is None:
+            entry = RankingEntry(
+                ticker=self.tickers[position],
+                score=float(self.scores[position]),
+                rank=int(rank),
+                confidence=float(self.confidences[position]),
+                momentum_score=float(self.momentum_scores[position]),
+                quality_score=float(self.quality_scores[position]),
+                value_score=float(self.value_scores[position])
+            )
+            self._entries[position] = entry
+        return entry
+    
+    def __len__(self) -> int:
+        return len(self.tickers)
+    
+    def __getitem__(self, item: Union[int, slice]) -> Union[RankingEntry, List[RankingEntry]]:
+        """Entrada(s) por posição no ranking (0 = melhor)."""
+        self._ensure_order()
+        if isinstance(item, slice):
+            return [
+                self._entry(int(self._order[i]), i + 1)
+                for i in range(*item.indices(len(self)))
+            ]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError("ranking index out of range")
+        return self._entry(int(self._order[item]), item + 1)
+    
+    def __iter__(self) -> Iterator[RankingEntry]:
+        for i in range(len(self)):
+            yield self[i]
+    
+    def __contains__(self, ticker: object) -> bool:
+        return ticker in self._index
+    
+    def rank_of(self, ticker: str) -> Optional[int]:
+        """
+        Retorna a posição do ticker no ranking (1 = melhor) em O(1).
+        
+        Args:
+            ticker: Símbolo do ativo
+        
+        Returns:
+            Posição no ranking ou None se o ticker não estiver no ranking
+        """
+        position = self._index.get(ticker)
+        if position is None:
+            return None
+        self._ensure_order()
+        return int(self._ranks[position])
+    
+    def get(self, ticker: str) -> Optional[RankingEntry]:
+        """
+        Retorna a entrada do ranking para um ticker em O(1).
+        
+        Args:
+            ticker: Símbolo do ativo
+        
+        Returns:
+            RankingEntry ou None se o ticker não estiver no ranking
+        """
+        rank = self.rank_of(ticker)
+        if rank is None:
+            return None
+        return self._entry(self._index[ticker], rank)
+    
+    def top_n(self, n: int) -> List[RankingEntry]:
+        """
+        Retorna os top N ativos usando seleção parcial.
+        
+        Se a ordenação completa ainda não foi calculada, seleciona os N
+        maiores com argpartition e ordena apenas esses, respeitando a mesma
+        regra de desempate da ordenação completa.
+        
+        Args:
+            n: Número de ativos a retornar
+        
+        Returns:
+            Lista com os top N ativos (ou todos se N > len(ranking))
+        """
+        if n <= 0:
+            return []
+        if self._order is not None or n >= len(self):
+            return self[:n]
+        
+        key = self._sort_key
+        kth_value = key[np.argpartition(-key, n - 1)[n - 1]]
+        
+        # Todos acima do corte e, no empate do corte, os primeiros pela ordem de entrada
+        above = np.flatnonzero(key > kth_value)
+        ties = np.flatnonzero(key == kth_value)[:n - len(above)]
+        selected = np.concatenate([above, ties])
+        selected = selected[np.lexsort((selected, -key[selected]))]
+        
+        return [self._entry(int(position), rank) for rank, position in enumerate(selected, start=1)]
+    
+    def percentile_of(self, ticker: str) -> Optional[float]:
+        """
+        Retorna o percentil do ticker no ranking (100 = melhor, 0 = pior).
+        
+        Args:
+            ticker: Símbolo do ativo
+        
+        Returns:
+            Percentil entre 0 e 100, ou None se o ticker não estiver no ranking
+        """
+        rank = self.rank_of(ticker)
+        if rank is None:
+            return None
+        if len(self) == 1:
+            return 100.0
+        return 100.0 * (len(self) - rank) / (len(self) - 1)
+    
+    def top_percentile(self, percentile: float) -> List[RankingEntry]:
+        """
+        Retorna os ativos no topo do ranking até o percentual dado.
+        
+        Args:
+            percentile: Percentual do universo a retornar (0-100)
+        
+        Returns:
+            Lista dos melhores ceil(N * percentile / 100) ativos
+            
+        Raises:
+            ValueError: Se percentile estiver fora de [0, 100]
+        """
+        if not 0 <= percentile <= 100:
+            raise ValueError(f"percentile must be between 0 and 100, got {percentile}")
+        return self.top_n(math.ceil(len(self) * percentile / 100))
+
+
 class Ranker:
     """
     Gera rankings a partir de scores.
@@ -73,22 +304,8 @@ class Ranker:
             logger.warning(f"No scores provided for ranking on {ranking_date}")
             return []
         
-        # Ordenar scores por final_score em ordem decrescente
-        sorted_scores = sorted(scores, key=lambda x: x.final_score, reverse=True)
-        
-        # Criar ranking entries com posições sequenciais
-        ranking = []
-        for rank, score_result in enumerate(sorted_scores, start=1):
-            entry = RankingEntry(
-                ticker=score_result.ticker,
-                score=score_result.final_score,
-                rank=rank,
-                confidence=score_result.confidence,
-                momentum_score=score_result.momentum_score,
-                quality_score=score_result.quality_score,
-                value_score=score_result.value_score
-            )
-            ranking.append(entry)
+        # Ordenar scores por final_score em ordem decrescente e materializar entries
+        ranking = list(self.index_ranking(scores, ranking_date))
         
         logger.info(
             f"Generated ranking for {ranking_date} with {len(ranking)} assets. "
@@ -97,12 +314,39 @@ class Ranker:
         
         return ranking
     
-    def get_top_n(self, ranking: List[RankingEntry], n: int) -> List[RankingEntry]:
+    def index_ranking(
+        self,
+        scores: List[ScoreResult],
+        ranking_date: date
+    ) -> IndexedRanking:
+        """
+        Gera ranking indexado, sem materializar uma entry por ativo.
+        
+        Indicado quando o ranking é consultado repetidamente (top N, posição
+        de um ticker, percentis): as consultas são O(1) ou usam seleção
+        parcial, e entries são criadas apenas quando solicitadas.
+        
+        Args:
+            scores: Lista de ScoreResult para rankear
+            ranking_date: Data do ranking
+            
+        Returns:
+            IndexedRanking com os ativos
+            
+        Valida: Requisitos 5.1, 5.2, 5.3, 5.4, 5.5
+        """
+        return IndexedRanking.from_score_results(scores, ranking_date)
+    
+    def get_top_n(
+        self,
+        ranking: Union[List[RankingEntry], IndexedRanking],
+        n: int
+    ) -> List[RankingEntry]:
         """
         Retorna top N ativos do ranking.
         
         Args:
-            ranking: Lista de RankingEntry ordenada
+            ranking: Lista de RankingEntry ordenada ou IndexedRanking
             n: Número de ativos a retornar
             
         Returns:
@@ -114,7 +358,10 @@ class Ranker:
             logger.warning(f"Invalid n={n} for get_top_n, returning empty list")
             return []
         
-        top_n = ranking[:n]
+        if isinstance(ranking, IndexedRanking):
+            top_n = ranking.top_n(n)
+        else:
+            top_n = ranking[:n]
         
         logger.debug(f"Returning top {len(top_n)} assets from ranking")
         
@@ -122,14 +369,16 @@ class Ranker:
     
     def get_asset_rank(
         self, 
-        ranking: List[RankingEntry], 
+        ranking: Union[List[RankingEntry], IndexedRanking], 
         ticker: str
     ) -> Optional[RankingEntry]:
         """
         Retorna entrada do ranking para um ticker específico.
         
+        Com IndexedRanking a busca é O(1); com lista, é uma varredura linear.
+        
         Args:
-            ranking: Lista de RankingEntry ordenada
+            ranking: Lista de RankingEntry ordenada ou IndexedRanking
             ticker: Símbolo do ativo a buscar
             
         Returns:
@@ -137,6 +386,12 @@ class Ranker:
             
         Valida: Requisitos 5.1, 5.2, 5.3, 5.4, 5.5
         """
+        if isinstance(ranking, IndexedRanking):
+            entry = ranking.get(ticker)
+            if entry is None:
+                logger.warning(f"Ticker {ticker} not found in ranking")
+            return entry
+        
         for entry in ranking:
             if entry.ticker == ticker:
                 logger.debug(
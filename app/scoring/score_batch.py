@@ -0,0 +1,358 @@
+"""
+Container colunar para resultados de scoring em batch.
+
+Guarda os resultados de um universo inteiro como struct-of-arrays (um array
+por sub-score e uma matriz compacta de fatores) em vez de um ScoreResult com
+dicts e listas por ativo. Linhas individuais são expostas como views que se
+comportam como ScoreResult para o código existente.
+
+Valida: Requisitos 4.5, 4.6
+"""
+
+from datetime import date
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from app.scoring.scoring_engine import ScoreResult
+
+# Ordem das colunas na matriz de penalidades
+PENALTY_COLUMNS = ('volatility', 'drawdown', 'distress')
+
+
+class ScoreRow:
+    """
+    View de uma linha de ScoreBatch com a interface de ScoreResult.
+    
+    Leituras vêm direto dos arrays do batch; raw_factors e risk_penalties são
+    montados sob demanda. Atribuir confidence ou passed_eligibility grava no
+    batch.
+    """
+    
+    __slots__ = ('_batch', '_position')
+    
+    def __init__(self, batch: 'ScoreBatch', position: int):
+        self._batch = batch
+        self._position = position
+    
+    @property
+    def ticker(self) -> str:
+        return self._batch.tickers[self._position]
+    
+    @property
+    def final_score(self) -> float:
+        return float(self._batch.final_score[self._position])
+    
+    @property
+    def base_score(self) -> float:
+        return float(self._batch.base_score[self._position])
+    
+    @property
+    def momentum_score(self) -> float:
+        return float(self._batch.momentum_score[self._position])
+    
+    @property
+    def quality_score(self) -> float:
+        return float(self._batch.quality_score[self._position])
+    
+    @property
+    def value_score(self) -> float:
+        return float(self._batch.value_score[self._position])
+    
+    @property
+    def confidence(self) -> float:
+        return float(self._batch.confidence[self._position])
+    
+    @confidence.setter
+    def confidence(self, value: float) -> None:
+        self._batch.confidence[self._position] = value
+    
+    @property
+    def passed_eligibility(self) -> bool:
+        return bool(self._batch.passed_eligibility[self._position])
+    
+    @passed_eligibility.setter
+    def passed_eligibility(self, value: bool) -> None:
+        self._batch.passed_eligibility[self._position] = value
+    
+    @property
+    def exclusion_reasons(self) -> List[str]:
+        return list(self._batch.exclusion_reasons.get(self._position, []))
+    
+    @property
+    def raw_factors(self) -> Dict[str, float]:
+        return self._batch.raw_factors(self._position)
+    
+    @property
+    def risk_penalties(self) -> Dict[str, Any]:
+        return self._batch.risk_penalties(self._position)
+    
+    def to_score_result(self) -> ScoreResult:
+        """Materializa a linha como ScoreResult."""
+        return ScoreResult(
+            ticker=self.ticker,
+            final_score=self.final_score,
+            momentum_score=self.momentum_score,
+            quality_score=self.quality_score,
+            value_score=self.value_score,
+            confidence=self.confidence,
+            raw_factors=self.raw_factors,
+            base_score=self.base_score,
+            risk_penalties=self.risk_penalties,
+            passed_eligibility=self.passed_eligibility,
+            exclusion_reasons=self.exclusion_reasons
+        )
+    
+    def __repr__(self) -> str:
+        return f"<ScoreRow(ticker={self.ticker}, final_score={self.final_score})>"
+
+
+class ScoreBatch:
+    """
+    Resultados de scoring de um universo em formato colunar.
+    
+    Sub-scores ficam em arrays float64 (os mesmos valores persistidos em
+    ScoreDaily), penalidades numa matriz float64 (N x 3, linha NaN = sem
+    penalidade aplicada) e fatores numa matriz N x F. Razões de exclusão e
+    de distress, raras, ficam em dicts esparsos indexados pela posição.
+    
+    Example:
+        >>> scores_df = engine.score_universe(factors_df)
+        >>> batch = engine.build_score_batch(scores_df, factors_df)
+        >>> batch[0].final_score
+        >>> score_service.save_batch_scores(batch, date.today())
+    """
+    
+    def __init__(
+        self,
+        tickers: Sequence[str],
+        final_score: Sequence[float],
+        momentum_score: Sequence[float],
+        quality_score: Sequence[float],
+        value_score: Sequence[float],
+        confidence: Optional[Sequence[float]] = None,
+        base_score: Optional[Sequence[float]] = None,
+        penalties: Optional[np.ndarray] = None,
+        factor_names: Sequence[str] = (),
+        factor_matrix: Optional[np.ndarray] = None,
+        passed_eligibility: Union[bool, Sequence[bool]] = True,
+        exclusion_reasons: Optional[Mapping[int, List[str]]] = None,
+        distress_reasons: Optional[Mapping[int, List[str]]] = None,
+        factor_dtype: Any = np.float64
+    ):
+        """
+        Inicializa o batch.
+        
+        Args:
+            tickers: Símbolos dos ativos
+            final_score: Scores finais
+            momentum_score: Scores de momentum
+            quality_score: Scores de qualidade
+            value_score: Scores de valor
+            confidence: Scores de confiança (default 0.5)
+            base_score: Scores base antes das penalidades (default 0.0)
+            penalties: Matriz N x 3 (volatility, drawdown, distress); linha
+                NaN indica que nenhuma penalidade foi aplicada
+            factor_names: Nomes das colunas de factor_matrix
+            factor_matrix: Matriz N x F de fatores brutos (NaN = ausente)
+            passed_eligibility: Status de elegibilidade (escalar ou por ativo)
+            exclusion_reasons: Dict posição -> razões de exclusão
+            distress_reasons: Dict posição -> condições de distress
+            factor_dtype: dtype da matriz de fatores (float32 reduz memória
+                pela metade em backfills históricos)
+            
+        Raises:
+            ValueError: Se os arrays tiverem tamanhos diferentes
+        """
+        self.tickers: List[str] = list(tickers)
+        n_assets = len(self.tickers)
+        
+        def column(values, fill, dtype=np.float64):
+            if values is None:
+                return np.full(n_assets, fill, dtype=dtype)
+            array = np.array(values, dtype=dtype)
+            if array.shape != (n_assets,):
+                raise ValueError(f"Expected {n_assets} values, got shape {array.shape}")
+            return array
+        
+        self.final_score = column(final_score, np.nan)
+        self.momentum_score = column(momentum_score, np.nan)
+        self.quality_score = column(quality_score, np.nan)
+        self.value_score = column(value_score, np.nan)
+        self.confidence = column(confidence, 0.5)
+        self.base_score = column(base_score, 0.0)
+        
+        if penalties is None:
+            self.penalties = np.full((n_assets, len(PENALTY_COLUMNS)), np.nan)
+        else:
+            self.penalties = np.array(penalties, dtype=np.float64).reshape(
+                n_assets, len(PENALTY_COLUMNS)
+            )
+        
+        self.factor_names: List[str] = list(factor_names)
+        if factor_matrix is None:
+            self.factor_matrix = np.full((n_assets, len(self.factor_names)), np.nan, dtype=factor_dtype)
+        else:
+            self.factor_matrix = np.asarray(factor_matrix, dtype=factor_dtype).reshape(
+                n_assets, len(self.factor_names)
+            )
+        
+        if isinstance(passed_eligibility, (bool, np.bool_)):
+            self.passed_eligibility = np.full(n_assets, passed_eligibility, dtype=bool)
+        else:
+            self.passed_eligibility = column(passed_eligibility, True, dtype=bool)
+        
+        self.exclusion_reasons: Dict[int, List[str]] = dict(exclusion_reasons or {})
+        self.distress_reasons: Dict[int, List[str]] = dict(distress_reasons or {})
+        
+        self._positions: Optional[Dict[str, int]] = None
+    
+    def __len__(self) -> int:
+        return len(self.tickers)
+    
+    def __getitem__(self, position: int) -> ScoreRow:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("score batch index out of range")
+        return ScoreRow(self, position)
+    
+    def __iter__(self) -> Iterator[ScoreRow]:
+        for position in range(len(self)):
+            yield ScoreRow(self, position)
+    
+    def row(self, ticker: str) -> Optional[ScoreRow]:
+        """
+        Retorna a view da linha de um ticker.
+        
+        Args:
+            ticker: Símbolo do ativo
+            
+        Returns:
+            ScoreRow ou None se o ticker não estiver no batch
+        """
+        if self._positions is None:
+            self._positions = {t: i for i, t in enumerate(self.tickers)}
+        position = self._positions.get(ticker)
+        return None if position is None else ScoreRow(self, position)
+    
+    def raw_factors(self, position: int) -> Dict[str, float]:
+        """Monta o dict de fatores brutos de uma linha (NaN = ausente)."""
+        return dict(zip(self.factor_names, self.factor_matrix[position].tolist()))
+    
+    def risk_penalties(self, position: int) -> Dict[str, Any]:
+        """Monta o dict de penalidades de risco de uma linha (vazio se não aplicadas)."""
+        row = self.penalties[position]
+        if np.isnan(row).all():
+            return {}
+        
+        penalties: Dict[str, Any] = dict(zip(PENALTY_COLUMNS, row.astype(float).tolist()))
+        reasons = self.distress_reasons.get(position)
+        if reasons:
+            penalties['distress_reasons'] = list(reasons)
+        return penalties
+    
+    def take(self, positions: Sequence[int]) -> 'ScoreBatch':
+        """
+        Cria um novo batch com as linhas selecionadas.
+        
+        Args:
+            positions: Posições a manter, na ordem desejada
+            
+        Returns:
+            Novo ScoreBatch
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        remap = {int(old): new for new, old in enumerate(positions)}
+        
+        return ScoreBatch(
+            tickers=[self.tickers[i] for i in positions],
+            final_score=self.final_score[positions],
+            momentum_score=self.momentum_score[positions],
+            quality_score=self.quality_score[positions],
+            value_score=self.value_score[positions],
+            confidence=self.confidence[positions],
+            base_score=self.base_score[positions],
+            penalties=self.penalties[positions],
+            factor_names=self.factor_names,
+            factor_matrix=self.factor_matrix[positions],
+            passed_eligibility=self.passed_eligibility[positions],
+            exclusion_reasons={
+                remap[i]: reasons for i, reasons in self.exclusion_reasons.items() if i in remap
+            },
+            distress_reasons={
+                remap[i]: reasons for i, reasons in self.distress_reasons.items() if i in remap
+            },
+            factor_dtype=self.factor_matrix.dtype
+        )
+    
+    def to_score_results(self) -> List[ScoreResult]:
+        """Materializa todas as linhas como ScoreResult."""
+        return [row.to_score_result() for row in self]
+    
+    def to_score_values(
+        self,
+        score_date: date,
+        ranks: Optional[Mapping[str, int]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Serializa o batch nas linhas de ScoreDaily usadas pelo bulk writer.
+        
+        Produz os mesmos valores de ScoreService._score_values para cada
+        linha, sem materializar ScoreResult.
+        
+        Args:
+            score_date: Data dos scores
+            ranks: Dicionário opcional mapeando ticker -> rank
+            
+        Returns:
+            Lista de dicts coluna -> valor
+        """
+        base = self.base_score
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factors = np.where(
+                (base != 0) & ~np.isnan(base), self.final_score / base, np.nan
+            )
+        
+        columns = zip(
+            self.final_score.tolist(),
+            self.momentum_score.tolist(),
+            self.quality_score.tolist(),
+            self.value_score.tolist(),
+            self.confidence.tolist(),
+            base.tolist(),
+            factors.tolist(),
+            self.passed_eligibility.tolist()
+        )
+        
+        values = []
+        for position, (final, momentum, quality, value, confidence, base_value,
+                       penalty_factor, passed) in enumerate(columns):
+            ticker = self.tickers[position]
+            values.append({
+                'ticker': ticker,
+                'date': score_date,
+                'final_score': final,
+                'momentum_score': momentum,
+                'quality_score': quality,
+                'value_score': value,
+                'confidence': confidence,
+                'rank': ranks.get(ticker) if ranks else None,
+                'base_score': base_value,
+                'risk_penalty_factor': None if np.isnan(penalty_factor) else penalty_factor,
+                'passed_eligibility': passed,
+                'exclusion_reasons': self.exclusion_reasons.get(position) or None,
+                'risk_penalties': self.risk_penalties(position) or None,
+                'distress_flag': False
+            })
+        
+        return values
+    
+    def nbytes(self) -> int:
+        """Memória ocupada pelos arrays numéricos do batch, em bytes."""
+        arrays = (
+            self.final_score, self.momentum_score, self.quality_score, self.value_score,
+            self.confidence, self.base_score, self.penalties, self.factor_matrix,
+            self.passed_eligibility
+        )
+        return sum(array.nbytes for array in arrays)
@@ -6,15 +6,21 @@ Valida: Requisitos 4.5, 4.6
 
 import logging
 from datetime import date
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Union
 
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
 from app.models.schemas import ScoreDaily
 from app.scoring.scoring_engine import ScoreResult
+from app.scoring.score_batch import ScoreBatch
+from app.scoring.ranker import IndexedRanking
 
 logger = logging.getLogger(__name__)
 
+# Tratamentos de empate suportados por ScoreService.update_ranks
+RANK_TIE_METHODS = ('ordinal', 'competition', 'dense')
+
 
 class ScoreService:
     """
@@ -55,33 +61,18 @@ class ScoreService:
         Valida: Requisitos 4.5, 4.6, 5.1, 5.2, 5.3, 5.5
         """
         try:
+            values = self._score_values(score_result, score_date, rank)
+            
             # Verifica se registro já existe
             existing = self.db.query(ScoreDaily).filter_by(
                 ticker=score_result.ticker,
                 date=score_date
             ).first()
             
-            # Calculate risk penalty factor from base_score and final_score
-            risk_penalty_factor = None
-            if score_result.base_score and score_result.base_score != 0:
-                risk_penalty_factor = score_result.final_score / score_result.base_score
-            
             if existing:
                 # Atualiza registro existente
-                existing.final_score = score_result.final_score
-                existing.momentum_score = score_result.momentum_score
-                existing.quality_score = score_result.quality_score
-                existing.value_score = score_result.value_score
-                existing.confidence = score_result.confidence
-                existing.rank = rank
-                
-                # Update enhanced fields
-                existing.base_score = score_result.base_score
-                existing.risk_penalty_factor = risk_penalty_factor
-                existing.passed_eligibility = score_result.passed_eligibility
-                existing.exclusion_reasons = score_result.exclusion_reasons if score_result.exclusion_reasons else None
-                existing.risk_penalties = score_result.risk_penalties if score_result.risk_penalties else None
-                existing.distress_flag = score_result.distress_flag if hasattr(score_result, 'distress_flag') else False
+                for column, value in values.items():
+                    setattr(existing, column, value)
                 
                 logger.info(
                     f"Updated score for {score_result.ticker} on {score_date}: "
@@ -91,22 +82,7 @@ class ScoreService:
                 record = existing
             else:
                 # Cria novo registro
-                record = ScoreDaily(
-                    ticker=score_result.ticker,
-                    date=score_date,
-                    final_score=score_result.final_score,
-                    momentum_score=score_result.momentum_score,
-                    quality_score=score_result.quality_score,
-                    value_score=score_result.value_score,
-                    confidence=score_result.confidence,
-                    rank=rank,
-                    base_score=score_result.base_score,
-                    risk_penalty_factor=risk_penalty_factor,
-                    passed_eligibility=score_result.passed_eligibility,
-                    exclusion_reasons=score_result.exclusion_reasons if score_result.exclusion_reasons else None,
-                    risk_penalties=score_result.risk_penalties if score_result.risk_penalties else None,
-                    distress_flag=score_result.distress_flag if hasattr(score_result, 'distress_flag') else False
-                )
+                record = ScoreDaily(**values)
                 self.db.add(record)
                 logger.info(
                     f"Created score for {score_result.ticker} on {score_date}: "
@@ -125,19 +101,67 @@ class ScoreService:
             self.db.rollback()
             raise
     
+    @staticmethod
+    def _score_values(
+        score_result: ScoreResult,
+        score_date: date,
+        rank: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Converte um ScoreResult nos valores de coluna de ScoreDaily.
+        
+        Args:
+            score_result: Resultado do scoring
+            score_date: Data do score
+            rank: Posição no ranking (opcional)
+        
+        Returns:
+            Dict coluna -> valor (sem id e calculated_at)
+        """
+        # Calculate risk penalty factor from base_score and final_score
+        risk_penalty_factor = None
+        if score_result.base_score and score_result.base_score != 0:
+            risk_penalty_factor = score_result.final_score / score_result.base_score
+        
+        return {
+            'ticker': score_result.ticker,
+            'date': score_date,
+            'final_score': score_result.final_score,
+            'momentum_score': score_result.momentum_score,
+            'quality_score': score_result.quality_score,
+            'value_score': score_result.value_score,
+            'confidence': score_result.confidence,
+            'rank': rank,
+            'base_score': score_result.base_score,
+            'risk_penalty_factor': risk_penalty_factor,
+            'passed_eligibility': score_result.passed_eligibility,
+            'exclusion_reasons': score_result.exclusion_reasons if score_result.exclusion_reasons else None,
+            'risk_penalties': score_result.risk_penalties if score_result.risk_penalties else None,
+            'distress_flag': score_result.distress_flag if hasattr(score_result, 'distress_flag') else False
+        }
+    
     def save_batch_scores(
         self,
-        scores: List[ScoreResult],
+        scores: Union[List[ScoreResult], ScoreBatch],
         score_date: date,
-        ranks: Optional[Dict[str, int]] = None
+        ranks: Optional[Dict[str, int]] = None,
+        chunk_size: int = 500
     ) -> Dict[str, any]:
         """
-        Salva múltiplos scores em batch.
+        Salva múltiplos scores em batch, numa única transação.
+        
+        Cada chunk de até chunk_size linhas é gravado com um único upsert
+        (INSERT ... ON CONFLICT (ticker, date) DO UPDATE) dentro de um
+        savepoint. Se o chunk falhar, suas linhas são regravadas uma a uma
+        para isolar as que falharam, sem abortar o restante do batch. O commit
+        acontece uma única vez no final.
         
         Args:
-            scores: Lista de ScoreResult
+            scores: Lista de ScoreResult ou ScoreBatch (serializado direto
+                das colunas, sem materializar ScoreResult)
             score_date: Data dos scores
             ranks: Dicionário opcional mapeando ticker -> rank
+            chunk_size: Número máximo de linhas por statement
         
         Returns:
             Dict com estatísticas:
@@ -147,28 +171,65 @@ class ScoreService:
                 "total_records": número total de registros inseridos
             }
             
+        Raises:
+            ValueError: Se chunk_size não for positivo
+            Exception: Se o commit final falhar
+            
         Valida: Requisitos 4.5, 4.6
         """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+        
         results = {
             "success": [],
             "failed": [],
             "total_records": 0
         }
         
-        for score_result in scores:
-            try:
+        # Uma linha por ticker (a última ocorrência prevalece), como no save_score
+        rows: Dict[str, Dict[str, Any]] = {}
+        if isinstance(scores, ScoreBatch):
+            for values in scores.to_score_values(score_date, ranks):
+                rows[values['ticker']] = values
+        else:
+            for score_result in scores:
                 rank = ranks.get(score_result.ticker) if ranks else None
+                rows[score_result.ticker] = self._score_values(score_result, score_date, rank)
+        
+        row_list = list(rows.values())
+        
+        try:
+            for start in range(0, len(row_list), chunk_size):
+                chunk = row_list[start:start + chunk_size]
                 
-                self.save_score(score_result, score_date, rank)
-                
-                results["success"].append(score_result.ticker)
-                results["total_records"] += 1
-                
-            except Exception as e:
-                ticker = score_result.ticker
-                logger.error(f"Failed to save score for {ticker}: {e}")
-                results["failed"].append({"ticker": ticker, "error": str(e)})
-                continue
+                try:
+                    with self.db.begin_nested():
+                        self._upsert_score_rows(chunk)
+                    results["success"].extend(row['ticker'] for row in chunk)
+                    
+                except Exception as chunk_error:
+                    logger.warning(
+                        f"Bulk score upsert failed for chunk of {len(chunk)} rows, "
+                        f"retrying row by row: {chunk_error}"
+                    )
+                    for row in chunk:
+                        try:
+                            with self.db.begin_nested():
+                                self._upsert_score_rows([row])
+                            results["success"].append(row['ticker'])
+                        except Exception as e:
+                            ticker = row['ticker']
+                            logger.error(f"Failed to save score for {ticker}: {e}")
+                            results["failed"].append({"ticker": ticker, "error": str(e)})
+            
+            self.db.commit()
+            
+        except Exception as e:
+            logger.error(f"Error committing batch scores for {score_date}: {e}")
+            self.db.rollback()
+            raise
+        
+        results["total_records"] = len(results["success"])
         
         logger.info(
             f"Batch score save complete: {len(results['success'])} succeeded, "
@@ -177,6 +238,58 @@ class ScoreService:
         
         return results
     
+    def _upsert_score_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Grava linhas de ScoreDaily com upsert em (ticker, date).
+        
+        Em PostgreSQL e SQLite usa um único INSERT ... ON CONFLICT DO UPDATE.
+        Nos demais dialetos busca os ids existentes numa consulta e aplica
+        bulk insert/update via ORM.
+        
+        Args:
+            rows: Valores de coluna gerados por _score_values
+        """
+        if not rows:
+            return
+        
+        dialect = self.db.get_bind().dialect.name
+        
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            
+            stmt = insert(ScoreDaily).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['ticker', 'date'],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in rows[0]
+                    if column not in ('ticker', 'date')
+                }
+            )
+            self.db.execute(stmt)
+            return
+        
+        existing_ids = dict(
+            self.db.query(ScoreDaily.ticker, ScoreDaily.id).filter(
+                ScoreDaily.date == rows[0]['date'],
+                ScoreDaily.ticker.in_([row['ticker'] for row in rows])
+            ).all()
+        )
+        
+        updates = [
+            {**row, 'id': existing_ids[row['ticker']]}
+            for row in rows if row['ticker'] in existing_ids
+        ]
+        inserts = [row for row in rows if row['ticker'] not in existing_ids]
+        
+        if updates:
+            self.db.bulk_update_mappings(ScoreDaily, updates)
+        if inserts:
+            self.db.bulk_insert_mappings(ScoreDaily, inserts)
+    
     def get_score(
         self,
         ticker: str,
@@ -216,7 +329,37 @@ class ScoreService:
         """
         return self.db.query(ScoreDaily).filter_by(
             date=score_date
-        ).order_by(ScoreDaily.final_score.desc()).all()
+        ).order_by(ScoreDaily.final_score.desc(), ScoreDaily.ticker).all()
+    
+    def get_indexed_ranking(
+        self,
+        score_date: date
+    ) -> IndexedRanking:
+        """
+        Carrega o ranking indexado de uma data para consultas repetidas.
+        
+        Lê apenas as colunas de score (sem objetos ORM) e as entrega a um
+        IndexedRanking, que ordena por final_score com desempate por ticker,
+        como o rank 'ordinal' de update_ranks.
+        
+        Args:
+            score_date: Data dos scores
+        
+        Returns:
+            IndexedRanking da data (vazio se não houver scores)
+            
+        Valida: Requisitos 5.1, 5.2, 6.2
+        """
+        rows = self.db.query(
+            ScoreDaily.ticker,
+            ScoreDaily.final_score,
+            ScoreDaily.confidence,
+            ScoreDaily.momentum_score,
+            ScoreDaily.quality_score,
+            ScoreDaily.value_score
+        ).filter(ScoreDaily.date == score_date).order_by(ScoreDaily.ticker).all()
+        
+        return IndexedRanking.from_score_results(rows, score_date)
     
     def get_latest_score(
         self,
@@ -267,41 +410,95 @@ class ScoreService:
         """
         return self.db.query(ScoreDaily).filter_by(
             date=score_date
-        ).order_by(ScoreDaily.final_score.desc()).limit(n).all()
+        ).order_by(ScoreDaily.final_score.desc(), ScoreDaily.ticker).limit(n).all()
     
     def update_ranks(
         self,
-        score_date: date
+        score_date: Union[date, Iterable[date]],
+        tie_method: str = 'ordinal',
+        use_smoothed: bool = False
     ) -> int:
         """
-        Atualiza os ranks de todos os scores para uma data específica.
+        Atualiza os ranks de todos os scores para uma ou mais datas.
         
-        Ordena por score final (maior primeiro) e atribui ranks sequenciais.
+        O rank é calculado no banco com um único
+        UPDATE ... FROM (SELECT id, RANK() OVER (PARTITION BY date ORDER BY score DESC)),
+        sem carregar os registros como objetos ORM.
         
         Args:
-            score_date: Data dos scores a atualizar
+            score_date: Data dos scores a atualizar, ou coleção de datas
+                (útil para recálculos históricos)
+            tie_method: Tratamento de empates:
+                - 'ordinal': ranks sequenciais 1..N, empates desfeitos por ticker
+                - 'competition': empates recebem o mesmo rank e o próximo
+                  salta posições (1, 2, 2, 4)
+                - 'dense': empates recebem o mesmo rank sem saltos (1, 2, 2, 3)
+            use_smoothed: Se True, ordena por final_score_smoothed (usando
+                final_score quando o suavizado ainda não existe)
         
         Returns:
             Número de registros atualizados
             
+        Raises:
+            ValueError: Se tie_method for inválido
+            
         Valida: Requisitos 5.1, 5.2
         """
+        if tie_method not in RANK_TIE_METHODS:
+            raise ValueError(
+                f"Invalid tie_method '{tie_method}'. Must be one of {RANK_TIE_METHODS}"
+            )
+        
+        dates = [score_date] if isinstance(score_date, date) else list(score_date)
+        if not dates:
+            return 0
+        
         try:
-            # Buscar todos os scores da data ordenados por score final
-            scores = self.db.query(ScoreDaily).filter_by(
-                date=score_date
-            ).order_by(ScoreDaily.final_score.desc()).all()
+            if use_smoothed:
+                score_column = func.coalesce(ScoreDaily.final_score_smoothed, ScoreDaily.final_score)
+            else:
+                score_column = ScoreDaily.final_score
+            
+            rank_function = {
+                'ordinal': func.row_number,
+                'competition': func.rank,
+                'dense': func.dense_rank
+            }[tie_method]
+            
+            # Só o ranking ordinal desempata por ticker; nos demais o empate
+            # no score precisa chegar intacto à função de rank
+            order_by = [score_column.desc()]
+            if tie_method == 'ordinal':
+                order_by.append(ScoreDaily.ticker)
+            
+            ranked = select(
+                ScoreDaily.id.label('id'),
+                rank_function().over(
+                    partition_by=ScoreDaily.date,
+                    order_by=order_by
+                ).label('new_rank')
+            ).where(
+                ScoreDaily.date.in_(dates)
+            ).subquery()
             
-            # Atribuir ranks sequenciais
-            for rank, score in enumerate(scores, start=1):
-                score.rank = rank
+            stmt = (
+                update(ScoreDaily)
+                .where(ScoreDaily.id == ranked.c.id)
+                .values(rank=ranked.c.new_rank)
+                .execution_options(synchronize_session=False)
+            )
+            result = self.db.execute(stmt)
             
             # Commit
             self.db.commit()
             
-            logger.info(f"Updated ranks for {len(scores)} scores on {score_date}")
+            updated = result.rowcount
+            logger.info(
+                f"Updated ranks for {updated} scores on {len(dates)} date(s) "
+                f"(tie_method={tie_method}, use_smoothed={use_smoothed})"
+            )
             
-            return len(scores)
+            return updated
             
         except Exception as e:
             logger.error(f"Error updating ranks for {score_date}: {e}")
@@ -4,11 +4,16 @@ Motor de scoring que combina fatores em score final.
 Valida: Requisitos 4.1, 4.2, 4.3, 4.4, 4.7
 """
 
-from typing import Dict, Optional, List
+from typing import Any, Dict, Mapping, Optional, List, TYPE_CHECKING
 from dataclasses import dataclass, field
 import logging
+import numpy as np
+import pandas as pd
 from app.config import Settings
 
+if TYPE_CHECKING:
+    from app.scoring.score_batch import ScoreBatch
+
 logger = logging.getLogger(__name__)
 
 
@@ -56,13 +61,20 @@ class ScoringEngine:
     Valida: Requisitos 4.1, 4.2, 4.3, 4.4, 4.7
     """
     
-    def __init__(self, config: Optional[Settings] = None):
+    def __init__(
+        self,
+        config: Optional[Settings] = None,
+        sector_map: Optional[Mapping] = None
+    ):
         """
         Inicializa o scoring engine com configuração.
         
         Args:
             config: Objeto Settings com pesos configurados.
                    Se None, usa configuração padrão.
+            sector_map: Mapa imutável ticker -> SectorClassification carregado uma
+                        vez por execução. Quando o setor é conhecido, substitui a
+                        heurística baseada em fatores na detecção de financeiras.
         
         Valida: Requisitos 4.4, 4.7
         """
@@ -70,6 +82,8 @@ class ScoringEngine:
             from app.config import settings
             config = settings
         
+        self.sector_map = sector_map
+        
         self.momentum_weight = config.momentum_weight
         self.quality_weight = config.quality_weight
         self.value_weight = config.value_weight
@@ -634,25 +648,7 @@ class ScoringEngine:
         
         # Calcular distress flag
         distress_penalty = 1.0
-        net_income_last_year = fundamental_factors.get('net_income_last_year')
-        net_income_history = fundamental_factors.get('net_income_history', [])
-        debt_to_ebitda_raw = fundamental_factors.get('debt_to_ebitda_raw')
-        
-        distress_conditions = []
-        
-        # Condição 1: Lucro líquido negativo no último ano
-        if net_income_last_year is not None and net_income_last_year < 0:
-            distress_conditions.append("negative_net_income_last_year")
-        
-        # Condição 2: Lucro negativo em 2 dos últimos 3 anos
-        if net_income_history and len(net_income_history) >= 3:
-            negative_years = sum(1 for ni in net_income_history if ni is not None and ni < 0)
-            if negative_years >= 2:
-                distress_conditions.append("negative_net_income_2_of_3_years")
-        
-        # Condição 3: Dívida líquida / EBITDA > 5
-        if debt_to_ebitda_raw is not None and debt_to_ebitda_raw > 5:
-            distress_conditions.append("high_leverage_debt_to_ebitda_gt_5")
+        distress_conditions = self._distress_conditions(fundamental_factors)
         
         # Aplicar distress penalty se qualquer condição for verdadeira
         if distress_conditions:
@@ -689,117 +685,45 @@ class ScoringEngine:
         )
         
         return result
-
-    def calculate_quality_score_financial(self, factors: Dict[str, float]) -> float:
+    
+    def _distress_conditions(self, factors: Dict[str, float]) -> List[str]:
         """
-        Calcula score de qualidade específico para instituições financeiras.
-
-        Fatores para bancos:
-        - ROE 3Y (cap 30%)
-        - Crescimento lucro 3Y (usando book_value_growth como proxy)
-        - Estabilidade do lucro (net_income_volatility invertido)
-        - Índice de eficiência (efficiency_ratio invertido)
-
+        Identifica condições de distress financeiro.
+        
+        Condições:
+        - Lucro líquido negativo no último ano
+        - Lucro negativo em 2 dos últimos 3 anos
+        - Dívida líquida / EBITDA > 5
+        
         Args:
-            factors: Dicionário com fatores normalizados
-
+            factors: Dicionário com net_income_last_year, net_income_history
+                     e debt_to_ebitda_raw
+            
         Returns:
-            Score de qualidade para financeiras
+            Lista com as condições de distress ativadas
         """
-        financial_quality_factors = []
-
-        # ROE 3Y (positivo é melhor)
-        if factors.get('roe') is not None:
-            financial_quality_factors.append(factors['roe'])
-
-        # Crescimento lucro 3Y (usando revenue_growth_3y que mapeia para book_value_growth)
-        if factors.get('revenue_growth_3y') is not None:
-            financial_quality_factors.append(factors['revenue_growth_3y'])
-
-        # Estabilidade do lucro (net_income_volatility invertido - menor volatilidade é melhor)
-        if factors.get('net_income_volatility') is not None:
-            financial_quality_factors.append(-factors['net_income_volatility'])
-
-        # Índice de eficiência (efficiency_ratio invertido - menor é melhor)
-        if factors.get('efficiency_ratio') is not None:
-            financial_quality_factors.append(-factors['efficiency_ratio'])
-
-        # Se nenhum fator disponível, retorna 0
-        if not financial_quality_factors:
-            return 0.0
-
-        # Calcular média dos fatores disponíveis
-        quality_score = sum(financial_quality_factors) / len(financial_quality_factors)
-
-        # Aplicar penalidade por prejuízo recente (mesmo critério)
         net_income_last_year = factors.get('net_income_last_year')
+        net_income_history = factors.get('net_income_history', [])
+        debt_to_ebitda_raw = factors.get('debt_to_ebitda_raw')
+        
+        distress_conditions = []
+        
+        # Condição 1: Lucro líquido negativo no último ano
         if net_income_last_year is not None and net_income_last_year < 0:
-            quality_score *= 0.4
-
-        return quality_score
-
-    def calculate_value_score_financial(self, factors: Dict[str, float]) -> float:
-        """
-        Calcula score de valor específico para instituições financeiras.
-
-        Fatores para bancos:
-        - P/L (pe_ratio invertido - menor é melhor)
-        - P/VP (pb_ratio invertido - menor é melhor)
-
-        Remove:
-        - EV/EBITDA (não aplicável para bancos)
-
-        Args:
-            factors: Dicionário com fatores normalizados
-
-        Returns:
-            Score de valor para financeiras
-        """
-        financial_value_factors = []
-
-        # P/L (invertido - menor é melhor)
-        if factors.get('pe_ratio') is not None:
-            financial_value_factors.append(-factors['pe_ratio'])
-
-        # P/VP (invertido - menor é melhor)
-        if factors.get('pb_ratio') is not None:
-            financial_value_factors.append(-factors['pb_ratio'])
-
-        # Se nenhum fator disponível, retorna 0
-        if not financial_value_factors:
-            return 0.0
-
-        # Calcular média dos fatores disponíveis
-        value_score = sum(financial_value_factors) / len(financial_value_factors)
-
-        return value_score
-
-    def _is_financial_institution(self, factors: Dict[str, float]) -> bool:
-        """
-        Detecta se o ativo é uma instituição financeira baseado nos fatores.
-
-        Critério: Se debt_to_ebitda e ev_ebitda são None (não aplicáveis para bancos)
-        e temos fatores específicos de financeiras como roa ou efficiency_ratio.
-
-        Args:
-            factors: Dicionário com fatores calculados
-
-        Returns:
-            True se for instituição financeira
-        """
-        # Bancos não têm debt_to_ebitda nem ev_ebitda
-        has_ebitda_metrics = (
-            factors.get('debt_to_ebitda') is not None or
-            factors.get('ev_ebitda') is not None
-        )
-
-        # Bancos têm fatores específicos como ROA ou efficiency_ratio
-        has_financial_metrics = (
-            factors.get('roa') is not None or
-            factors.get('efficiency_ratio') is not None
-        )
-
-        return not has_ebitda_metrics and has_financial_metrics
+            distress_conditions.append("negative_net_income_last_year")
+        
+        # Condição 2: Lucro negativo em 2 dos últimos 3 anos
+        if isinstance(net_income_history, (list, tuple)) and len(net_income_history) >= 3:
+            negative_years = sum(1 for ni in net_income_history if ni is not None and ni < 0)
+            if negative_years >= 2:
+                distress_conditions.append("negative_net_income_2_of_3_years")
+        
+        # Condição 3: Dívida líquida / EBITDA > 5
+        if debt_to_ebitda_raw is not None and debt_to_ebitda_raw > 5:
+            distress_conditions.append("high_leverage_debt_to_ebitda_gt_5")
+        
+        return distress_conditions
+    
     def calculate_quality_score_financial(self, factors: Dict[str, float]) -> float:
         """
         Calcula score de qualidade específico para instituições financeiras.
@@ -884,19 +808,31 @@ class ScoringEngine:
         
         return value_score
     
-    def _is_financial_institution(self, factors: Dict[str, float]) -> bool:
+    def _is_financial_institution(
+        self,
+        factors: Dict[str, float],
+        ticker: Optional[str] = None
+    ) -> bool:
         """
-        Detecta se o ativo é uma instituição financeira baseado nos fatores.
+        Detecta se o ativo é uma instituição financeira.
         
-        Critério: Se debt_to_ebitda e ev_ebitda são None (não aplicáveis para bancos)
+        Se o ticker tem setor conhecido no sector_map, usa a classificação
+        pré-carregada. Caso contrário, usa a heurística baseada nos fatores:
+        debt_to_ebitda e ev_ebitda são None (não aplicáveis para bancos)
         e temos fatores específicos de financeiras como roa ou efficiency_ratio.
         
         Args:
             factors: Dicionário com fatores calculados
+            ticker: Símbolo do ativo (para consulta ao sector_map)
             
         Returns:
             True se for instituição financeira
         """
+        if self.sector_map is not None and ticker is not None:
+            classification = self.sector_map.get(ticker)
+            if classification is not None and classification.is_financial is not None:
+                return classification.is_financial
+        
         # Bancos não têm debt_to_ebitda nem ev_ebitda
         has_ebitda_metrics = (
             factors.get('debt_to_ebitda') is not None or 
@@ -941,7 +877,7 @@ class ScoringEngine:
         all_factors = {**fundamental_factors, **momentum_factors}
         
         # Detectar se é instituição financeira
-        is_financial = self._is_financial_institution(fundamental_factors)
+        is_financial = self._is_financial_institution(fundamental_factors, ticker)
         
         # Calcular scores por categoria
         momentum_score = self.calculate_momentum_score(momentum_factors)
@@ -977,4 +913,352 @@ class ScoringEngine:
             f"quality={quality_score:.3f}, value={value_score:.3f}"
         )
         
-        return result
\ No newline at end of file
+        return result
+    
+    def score_universe(
+        self,
+        factors_df: pd.DataFrame,
+        sector_aware: bool = False,
+        volatility_limit: Optional[float] = None,
+        drawdown_limit: Optional[float] = None
+    ) -> pd.DataFrame:
+        """
+        Calcula scores de todo o universo de uma vez com operações NumPy mascaradas.
+        
+        Reproduz exatamente score_asset (e score_asset_sector_aware quando
+        sector_aware=True) para cada linha:
+        - Momentum: -999 se momentum_6m_ex_1m ou momentum_12m_ex_1m ausente
+        - Quality: NaN se roe_mean_3y ou net_margin ausente; escalado por
+          overall_confidence quando < 1
+        - Value: NaN se pe_ratio ou price_to_book (fallback pb_ratio) ausente
+        - Size: 0.0 quando ausente (e então excluído do score final)
+        - Final: média ponderada com redistribuição dos pesos de scores NaN;
+          0.0 se todos os scores são NaN
+        
+        Se volatility_limit e drawdown_limit são informados, aplica as mesmas
+        penalidades de risco e distress de score_asset_enhanced sobre o score
+        base: final_score = base_score * risk_penalty_factor * distress_penalty.
+        
+        Valores NaN no DataFrame são tratados como fatores ausentes (equivalente
+        a None nos dicionários de score_asset).
+        
+        Args:
+            factors_df: DataFrame com tickers no índice e fatores normalizados nas
+                        colunas; coluna opcional 'confidence' (default 0.5)
+            sector_aware: Se True, usa scoring de financeiras para os tickers
+                          classificados como tal (sector_map ou heurística)
+            volatility_limit: Limite de volatility_180d para penalidade (opcional)
+            drawdown_limit: Limite de max_drawdown_3y para penalidade (opcional)
+            
+        Returns:
+            DataFrame indexado por ticker com momentum_score, quality_score,
+            value_score, size_score, base_score, volatility_penalty,
+            drawdown_penalty, risk_penalty_factor, distress_penalty,
+            final_score, confidence e is_financial (penalidades são NaN
+            quando não aplicadas)
+            
+        Valida: Requisitos 4.1, 4.2, 4.3, 4.4, 4.7
+        """
+        n = len(factors_df)
+        
+        def column(name: str) -> np.ndarray:
+            if name not in factors_df.columns:
+                return np.full(n, np.nan)
+            return pd.to_numeric(factors_df[name], errors='coerce').to_numpy(dtype=float)
+        
+        def masked_mean(terms: List[np.ndarray]) -> np.ndarray:
+            stacked = np.vstack(terms)
+            valid = ~np.isnan(stacked)
+            counts = valid.sum(axis=0)
+            totals = np.where(valid, stacked, 0.0).sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(counts > 0, totals / counts, np.nan)
+        
+        # Momentum: fatores críticos obrigatórios, secundários invertidos
+        momentum_6m = column('momentum_6m_ex_1m')
+        momentum_12m = column('momentum_12m_ex_1m')
+        momentum_score = masked_mean([
+            momentum_6m, momentum_12m,
+            -column('volatility_90d'), -column('recent_drawdown')
+        ])
+        momentum_score = np.where(
+            np.isnan(momentum_6m) | np.isnan(momentum_12m), -999.0, momentum_score
+        )
+        
+        # Quality: roe_mean_3y e net_margin críticos, ajuste por confiança
+        roe_mean_3y = column('roe_mean_3y')
+        net_margin = column('net_margin')
+        debt_to_ebitda = column('debt_to_ebitda')
+        quality_score = masked_mean([
+            roe_mean_3y, -column('roe_volatility'), net_margin,
+            column('revenue_growth_3y'), -debt_to_ebitda
+        ])
+        quality_score = np.where(
+            np.isnan(roe_mean_3y) | np.isnan(net_margin), np.nan, quality_score
+        )
+        overall_confidence = column('overall_confidence')
+        quality_score = np.where(
+            overall_confidence < 1.0, quality_score * overall_confidence, quality_score
+        )
+        
+        # Value: pe_ratio e price_to_book (fallback pb_ratio) críticos
+        pe_ratio = column('pe_ratio')
+        pb_ratio = column('pb_ratio')
+        price_to_book = column('price_to_book')
+        price_to_book = np.where(np.isnan(price_to_book), pb_ratio, price_to_book)
+        ev_ebitda = column('ev_ebitda')
+        value_score = masked_mean([
+            -pe_ratio, -price_to_book, -ev_ebitda, column('fcf_yield'), -debt_to_ebitda
+        ])
+        value_score = np.where(
+            np.isnan(pe_ratio) | np.isnan(price_to_book), np.nan, value_score
+        )
+        
+        # Size: ausente = 0.0
+        size_score = np.nan_to_num(column('size_factor'), nan=0.0)
+        
+        # Scoring específico para instituições financeiras
+        is_financial = np.zeros(n, dtype=bool)
+        if sector_aware:
+            is_financial = self._financial_mask(factors_df, debt_to_ebitda, ev_ebitda)
+            
+            roe = column('roe')
+            financial_quality = masked_mean([
+                roe, column('revenue_growth_3y'),
+                -column('net_income_volatility'), -column('efficiency_ratio')
+            ])
+            financial_quality = np.nan_to_num(financial_quality, nan=0.0)
+            financial_quality = np.where(
+                column('net_income_last_year') < 0, financial_quality * 0.4, financial_quality
+            )
+            financial_value = np.nan_to_num(masked_mean([-pe_ratio, -pb_ratio]), nan=0.0)
+            
+            quality_score = np.where(is_financial, financial_quality, quality_score)
+            value_score = np.where(is_financial, financial_value, value_score)
+            # score_asset_sector_aware não inclui o fator size
+            size_score = np.zeros(n)
+        
+        base_score = self._weighted_final_scores(
+            momentum_score, quality_score, value_score, size_score
+        )
+        
+        # Penalidades de risco (opcional, mesmas regras de score_asset_enhanced)
+        volatility_penalty = np.full(n, np.nan)
+        drawdown_penalty = np.full(n, np.nan)
+        distress_penalty = np.full(n, np.nan)
+        risk_penalty_factor = np.full(n, np.nan)
+        final_score = base_score
+        if volatility_limit is not None and drawdown_limit is not None:
+            volatility_penalty = np.where(column('volatility_180d') > volatility_limit, 0.8, 1.0)
+            drawdown_penalty = np.where(column('max_drawdown_3y') < drawdown_limit, 0.8, 1.0)
+            risk_penalty_factor = volatility_penalty * drawdown_penalty
+            
+            distressed = (column('net_income_last_year') < 0) | (column('debt_to_ebitda_raw') > 5)
+            if 'net_income_history' in factors_df.columns:
+                distressed |= np.array([
+                    isinstance(history, (list, tuple)) and len(history) >= 3 and
+                    sum(1 for ni in history if ni is not None and ni < 0) >= 2
+                    for history in factors_df['net_income_history']
+                ], dtype=bool)
+            distress_penalty = np.where(distressed, 0.5, 1.0)
+            
+            final_score = base_score * risk_penalty_factor * distress_penalty
+        
+        confidence = column('confidence')
+        confidence = np.where(np.isnan(confidence), 0.5, confidence)
+        
+        return pd.DataFrame({
+            'momentum_score': momentum_score,
+            'quality_score': quality_score,
+            'value_score': value_score,
+            'size_score': size_score,
+            'base_score': base_score,
+            'volatility_penalty': volatility_penalty,
+            'drawdown_penalty': drawdown_penalty,
+            'risk_penalty_factor': risk_penalty_factor,
+            'distress_penalty': distress_penalty,
+            'final_score': final_score,
+            'confidence': confidence,
+            'is_financial': is_financial
+        }, index=factors_df.index)
+    
+    def build_score_results(
+        self,
+        scores_df: pd.DataFrame,
+        factors_df: Optional[pd.DataFrame] = None,
+        passed_eligibility: bool = True
+    ) -> List[ScoreResult]:
+        """
+        Materializa objetos ScoreResult a partir do resultado de score_universe.
+        
+        Args:
+            scores_df: DataFrame retornado por score_universe
+            factors_df: DataFrame de fatores usado no scoring (para raw_factors)
+            passed_eligibility: Status de elegibilidade atribuído a todos os ativos
+            
+        Returns:
+            Lista de ScoreResult na ordem do índice de scores_df
+        """
+        raw_factors = {}
+        if factors_df is not None:
+            raw_factors = factors_df.drop(columns=['confidence'], errors='ignore').to_dict('index')
+        
+        results = []
+        for ticker, row in zip(scores_df.index, scores_df.itertuples(index=False)):
+            factors = raw_factors.get(ticker, {})
+            penalized = not np.isnan(row.risk_penalty_factor)
+            
+            risk_penalties = {}
+            if penalized:
+                risk_penalties = {
+                    'volatility': float(row.volatility_penalty),
+                    'drawdown': float(row.drawdown_penalty),
+                    'distress': float(row.distress_penalty)
+                }
+                distress_reasons = self._distress_conditions(factors)
+                if distress_reasons:
+                    risk_penalties['distress_reasons'] = distress_reasons
+            
+            results.append(ScoreResult(
+                ticker=ticker,
+                final_score=float(row.final_score),
+                momentum_score=float(row.momentum_score),
+                quality_score=float(row.quality_score),
+                value_score=float(row.value_score),
+                confidence=float(row.confidence),
+                raw_factors=factors,
+                base_score=float(row.base_score) if penalized else 0.0,
+                risk_penalties=risk_penalties,
+                passed_eligibility=passed_eligibility
+            ))
+        
+        return results
+    
+    def build_score_batch(
+        self,
+        scores_df: pd.DataFrame,
+        factors_df: Optional[pd.DataFrame] = None,
+        passed_eligibility: bool = True,
+        factor_dtype: Any = np.float64
+    ) -> 'ScoreBatch':
+        """
+        Monta um ScoreBatch colunar a partir do resultado de score_universe.
+        
+        Equivalente a build_score_results, mas sem criar um ScoreResult (e
+        seus dicts) por ativo: sub-scores, penalidades e fatores numéricos
+        ficam em arrays.
+        
+        Args:
+            scores_df: DataFrame retornado por score_universe
+            factors_df: DataFrame de fatores usado no scoring (para raw_factors)
+            passed_eligibility: Status de elegibilidade atribuído a todos os ativos
+            factor_dtype: dtype da matriz de fatores
+            
+        Returns:
+            ScoreBatch na ordem do índice de scores_df
+        """
+        from app.scoring.score_batch import ScoreBatch
+        
+        tickers = list(scores_df.index)
+        penalized = ~np.isnan(scores_df['risk_penalty_factor'].to_numpy(dtype=float))
+        
+        penalties = np.where(
+            penalized[:, None],
+            scores_df[['volatility_penalty', 'drawdown_penalty', 'distress_penalty']].to_numpy(dtype=float),
+            np.nan
+        )
+        
+        factor_names: List[str] = []
+        factor_matrix = None
+        distress_reasons = {}
+        if factors_df is not None:
+            factors = factors_df.drop(columns=['confidence'], errors='ignore').reindex(tickers)
+            
+            # Colunas numéricas (inclusive object com None); históricos e
+            # outros valores não numéricos ficam fora da matriz
+            numeric = {}
+            for name in factors.columns:
+                try:
+                    values = pd.to_numeric(factors[name], errors='coerce')
+                except (TypeError, ValueError):
+                    continue
+                if values.notna().sum() == factors[name].notna().sum():
+                    numeric[name] = values.to_numpy(dtype=float)
+            
+            factor_names = list(numeric)
+            factor_matrix = (
+                np.column_stack(list(numeric.values())).astype(factor_dtype)
+                if numeric else None
+            )
+            
+            for position in np.flatnonzero(penalized):
+                reasons = self._distress_conditions(factors.iloc[position].to_dict())
+                if reasons:
+                    distress_reasons[int(position)] = reasons
+        
+        return ScoreBatch(
+            tickers=tickers,
+            final_score=scores_df['final_score'].to_numpy(dtype=float),
+            momentum_score=scores_df['momentum_score'].to_numpy(dtype=float),
+            quality_score=scores_df['quality_score'].to_numpy(dtype=float),
+            value_score=scores_df['value_score'].to_numpy(dtype=float),
+            confidence=scores_df['confidence'].to_numpy(dtype=float),
+            base_score=np.where(penalized, scores_df['base_score'].to_numpy(dtype=float), 0.0),
+            penalties=penalties,
+            factor_names=factor_names,
+            factor_matrix=factor_matrix,
+            passed_eligibility=passed_eligibility,
+            distress_reasons=distress_reasons,
+            factor_dtype=factor_dtype
+        )
+    
+    def _weighted_final_scores(
+        self,
+        momentum_score: np.ndarray,
+        quality_score: np.ndarray,
+        value_score: np.ndarray,
+        size_score: np.ndarray
+    ) -> np.ndarray:
+        """
+        Versão vetorizada de calculate_final_score (redistribuição de pesos NaN).
+        """
+        scores = np.vstack([momentum_score, quality_score, value_score, size_score])
+        weights = np.array([
+            self.momentum_weight, self.quality_weight, self.value_weight, self.size_weight
+        ])[:, np.newaxis]
+        
+        valid = ~np.isnan(scores)
+        # Size só entra no score quando diferente de zero
+        valid[3] &= scores[3] != 0.0
+        
+        total_weight = np.where(valid, weights, 0.0).sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            contributions = np.where(valid, scores * (weights / total_weight), 0.0)
+        
+        return np.where(total_weight > 0, contributions.sum(axis=0), 0.0)
+    
+    def _financial_mask(
+        self,
+        factors_df: pd.DataFrame,
+        debt_to_ebitda: np.ndarray,
+        ev_ebitda: np.ndarray
+    ) -> np.ndarray:
+        """
+        Versão vetorizada de _is_financial_institution (sector_map + heurística).
+        """
+        def present(name: str) -> np.ndarray:
+            if name not in factors_df.columns:
+                return np.zeros(len(factors_df), dtype=bool)
+            return factors_df[name].notna().to_numpy()
+        
+        has_ebitda_metrics = ~np.isnan(debt_to_ebitda) | ~np.isnan(ev_ebitda)
+        has_financial_metrics = present('roa') | present('efficiency_ratio')
+        is_financial = ~has_ebitda_metrics & has_financial_metrics
+        
+        if self.sector_map is not None:
+            for position, ticker in enumerate(factors_df.index):
+                classification = self.sector_map.get(ticker)
+                if classification is not None and classification.is_financial is not None:
+                    is_financial[position] = classification.is_financial
+        
+        return is_financial
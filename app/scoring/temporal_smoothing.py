@@ -7,10 +7,12 @@ final_score_smoothed = alpha * score_current + (1 - alpha) * score_previous
 Onde alpha = 0.7 (70% peso no score atual, 30% no anterior)
 """
 
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Sequence
 from datetime import date, timedelta
 import logging
 
+import numpy as np
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 from app.models.schemas import ScoreDaily
 
@@ -81,6 +83,61 @@ class TemporalSmoothing:
         else:
             return previous_score.final_score
     
+    def get_previous_scores(
+        self,
+        db: Session,
+        current_date: date,
+        tickers: Optional[Iterable[str]] = None,
+        lookback_days: int = 30
+    ) -> Dict[str, float]:
+        """
+        Obtém o score anterior de vários ativos numa única consulta.
+        
+        Equivalente a chamar get_previous_score para cada ticker: o registro
+        elegível mais recente dentro do lookback é escolhido com
+        ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC).
+        
+        Args:
+            db: Sessão do banco de dados
+            current_date: Data atual
+            tickers: Tickers a buscar (None = todos)
+            lookback_days: Número de dias para buscar score anterior
+            
+        Returns:
+            Dicionário {ticker: score anterior}, apenas para tickers com
+            histórico (final_score_smoothed se disponível, senão final_score)
+        """
+        min_date = current_date - timedelta(days=lookback_days)
+        
+        filters = [
+            ScoreDaily.date < current_date,
+            ScoreDaily.date >= min_date,
+            ScoreDaily.passed_eligibility == True
+        ]
+        if tickers is not None:
+            tickers = list(tickers)
+            if not tickers:
+                return {}
+            filters.append(ScoreDaily.ticker.in_(tickers))
+        
+        latest = select(
+            ScoreDaily.ticker.label('ticker'),
+            func.coalesce(
+                ScoreDaily.final_score_smoothed,
+                ScoreDaily.final_score
+            ).label('score'),
+            func.row_number().over(
+                partition_by=ScoreDaily.ticker,
+                order_by=ScoreDaily.date.desc()
+            ).label('row_number')
+        ).where(*filters).subquery()
+        
+        rows = db.execute(
+            select(latest.c.ticker, latest.c.score).where(latest.c.row_number == 1)
+        ).all()
+        
+        return {ticker: score for ticker, score in rows}
+    
     def smooth_score(
         self,
         current_score: float,
@@ -109,6 +166,30 @@ class TemporalSmoothing:
         
         return smoothed
     
+    def smooth_values(
+        self,
+        current_scores: np.ndarray,
+        previous_scores: np.ndarray
+    ) -> np.ndarray:
+        """
+        Versão vetorizada de smooth_score.
+        
+        Args:
+            current_scores: Array de scores atuais
+            previous_scores: Array de scores anteriores (NaN = sem histórico)
+            
+        Returns:
+            Array de scores suavizados (score atual onde não há anterior)
+        """
+        current_scores = np.asarray(current_scores, dtype=float)
+        previous_scores = np.asarray(previous_scores, dtype=float)
+        
+        return np.where(
+            np.isnan(previous_scores),
+            current_scores,
+            self.alpha * current_scores + (1 - self.alpha) * previous_scores
+        )
+    
     def smooth_scores_batch(
         self,
         db: Session,
@@ -119,6 +200,9 @@ class TemporalSmoothing:
         """
         Aplica suavização a um batch de scores.
         
+        Busca todos os scores anteriores numa única consulta e aplica a
+        suavização de forma vetorizada.
+        
         Args:
             db: Sessão do banco de dados
             scores: Dicionário {ticker: current_score}
@@ -128,29 +212,23 @@ class TemporalSmoothing:
         Returns:
             Dicionário {ticker: smoothed_score}
         """
-        smoothed_scores = {}
+        if not scores:
+            return {}
         
-        for ticker, current_score in scores.items():
-            # Obter score anterior
-            previous_score = self.get_previous_score(
-                db,
-                ticker,
-                current_date,
-                lookback_days
-            )
-            
-            # Aplicar suavização
-            smoothed = self.smooth_score(current_score, previous_score)
-            smoothed_scores[ticker] = smoothed
-            
-            if previous_score is not None:
-                logger.debug(
-                    f"{ticker}: current={current_score:.3f}, "
-                    f"previous={previous_score:.3f}, "
-                    f"smoothed={smoothed:.3f}"
-                )
-        
-        return smoothed_scores
+        tickers = list(scores)
+        previous = self.get_previous_scores(db, current_date, tickers, lookback_days)
+        
+        smoothed = self.smooth_values(
+            np.array([scores[t] for t in tickers], dtype=float),
+            np.array([previous.get(t, np.nan) for t in tickers], dtype=float)
+        )
+        
+        logger.debug(
+            f"Smoothed {len(tickers)} scores for {current_date} "
+            f"({len(previous)} with previous score)"
+        )
+        
+        return dict(zip(tickers, smoothed.tolist()))
     
     def update_smoothed_scores(
         self,
@@ -161,7 +239,8 @@ class TemporalSmoothing:
         """
         Atualiza scores suavizados para todos os ativos de uma data.
         
-        Busca todos os scores da data atual e aplica suavização.
+        Usa um número constante de consultas: scores da data, scores
+        anteriores (uma consulta com window function) e um bulk update.
         
         Args:
             db: Sessão do banco de dados
@@ -172,35 +251,148 @@ class TemporalSmoothing:
             Número de scores atualizados
         """
         # Buscar todos os scores da data
-        scores = db.query(ScoreDaily).filter(
+        rows = db.query(ScoreDaily.id, ScoreDaily.ticker, ScoreDaily.final_score).filter(
             ScoreDaily.date == current_date,
             ScoreDaily.passed_eligibility == True
         ).all()
         
-        if not scores:
+        if not rows:
             logger.warning(f"No scores found for {current_date}")
             return 0
         
-        updated_count = 0
+        ids, tickers, current_scores = zip(*rows)
+        previous = self.get_previous_scores(db, current_date, None, lookback_days)
+        
+        smoothed = self.smooth_values(
+            np.array(current_scores, dtype=float),
+            np.array([previous.get(t, np.nan) for t in tickers], dtype=float)
+        )
+        
+        # Bulk update por chave primária
+        db.execute(
+            update(ScoreDaily),
+            [
+                {'id': score_id, 'final_score_smoothed': value}
+                for score_id, value in zip(ids, smoothed.tolist())
+            ]
+        )
+        db.commit()
         
-        for score_obj in scores:
-            # Obter score anterior
-            previous_score = self.get_previous_score(
-                db,
-                score_obj.ticker,
-                current_date,
-                lookback_days
+        updated_count = len(ids)
+        logger.info(f"Updated {updated_count} smoothed scores for {current_date}")
+        
+        return updated_count
+    
+    def smooth_history(
+        self,
+        score_matrix: np.ndarray,
+        dates: Sequence[date],
+        lookback_days: int = 30
+    ) -> np.ndarray:
+        """
+        Aplica a suavização recursiva a todo o histórico de uma vez.
+        
+        Percorre as datas em ordem, vetorizando sobre os tickers. O resultado
+        é idêntico a rodar update_smoothed_scores data a data: o score
+        anterior é o último suavizado do ticker dentro do lookback, e
+        tickers sem histórico recente (novas listagens, lacunas maiores que
+        o lookback) recomeçam do score atual.
+        
+        Args:
+            score_matrix: Matriz datas x tickers de final_score (NaN = sem
+                score elegível naquela data)
+            dates: Datas das linhas, em ordem crescente
+            lookback_days: Número de dias para buscar score anterior
+            
+        Returns:
+            Matriz datas x tickers de scores suavizados (NaN onde não há score)
+            
+        Raises:
+            ValueError: Se o número de datas não corresponder às linhas
+        """
+        scores = np.asarray(score_matrix, dtype=float)
+        if scores.ndim != 2 or scores.shape[0] != len(dates):
+            raise ValueError(
+                f"score_matrix must have one row per date, got shape {scores.shape} "
+                f"for {len(dates)} dates"
             )
+        
+        day_numbers = np.array([d.toordinal() for d in dates], dtype=np.int64)
+        smoothed = np.full_like(scores, np.nan)
+        
+        # Último suavizado e data (ordinal) por ticker
+        last_smoothed = np.full(scores.shape[1], np.nan)
+        last_day = np.full(scores.shape[1], np.iinfo(np.int64).min // 2, dtype=np.int64)
+        
+        for i, day in enumerate(day_numbers):
+            current = scores[i]
+            present = ~np.isnan(current)
             
-            # Aplicar suavização
-            smoothed = self.smooth_score(score_obj.final_score, previous_score)
+            previous = np.where(last_day >= day - lookback_days, last_smoothed, np.nan)
+            row = self.smooth_values(current, previous)
             
-            # Atualizar no banco
-            score_obj.final_score_smoothed = smoothed
-            updated_count += 1
+            smoothed[i] = row
+            last_smoothed = np.where(present, row, last_smoothed)
+            last_day = np.where(present, day, last_day)
         
+        return smoothed
+    
+    def backfill_smoothed_scores(
+        self,
+        db: Session,
+        lookback_days: int = 30,
+        chunk_size: int = 5000
+    ) -> int:
+        """
+        Recalcula final_score_smoothed de todo o histórico.
+        
+        Carrega o histórico elegível numa consulta, monta a matriz datas x
+        tickers, aplica smooth_history e grava o resultado com bulk updates
+        por chave primária.
+        
+        Args:
+            db: Sessão do banco de dados
+            lookback_days: Número de dias para buscar score anterior
+            chunk_size: Linhas por bulk update
+            
+        Returns:
+            Número de scores atualizados
+        """
+        rows = db.query(
+            ScoreDaily.id, ScoreDaily.ticker, ScoreDaily.date, ScoreDaily.final_score
+        ).filter(
+            ScoreDaily.passed_eligibility == True
+        ).all()
+        
+        if not rows:
+            logger.warning("No scores found for backfill")
+            return 0
+        
+        ids, tickers, score_dates, final_scores = zip(*rows)
+        
+        dates = sorted(set(score_dates))
+        date_index = {d: i for i, d in enumerate(dates)}
+        ticker_index = {t: j for j, t in enumerate(sorted(set(tickers)))}
+        
+        date_codes = np.array([date_index[d] for d in score_dates], dtype=np.intp)
+        ticker_codes = np.array([ticker_index[t] for t in tickers], dtype=np.intp)
+        
+        matrix = np.full((len(dates), len(ticker_index)), np.nan)
+        matrix[date_codes, ticker_codes] = np.array(final_scores, dtype=float)
+        
+        smoothed = self.smooth_history(matrix, dates, lookback_days)[date_codes, ticker_codes]
+        
+        mappings = [
+            {'id': score_id, 'final_score_smoothed': value}
+            for score_id, value in zip(ids, smoothed.tolist())
+        ]
+        for start in range(0, len(mappings), chunk_size):
+            db.execute(update(ScoreDaily), mappings[start:start + chunk_size])
         db.commit()
         
-        logger.info(f"Updated {updated_count} smoothed scores for {current_date}")
+        logger.info(
+            f"Backfilled {len(mappings)} smoothed scores "
+            f"({len(dates)} dates x {len(ticker_index)} tickers)"
+        )
         
-        return updated_count
+        return len(mappings)
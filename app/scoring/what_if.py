@@ -0,0 +1,289 @@
+"""
+Re-ranking em memória com pesos alternativos ("what-if").
+
+Mantém os sub-scores (momentum, quality, value, size) de uma data em arrays
+NumPy e recalcula score final e ranking para qualquer vetor de pesos sem
+passar pelo banco. Vários cenários são resolvidos numa única multiplicação
+de matrizes.
+
+Valida: Requisitos 4.1, 4.2, 4.3, 4.4, 5.1, 5.2
+"""
+
+import logging
+from datetime import date
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.schemas import ScoreDaily
+
+logger = logging.getLogger(__name__)
+
+# Ordem das categorias nas matrizes de sub-scores e de pesos
+WHAT_IF_CATEGORIES = ('momentum', 'quality', 'value', 'size')
+
+WeightVector = Union[Mapping[str, float], Sequence[float]]
+
+
+class WhatIfRanker:
+    """
+    Recalcula scores finais e rankings para pesos alternativos.
+    
+    Aplica a mesma regra de ScoringEngine.calculate_final_score: categorias
+    NaN (e size igual a zero) ficam fora da média e seus pesos são
+    redistribuídos entre as demais; sem nenhuma categoria válida o score é
+    0.0. O fator de penalidade de risco persistido (final/base) é aplicado
+    sobre o score recalculado.
+    
+    Example:
+        >>> what_if = WhatIfRanker.from_db(db)
+        >>> scores, ranks = what_if.evaluate([
+        ...     {'momentum': 0.5, 'quality': 0.3, 'value': 0.2},
+        ...     {'momentum': 0.2, 'quality': 0.3, 'value': 0.5},
+        ... ])
+    """
+    
+    def __init__(
+        self,
+        tickers: Sequence[str],
+        momentum_scores: Sequence[float],
+        quality_scores: Sequence[float],
+        value_scores: Sequence[float],
+        size_scores: Optional[Sequence[float]] = None,
+        penalty_factors: Optional[Sequence[float]] = None,
+        score_date: Optional[date] = None
+    ):
+        """
+        Inicializa o ranker com os sub-scores de uma data.
+        
+        Args:
+            tickers: Símbolos dos ativos
+            momentum_scores: Scores de momentum
+            quality_scores: Scores de qualidade
+            value_scores: Scores de valor
+            size_scores: Scores de tamanho (None = indisponível)
+            penalty_factors: Fator de penalidade de risco por ativo
+                (None/NaN = sem penalidade)
+            score_date: Data dos sub-scores (informativo)
+            
+        Raises:
+            ValueError: Se os arrays tiverem tamanhos diferentes
+        """
+        n_assets = len(tickers)
+        
+        def as_array(values, fill):
+            if values is None:
+                return np.full(n_assets, fill)
+            array = np.array(values, dtype=float)
+            if array.shape != (n_assets,):
+                raise ValueError(
+                    f"Expected {n_assets} values per category, got shape {array.shape}"
+                )
+            return array
+        
+        # Ordem alfabética: empates no ranking são desfeitos por ticker,
+        # como no ranking ordinal de ScoreService.update_ranks
+        order = np.argsort(np.array(tickers, dtype=object), kind='stable')
+        
+        self.tickers: List[str] = [tickers[i] for i in order]
+        self.score_date = score_date
+        
+        scores = np.column_stack([
+            as_array(momentum_scores, np.nan),
+            as_array(quality_scores, np.nan),
+            as_array(value_scores, np.nan),
+            as_array(size_scores, np.nan)
+        ])[order] if n_assets else np.empty((0, len(WHAT_IF_CATEGORIES)))
+        
+        # Máscara de validade: NaN fora; size só conta quando diferente de zero
+        valid = ~np.isnan(scores)
+        valid[:, 3] &= scores[:, 3] != 0.0
+        
+        self._valid = valid.astype(float)
+        self._scores = np.where(valid, scores, 0.0)
+        
+        penalties = as_array(penalty_factors, 1.0)[order] if n_assets else np.empty(0)
+        self._penalties = np.where(np.isnan(penalties), 1.0, penalties)
+        
+        self._positions: Dict[str, int] = {t: i for i, t in enumerate(self.tickers)}
+    
+    @classmethod
+    def from_scores(cls, scores: Sequence[ScoreDaily]) -> 'WhatIfRanker':
+        """
+        Cria o ranker a partir de registros ScoreDaily.
+        
+        Args:
+            scores: Registros de uma mesma data
+            
+        Returns:
+            WhatIfRanker com os sub-scores persistidos
+        """
+        penalty_factors = [
+            s.risk_penalty_factor if s.risk_penalty_factor is not None else np.nan
+            for s in scores
+        ]
+        return cls(
+            tickers=[s.ticker for s in scores],
+            momentum_scores=[s.momentum_score for s in scores],
+            quality_scores=[s.quality_score for s in scores],
+            value_scores=[s.value_score for s in scores],
+            penalty_factors=penalty_factors,
+            score_date=scores[0].date if scores else None
+        )
+    
+    @classmethod
+    def from_db(cls, db: Session, score_date: Optional[date] = None) -> 'WhatIfRanker':
+        """
+        Carrega os sub-scores de uma data do banco.
+        
+        Apenas ativos que passaram no filtro de elegibilidade entram no
+        ranking. Size não é persistido em ScoreDaily, portanto o peso de
+        size não tem efeito em rankers carregados do banco.
+        
+        Args:
+            db: Sessão do banco de dados
+            score_date: Data dos scores (None = data mais recente)
+            
+        Returns:
+            WhatIfRanker para a data
+        """
+        if score_date is None:
+            latest = db.query(ScoreDaily.date).order_by(ScoreDaily.date.desc()).first()
+            score_date = latest[0] if latest else None
+        
+        rows = db.query(
+            ScoreDaily.ticker,
+            ScoreDaily.momentum_score,
+            ScoreDaily.quality_score,
+            ScoreDaily.value_score,
+            ScoreDaily.risk_penalty_factor
+        ).filter(
+            ScoreDaily.date == score_date,
+            ScoreDaily.passed_eligibility.isnot(False)
+        ).all()
+        
+        def column(index, fill=np.nan):
+            return [row[index] if row[index] is not None else fill for row in rows]
+        
+        logger.info(f"Loaded {len(rows)} sub-scores for what-if ranking on {score_date}")
+        
+        return cls(
+            tickers=column(0),
+            momentum_scores=column(1),
+            quality_scores=column(2),
+            value_scores=column(3),
+            penalty_factors=column(4),
+            score_date=score_date
+        )
+    
+    def __len__(self) -> int:
+        return len(self.tickers)
+    
+    @staticmethod
+    def weight_matrix(weights: Union[WeightVector, Sequence[WeightVector]]) -> np.ndarray:
+        """
+        Converte um ou mais vetores de pesos numa matriz (cenários x categorias).
+        
+        Cada vetor pode ser um dict {'momentum': w, 'quality': w, 'value': w,
+        'size': w} (categorias ausentes têm peso zero) ou uma sequência na
+        ordem de WHAT_IF_CATEGORIES (size opcional).
+        
+        Args:
+            weights: Vetor de pesos ou lista de vetores
+            
+        Returns:
+            Matriz de pesos com shape (n_cenarios, 4)
+            
+        Raises:
+            ValueError: Se algum peso for negativo, não finito ou a categoria
+                for desconhecida
+        """
+        if isinstance(weights, Mapping) or (
+            len(weights) > 0 and np.isscalar(weights[0])
+        ):
+            weights = [weights]
+        
+        rows = []
+        for vector in weights:
+            if isinstance(vector, Mapping):
+                unknown = set(vector) - set(WHAT_IF_CATEGORIES)
+                if unknown:
+                    raise ValueError(
+                        f"Unknown weight categories {sorted(unknown)}. "
+                        f"Must be in {WHAT_IF_CATEGORIES}"
+                    )
+                row = [float(vector.get(category, 0.0)) for category in WHAT_IF_CATEGORIES]
+            else:
+                row = [float(w) for w in vector]
+                if not 3 <= len(row) <= len(WHAT_IF_CATEGORIES):
+                    raise ValueError(
+                        f"Weight vectors must have 3 or 4 values, got {len(row)}"
+                    )
+                row += [0.0] * (len(WHAT_IF_CATEGORIES) - len(row))
+            rows.append(row)
+        
+        matrix = np.array(rows, dtype=float).reshape(-1, len(WHAT_IF_CATEGORIES))
+        if not np.all(np.isfinite(matrix)) or np.any(matrix < 0):
+            raise ValueError("Weights must be finite and non-negative")
+        
+        return matrix
+    
+    def final_scores(self, weights: Union[WeightVector, Sequence[WeightVector]]) -> np.ndarray:
+        """
+        Recalcula o score final de todos os ativos para cada cenário.
+        
+        Args:
+            weights: Vetor de pesos ou lista de vetores (ver weight_matrix)
+            
+        Returns:
+            Matriz (n_cenarios, n_ativos) de scores finais, colunas na ordem
+            de self.tickers
+        """
+        weight_matrix = self.weight_matrix(weights)
+        
+        numerator = self._scores @ weight_matrix.T
+        total_weight = self._valid @ weight_matrix.T
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            base_scores = np.where(total_weight > 0, numerator / total_weight, 0.0)
+        
+        return (base_scores * self._penalties[:, np.newaxis]).T
+    
+    def evaluate(
+        self,
+        weights: Union[WeightVector, Sequence[WeightVector]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recalcula scores finais e ranks para cada cenário.
+        
+        Ranks são ordinais (1..N), com empates desfeitos por ticker.
+        
+        Args:
+            weights: Vetor de pesos ou lista de vetores (ver weight_matrix)
+            
+        Returns:
+            Tupla (scores, ranks), ambas com shape (n_cenarios, n_ativos)
+        """
+        scores = self.final_scores(weights)
+        
+        # Ordenação estável sobre tickers já em ordem alfabética
+        order = np.argsort(-scores, axis=1, kind='stable')
+        ranks = np.empty_like(order)
+        np.put_along_axis(
+            ranks, order, np.arange(1, scores.shape[1] + 1)[np.newaxis, :], axis=1
+        )
+        
+        return scores, ranks
+    
+    def position_of(self, ticker: str) -> Optional[int]:
+        """
+        Retorna a posição do ticker nas colunas das matrizes de evaluate.
+        
+        Args:
+            ticker: Símbolo do ativo
+            
+        Returns:
+            Índice da coluna ou None se o ticker não estiver no ranker
+        """
+        return self._positions.get(ticker)
@@ -48,7 +48,12 @@ def main():
     parser.add_argument(
         '--all',
         action='store_true',
-        help='Process all dates with scores'
+        help='Process all dates with scores, one date at a time'
+    )
+    parser.add_argument(
+        '--backfill',
+        action='store_true',
+        help='Recompute the full history at once (dates x tickers EWMA, bulk write)'
     )
     
     args = parser.parse_args()
@@ -69,7 +74,17 @@ def main():
     smoother = TemporalSmoothing(alpha=args.alpha)
     
     try:
-        if args.all:
+        if args.backfill:
+            # Recalcular todo o histórico de uma vez
+            logger.info("Backfilling full history...")
+            
+            total_updated = smoother.backfill_smoothed_scores(
+                db,
+                args.lookback_days
+            )
+            
+            logger.info(f"Total scores updated: {total_updated}")
+        elif args.all:
             # Processar todas as datas
             from app.models.schemas import ScoreDaily
             from sqlalchemy import func
@@ -0,0 +1,65 @@
+"""
+Migração: Adicionar cache de resultados de backtest.
+
+Adiciona à tabela backtest_runs:
+1. Coluna cache_key (com índice) com o hash de parâmetros + versão dos dados
+
+IMPORTANTE: Não altera tabelas de produção.
+"""
+
+import sys
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from app.models.database import SessionLocal
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Executa migração do banco de dados."""
+    
+    db = SessionLocal()
+    
+    try:
+        logger.info("Starting migration: backtest result cache")
+        
+        logger.info("Adding cache_key column to backtest_runs...")
+        try:
+            db.execute(text("ALTER TABLE backtest_runs ADD COLUMN cache_key VARCHAR(64)"))
+            db.commit()
+            logger.info("✓ Added cache_key column")
+        except Exception as e:
+            if "already exists" in str(e) or "duplicate column" in str(e).lower():
+                logger.info("✓ Column cache_key already exists")
+                db.rollback()
+            else:
+                raise
+        
+        logger.info("Creating index for cache_key...")
+        db.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_backtest_runs_cache_key
+            ON backtest_runs (cache_key)
+        """))
+        db.commit()
+        logger.info("✓ Created index for cache_key")
+        
+        logger.info("Migration completed successfully")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    success = migrate()
+    sys.exit(0 if success else 1)
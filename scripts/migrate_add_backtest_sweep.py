@@ -0,0 +1,67 @@
+"""
+Migração: Adicionar suporte a varreduras de parâmetros de backtest.
+
+Adiciona à tabela backtest_runs:
+1. Coluna parameters (JSON) com os parâmetros da estratégia
+2. Coluna sweep_id (com índice) ligando execuções da mesma varredura
+
+IMPORTANTE: Não altera tabelas de produção.
+"""
+
+import sys
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from app.models.database import SessionLocal
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Executa migração do banco de dados."""
+    
+    db = SessionLocal()
+    
+    try:
+        logger.info("Starting migration: backtest parameter sweeps")
+        
+        for column, column_type in [("parameters", "JSON"), ("sweep_id", "VARCHAR(36)")]:
+            logger.info(f"Adding {column} column to backtest_runs...")
+            try:
+                db.execute(text(f"ALTER TABLE backtest_runs ADD COLUMN {column} {column_type}"))
+                db.commit()
+                logger.info(f"✓ Added {column} column")
+            except Exception as e:
+                if "already exists" in str(e) or "duplicate column" in str(e).lower():
+                    logger.info(f"✓ Column {column} already exists")
+                    db.rollback()
+                else:
+                    raise
+        
+        logger.info("Creating index for sweep_id...")
+        db.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_backtest_runs_sweep_id
+            ON backtest_runs (sweep_id)
+        """))
+        db.commit()
+        logger.info("✓ Created index for sweep_id")
+        
+        logger.info("Migration completed successfully")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    success = migrate()
+    sys.exit(0 if success else 1)
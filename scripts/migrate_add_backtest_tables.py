@@ -1,11 +1,12 @@
 """
 Migration para adicionar tabelas de backtesting persistente.
 
-Cria 4 novas tabelas isoladas:
+Cria 5 novas tabelas isoladas:
 - backtest_runs: Metadados de execuções
 - backtest_nav: Equity curve diária
 - backtest_positions: Posições por rebalance
 - backtest_metrics: Métricas finais
+- backtest_equity_curves: Equity curve compacta (blob por execução)
 
 IMPORTANTE: Não altera tabelas de produção.
 """
@@ -21,7 +22,8 @@ from app.backtest.models import (
     BacktestRun,
     BacktestNAV,
     BacktestPosition,
-    BacktestMetrics
+    BacktestMetrics,
+    BacktestEquityCurve
 )
 import logging
 
@@ -50,7 +52,8 @@ def run_migration():
             'backtest_runs',
             'backtest_nav',
             'backtest_positions',
-            'backtest_metrics'
+            'backtest_metrics',
+            'backtest_equity_curves'
         ]
         
         for table_name in tables_to_create:
@@ -66,7 +69,8 @@ def run_migration():
                 BacktestRun.__table__,
                 BacktestNAV.__table__,
                 BacktestPosition.__table__,
-                BacktestMetrics.__table__
+                BacktestMetrics.__table__,
+                BacktestEquityCurve.__table__
             ],
             checkfirst=True
         )
@@ -0,0 +1,66 @@
+"""
+Migration para adicionar a tabela ticker_stats.
+
+Cria a tabela de agregados por ticker (cobertura de preços, ADV, volume
+financeiro médio e períodos fundamentalistas) e faz o backfill a partir
+de raw_prices_daily e raw_fundamentals. Depois disso a ingestão mantém a
+tabela atualizada.
+
+IMPORTANTE: Não altera tabelas de produção.
+"""
+
+import sys
+from pathlib import Path
+
+# Adicionar diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.database import engine, Base, SessionLocal
+from app.models.schemas import TickerStats
+from app.ingestion.ticker_stats_service import TickerStatsService
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def run_migration():
+    """
+    Executa migration para criar e popular ticker_stats.
+    """
+    logger.info("=" * 80)
+    logger.info("MIGRATION: Adicionar Tabela ticker_stats")
+    logger.info("=" * 80)
+    
+    db = SessionLocal()
+    try:
+        Base.metadata.create_all(
+            bind=engine,
+            tables=[TickerStats.__table__],
+            checkfirst=True
+        )
+        logger.info("✅ Tabela ticker_stats criada (ou já existente)")
+        
+        logger.info("Calculando agregados a partir das tabelas brutas...")
+        updated = TickerStatsService(db).refresh()
+        logger.info(f"✅ Agregados calculados para {updated} tickers")
+        
+        logger.info("\n" + "=" * 80)
+        logger.info("MIGRATION CONCLUÍDA COM SUCESSO")
+        logger.info("=" * 80)
+        
+        return True
+    
+    except Exception as e:
+        logger.error(f"\n❌ Erro durante migration: {e}")
+        import traceback
+        logger.error(traceback.format_exc())
+        db.rollback()
+        return False
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    success = run_migration()
+    sys.exit(0 if success else 1)
@@ -5,6 +5,7 @@ Script to recalculate scores using existing features.
 from app.models.database import SessionLocal
 from app.scoring.scoring_engine import ScoringEngine
 from app.scoring.score_service import ScoreService
+from app.backtest.service import BacktestService
 from app.factor_engine.feature_service import FeatureService
 from datetime import date
 from app.config import settings
@@ -86,6 +87,9 @@ def main():
         print(f'\nUpdating ranks...')
         score_service.update_ranks(score_date)
         
+        # Invalidate cached backtests (same dates, new scores)
+        BacktestService(db).invalidate_cache()
+        
         print(f'\n[OK] Recalculated {success} scores, {failed} failed')
         
     finally:
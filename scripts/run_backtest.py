@@ -67,6 +67,17 @@ def main():
         default=0.0,
         help='Risk-free rate (annualized). Default: 0.0'
     )
+    parser.add_argument(
+        '--transaction-cost',
+        type=float,
+        default=0.0,
+        help='Cost per unit of traded weight (e.g. 0.001 for 0.1%%). Default: 0.0'
+    )
+    parser.add_argument(
+        '--network-fallback',
+        action='store_true',
+        help='Fetch tickers missing from the database from Yahoo Finance'
+    )
     parser.add_argument(
         '--name',
         type=str,
@@ -107,6 +118,8 @@ def main():
     logger.info(f"Weight method: {args.weight_method}")
     logger.info(f"Use smoothing: {args.use_smoothing}")
     logger.info(f"Risk-free rate: {args.risk_free_rate * 100:.2f}%")
+    logger.info(f"Transaction cost: {args.transaction_cost * 100:.2f}%")
+    logger.info(f"Network fallback: {args.network_fallback}")
     logger.info("=" * 80)
     
     db = SessionLocal()
@@ -120,7 +133,9 @@ def main():
             rebalance_frequency='monthly',
             weight_method=args.weight_method,
             use_smoothing=args.use_smoothing,
-            risk_free_rate=args.risk_free_rate
+            risk_free_rate=args.risk_free_rate,
+            transaction_cost=args.transaction_cost,
+            use_network_fallback=args.network_fallback
         )
         
         # Executar backtest
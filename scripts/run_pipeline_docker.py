@@ -28,6 +28,8 @@ from app.models.schemas import RawPriceDaily, RawFundamental, PipelineExecution
 from app.ingestion.yahoo_client import YahooFinanceClient
 from app.ingestion.yahoo_finance_client import YahooFinanceClient as YahooFundamentalsClient
 from app.ingestion.ingestion_service import IngestionService
+from app.ingestion.asset_info_service import AssetInfoService
+from app.ingestion.ticker_stats_service import TickerStatsService
 from app.ingestion.b3_liquid_stocks import fetch_most_liquid_stocks
 from app.factor_engine.fundamental_factors import FundamentalFactorCalculator
 from app.factor_engine.momentum_factors import MomentumFactorCalculator
@@ -36,6 +38,7 @@ from app.factor_engine.feature_service import FeatureService
 from app.scoring.scoring_engine import ScoringEngine
 from app.scoring.ranker import Ranker
 from app.scoring.score_service import ScoreService
+from app.backtest.service import BacktestService
 from app.confidence.confidence_engine import ConfidenceEngine
 
 # Configurar logging
@@ -294,6 +297,9 @@ def ingest_prices_with_rate_limit(
             logger.info(f"Aguardando {SLEEP_BETWEEN_BATCHES}s antes do próximo batch...")
             time.sleep(SLEEP_BETWEEN_BATCHES)
     
+    # Atualizar agregados por ticker (ticker_stats) dos tickers ingeridos
+    ingestion_service.refresh_stats(ingestion_service.stats_service.refresh_prices, success)
+    
     logger.info(f"Preços: {len(success)} sucesso, {len(failed)} falhas, {total_records} registros")
     
     return {
@@ -440,13 +446,13 @@ def run_pipeline_docker(
             fundamental_results = ingest_fundamentals_with_rate_limit(db, tickers, is_full)
         else:
             # No modo incremental, verificar quais tickers não têm fundamentos
-            tickers_without_fundamentals = []
-            for ticker in tickers:
-                has_fundamentals = db.query(RawFundamental).filter(
-                    RawFundamental.ticker == ticker
-                ).first()
-                if not has_fundamentals:
-                    tickers_without_fundamentals.append(ticker)
+            # (uma consulta em ticker_stats em vez de uma por ticker)
+            ticker_stats = TickerStatsService(db).get_stats(tickers)
+            tickers_without_fundamentals = [
+                ticker for ticker in tickers
+                if ticker not in ticker_stats
+                or not ticker_stats[ticker].fundamental_period_count
+            ]
             
             if tickers_without_fundamentals:
                 logger.info(f"Buscando fundamentos para {len(tickers_without_fundamentals)} tickers sem dados")
@@ -513,6 +519,7 @@ def run_pipeline_docker(
         logger.info("\n📈 Calculando features de momentum...")
         momentum_calculator = MomentumFactorCalculator()
         momentum_factors_dict = {}
+        price_history_days = {}
         
         for ticker in eligible_tickers:
             try:
@@ -535,16 +542,21 @@ def run_pipeline_docker(
                 # Calcular fatores
                 factors = momentum_calculator.calculate_all_factors(ticker, prices_df)
                 momentum_factors_dict[ticker] = factors
+                price_history_days[ticker] = len(prices_df)
                 
             except Exception as e:
                 logger.warning(f"Erro ao calcular momentum para {ticker}: {e}")
         
         logger.info(f"✅ Momentum: {len(momentum_factors_dict)}/{len(eligible_tickers)} calculados")
         
+        # Classificação setorial carregada uma vez (sem consultas por ticker no loop)
+        sector_map = AssetInfoService(db).load_sector_classifications(eligible_tickers)
+        
         # Calcular features fundamentalistas
         logger.info("\n💼 Calculando features fundamentalistas...")
-        fundamental_calculator = FundamentalFactorCalculator()
+        fundamental_calculator = FundamentalFactorCalculator(sector_map=sector_map)
         fundamental_factors_dict = {}
+        fundamental_periods = {}
         
         for ticker in eligible_tickers:
             try:
@@ -562,6 +574,8 @@ def run_pipeline_docker(
                     RawFundamental.ticker == ticker
                 ).order_by(RawFundamental.period_end_date.asc()).limit(5).all()
                 
+                fundamental_periods[ticker] = len(fundamentals_history_raw)
+                
                 # Converter histórico para formato dict
                 fundamentals_history = []
                 for f in fundamentals_history_raw:
@@ -624,6 +638,7 @@ def run_pipeline_docker(
                 combined.update(fundamental_factors_dict[ticker])
             all_factors_for_analysis[ticker] = combined
         
+        analysis_df = pd.DataFrame()
         if all_factors_for_analysis:
             analysis_df = pd.DataFrame(all_factors_for_analysis).T
             missing_counts = analysis_df.isnull().sum()
@@ -649,15 +664,21 @@ def run_pipeline_docker(
         logger.info("\n📊 Normalizando e salvando features...")
         normalizer = CrossSectionalNormalizer()
         
+        # Número de fatores sujeitos à imputação (denominador da taxa de imputação)
+        imputable_features = 0
+        
         # Normalizar momentum
         if momentum_factors_dict:
             momentum_df = pd.DataFrame(momentum_factors_dict).T
             momentum_columns = [col for col in momentum_df.columns if momentum_df[col].notna().any()]
+            imputable_features += len(momentum_df.columns)
             
             # Impute missing values BEFORE normalization
             momentum_df = missing_handler.impute_missing_features(momentum_df)
             
-            normalized_momentum = normalizer.normalize_factors(momentum_df, momentum_columns)
+            normalized_momentum = normalizer.normalize_factors_by_method(
+                momentum_df, momentum_columns, method=settings.normalization_method
+            )
             
             # Salvar features diárias
             for ticker in normalized_momentum.index:
@@ -693,9 +714,12 @@ def run_pipeline_docker(
             if numeric_columns:
                 # Impute missing values BEFORE normalization
                 fundamental_df_numeric = fundamental_df[numeric_columns]
+                imputable_features += len(numeric_columns)
                 fundamental_df_numeric = missing_handler.impute_missing_features(fundamental_df_numeric)
                 
-                normalized_fundamental = normalizer.normalize_factors(fundamental_df_numeric, numeric_columns)
+                normalized_fundamental = normalizer.normalize_factors_by_method(
+                    fundamental_df_numeric, numeric_columns, method=settings.normalization_method
+                )
                 
                 # Salvar features mensais (normalized + confidence factors)
                 month_start = date(date.today().year, date.today().month, 1)
@@ -729,11 +753,11 @@ def run_pipeline_docker(
         # ========================================================================
         logger.info("\n🎯 LAYER 3: SCORING & NORMALIZATION")
         logger.info("Calculando scores finais...")
-        scoring_engine = ScoringEngine(settings)
+        scoring_engine = ScoringEngine(settings, sector_map=sector_map)
         score_service = ScoreService(db)
         confidence_engine = ConfidenceEngine()
         
-        scores_calculated = 0
+        factor_rows = {}
         for ticker in eligible_tickers:
             try:
                 # Obter features
@@ -774,21 +798,44 @@ def run_pipeline_docker(
                 else:
                     logger.warning(f"Features fundamentalistas faltando para {ticker}, usando apenas momentum")
                 
-                # Calcular score
-                score_result = scoring_engine.score_asset(ticker, fundamental_factors, momentum_factors)
-                score_result.passed_eligibility = True
-                score_result.exclusion_reasons = []
-                
-                # Calcular confiança
-                confidence = confidence_engine.calculate_confidence(ticker, date.today())
-                score_result.confidence = confidence
-                
-                # Salvar score
-                score_service.save_score(score_result, date.today())
-                scores_calculated += 1
+                factor_rows[ticker] = {**fundamental_factors, **momentum_factors}
                 
             except Exception as e:
-                logger.warning(f"Erro ao calcular score para {ticker}: {e}")
+                logger.warning(f"Erro ao carregar features para {ticker}: {e}")
+        
+        # Calcular scores de todo o universo de uma vez
+        score_batch = None
+        if factor_rows:
+            factors_df = pd.DataFrame.from_dict(factor_rows, orient='index')
+            
+            # Confiança do universo inteiro a partir dos dados já carregados
+            # (histórico, completude antes da imputação, imputações e
+            # overall_confidence), sem consultas adicionais
+            coverage = confidence_engine.build_coverage_frame(
+                factors_df.index,
+                raw_factors=analysis_df,
+                feature_columns=[
+                    col for col in factors_df.columns
+                    if col in analysis_df.columns and col != 'overall_confidence'
+                ],
+                price_history_days=price_history_days,
+                fundamental_periods=fundamental_periods,
+                imputation_log=imputation_summary,
+                imputable_features=imputable_features,
+                overall_confidence=factors_df.get('overall_confidence')
+            )
+            factors_df['confidence'] = confidence_engine.calculate_universe_confidence(coverage)
+            
+            scores_df = scoring_engine.score_universe(factors_df)
+            score_batch = scoring_engine.build_score_batch(scores_df, factors_df)
+        
+        # Salvar todos os scores numa única transação
+        save_results = score_service.save_batch_scores(
+            score_batch if score_batch is not None else [], date.today()
+        )
+        for failure in save_results["failed"]:
+            logger.warning(f"Erro ao salvar score para {failure['ticker']}: {failure['error']}")
+        scores_calculated = save_results["total_records"]
         
         logger.info(f"✅ Scores calculados: {scores_calculated}/{len(eligible_tickers)}")
         
@@ -799,6 +846,9 @@ def run_pipeline_docker(
         
         logger.info(f"✅ Ranking atualizado: {ranking_size} ativos")
         
+        # Novos scores tornam obsoletos os backtests em cache
+        BacktestService(db).invalidate_cache()
+        
         # ========================================================================
         # PIPELINE SUMMARY
         # ========================================================================
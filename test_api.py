@@ -6,7 +6,7 @@ async def test():
     db = SessionLocal()
     try:
         print("Calling get_ranking...")
-        result = await get_ranking(date=None, db=db)
+        result = await get_ranking(date=None, limit=None, db=db)
         print(f'Success! Got {result.total_assets} assets')
         print(f'Top 3: {[r.ticker for r in result.rankings[:3]]}')
     finally:
@@ -0,0 +1,62 @@
+"""
+Fixtures compartilhadas dos testes unitários.
+"""
+
+import pytest
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.schemas import RawPriceDaily, RankingHistory
+
+
+@pytest.fixture
+def backtest_session_factory():
+    """
+    Fábrica de sessões SQLite em memória com preços e snapshots aleatórios.
+    
+    build(tickers, start, end, seed, membership) gera um passeio aleatório de
+    preços por ticker em dias úteis e, a cada fim de mês, um snapshot com os
+    tickers sorteados (probabilidade membership), scores de fator normais e
+    score final 0.4/0.3/0.3. As sessões são fechadas ao fim do teste.
+    """
+    sessions = []
+    
+    def build(tickers, start, end, seed, membership=0.85):
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        sessions.append(session)
+        
+        rng = np.random.default_rng(seed)
+        bars = pd.bdate_range(start, end)
+        for ticker in tickers:
+            prices = 20.0 * np.cumprod(1 + rng.normal(0.001, 0.02, len(bars)))
+            for bar, price in zip(bars, prices):
+                session.add(RawPriceDaily(ticker=ticker, date=bar.date(), close=price, adj_close=price))
+        
+        for month_end in pd.date_range(start, end, freq='ME'):
+            members = [t for t in tickers if rng.random() < membership]
+            factors = rng.normal(0, 1, (len(members), 3))
+            finals = factors @ np.array([0.4, 0.3, 0.3])
+            order = np.argsort(-finals)
+            for rank, i in enumerate(order, start=1):
+                session.add(RankingHistory(
+                    date=month_end.date(), ticker=members[i],
+                    final_score=float(finals[i]),
+                    final_score_smoothed=float(finals[i]) * 0.9,
+                    momentum_score=float(factors[i, 0]),
+                    quality_score=float(factors[i, 1]),
+                    value_score=float(factors[i, 2]),
+                    rank=rank
+                ))
+        session.commit()
+        return session
+    
+    yield build
+    
+    for session in sessions:
+        session.close()
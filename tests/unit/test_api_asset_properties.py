@@ -16,6 +16,7 @@ from app.main import app as fastapi_app
 from app.models.database import SessionLocal, engine, Base
 from app.models.schemas import ScoreDaily, FeatureDaily, FeatureMonthly, RawPriceDaily, RawFundamental
 from app.api.dependencies import get_db
+from app.api import routes
 
 # Import all models to register them with Base before creating tables
 import app.models.schemas  # noqa: F401
@@ -322,3 +323,88 @@ def test_asset_detail_endpoint_uses_latest_date_when_not_specified(db_session: S
     data = response.json()
     # A data mais recente tem score 2.0, então se retornar 2.0, está usando a data mais recente
     assert data["score"]["final_score"] == 2.0
+
+
+def test_asset_detail_falls_back_to_indexed_rank(db_session: Session):
+    """
+    Teste: Sem rank persistido, o endpoint usa a posição por score
+    
+    Antes de update_ranks, a posição vem do ranking indexado da data.
+    
+    Valida: Requisitos 6.2, 6.3
+    """
+    # Arrange: Dois ativos sem rank persistido
+    test_date = date.today()
+    create_test_asset_data(db_session, "TEST1", test_date, 1.0, 1)
+    create_test_asset_data(db_session, "TEST2", test_date, 2.0, 1)
+    db_session.query(ScoreDaily).update({"rank": None})
+    db_session.commit()
+    
+    # Act: Chamar endpoint
+    response = client.get(f"/api/v1/asset/TEST1?date={test_date}")
+    
+    # Assert: TEST2 tem score maior, então TEST1 é o segundo
+    assert response.status_code == 200
+    
+    data = response.json()
+    assert data["score"]["rank"] == 2
+    assert "2ª posição" in data["explanation"]
+
+
+def test_asset_detail_warms_explanations_for_the_date(db_session: Session):
+    """
+    Teste: A primeira consulta da data gera as explicações em batch
+    
+    Os demais ativos da data passam a ser servidos do cache, com os mesmos
+    fatores brutos das features.
+    
+    Valida: Requisitos 6.2, 6.3
+    """
+    # Arrange: Dois ativos na mesma data
+    test_date = date.today()
+    create_test_asset_data(db_session, "TEST1", test_date, 1.0, 2)
+    create_test_asset_data(db_session, "TEST2", test_date, 2.0, 1)
+    routes.report_generator.clear_cache()
+    
+    # Act: Consultar só o primeiro
+    response = client.get(f"/api/v1/asset/TEST1?date={test_date}")
+    
+    # Assert: O segundo já está em cache com a versão (score, rank) atual
+    assert response.status_code == 200
+    cached = routes.report_generator.get_cached_explanation("TEST2", test_date, version=(2.0, 1))
+    assert cached is not None and "1ª posição" in cached
+    
+    second = client.get(f"/api/v1/asset/TEST2?date={test_date}").json()
+    assert second["explanation"] == cached
+    assert second["raw_factors"]["roe"] == pytest.approx(0.9)
+
+
+def test_asset_detail_keeps_several_dates_warm(db_session: Session, monkeypatch):
+    """
+    Teste: Alternar entre datas não reaquece o universo a cada consulta
+    
+    Cada data é aquecida uma vez e permanece em cache, até o limite de
+    MAX_CACHED_DATES datas.
+    
+    Valida: Requisitos 6.2, 6.3
+    """
+    # Arrange: Mesmo ativo em duas datas, caches vazios
+    newer_date = date.today()
+    older_date = newer_date - timedelta(days=5)
+    create_test_asset_data(db_session, "TEST1", older_date, 1.0, 1)
+    create_test_asset_data(db_session, "TEST1", newer_date, 2.0, 1)
+    routes.report_generator.clear_cache()
+    routes.raw_factors_cache.clear()
+    
+    warmed = []
+    warm = routes._warm_asset_details
+    monkeypatch.setattr(routes, "_warm_asset_details", lambda db, d: (warmed.append(d), warm(db, d)))
+    
+    # Act: Alternar entre as datas
+    for test_date in (older_date, newer_date, older_date, newer_date):
+        response = client.get(f"/api/v1/asset/TEST1?date={test_date}")
+        assert response.status_code == 200
+    
+    # Assert: Uma carga em batch por data
+    assert warmed == [older_date, newer_date]
+    assert set(routes.raw_factors_cache) == {older_date, newer_date}
@@ -222,3 +222,36 @@ def test_ranking_endpoint_uses_latest_date_when_not_specified(db_session: Sessio
     data = response.json()
     assert data["date"] == str(newer_date)
     assert data["total_assets"] == 3
+
+
+def test_ranking_endpoint_limit_uses_partial_selection(db_session: Session):
+    """
+    Teste: limit retorna o mesmo prefixo do ranking completo
+    
+    Com empates, a ordem segue o ticker, tanto no ranking completo quanto
+    na seleção parcial do top-N.
+    
+    Valida: Requisito 6.1
+    """
+    # Arrange: Scores com empates
+    test_date = date.today()
+    for ticker, final_score in [("CCC", 1.0), ("AAA", 1.0), ("BBB", 2.0), ("DDD", 0.5)]:
+        db_session.add(ScoreDaily(
+            ticker=ticker,
+            date=test_date,
+            final_score=final_score,
+            momentum_score=0.5,
+            quality_score=0.3,
+            value_score=0.2,
+            confidence=0.5
+        ))
+    db_session.commit()
+    
+    # Act: Ranking completo e limitado
+    full = client.get(f"/api/v1/ranking?date={test_date}").json()
+    limited = client.get(f"/api/v1/ranking?date={test_date}&limit=2").json()
+    
+    # Assert: Mesmo prefixo, desempate por ticker
+    assert [r["ticker"] for r in full["rankings"]] == ["BBB", "AAA", "CCC", "DDD"]
+    assert [r["ticker"] for r in limited["rankings"]] == ["BBB", "AAA"]
+    assert limited["total_assets"] == 2
@@ -0,0 +1,594 @@
+"""
+Testes para o BacktestEngine e as fontes de preços do backtest.
+"""
+
+import pytest
+from datetime import date
+from unittest.mock import Mock
+
+import numpy as np
+import pandas as pd
+from hypothesis import example, given, settings, strategies as st
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.schemas import RawPriceDaily, RankingHistory, ScoreDaily
+from app.backtest.backtest_engine import BacktestEngine
+from app.backtest.vectorized import VectorizedBacktest
+from app.backtest.price_provider import (
+    PriceProvider,
+    DatabasePriceProvider,
+    YahooPriceProvider
+)
+
+
+@pytest.fixture
+def db_session():
+    """Sessão SQLite em memória com schema criado."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_prices(db, ticker, start, prices):
+    """Adiciona um pregão por dia útil a partir de start."""
+    bars = pd.bdate_range(start, periods=len(prices))
+    for bar, price in zip(bars, prices):
+        db.add(RawPriceDaily(
+            ticker=ticker,
+            date=bar.date(),
+            close=price,
+            adj_close=price
+        ))
+
+
+def add_snapshot(db, snapshot_date, scores):
+    """Adiciona um snapshot de ranking {ticker: score}."""
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    for rank, ticker in enumerate(ordered, start=1):
+        db.add(RankingHistory(
+            date=snapshot_date,
+            ticker=ticker,
+            final_score=scores[ticker],
+            momentum_score=0.0,
+            quality_score=0.0,
+            value_score=0.0,
+            rank=rank
+        ))
+
+
+class CountingProvider(DatabasePriceProvider):
+    """DatabasePriceProvider que registra as buscas na fonte."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetches = []
+    
+    def _fetch_prices(self, tickers, start_date, end_date):
+        self.fetches.append((list(tickers), start_date, end_date))
+        return super()._fetch_prices(tickers, start_date, end_date)
+
+
+class StaticProvider(PriceProvider):
+    """Provider com preços fixos em memória."""
+    
+    def __init__(self, prices):
+        super().__init__()
+        self.prices = prices
+        self.requested = []
+    
+    def _fetch_prices(self, tickers, start_date, end_date):
+        self.requested.extend(tickers)
+        prices = self.prices[self.prices['ticker'].isin(tickers)]
+        dates = pd.to_datetime(prices['date']).dt.date
+        return prices[(dates >= start_date) & (dates <= end_date)]
+
+
+def add_score(db, ticker, score_date, final_score, passed=True):
+    """Adiciona um ScoreDaily com fatores derivados do final_score."""
+    db.add(ScoreDaily(
+        ticker=ticker,
+        date=score_date,
+        final_score=final_score,
+        final_score_smoothed=final_score / 2,
+        momentum_score=final_score + 1,
+        quality_score=final_score + 2,
+        value_score=final_score + 3,
+        confidence=1.0,
+        passed_eligibility=passed,
+        rank=None
+    ))
+
+
+class TestMonthlySnapshots:
+    """Testes para BacktestEngine.create_monthly_snapshots."""
+    
+    def snapshot(self, db, snapshot_date):
+        rows = db.query(RankingHistory).filter(
+            RankingHistory.date == snapshot_date
+        ).order_by(RankingHistory.rank).all()
+        return [(r.ticker, r.final_score, r.rank) for r in rows]
+    
+    def test_latest_eligible_score_per_ticker(self, db_session):
+        """Cada ticker entra com seu score mais recente até a data, não as últimas 100 linhas."""
+        # 150 tickers com score diário: LIMIT 100 perderia a maioria
+        for i in range(150):
+            ticker = f"T{i:03d}"
+            add_score(db_session, ticker, date(2024, 1, 29), float(i))
+            add_score(db_session, ticker, date(2024, 1, 30), float(i) + 0.5)
+        add_score(db_session, "OLD", date(2024, 1, 10), 999.0)
+        add_score(db_session, "NEWER", date(2024, 2, 1), 999.0)
+        add_score(db_session, "EXCL", date(2024, 1, 30), 999.0, passed=False)
+        db_session.commit()
+        
+        BacktestEngine(date(2024, 1, 1), date(2024, 1, 31)).create_monthly_snapshots(db_session)
+        rows = self.snapshot(db_session, date(2024, 1, 31))
+        
+        assert len(rows) == 151
+        assert rows[0] == ("OLD", 999.0, 1)
+        assert rows[1] == ("T149", 149.5, 2)
+        assert rows[-1] == ("T000", 0.5, 151)
+        
+        stored = db_session.query(RankingHistory).filter(RankingHistory.ticker == "T149").one()
+        assert (stored.final_score_smoothed, stored.momentum_score, stored.quality_score,
+                stored.value_score) == (149.5 / 2, 150.5, 151.5, 152.5)
+        assert stored.created_at is not None
+    
+    def test_stale_scores_are_excluded(self, db_session):
+        """Scores mais antigos que lookback_days não entram no snapshot."""
+        add_score(db_session, "AAA", date(2024, 1, 31), 1.0)
+        add_score(db_session, "GONE", date(2023, 12, 1), 5.0)
+        db_session.commit()
+        
+        BacktestEngine(date(2024, 1, 1), date(2024, 1, 31)).create_monthly_snapshots(
+            db_session, lookback_days=30
+        )
+        
+        assert self.snapshot(db_session, date(2024, 1, 31)) == [("AAA", 1.0, 1)]
+    
+    def test_one_statement_per_chunk_and_existing_dates_skipped(self, db_session):
+        """Uma instrução INSERT por lote; datas já existentes não são refeitas."""
+        for month in range(1, 13):
+            for ticker, score in [("AAA", 1.0), ("BBB", 2.0)]:
+                add_score(db_session, ticker, date(2023, month, 15), score)
+        add_snapshot(db_session, date(2023, 3, 31), {"ZZZ": 9.0})
+        db_session.commit()
+        
+        inserts = []
+        
+        def count_inserts(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("INSERT"):
+                inserts.append(statement)
+        
+        bind = db_session.get_bind()
+        event.listen(bind, "before_cursor_execute", count_inserts)
+        try:
+            BacktestEngine(date(2023, 1, 1), date(2023, 12, 31)).create_monthly_snapshots(
+                db_session, chunk_size=5
+            )
+        finally:
+            event.remove(bind, "before_cursor_execute", count_inserts)
+        
+        assert len(inserts) == 3  # 11 datas pendentes em lotes de 5
+        assert self.snapshot(db_session, date(2023, 3, 31)) == [("ZZZ", 9.0, 1)]
+        assert self.snapshot(db_session, date(2023, 12, 31)) == [("BBB", 2.0, 1), ("AAA", 1.0, 2)]
+        assert db_session.query(RankingHistory).count() == 1 + 11 * 2
+    
+    def test_rerun_is_idempotent(self, db_session):
+        """Rodar de novo não duplica snapshots."""
+        add_score(db_session, "AAA", date(2024, 1, 31), 1.0)
+        db_session.commit()
+        engine = BacktestEngine(date(2024, 1, 1), date(2024, 2, 29))
+        
+        engine.create_monthly_snapshots(db_session)
+        engine.create_monthly_snapshots(db_session)
+        
+        assert db_session.query(RankingHistory).count() == 2
+
+
+class TestDatabasePriceProvider:
+    """Testes para DatabasePriceProvider."""
+    
+    def test_base_provider_is_abstract(self):
+        """PriceProvider sem _fetch_prices não pode ser instanciado."""
+        with pytest.raises(TypeError):
+            PriceProvider()
+    
+    def test_loads_window_once_and_slices_periods(self, db_session):
+        """Períodos dentro da janela carregada não voltam ao banco."""
+        add_prices(db_session, "AAA", date(2024, 1, 1), [10.0 + i for i in range(60)])
+        add_prices(db_session, "BBB", date(2024, 1, 1), [20.0] * 60)
+        db_session.commit()
+        
+        provider = CountingProvider(db_session)
+        provider.load(["AAA", "BBB"], date(2024, 1, 31), date(2024, 3, 15))
+        
+        jan = provider.get_period_returns(["AAA", "BBB"], date(2024, 1, 31), date(2024, 2, 29))
+        feb = provider.get_period_returns(["AAA"], date(2024, 2, 29), date(2024, 3, 15))
+        
+        assert len(provider.fetches) == 1
+        # 31/01 é o 23º pregão (preço 32), 29/02 o 44º (53) e 15/03 o 55º (64)
+        assert jan["AAA"] == pytest.approx(53.0 / 32.0 - 1.0)
+        assert jan["BBB"] == pytest.approx(0.0)
+        assert feb["AAA"] == pytest.approx(64.0 / 53.0 - 1.0)
+    
+    def test_non_trading_dates_use_last_price(self, db_session):
+        """Rebalanceamento num fim de semana usa o último pregão anterior."""
+        add_prices(db_session, "AAA", date(2024, 3, 1), [10.0 + i for i in range(30)])
+        db_session.commit()
+        
+        provider = DatabasePriceProvider(db_session)
+        # 31/03/2024 é domingo: vale o preço de 29/03 (21º pregão); 10/04 é o 29º
+        returns = provider.get_period_returns(["AAA"], date(2024, 3, 31), date(2024, 4, 10))
+        
+        assert returns["AAA"] == pytest.approx(38.0 / 30.0 - 1.0)
+    
+    def test_missing_tickers_are_omitted_not_zero(self, db_session):
+        """Tickers sem preço no período não recebem retorno 0.0 silencioso."""
+        add_prices(db_session, "AAA", date(2024, 1, 1), [10.0, 11.0, 12.0])
+        db_session.commit()
+        
+        provider = DatabasePriceProvider(db_session)
+        returns = provider.get_period_returns(["AAA", "ZZZ"], date(2024, 1, 1), date(2024, 1, 3))
+        
+        assert set(returns) == {"AAA"}
+        assert returns["AAA"] == pytest.approx(0.2)
+    
+    def test_listing_during_period_starts_at_first_bar(self, db_session):
+        """Ativo listado no meio do período usa o primeiro pregão como base."""
+        add_prices(db_session, "NEW", date(2024, 1, 15), [10.0, 12.0, 15.0])
+        db_session.commit()
+        
+        provider = DatabasePriceProvider(db_session)
+        returns = provider.get_period_returns(["NEW"], date(2024, 1, 1), date(2024, 1, 31))
+        
+        assert returns["NEW"] == pytest.approx(0.5)
+    
+    def test_fallback_fills_tickers_missing_from_database(self, db_session):
+        """O fallback só é consultado para tickers sem preços no banco."""
+        add_prices(db_session, "AAA", date(2024, 1, 1), [10.0, 11.0])
+        db_session.commit()
+        
+        fallback = StaticProvider(pd.DataFrame({
+            'ticker': ["AAA", "AAA", "BBB", "BBB"],
+            'date': [date(2024, 1, 1), date(2024, 1, 2)] * 2,
+            'adj_close': [99.0, 99.0, 4.0, 5.0]
+        }))
+        provider = DatabasePriceProvider(db_session, fallback=fallback)
+        returns = provider.get_period_returns(["AAA", "BBB"], date(2024, 1, 1), date(2024, 1, 2))
+        
+        assert fallback.requested == ["BBB"]
+        assert returns == {"AAA": pytest.approx(0.1), "BBB": pytest.approx(0.25)}
+    
+    def test_extends_window_and_universe_on_demand(self, db_session):
+        """Pedidos fora do que foi carregado recarregam a matriz ampliada."""
+        add_prices(db_session, "AAA", date(2024, 1, 1), [10.0 + i for i in range(60)])
+        add_prices(db_session, "BBB", date(2024, 1, 1), [5.0 + i for i in range(60)])
+        db_session.commit()
+        
+        provider = CountingProvider(db_session)
+        provider.load(["AAA"], date(2024, 1, 15), date(2024, 1, 31))
+        provider.get_period_returns(["BBB"], date(2024, 1, 15), date(2024, 1, 31))
+        provider.get_period_returns(["AAA"], date(2024, 1, 31), date(2024, 3, 1))
+        
+        assert [fetch[0] for fetch in provider.fetches] == [["AAA"], ["BBB"], ["AAA", "BBB"]]
+        matrix = provider.get_price_matrix(["BBB", "AAA"], date(2024, 1, 15), date(2024, 3, 1))
+        assert list(matrix.columns) == ["BBB", "AAA"]
+
+
+class TestYahooPriceProvider:
+    """Testes para YahooPriceProvider."""
+    
+    def test_fetches_each_ticker_once_and_tolerates_errors(self):
+        """Uma chamada por ticker para a janela inteira; falhas ficam sem preço."""
+        client = Mock()
+        
+        def fetch(ticker, start_date, end_date):
+            if ticker == "BAD":
+                raise RuntimeError("network down")
+            return pd.DataFrame({
+                'date': [date(2024, 1, 2), date(2024, 1, 31), date(2024, 2, 29)],
+                'adj_close': [10.0, 11.0, 12.1]
+            })
+        
+        client.fetch_daily_prices.side_effect = fetch
+        provider = YahooPriceProvider(client)
+        provider.load(["AAA", "BAD"], date(2024, 1, 31), date(2024, 2, 29))
+        returns = provider.get_period_returns(["AAA", "BAD"], date(2024, 1, 31), date(2024, 2, 29))
+        
+        assert client.fetch_daily_prices.call_count == 2
+        assert returns == {"AAA": pytest.approx(0.1)}
+
+
+class TestBacktestEnginePrices:
+    """Testes para o uso do provider de preços pelo BacktestEngine."""
+    
+    def _populate(self, db):
+        add_prices(db, "AAA", date(2023, 12, 1), [10.0 + 0.1 * i for i in range(100)])
+        add_prices(db, "BBB", date(2023, 12, 1), [50.0 - 0.2 * i for i in range(100)])
+        add_prices(db, "CCC", date(2023, 12, 1), [30.0] * 100)
+        for snapshot_date in [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)]:
+            add_snapshot(db, snapshot_date, {"AAA": 0.9, "BBB": 0.5, "CCC": 0.1})
+        db.commit()
+    
+    def test_run_backtest_uses_database_prices_with_single_load(self, db_session):
+        """O backtest carrega o universo dos snapshots uma vez, sem rede."""
+        self._populate(db_session)
+        provider = CountingProvider(db_session)
+        engine = BacktestEngine(
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 3, 31),
+            top_n=2,
+            price_provider=provider
+        )
+        
+        result = engine.run_backtest(db_session)
+        
+        assert len(provider.fetches) == 1
+        assert provider.fetches[0][0] == ["AAA", "BBB", "CCC"]
+        assert len(result['monthly_returns']) == 2
+        
+        expected = provider.get_period_returns(["AAA", "BBB"], date(2024, 1, 31), date(2024, 2, 29))
+        assert result['monthly_returns'][0] == pytest.approx(
+            0.5 * expected["AAA"] + 0.5 * expected["BBB"]
+        )
+    
+    def test_default_provider_reads_database_and_is_deterministic(self, db_session):
+        """Sem provider explícito o engine usa o banco e repete o resultado."""
+        self._populate(db_session)
+        
+        def run():
+            engine = BacktestEngine(
+                start_date=date(2024, 1, 1),
+                end_date=date(2024, 3, 31),
+                top_n=2
+            )
+            result = engine.run_backtest(db_session)
+            assert isinstance(engine.price_provider, DatabasePriceProvider)
+            assert engine.price_provider.fallback is None
+            return result['monthly_returns']
+        
+        first = run()
+        
+        assert first == run()
+        assert all(r != 0.0 for r in first)
+
+
+
+class TestVectorizedBacktest:
+    """Testes para as operações matriciais do backtest."""
+    
+    def test_weight_matrix_follows_portfolio_rules(self):
+        """Top N por score, empates pelo rank e fallback para equal weight."""
+        snapshots = pd.DataFrame({
+            'date': [date(2024, 1, 31)] * 4 + [date(2024, 2, 29)] * 3,
+            'ticker': ["AAA", "BBB", "CCC", "DDD", "AAA", "BBB", "CCC"],
+            'final_score': [3.0, 1.0, 1.0, None, -1.0, -2.0, 0.5],
+            'rank': [1, 3, 2, 4, 2, 3, 1],
+        })
+        dates = [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)]
+        
+        weights = VectorizedBacktest.build_weight_matrix(
+            snapshots, dates, top_n=2, weight_method='score_weighted'
+        )
+        
+        assert list(weights.columns) == ["AAA", "CCC"]
+        assert weights.iloc[0].tolist() == pytest.approx([0.75, 0.25])
+        assert weights.iloc[1].tolist() == pytest.approx([0.0, 1.0])
+        assert weights.iloc[2].tolist() == [0.0, 0.0]
+        
+        equal = VectorizedBacktest.build_weight_matrix(
+            snapshots.assign(final_score=[3.0, 1.0, 1.0, None, -1.0, -2.0, -0.5]),
+            dates[1:2], top_n=2, weight_method='score_weighted'
+        )
+        assert equal.loc[:, ["AAA", "CCC"]].iloc[0].tolist() == pytest.approx([0.5, 0.5])
+    
+    def test_unknown_weight_method_raises(self):
+        """Métodos de ponderação desconhecidos são rejeitados."""
+        with pytest.raises(ValueError):
+            VectorizedBacktest.build_weight_matrix(pd.DataFrame(), [], 10, 'random')
+    
+    def test_simulate_charges_traded_volume(self):
+        """Custo = taxa × soma de |Δpeso|, partindo do caixa; linhas vazias saem."""
+        index = pd.to_datetime([date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31)])
+        weights = pd.DataFrame(
+            [[0.5, 0.5, 0.0], [0.0, 0.0, 0.0], [0.0, 0.5, 0.5]],
+            index=index, columns=["AAA", "BBB", "CCC"]
+        )
+        returns = pd.DataFrame(
+            [[0.1, np.nan, 0.0], [0.0, 0.0, 0.0], [0.2, 0.1, -0.1]],
+            index=index, columns=["AAA", "BBB", "CCC"]
+        )
+        
+        periods = VectorizedBacktest.simulate(weights, returns, transaction_cost=0.01)
+        
+        assert list(periods.index) == [index[0], index[2]]
+        assert periods['gross_return'].tolist() == pytest.approx([0.05, 0.0])
+        assert periods['traded'].tolist() == pytest.approx([1.0, 1.0])
+        assert periods['turnover'].tolist() == pytest.approx([0.5, 0.5])
+        assert periods['net_return'].tolist() == pytest.approx([0.04, -0.01])
+
+
+class TestDailyMarking:
+    """Testes para a marcação diária do NAV."""
+    
+    def test_weights_drift_and_cost_uses_drifted_turnover(self):
+        """Entre rebalanceamentos os pesos derivam; o custo incide sobre a troca real."""
+        days = pd.to_datetime([date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 2), date(2024, 2, 5)])
+        prices = pd.DataFrame(
+            {"AAA": [10.0, 11.0, 12.0, 12.0], "BBB": [10.0, 10.0, 9.0, 9.0]}, index=days
+        )
+        weights = pd.DataFrame(
+            [[0.5, 0.5], [0.5, 0.5]], index=days[[0, 2]], columns=["AAA", "BBB"]
+        )
+        
+        result = VectorizedBacktest.simulate_daily(
+            weights, prices, transaction_cost=0.01, initial_capital=100.0
+        )
+        nav = result['nav']
+        
+        drifted_traded = 2 * abs(0.6 / 1.05 - 0.5)
+        assert list(nav.index) == list(days)
+        assert result['rebalances']['traded'].tolist() == pytest.approx([1.0, drifted_traded])
+        assert nav['nav'].tolist() == pytest.approx([
+            99.0,
+            99.0 * 1.05,
+            99.0 * 1.05 * (1 - 0.01 * drifted_traded),
+            99.0 * 1.05 * (1 - 0.01 * drifted_traded),
+        ])
+        assert nav['daily_return'].iloc[0] == 0.0
+        assert nav['daily_return'].iloc[1] == pytest.approx(0.05)
+        assert nav['benchmark_nav'].isna().all()
+    
+    def test_cash_before_first_rebalance_and_benchmark(self):
+        """Linhas sem pesos não rebalanceiam; datas sem pregão usam o último pregão."""
+        days = pd.to_datetime([date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 2), date(2024, 2, 5)])
+        prices = pd.DataFrame({"AAA": [10.0, 11.0, 12.0, 6.0]}, index=days)
+        weights = pd.DataFrame(
+            [[0.0], [1.0], [0.0]],
+            index=pd.to_datetime([date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 3)]),
+            columns=["AAA"]
+        )
+        benchmark = pd.Series([100.0, 101.0, 99.0, np.nan], index=days)
+        
+        result = VectorizedBacktest.simulate_daily(
+            weights, prices, transaction_cost=0.01, initial_capital=100.0, benchmark=benchmark
+        )
+        nav = result['nav']
+        
+        assert list(result['rebalances'].index) == [days[1]]
+        assert nav['nav'].tolist() == pytest.approx([100.0, 99.0, 99.0 * 12 / 11, 99.0 * 6 / 11])
+        assert nav['benchmark_nav'].tolist() == pytest.approx([100.0, 101.0, 99.0, 99.0])
+        assert nav['benchmark_return'].tolist() == pytest.approx([0.0, 0.01, 99 / 101 - 1, 0.0])
+    
+    def test_records_match_persistence_models(self):
+        """Registros saem no formato de BacktestNAV e BacktestPosition."""
+        days = pd.to_datetime([date(2024, 1, 31), date(2024, 2, 1)])
+        nav = pd.DataFrame({
+            'nav': [100.0, 101.0],
+            'daily_return': [0.0, 0.01],
+            'benchmark_nav': [np.nan, 100.0],
+            'benchmark_return': [np.nan, 0.0],
+        }, index=days)
+        weights = pd.DataFrame([[0.0, 0.6, 0.4]], index=days[:1], columns=["CCC", "BBB", "AAA"])
+        scores = pd.DataFrame([[1.0, 2.0]], index=days[:1], columns=["BBB", "CCC"])
+        
+        assert VectorizedBacktest.to_nav_records(nav) == [
+            {'date': date(2024, 1, 31), 'nav': 100.0, 'daily_return': 0.0,
+             'benchmark_nav': None, 'benchmark_return': None},
+            {'date': date(2024, 2, 1), 'nav': 101.0, 'daily_return': 0.01,
+             'benchmark_nav': 100.0, 'benchmark_return': 0.0},
+        ]
+        assert VectorizedBacktest.to_position_records(weights, scores) == [
+            {'date': date(2024, 1, 31), 'ticker': "AAA", 'weight': 0.4, 'score_at_selection': None},
+            {'date': date(2024, 1, 31), 'ticker': "BBB", 'weight': 0.6, 'score_at_selection': 1.0},
+        ]
+    
+    def test_engine_daily_nav_matches_monthly_periods(self, db_session):
+        """Sem custo, o NAV diário nas datas de rebalanceamento compõe os retornos mensais."""
+        TestBacktestEnginePrices()._populate(db_session)
+        engine = BacktestEngine(start_date=date(2024, 1, 1), end_date=date(2024, 3, 31), top_n=2)
+        
+        monthly = engine.run_backtest(db_session)['monthly_returns']
+        result = engine.run_backtest_daily(db_session, initial_capital=1000.0, benchmark_ticker="CCC")
+        
+        nav = {r['date']: r['nav'] for r in result['nav_records']}
+        assert result['nav_records'][0]['date'] == date(2024, 1, 31)
+        assert result['nav_records'][-1]['date'] == date(2024, 3, 29)
+        assert nav[date(2024, 2, 29)] / nav[date(2024, 1, 31)] - 1 == pytest.approx(monthly[0])
+        assert nav[date(2024, 3, 29)] / nav[date(2024, 2, 29)] - 1 == pytest.approx(monthly[1])
+        assert all(r['benchmark_nav'] == pytest.approx(1000.0) for r in result['nav_records'])
+        assert len(result['daily_returns']) == len(result['nav_records']) - 1
+        assert [(p['date'], p['ticker'], p['weight'], p['score_at_selection']) for p in result['positions']] == [
+            (date(2024, 1, 31), "AAA", 0.5, 0.9),
+            (date(2024, 1, 31), "BBB", 0.5, 0.5),
+            (date(2024, 2, 29), "AAA", 0.5, 0.9),
+            (date(2024, 2, 29), "BBB", 0.5, 0.5),
+        ]
+        
+        costly = BacktestEngine(
+            start_date=date(2024, 1, 1), end_date=date(2024, 3, 31), top_n=2, transaction_cost=0.01
+        ).run_backtest_daily(db_session, initial_capital=1000.0)
+        assert costly['nav_records'][0]['nav'] == pytest.approx(990.0)
+        assert costly['metrics']['avg_turnover'] > 0
+
+
+def make_session():
+    """Sessão SQLite em memória nova (fixtures não reiniciam entre exemplos)."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+class TestVectorizedMatchesLoop:
+    """O núcleo vetorizado reproduz o laço de referência."""
+    
+    MONTH_ENDS = [
+        date(2023, 1, 31), date(2023, 2, 28), date(2023, 3, 31), date(2023, 4, 30),
+        date(2023, 5, 31), date(2023, 6, 30), date(2023, 7, 31),
+    ]
+    TICKERS = ["AAA", "BBB", "CCC", "DDD", "EEE", "FFF"]
+    
+    @given(
+        seed=st.integers(min_value=0, max_value=2**32 - 1),
+        top_n=st.integers(min_value=1, max_value=7),
+        weight_method=st.sampled_from(['equal', 'score_weighted']),
+        use_smoothing=st.booleans(),
+        transaction_cost=st.sampled_from([0.0, 0.001, 0.01])
+    )
+    # Um único período de rebalanceamento: Sharpe NaN nos dois caminhos
+    @example(seed=69142, top_n=1, weight_method='equal', use_smoothing=False, transaction_cost=0.0)
+    @settings(max_examples=25, deadline=None)
+    def test_vectorized_matches_loop(self, seed, top_n, weight_method, use_smoothing, transaction_cost):
+        """Retornos, pesos e métricas coincidem com run_backtest_loop."""
+        rng = np.random.default_rng(seed)
+        db = make_session()
+        try:
+            bars = pd.bdate_range(date(2023, 1, 2), date(2023, 7, 31))
+            for ticker in self.TICKERS:
+                prices = 20.0 * np.cumprod(1 + rng.normal(0, 0.02, len(bars)))
+                # Listagem tardia, delisting e buracos aleatórios
+                alive = np.ones(len(bars), dtype=bool)
+                alive[:rng.integers(0, 60)] = False
+                alive[len(bars) - rng.integers(0, 60):] = False
+                alive &= rng.random(len(bars)) > 0.1
+                for bar, price in zip(bars[alive], prices[alive]):
+                    db.add(RawPriceDaily(ticker=ticker, date=bar.date(), close=price, adj_close=price))
+            
+            for month_end in self.MONTH_ENDS:
+                if rng.random() < 0.15:
+                    continue
+                members = [t for t in self.TICKERS if rng.random() < 0.8]
+                scores = rng.normal(0, 1, len(members)).round(1)
+                for rank, (ticker, score) in enumerate(zip(members, scores), start=1):
+                    db.add(RankingHistory(
+                        date=month_end, ticker=ticker, final_score=float(score),
+                        final_score_smoothed=None if rng.random() < 0.2 else float(score) / 2,
+                        momentum_score=0.0, quality_score=0.0, value_score=0.0, rank=rank
+                    ))
+            db.commit()
+            
+            def engine():
+                return BacktestEngine(
+                    start_date=date(2023, 1, 1), end_date=date(2023, 7, 31),
+                    top_n=top_n, weight_method=weight_method,
+                    use_smoothing=use_smoothing, transaction_cost=transaction_cost
+                )
+            
+            vectorized = engine().run_backtest(db)
+            reference = engine().run_backtest_loop(db)
+        finally:
+            db.close()
+        
+        assert vectorized['monthly_returns'] == pytest.approx(reference['monthly_returns'], abs=1e-12)
+        assert vectorized['portfolio_history'] == [
+            {t: pytest.approx(w) for t, w in p.items() if w > 0}
+            for p in reference['portfolio_history']
+        ]
+        for key in ('total_return', 'cagr', 'sharpe_ratio', 'max_drawdown', 'avg_turnover'):
+            assert vectorized['metrics'][key] == pytest.approx(
+                reference['metrics'][key], rel=1e-9, abs=1e-9, nan_ok=True
+            ), key
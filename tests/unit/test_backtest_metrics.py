@@ -0,0 +1,146 @@
+"""
+Testes para o cálculo vetorizado de métricas de performance.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.backtest.metrics import PerformanceMetrics
+
+
+def random_returns(n_periods, n_series=None, seed=0):
+    """Retornos mensais normais (seed fixa)."""
+    rng = np.random.default_rng(seed)
+    shape = (n_periods,) if n_series is None else (n_periods, n_series)
+    return rng.normal(0.01, 0.05, shape)
+
+
+class TestMetricsMatrix:
+    """Testes para calculate_metrics_matrix."""
+    
+    def test_columns_match_per_metric_functions(self):
+        """Cada coluna bate com as funções por métrica aplicadas à série isolada."""
+        returns = random_returns(60, 4)
+        matrix = PerformanceMetrics.calculate_metrics_matrix(returns, risk_free_rate=0.02)
+        
+        for column in range(returns.shape[1]):
+            series = pd.Series(returns[:, column])
+            assert matrix['cagr'][column] == pytest.approx(PerformanceMetrics.calculate_cagr(series))
+            assert matrix['volatility'][column] == pytest.approx(PerformanceMetrics.calculate_volatility(series))
+            assert matrix['sharpe_ratio'][column] == pytest.approx(
+                PerformanceMetrics.calculate_sharpe_ratio(series, 0.02)
+            )
+            assert matrix['sortino_ratio'][column] == pytest.approx(
+                PerformanceMetrics.calculate_sortino_ratio(series, 0.02)
+            )
+            assert matrix['max_drawdown'][column] == pytest.approx(
+                PerformanceMetrics.calculate_max_drawdown((1 + series).cumprod())
+            )
+        
+        assert np.isnan(matrix['avg_turnover']).all()
+        assert np.isnan(matrix['beta']).all()
+    
+    def test_drawdown_duration_hit_rate_and_calmar(self):
+        """Duração é a maior sequência abaixo do pico; Calmar = CAGR / |MDD|."""
+        returns = np.array([0.10, -0.10, 0.05, 0.02, 0.10, -0.05, 0.01])
+        matrix = PerformanceMetrics.calculate_metrics_matrix(returns)
+        
+        # Abaixo do pico de 1.10 nos períodos 2-4, recupera no 5, cai de novo nos 6-7
+        assert matrix['max_drawdown_duration'][0] == 3
+        assert matrix['hit_rate'][0] == pytest.approx(500 / 7)
+        assert matrix['max_drawdown'][0] == pytest.approx(-10.0)
+        assert matrix['calmar_ratio'][0] == pytest.approx(matrix['cagr'][0] / 10.0)
+    
+    def test_turnover_from_weight_matrices(self):
+        """Turnover médio sai dos pesos, comuns ou por série."""
+        weights = np.array([
+            [0.5, 0.5, 0.0],
+            [0.5, 0.0, 0.5],
+            [0.0, 0.0, 1.0],
+        ])
+        returns = random_returns(3, 2)
+        
+        shared = PerformanceMetrics.calculate_metrics_matrix(returns, weights)
+        per_series = PerformanceMetrics.calculate_metrics_matrix(
+            returns, np.stack([weights, weights[[0, 0, 0]]])
+        )
+        
+        assert shared['avg_turnover'].tolist() == pytest.approx([50.0, 50.0])
+        assert per_series['avg_turnover'].tolist() == pytest.approx([50.0, 0.0])
+    
+    def test_alpha_beta_information_ratio(self):
+        """Beta e alpha recuperam a relação linear; NaN do benchmark é ignorado."""
+        rng = np.random.default_rng(1)
+        benchmark = rng.normal(0.01, 0.04, 120)
+        returns = 0.002 + 1.5 * benchmark
+        benchmark_with_gap = np.r_[np.nan, np.nan, benchmark[2:]]
+        
+        matrix = PerformanceMetrics.calculate_metrics_matrix(
+            returns, benchmark_returns=benchmark_with_gap
+        )
+        
+        assert matrix['beta'][0] == pytest.approx(1.5)
+        assert matrix['alpha'][0] == pytest.approx(0.002 * 12 * 100)
+        active = returns[2:] - benchmark[2:]
+        expected_ir = active.mean() * 12 / (active.std(ddof=1) * np.sqrt(12))
+        assert matrix['information_ratio'][0] == pytest.approx(expected_ir)
+    
+    def test_empty_returns(self):
+        """Sem períodos as métricas são zero, como nas funções por métrica."""
+        matrix = PerformanceMetrics.calculate_metrics_matrix(np.zeros((0, 2)), np.zeros((0, 3)))
+        
+        assert matrix['total_return'].tolist() == [0.0, 0.0]
+        assert matrix['avg_turnover'].tolist() == [0.0, 0.0]
+        assert np.isnan(matrix['alpha']).all()
+    
+    def test_large_sweep_shapes(self):
+        """Dez mil séries de 10 anos com benchmark (tempo medido em scripts/benchmark_backtest.py)."""
+        returns = random_returns(120, 10000)
+        benchmark = random_returns(120, seed=1)
+        
+        matrix = PerformanceMetrics.calculate_metrics_matrix(returns, benchmark_returns=benchmark)
+        
+        assert matrix['sharpe_ratio'].shape == (10000,)
+        assert np.isfinite(matrix['beta']).all()
+
+
+class TestAllAndRollingMetrics:
+    """Testes para calculate_all_metrics e calculate_rolling_metrics."""
+    
+    def test_all_metrics_turnover_and_optional_benchmark(self):
+        """Turnover dos dicts de pesos; alpha/beta/IR só com benchmark."""
+        returns = pd.Series(random_returns(24))
+        history = [{'AAA': 0.5, 'BBB': 0.5}, {'AAA': 0.5, 'CCC': 0.5}, {'CCC': 1.0}]
+        
+        metrics = PerformanceMetrics.calculate_all_metrics(returns, history)
+        assert metrics['avg_turnover'] == pytest.approx(50.0)
+        assert metrics['alpha'] is None and metrics['information_ratio'] is None
+        
+        benchmark = pd.Series(random_returns(24, seed=3))
+        with_benchmark = PerformanceMetrics.calculate_all_metrics(
+            returns, history, benchmark_returns=benchmark
+        )
+        assert isinstance(with_benchmark['beta'], float)
+        assert with_benchmark['cagr'] == pytest.approx(metrics['cagr'])
+    
+    def test_rolling_windows_match_full_calculation(self):
+        """Cada linha é o cálculo completo sobre os últimos 12 períodos."""
+        index = pd.date_range('2015-01-31', periods=36, freq='ME')
+        returns = pd.DataFrame(random_returns(36, 3), index=index, columns=['a', 'b', 'c'])
+        benchmark = pd.Series(random_returns(36, seed=5), index=index)
+        
+        rolling = PerformanceMetrics.calculate_rolling_metrics(returns, benchmark)
+        single = PerformanceMetrics.calculate_rolling_metrics(returns['b'], benchmark)
+        
+        assert len(rolling) == 25
+        assert rolling.index[0] == index[11]
+        window = PerformanceMetrics.calculate_metrics_matrix(
+            returns.iloc[5:17].to_numpy(), benchmark_returns=benchmark.iloc[5:17].to_numpy()
+        )
+        for key in ('sharpe_ratio', 'max_drawdown', 'beta', 'information_ratio'):
+            assert rolling[key].iloc[5].tolist() == pytest.approx(window[key].tolist())
+            assert single[key].iloc[5] == pytest.approx(window[key][1])
+        assert 'avg_turnover' not in single.columns
+        
+        assert PerformanceMetrics.calculate_rolling_metrics(returns['a'].iloc[:5]).empty
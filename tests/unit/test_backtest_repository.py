@@ -0,0 +1,348 @@
+"""
+Testes para a persistência em lote do BacktestRepository.
+"""
+
+import csv
+import io
+import pytest
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import numpy as np
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.backtest.models import (
+    BacktestNAV,
+    BacktestPosition,
+    BacktestMetrics,
+    BacktestRun,
+    BacktestEquityCurve
+)
+from app.backtest.equity_curve import EquityCurveCodec
+from app.backtest.repository import BacktestRepository
+from app.backtest.service import BacktestService
+from app.models.schemas import RawPriceDaily, ScoreDaily
+
+METRICS = {
+    'total_return': 10.0,
+    'cagr': 5.0,
+    'volatility': 12.0,
+    'sharpe_ratio': 0.4,
+    'sortino_ratio': 0.6,
+    'max_drawdown': -8.0,
+    'turnover_avg': 20.0,
+}
+
+
+@pytest.fixture
+def db_session():
+    """Sessão SQLite em memória com schema criado."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def nav_records(n):
+    """Gera n registros de NAV diários."""
+    return [
+        {
+            'date': date(2024, 1, 1) + timedelta(days=i),
+            'nav': 100.0 + i,
+            'daily_return': 0.01,
+            'benchmark_nav': None if i == 0 else 100.0,
+            'benchmark_return': None,
+        }
+        for i in range(n)
+    ]
+
+
+def create_run(repo, name="run"):
+    return repo.create_run(name, date(2024, 1, 1), date(2024, 12, 31), "monthly", 5, 0.001, 1000.0)
+
+
+def capture_statements(session, kind="INSERT"):
+    """Registra (statement, executemany) de cada comando kind enviado ao banco."""
+    statements = []
+    
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(kind):
+            statements.append((statement, executemany))
+    
+    event.listen(session.get_bind(), "before_cursor_execute", listener)
+    return statements, lambda: event.remove(session.get_bind(), "before_cursor_execute", listener)
+
+
+class TestBulkPersistence:
+    """Testes para gravação e remoção em lote."""
+    
+    def test_nav_records_are_inserted_in_executemany_chunks(self, db_session):
+        """Um executemany por chunk, sem um INSERT por linha."""
+        repo = BacktestRepository(db_session)
+        run = create_run(repo)
+        statements, stop = capture_statements(db_session)
+        try:
+            saved = repo.save_nav_records(run.id, nav_records(250), chunk_size=100)
+        finally:
+            stop()
+        
+        assert saved == 250
+        assert len(statements) == 3
+        assert all(executemany for _, executemany in statements)
+        
+        stored = repo.get_nav_records(run.id)
+        assert len(stored) == 250
+        assert stored[0].benchmark_nav is None
+        assert (stored[-1].date, stored[-1].nav) == (date(2024, 1, 1) + timedelta(days=249), 349.0)
+    
+    def test_positions_roundtrip(self, db_session):
+        """Posições gravadas em lote voltam ordenadas por data e ticker."""
+        repo = BacktestRepository(db_session)
+        run = create_run(repo)
+        positions = [
+            {'date': date(2024, 2, 1), 'ticker': "BBB", 'weight': 0.5},
+            {'date': date(2024, 1, 1), 'ticker': "AAA", 'weight': 0.5, 'score_at_selection': 1.5},
+        ]
+        
+        assert repo.save_positions(run.id, positions) == 2
+        
+        stored = repo.get_positions(run.id)
+        assert [(p.date, p.ticker, p.score_at_selection) for p in stored] == [
+            (date(2024, 1, 1), "AAA", 1.5),
+            (date(2024, 2, 1), "BBB", None),
+        ]
+        assert repo.get_rebalance_dates(run.id) == [date(2024, 1, 1), date(2024, 2, 1)]
+    
+    def test_invalid_chunk_size_raises(self, db_session):
+        """chunk_size precisa ser positivo."""
+        repo = BacktestRepository(db_session)
+        with pytest.raises(ValueError):
+            repo.save_nav_records("x", nav_records(1), chunk_size=0)
+    
+    def test_delete_runs_removes_children(self, db_session):
+        """Execuções e registros filhos somem; outras execuções ficam intactas."""
+        repo = BacktestRepository(db_session)
+        runs = [create_run(repo, f"run{i}") for i in range(3)]
+        run_ids = [run.id for run in runs]
+        for run_id in run_ids:
+            repo.save_nav_records(run_id, nav_records(10))
+            repo.save_positions(run_id, [{'date': date(2024, 1, 1), 'ticker': "AAA", 'weight': 1.0}])
+            repo.save_metrics(run_id, METRICS)
+        
+        assert repo.delete_runs(run_ids[:2] + ["missing"]) == 2
+        assert repo.delete_run(run_ids[0]) is False
+        
+        for model in (BacktestNAV, BacktestPosition, BacktestMetrics):
+            assert {row.run_id for row in db_session.query(model).all()} == {run_ids[2]}
+        assert [run.id for run in db_session.query(BacktestRun).all()] == [run_ids[2]]
+        
+        assert repo.delete_run(run_ids[2]) is True
+        assert db_session.query(BacktestNAV).count() == 0
+    
+    def test_postgresql_uses_copy(self):
+        """No PostgreSQL as linhas vão num único COPY em CSV, com NULLs vazios."""
+        db = MagicMock()
+        db.get_bind.return_value.dialect.name = 'postgresql'
+        cursor = db.connection.return_value.connection.cursor.return_value
+        copied = {}
+        
+        def copy_expert(sql, buffer):
+            copied['sql'] = sql
+            copied['rows'] = list(csv.reader(io.StringIO(buffer.read())))
+        
+        cursor.copy_expert.side_effect = copy_expert
+        
+        saved = BacktestRepository(db).save_nav_records("run-1", nav_records(2), chunk_size=1)
+        
+        assert saved == 2
+        assert copied['sql'] == (
+            "COPY backtest_nav (run_id, date, nav, benchmark_nav, daily_return, "
+            "benchmark_return) FROM STDIN WITH (FORMAT csv)"
+        )
+        assert copied['rows'] == [
+            ["run-1", "2024-01-01", "100.0", "", "0.01", ""],
+            ["run-1", "2024-01-02", "101.0", "100.0", "0.01", ""],
+        ]
+        db.execute.assert_not_called()
+        cursor.close.assert_called_once()
+        db.commit.assert_called_once()
+
+
+def daily_curve(n, seed=0):
+    """Curva diária em dias úteis com benchmark ausente no início."""
+    rng = np.random.default_rng(seed)
+    dates = np.busday_offset('2015-01-02', np.arange(n), roll='forward')
+    nav = 1000.0 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    benchmark = 1000.0 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    benchmark[:3] = np.nan
+    return dates, nav, benchmark
+
+
+class TestEquityCurveStorage:
+    """Testes para a equity curve compacta."""
+    
+    def test_codec_roundtrip_is_exact_and_compact(self):
+        """Datas, NAV e benchmark voltam bit a bit; o blob é menor que os vetores."""
+        dates, nav, benchmark = daily_curve(2500)
+        
+        blob = EquityCurveCodec.encode(dates, nav, benchmark)
+        curve = EquityCurveCodec.decode(blob)
+        
+        assert len(blob) < 2500 * (4 + 8 + 8)
+        assert np.array_equal(curve['date'], dates.astype('datetime64[D]'))
+        assert np.array_equal(curve['nav'], nav)
+        assert np.array_equal(curve['benchmark_nav'], benchmark, equal_nan=True)
+        assert curve['daily_return'][0] == 0.0
+        assert curve['daily_return'][1] == pytest.approx(nav[1] / nav[0] - 1)
+        assert np.isnan(curve['benchmark_return'][:3]).all()
+        assert curve['benchmark_return'][3] == 0.0
+        
+        without_benchmark = EquityCurveCodec.decode(EquityCurveCodec.encode(dates[:5], nav[:5]))
+        assert np.isnan(without_benchmark['benchmark_nav']).all()
+    
+    def test_codec_rejects_invalid_input(self):
+        """Vetores desalinhados e blobs estranhos geram ValueError."""
+        with pytest.raises(ValueError):
+            EquityCurveCodec.encode([date(2024, 1, 1)], [1.0, 2.0])
+        with pytest.raises(ValueError):
+            EquityCurveCodec.decode(b"XXXX" + bytes(16))
+    
+    def test_curve_loads_with_single_query_and_slices(self, db_session):
+        """Carregar a curva é uma leitura de linha; o recorte por data é local."""
+        repo = BacktestRepository(db_session)
+        run_id = create_run(repo).id
+        dates, nav, benchmark = daily_curve(300)
+        repo.save_equity_curve(run_id, dates, nav, benchmark)
+        db_session.expire_all()
+        
+        statements, stop = capture_statements(db_session, kind="SELECT")
+        try:
+            curve = repo.get_equity_curve_arrays(run_id)
+        finally:
+            stop()
+        
+        assert len(statements) == 1
+        assert np.array_equal(curve['nav'], nav)
+        assert db_session.query(BacktestNAV).count() == 0
+        
+        window = repo.get_equity_curve_arrays(run_id, date(2015, 2, 1), date(2015, 2, 28))
+        assert window['date'][0] == np.datetime64('2015-02-02')
+        assert window['date'][-1] == np.datetime64('2015-02-27')
+        assert len(window['nav']) == 20
+        
+        assert repo.get_equity_curve_arrays("missing") is None
+        assert repo.get_run_summary(run_id)['nav_records_count'] == 300
+    
+    def test_blob_and_rows_storage_read_back_the_same(self, db_session):
+        """O serviço devolve a mesma curva nos modos 'rows', 'blob' e 'both'."""
+        service = BacktestService(db_session)
+        dates, nav, benchmark = daily_curve(50)
+        records = EquityCurveCodec.to_records(EquityCurveCodec.with_returns(dates, nav, benchmark))
+        
+        curves = {}
+        for mode in ('rows', 'blob', 'both'):
+            run = service.create_backtest_run(name=mode, start_date=date(2015, 1, 1), end_date=date(2015, 3, 31))
+            service.save_backtest_results(run.id, records, [], METRICS, nav_storage=mode)
+            curves[mode] = (run.id, service.get_equity_curve(run.id))
+        
+        assert curves['rows'][1] == curves['blob'][1] == curves['both'][1] == records
+        assert db_session.query(BacktestEquityCurve).count() == 2
+        assert db_session.query(BacktestNAV).count() == 100
+        
+        arrays = service.get_equity_curve_arrays(curves['rows'][0])
+        assert np.array_equal(arrays['nav'], nav)
+        
+        with pytest.raises(ValueError):
+            service.save_backtest_results(curves['rows'][0], records, [], METRICS, nav_storage='csv')
+        
+        assert service.delete_backtest(curves['blob'][0]) is True
+        assert db_session.query(BacktestEquityCurve).count() == 1
+
+
+def add_score(session, day, ticker="AAA"):
+    session.add(ScoreDaily(
+        ticker=ticker, date=day, final_score=1.0, momentum_score=1.0,
+        quality_score=1.0, value_score=1.0, confidence=1.0
+    ))
+    session.commit()
+
+
+def add_price(session, day, ticker="AAA"):
+    session.add(RawPriceDaily(ticker=ticker, date=day, close=10.0, adj_close=10.0))
+    session.commit()
+
+
+def cached_run(service, parameters, name="cached"):
+    """Cria uma execução concluída com a chave de cache dos parâmetros."""
+    cache_key = service.get_cache_key(parameters)
+    run = service.create_backtest_run(
+        name=name, start_date=date(2024, 1, 1), end_date=date(2024, 12, 31),
+        parameters=parameters, cache_key=cache_key
+    )
+    service.save_backtest_results(run.id, nav_records(3), [], METRICS, nav_storage='blob')
+    return run
+
+
+class TestResultCache:
+    """Testes para o cache de resultados por parâmetros e versão dos dados."""
+    
+    PARAMETERS = {'start_date': '2024-01-01', 'end_date': '2024-12-31', 'top_n': 10}
+    
+    def test_key_depends_on_parameters_and_data_version(self, db_session):
+        """Mesma entrada, mesma chave; parâmetros ou dados novos mudam a chave."""
+        service = BacktestService(db_session)
+        assert service.get_data_version() == {'scores': None, 'prices': None}
+        
+        add_score(db_session, date(2024, 6, 28))
+        add_price(db_session, date(2024, 7, 1))
+        key = service.get_cache_key(self.PARAMETERS)
+        
+        assert service.get_data_version() == {'scores': date(2024, 6, 28), 'prices': date(2024, 7, 1)}
+        assert len(key) == 64
+        assert service.get_cache_key(dict(reversed(list(self.PARAMETERS.items())))) == key
+        assert service.get_cache_key({**self.PARAMETERS, 'top_n': 5}) != key
+        
+        add_price(db_session, date(2024, 7, 2))
+        assert service.get_cache_key(self.PARAMETERS) != key
+        add_score(db_session, date(2024, 7, 2))
+        assert service.get_cache_key(self.PARAMETERS) != key
+    
+    def test_completed_run_is_a_hit(self, db_session):
+        """Só execuções com métricas salvas são devolvidas pelo cache."""
+        service = BacktestService(db_session)
+        add_score(db_session, date(2024, 6, 28))
+        key = service.get_cache_key(self.PARAMETERS)
+        
+        service.create_backtest_run(
+            name="interrupted", start_date=date(2024, 1, 1), end_date=date(2024, 12, 31),
+            parameters=self.PARAMETERS, cache_key=key
+        )
+        assert service.get_cached_run(key) is None
+        
+        run = cached_run(service, self.PARAMETERS)
+        hit = service.get_cached_run(service.get_cache_key(self.PARAMETERS))
+        
+        assert hit.id == run.id
+        assert hit.parameters == self.PARAMETERS
+        assert service.get_cached_run(service.get_cache_key({**self.PARAMETERS, 'top_n': 5})) is None
+    
+    def test_invalidate_cache_keeps_runs(self, db_session):
+        """Invalidar remove as chaves num UPDATE, sem apagar execuções."""
+        service = BacktestService(db_session)
+        add_score(db_session, date(2024, 6, 28))
+        run = cached_run(service, self.PARAMETERS)
+        key = run.cache_key
+        
+        statements, stop = capture_statements(db_session, kind="UPDATE")
+        try:
+            assert service.invalidate_cache() == 1
+        finally:
+            stop()
+        
+        assert len(statements) == 1
+        assert service.get_cached_run(key) is None
+        assert service.get_equity_curve(run.id)[-1]['nav'] == 102.0
+        assert service.invalidate_cache() == 0
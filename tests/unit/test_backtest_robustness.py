@@ -0,0 +1,193 @@
+"""
+Testes para a análise de robustez por reamostragem.
+"""
+
+from itertools import combinations
+
+import pytest
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from app.backtest.backtest_engine import BacktestEngine
+from app.backtest.robustness import RobustnessAnalysis, RESAMPLED_METRICS
+from app.backtest.vectorized import VectorizedBacktest
+
+START = date(2023, 1, 1)
+END = date(2023, 9, 30)
+TICKERS = ["AAA", "BBB", "CCC", "DDD", "EEE"]
+
+
+@pytest.fixture
+def db_session(backtest_session_factory):
+    """Sessão SQLite em memória com preços e snapshots aleatórios (seed fixa)."""
+    return backtest_session_factory(TICKERS, START, END, seed=7, membership=0.8)
+
+
+def monthly_returns(n=120, seed=0):
+    """Série de retornos mensais normais (seed fixa)."""
+    return np.random.default_rng(seed).normal(0.01, 0.05, n)
+
+
+class TestBlockBootstrap:
+    """Testes para o block bootstrap."""
+    
+    def test_indices_are_circular_blocks(self):
+        """Cada reamostragem é feita de blocos consecutivos que dão a volta na série."""
+        indices = RobustnessAnalysis(n_resamples=50, seed=0).block_bootstrap_indices(10, block_size=4)
+        
+        assert indices.shape == (50, 10)
+        blocks = indices[:, :8].reshape(50, 2, 4)
+        assert (np.diff(blocks, axis=2) % 10 == 1).all()
+    
+    def test_seeded(self):
+        """Mesma seed, mesmo resultado (tempo medido em scripts/benchmark_backtest.py)."""
+        returns = monthly_returns()
+        
+        first = RobustnessAnalysis(seed=42).block_bootstrap(returns)
+        second = RobustnessAnalysis(seed=42).block_bootstrap(returns)
+        
+        assert first['metrics']['sharpe_ratio'].shape == (10000,)
+        assert np.array_equal(first['metrics']['cagr'], second['metrics']['cagr'])
+        
+        intervals = first['intervals']
+        assert list(intervals.index) == list(RESAMPLED_METRICS)
+        sharpe = intervals.loc['sharpe_ratio']
+        assert sharpe['lower'] < sharpe['estimate'] < sharpe['upper']
+        assert sharpe['estimate'] == pytest.approx(
+            np.mean(returns) * 12 / (np.std(returns, ddof=1) * np.sqrt(12))
+        )
+    
+    def test_invalid_arguments(self):
+        """Parâmetros fora do domínio geram ValueError."""
+        with pytest.raises(ValueError):
+            RobustnessAnalysis(n_resamples=0)
+        with pytest.raises(ValueError):
+            RobustnessAnalysis(confidence=1.0)
+        with pytest.raises(ValueError):
+            RobustnessAnalysis(seed=0).block_bootstrap(monthly_returns(), block_size=0)
+
+
+class TestPlacebo:
+    """Testes para os portfólios placebo."""
+    
+    def test_full_universe_matches_simulation(self):
+        """Com top_n >= membros o placebo é a carteira igual de todo o snapshot."""
+        rng = np.random.default_rng(3)
+        members = rng.random((12, 6)) < 0.6
+        members[:, 0] = True
+        period_returns = rng.normal(0.01, 0.05, (12, 6))
+        period_returns[2, 1] = np.nan
+        
+        placebo = RobustnessAnalysis(n_resamples=4, seed=0).placebo_returns(
+            members, period_returns, top_n=6, transaction_cost=0.01
+        )
+        
+        weights = members / members.sum(axis=1, keepdims=True)
+        expected = VectorizedBacktest.simulate_arrays(weights, period_returns, 0.01)['net_return']
+        assert placebo.shape == (12, 4)
+        assert np.allclose(placebo, expected[:, None])
+    
+    def test_random_selection_cost_matches_simulation(self):
+        """O custo do sorteio bate com simulate_arrays sobre os pesos sorteados."""
+        rng = np.random.default_rng(4)
+        members = rng.random((8, 10)) < 0.7
+        period_returns = rng.normal(0.01, 0.05, (8, 10))
+        
+        gross = RobustnessAnalysis(n_resamples=3, seed=9).placebo_returns(members, period_returns, 3)
+        net = RobustnessAnalysis(n_resamples=3, seed=9).placebo_returns(
+            members, period_returns, 3, transaction_cost=0.01
+        )
+        
+        # Reconstrói a carteira de cada período a partir do retorno bruto sorteado
+        for sample in range(3):
+            weights = np.zeros_like(period_returns)
+            for t in range(len(members)):
+                candidates = np.flatnonzero(members[t])
+                k = min(3, len(candidates))
+                for subset in map(list, combinations(candidates, k)):
+                    if np.isclose(period_returns[t, subset].mean(), gross[t, sample]):
+                        weights[t, subset] = 1.0 / k
+                        break
+            expected = VectorizedBacktest.simulate_arrays(weights, period_returns, 0.01)['net_return']
+            assert np.allclose(net[:, sample], expected)
+    
+    def test_placebo_test_ranks_strategy(self):
+        """Uma estratégia que sempre escolhe o melhor ativo bate quase todos os placebos."""
+        rng = np.random.default_rng(5)
+        members = np.ones((60, 20), dtype=bool)
+        period_returns = rng.normal(0.0, 0.05, (60, 20))
+        best = period_returns.max(axis=1)
+        
+        result = RobustnessAnalysis(n_resamples=2000, seed=1).placebo_test(
+            best, members, period_returns, top_n=1
+        )
+        summary = result['summary']
+        
+        assert summary.loc['cagr', 'p_value'] == pytest.approx(1 / 2001)
+        assert summary.loc['cagr', 'percentile'] == 100.0
+        assert result['metrics']['sharpe_ratio'].shape == (2000,)
+        
+        with pytest.raises(ValueError):
+            RobustnessAnalysis(n_resamples=10, seed=1).placebo_test(best[:-1], members, period_returns, 1)
+    
+    def test_p_value_tail_follows_metric_direction(self):
+        """Volatilidade e duração de drawdown contam placebos com valor menor ou igual."""
+        rng = np.random.default_rng(6)
+        members = np.ones((60, 20), dtype=bool)
+        period_returns = rng.normal(0.0, 0.05, (60, 20))
+        calm = np.full(60, 0.001)
+        
+        result = RobustnessAnalysis(n_resamples=500, seed=2).placebo_test(
+            calm, members, period_returns, top_n=1
+        )
+        summary = result['summary']
+        
+        # Série constante positiva: volatilidade mínima e nenhum drawdown
+        assert summary.loc['volatility', 'p_value'] == pytest.approx(1 / 501)
+        assert summary.loc['max_drawdown_duration', 'p_value'] == pytest.approx(1 / 501)
+        assert summary.loc['max_drawdown', 'p_value'] < 0.05
+    
+    def test_large_placebo_is_seeded(self):
+        """Mesma seed, mesmos placebos, com custo (tempo medido em scripts/benchmark_backtest.py)."""
+        rng = np.random.default_rng(8)
+        members = rng.random((120, 300)) < 0.8
+        period_returns = rng.normal(0.01, 0.08, (120, 300))
+        
+        first, second = (
+            RobustnessAnalysis(n_resamples=1000, seed=3).placebo_test(
+                monthly_returns(), members, period_returns, top_n=10, transaction_cost=0.001
+            )['metrics']
+            for _ in range(2)
+        )
+        
+        assert first['cagr'].shape == (1000,)
+        assert np.array_equal(first['cagr'], second['cagr'])
+
+
+class TestLoading:
+    """Testes para a carga de retornos e do universo."""
+    
+    def test_load_stored_returns_and_universe(self, db_session):
+        """Retornos salvos pelo engine e universo alinhado período a período."""
+        engine = BacktestEngine(START, END, top_n=2)
+        result = engine.run_backtest(db_session)
+        engine.save_backtest_result("top2", result, db_session)
+        
+        returns = RobustnessAnalysis.load_monthly_returns(db_session, "top2")
+        universe = RobustnessAnalysis.load_universe(engine, db_session)
+        
+        assert returns.tolist() == pytest.approx(result['monthly_returns'])
+        assert universe['members'].shape == (len(returns), len(universe['tickers']))
+        assert universe['period_returns'].shape == universe['members'].shape
+        assert universe['members'].any(axis=1).all()
+        
+        summary = RobustnessAnalysis(n_resamples=100, seed=0).placebo_test(
+            returns, universe['members'], universe['period_returns'], top_n=2
+        )['summary']
+        assert summary['p_value'].between(0, 1).all()
+        
+        with pytest.raises(ValueError):
+            RobustnessAnalysis.load_monthly_returns(db_session, "missing")
+
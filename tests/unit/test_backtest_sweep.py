@@ -0,0 +1,172 @@
+"""
+Testes para a varredura de parâmetros de backtest.
+"""
+
+import pytest
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from app.backtest.backtest_engine import BacktestEngine
+from app.backtest.repository import BacktestRepository
+from app.backtest.sweep import ParameterSweep, combination_scores
+from app.scoring.scoring_engine import ScoringEngine
+
+START = date(2023, 1, 1)
+END = date(2023, 9, 30)
+TICKERS = ["AAA", "BBB", "CCC", "DDD", "EEE", "FFF", "GGG"]
+
+
+@pytest.fixture
+def db_session(backtest_session_factory):
+    """Sessão SQLite em memória com preços e snapshots aleatórios (seed fixa)."""
+    return backtest_session_factory(TICKERS, START, END, seed=42)
+
+
+def metric_columns(results):
+    """Colunas de métricas da tabela de resultados."""
+    return results[['total_return', 'cagr', 'volatility', 'sharpe_ratio', 'max_drawdown', 'avg_turnover']]
+
+
+class TestBuildGrid:
+    """Testes para ParameterSweep.build_grid."""
+    
+    def test_alpha_only_varies_with_smoothing(self):
+        """Combinações sem smoothing não se multiplicam por alpha."""
+        grid = ParameterSweep.build_grid(
+            top_n=[5, 10],
+            use_smoothing=[False, True],
+            alpha=[0.5, 0.7]
+        )
+        
+        assert len(grid) == 2 * (1 + 2)
+        assert all(p['alpha'] is None for p in grid if not p['use_smoothing'])
+        assert {p['alpha'] for p in grid if p['use_smoothing']} == {0.5, 0.7}
+
+
+class TestCombinationScores:
+    """Testes para combination_scores."""
+    
+    def test_missing_factor_redistributes_weight(self):
+        """Fator NaN tem o peso redistribuído como em ScoringEngine.calculate_final_score."""
+        engine = ScoringEngine()
+        factor_weights = {
+            'momentum': engine.momentum_weight,
+            'quality': engine.quality_weight,
+            'value': engine.value_weight,
+        }
+        # Campos × datas × tickers: AAA completo, BBB sem qualidade, CCC fora do snapshot
+        factors = np.array([
+            [[1.0, 2.0, np.nan]],
+            [[0.5, np.nan, np.nan]],
+            [[-1.0, 0.5, np.nan]],
+        ])
+        scores = np.concatenate([factors, np.full((2, 1, 3), np.nan)])
+        
+        combined = combination_scores(scores, {'factor_weights': factor_weights})
+        
+        assert combined[0, 0] == pytest.approx(engine.calculate_final_score(1.0, 0.5, -1.0))
+        assert combined[0, 1] == pytest.approx(engine.calculate_final_score(2.0, np.nan, 0.5))
+        assert np.isnan(combined[0, 2])
+
+
+class TestParameterSweep:
+    """Testes para ParameterSweep."""
+    
+    def test_matches_engine_for_stored_scores(self, db_session):
+        """Sem alpha/factor_weights cada combinação reproduz o BacktestEngine."""
+        grid = ParameterSweep.build_grid(
+            top_n=[2, 4],
+            weight_method=['equal', 'score_weighted'],
+            use_smoothing=[False, True]
+        )
+        sweep = ParameterSweep(START, END, transaction_cost=0.002, max_workers=1)
+        results = sweep.run(grid, db_session)
+        
+        assert len(results) == len(grid)
+        for params, (_, row) in zip(grid, results.iterrows()):
+            expected = BacktestEngine(
+                START, END,
+                top_n=params['top_n'],
+                weight_method=params['weight_method'],
+                use_smoothing=params['use_smoothing'],
+                transaction_cost=0.002
+            ).run_backtest(db_session)['metrics']
+            for key in ('total_return', 'cagr', 'sharpe_ratio', 'sortino_ratio',
+                        'max_drawdown', 'avg_turnover', 'num_rebalances', 'num_trades'):
+                assert row[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-9), key
+    
+    def test_parallel_workers_match_serial(self, db_session):
+        """Processos lendo a memória compartilhada dão o mesmo resultado."""
+        grid = ParameterSweep.build_grid(
+            top_n=[2, 3, 5],
+            weight_method=['equal', 'score_weighted'],
+            use_smoothing=[False, True],
+            alpha=[0.5, None]
+        )
+        serial = ParameterSweep(START, END, max_workers=1).run(grid, db_session)
+        parallel = ParameterSweep(START, END, max_workers=2).run(grid, db_session)
+        
+        pd.testing.assert_frame_equal(serial, parallel)
+    
+    def test_factor_weights_recombine_final_score(self, db_session):
+        """Os pesos usados para gerar final_score reproduzem o score armazenado."""
+        sweep = ParameterSweep(START, END, max_workers=1)
+        grid = ParameterSweep.build_grid(
+            top_n=[3],
+            factor_weights=[None, {'momentum': 0.4, 'quality': 0.3, 'value': 0.3}, {'value': 1.0}]
+        )
+        results = sweep.run(grid, db_session)
+        
+        np.testing.assert_allclose(metric_columns(results).iloc[0], metric_columns(results).iloc[1])
+        assert results.loc[2, 'value_weight'] == 1.0
+        assert pd.isna(results.loc[2, 'momentum_weight'])
+    
+    def test_alpha_one_is_unsmoothed(self, db_session):
+        """alpha = 1 ignora o score anterior: igual a não suavizar."""
+        sweep = ParameterSweep(START, END, max_workers=1)
+        grid = [
+            {'top_n': 3, 'weight_method': 'score_weighted', 'use_smoothing': False},
+            {'top_n': 3, 'weight_method': 'score_weighted', 'use_smoothing': True, 'alpha': 1.0},
+            {'top_n': 3, 'weight_method': 'score_weighted', 'use_smoothing': True, 'alpha': 0.3},
+        ]
+        results = sweep.run(grid, db_session)
+        
+        np.testing.assert_allclose(metric_columns(results).iloc[0], metric_columns(results).iloc[1])
+        assert not np.allclose(metric_columns(results).iloc[0], metric_columns(results).iloc[2])
+    
+    def test_loads_data_once(self, db_session):
+        """Rodadas seguintes reutilizam as matrizes carregadas."""
+        sweep = ParameterSweep(START, END, max_workers=1)
+        sweep.run([{'top_n': 2}], db_session)
+        data = sweep.data
+        
+        sweep.run([{'top_n': 3}], db_session)
+        
+        assert sweep.data is data
+        assert data['scores'].shape == (5, len(sweep.rebalance_dates), len(sweep.tickers))
+        assert data['period_returns'].shape == (len(sweep.rebalance_dates) - 1, len(sweep.tickers))
+    
+    def test_save_results_through_repository(self, db_session):
+        """Cada combinação vira um BacktestRun com parâmetros e métricas."""
+        grid = ParameterSweep.build_grid(
+            top_n=[2, 3],
+            use_smoothing=[True],
+            alpha=[0.6],
+            factor_weights=[{'momentum': 1.0}]
+        )
+        sweep = ParameterSweep(START, END, transaction_cost=0.001, max_workers=1)
+        results = sweep.run(grid, db_session)
+        
+        sweep_id = sweep.save_results(db_session, results, name='grid')
+        saved = BacktestRepository(db_session).get_sweep_results(sweep_id)
+        
+        assert [run.name for run, _ in saved] == ['grid_0000', 'grid_0001']
+        assert saved[1][0].parameters == {
+            'top_n': 3, 'weight_method': 'equal', 'use_smoothing': True,
+            'alpha': 0.6, 'factor_weights': {'momentum': 1.0}
+        }
+        assert saved[1][0].transaction_cost == 0.001
+        assert saved[1][1].sharpe_ratio == pytest.approx(results.loc[1, 'sharpe_ratio'])
+        assert saved[1][1].turnover_avg == pytest.approx(results.loc[1, 'avg_turnover'])
@@ -1,11 +1,14 @@
 """
-Testes unitários para o motor de confiança (placeholder).
+Testes unitários para o motor de confiança.
 
 Valida: Requisito 10.2
 """
 
+import numpy as np
+import pandas as pd
 import pytest
-from app.confidence.confidence_engine import ConfidenceEngine
+from hypothesis import given, settings, strategies as st
+from app.confidence.confidence_engine import ConfidenceEngine, COVERAGE_COLUMNS
 
 
 @pytest.fixture
@@ -256,3 +259,93 @@ class TestFutureExtensibility:
             historical_data=None
         )
         assert confidence is not None
+
+
+class TestUniverseConfidence:
+    """Testes para a confiança calculada em batch a partir da cobertura de dados."""
+    
+    def test_components_and_weight_redistribution(self, confidence_engine):
+        """Componentes indisponíveis ficam fora da média; sem nenhum, 0.5."""
+        coverage = pd.DataFrame({
+            'price_history_days': [252, 126, np.nan, np.nan],
+            'fundamental_periods': [3, np.nan, np.nan, np.nan],
+            'factor_completeness': [1.0, 0.5, np.nan, np.nan],
+            'imputation_ratio': [0.0, 0.5, 0.25, np.nan],
+            'overall_confidence': [1.0, np.nan, np.nan, np.nan],
+        }, index=['FULL', 'HALF', 'IMPUTED', 'NONE'])
+        
+        confidence = confidence_engine.calculate_universe_confidence(coverage)
+        
+        assert confidence['FULL'] == pytest.approx(1.0)
+        assert confidence['HALF'] == pytest.approx(0.5)
+        assert confidence['IMPUTED'] == pytest.approx(0.75)
+        assert confidence['NONE'] == pytest.approx(0.5)
+    
+    def test_build_coverage_frame_from_loaded_data(self):
+        """Completude é medida antes da imputação; a taxa vem do log do handler."""
+        raw_factors = pd.DataFrame({
+            'roe': [0.1, np.nan],
+            'pe_ratio': [10.0, np.nan],
+            'momentum_6m_ex_1m': [0.2, 0.3],
+            'overall_confidence': [0.66, 0.33],
+        }, index=['AAA', 'BBB'])
+        imputation_log = pd.DataFrame([
+            {'ticker': 'BBB', 'feature': 'roe', 'method': 'universe_median', 'value': 0.1},
+            {'ticker': 'BBB', 'feature': 'pe_ratio', 'method': 'universe_median', 'value': 10.0},
+        ])
+        
+        coverage = ConfidenceEngine.build_coverage_frame(
+            ['AAA', 'BBB', 'CCC'],
+            raw_factors=raw_factors,
+            price_history_days={'AAA': 300, 'BBB': 60},
+            fundamental_periods={'AAA': 5},
+            imputation_log=imputation_log,
+            imputable_features=4
+        )
+        
+        assert list(coverage.columns) == list(COVERAGE_COLUMNS)
+        assert coverage.loc['AAA', 'factor_completeness'] == pytest.approx(1.0)
+        assert coverage.loc['BBB', 'factor_completeness'] == pytest.approx(1 / 3)
+        assert np.isnan(coverage.loc['CCC', 'factor_completeness'])
+        assert coverage.loc['AAA', 'imputation_ratio'] == 0.0
+        assert coverage.loc['BBB', 'imputation_ratio'] == pytest.approx(0.5)
+        assert coverage.loc['BBB', 'overall_confidence'] == pytest.approx(0.33)
+        assert np.isnan(coverage.loc['BBB', 'fundamental_periods'])
+        assert np.isnan(coverage.loc['CCC', 'price_history_days'])
+    
+    def test_batch_matches_single_ticker(self, confidence_engine):
+        """calculate_batch_confidence e calculate_confidence usam a mesma regra."""
+        historical_data = {
+            'AAA': {'price_history_days': 100, 'factor_completeness': 0.8},
+            'BBB': {'imputation_ratio': 0.1, 'overall_confidence': 0.66, 'past_scores': [1.0]},
+        }
+        
+        batch = confidence_engine.calculate_batch_confidence(
+            {'AAA': {}, 'BBB': {}}, historical_data=historical_data
+        )
+        
+        for ticker, data in historical_data.items():
+            single = confidence_engine.calculate_confidence(ticker, historical_data=data)
+            assert batch[ticker] == pytest.approx(single)
+        assert batch['AAA'] == pytest.approx((100 / 252 + 0.8) / 2)
+    
+    @given(st.lists(
+        st.tuples(*[
+            st.one_of(st.none(), st.floats(min_value=-10, max_value=1000, allow_nan=False))
+            for _ in COVERAGE_COLUMNS
+        ]),
+        max_size=20
+    ))
+    @settings(max_examples=50, deadline=None)
+    def test_confidence_always_in_unit_interval(self, rows):
+        """Confiança fica em [0, 1] para quaisquer métricas de cobertura."""
+        coverage = pd.DataFrame(
+            [[np.nan if v is None else v for v in row] for row in rows],
+            columns=list(COVERAGE_COLUMNS), dtype=float
+        )
+        
+        confidence = ConfidenceEngine().calculate_universe_confidence(coverage)
+        
+        assert len(confidence) == len(rows)
+        assert ((confidence >= 0.0) & (confidence <= 1.0)).all()
+
@@ -6,6 +6,7 @@ Tests specific examples and edge cases for the EligibilityFilter class.
 
 import pytest
 import pandas as pd
+from hypothesis import given, settings, strategies as st
 from app.filters.eligibility_filter import EligibilityFilter
 from app.config import Settings
 
@@ -683,3 +684,76 @@ class TestRobustnessImprovements:
         
         assert is_eligible is True
         assert len(reasons) == 0
+
+
+optional_amount = st.one_of(
+    st.none(),
+    st.floats(min_value=-1e9, max_value=1e9, allow_nan=False, allow_infinity=False)
+)
+
+asset_strategy = st.fixed_dictionaries({
+    'fundamentals': st.one_of(
+        st.none(),
+        st.fixed_dictionaries({
+            'shareholders_equity': optional_amount,
+            'ebitda': optional_amount,
+            'revenue': optional_amount,
+            'net_income_last_year': optional_amount,
+            'net_income_history': st.lists(optional_amount, max_size=4),
+            'net_debt_to_ebitda': st.one_of(st.none(), st.floats(min_value=-20, max_value=20)),
+        })
+    ),
+    'volume_data': st.one_of(
+        st.none(),
+        st.lists(st.integers(min_value=0, max_value=300000), max_size=5).map(
+            lambda volumes: pd.DataFrame({'volume': volumes})
+        ),
+        st.just(pd.DataFrame({'close': [10.0, 11.0]})),
+    ),
+})
+
+
+class TestVectorizedFilter:
+    """Test the vectorized filter_frame path against is_eligible."""
+    
+    @given(assets=st.lists(asset_strategy, max_size=8))
+    @settings(max_examples=200, deadline=None)
+    def test_filter_universe_matches_is_eligible(self, assets):
+        """filter_universe (vectorized) returns the same verdicts and reasons as is_eligible."""
+        eligibility_filter = EligibilityFilter(Settings(minimum_volume=100000))
+        assets_data = {f"T{i}": data for i, data in enumerate(assets)}
+        
+        eligible, excluded = eligibility_filter.filter_universe(assets_data)
+        
+        expected_eligible = []
+        expected_excluded = {}
+        for ticker, data in assets_data.items():
+            ok, reasons = eligibility_filter.is_eligible(
+                ticker, data['fundamentals'], data['volume_data']
+            )
+            if ok:
+                expected_eligible.append(ticker)
+            else:
+                expected_excluded[ticker] = reasons
+        
+        assert eligible == expected_eligible
+        assert excluded == expected_excluded
+    
+    def test_filter_frame_defaults_for_absent_columns(self, eligibility_filter):
+        """Absent columns count as missing data; flags default to present."""
+        frame = pd.DataFrame(
+            {'shareholders_equity': [10.0], 'revenue': [5.0], 'ebitda': [2.0],
+             'volume_days': [90], 'avg_volume': [200000.0]},
+            index=pd.Index(['AAA'], name='ticker')
+        )
+        
+        eligible, excluded = eligibility_filter.filter_frame(frame)
+        
+        assert eligible == ['AAA']
+        assert excluded == {}
+        
+        eligible, excluded = eligibility_filter.filter_frame(frame.drop(columns='revenue'))
+        
+        assert eligible == []
+        assert excluded == {'AAA': ['missing_revenue']}
+
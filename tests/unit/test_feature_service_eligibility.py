@@ -6,7 +6,7 @@ Validates: Requirements 1.1, 1.6
 
 import pytest
 from datetime import date, timedelta
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 import pandas as pd
 
@@ -268,3 +268,100 @@ def test_filter_eligible_assets_empty_list(test_db, test_config):
     # Verify
     assert len(eligible_tickers) == 0
     assert len(exclusion_reasons) == 0
+
+
+def _legacy_assets_data(db, tickers, reference_date):
+    """Monta assets_data ticker a ticker, como o filtro fazia antes da consulta única."""
+    assets_data = {}
+    for ticker in tickers:
+        history = db.query(RawFundamental).filter(
+            RawFundamental.ticker == ticker,
+            RawFundamental.period_end_date <= reference_date
+        ).order_by(RawFundamental.period_end_date.desc()).limit(3).all()
+        prices = db.query(RawPriceDaily).filter(
+            RawPriceDaily.ticker == ticker,
+            RawPriceDaily.date <= reference_date
+        ).order_by(RawPriceDaily.date.desc()).limit(90).all()
+        
+        fundamentals = None
+        if history:
+            latest = history[0]
+            fundamentals = {
+                'shareholders_equity': latest.shareholders_equity,
+                'ebitda': latest.ebitda,
+                'revenue': latest.revenue,
+                'net_income_last_year': latest.net_income,
+                'net_debt_to_ebitda': latest.total_debt / latest.ebitda if (
+                    latest.total_debt is not None and latest.ebitda
+                ) else None,
+                'net_income_history': [f.net_income for f in history if f.net_income is not None],
+            }
+        assets_data[ticker] = {
+            'fundamentals': fundamentals,
+            'volume_data': pd.DataFrame({'volume': [p.volume for p in prices]}) if prices else None,
+        }
+    return assets_data
+
+
+def test_filter_eligible_assets_single_query_matches_per_ticker(test_db, test_config):
+    """
+    Test that the single-query path reproduces the per-ticker data gathering.
+    
+    Validates: Requirements 1.1, 1.6
+    """
+    reference_date = date(2024, 12, 31)
+    cases = {
+        # ticker: (equity, ebitda, revenue, net income por ano (recente primeiro), dívida, volume)
+        "GOOD": (100.0, 50.0, 200.0, [30.0, 20.0, 10.0, -5.0], 20.0, 150000),
+        "BANK": (100.0, None, 200.0, [30.0, 20.0, 10.0], 5000.0, 150000),
+        "LEVER": (100.0, 10.0, 200.0, [30.0, 20.0, 10.0], 100.0, 150000),
+        "LOSS": (100.0, 50.0, 200.0, [5.0, -1.0, -2.0], 20.0, 150000),
+        "THIN": (100.0, 50.0, 200.0, [30.0], 20.0, 50000),
+        "NEG": (-1.0, -3.0, None, [-30.0, None, -1.0], None, None),
+        "FUTURE": (100.0, 50.0, 200.0, [30.0], 20.0, 150000),
+    }
+    for ticker, (equity, ebitda, revenue, incomes, debt, volume) in cases.items():
+        offset = 400 if ticker == "FUTURE" else 0
+        for years_back, net_income in enumerate(incomes):
+            test_db.add(RawFundamental(
+                ticker=ticker,
+                period_end_date=date(2024 - years_back, 12, 31) + timedelta(days=offset),
+                period_type='annual',
+                shareholders_equity=equity,
+                ebitda=ebitda,
+                revenue=revenue,
+                net_income=net_income,
+                total_debt=debt
+            ))
+        if volume is not None:
+            for i in range(120):
+                # Volume antigo alto, recente conforme o caso: só os 90 últimos contam
+                test_db.add(RawPriceDaily(
+                    ticker=ticker,
+                    date=reference_date - timedelta(days=i),
+                    close=10.0,
+                    adj_close=10.0,
+                    volume=volume if i < 90 else 10 ** 9
+                ))
+    test_db.commit()
+    tickers = list(cases) + ["NONE"]
+    
+    feature_service = FeatureService(test_db, test_config)
+    expected = feature_service.eligibility_filter.filter_universe(
+        _legacy_assets_data(test_db, tickers, reference_date)
+    )
+    
+    statements = []
+    engine = test_db.get_bind()
+    listener = lambda *args: statements.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = feature_service.filter_eligible_assets(tickers, reference_date)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    
+    assert len(statements) == 1
+    assert result == expected
+    assert set(result[0]) == {"GOOD", "BANK"}
+    assert result[1]["FUTURE"] == ["insufficient_data"]
+    assert result[1]["NONE"] == ["insufficient_data"]
@@ -720,3 +720,98 @@ class TestEnhancedFactorCalculations:
         strength = calculator.calculate_financial_strength(fundamentals)
         # Deve retornar 1.0 (forte) pois ratio < 2.0
         assert strength == 1.0
+
+
+class TestSectorClassificationMap:
+    """Testes para a classificação setorial pré-carregada (sector_map)."""
+    
+    @pytest.fixture
+    def db_session(self):
+        """Banco SQLite em memória com informações de setor."""
+        from sqlalchemy import create_engine
+        from sqlalchemy.orm import sessionmaker
+        from app.models.database import Base
+        from app.models.schemas import AssetInfo
+        
+        engine = create_engine("sqlite:///:memory:")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        session.add_all([
+            AssetInfo(ticker='ITUB4.SA', sector='Financial Services', industry='Banks - Regional'),
+            AssetInfo(ticker='VALE3.SA', sector='Basic Materials', industry='Other Industrial Metals & Mining'),
+            AssetInfo(ticker='NOSECTOR.SA', sector=None),
+        ])
+        session.commit()
+        
+        yield session
+        
+        session.close()
+        engine.dispose()
+    
+    def test_load_sector_classifications_single_lookup(self, db_session):
+        """Testa que o mapa é imutável e marca setores desconhecidos como None."""
+        from app.ingestion.asset_info_service import AssetInfoService
+        
+        sector_map = AssetInfoService(db_session).load_sector_classifications(
+            ['ITUB4.SA', 'VALE3.SA', 'NOSECTOR.SA', 'UNKNOWN.SA'],
+            fetch_missing=False
+        )
+        
+        assert sector_map['ITUB4.SA'].is_financial is True
+        assert sector_map['ITUB4.SA'].industry == 'Banks - Regional'
+        assert sector_map['VALE3.SA'].is_financial is False
+        assert sector_map['NOSECTOR.SA'].is_financial is None
+        assert sector_map['UNKNOWN.SA'].is_financial is None
+        
+        with pytest.raises(TypeError):
+            sector_map['NEW.SA'] = sector_map['VALE3.SA']
+    
+    def test_load_sector_classifications_does_not_fetch_by_default(self, db_session, monkeypatch):
+        """Testa que tickers sem setor não disparam buscas no Yahoo Finance."""
+        from app.ingestion.asset_info_service import AssetInfoService
+        
+        service = AssetInfoService(db_session)
+        
+        def fail_fetch(*args, **kwargs):
+            raise AssertionError("missing sectors must not be fetched by default")
+        
+        monkeypatch.setattr(service, 'fetch_and_store_asset_info', fail_fetch)
+        sector_map = service.load_sector_classifications(['VALE3.SA', 'NOSECTOR.SA', 'UNKNOWN.SA'])
+        
+        assert sector_map['VALE3.SA'].is_financial is False
+        assert sector_map['UNKNOWN.SA'].is_financial is None
+        assert sector_map['UNKNOWN.SA'].sector is None
+    
+    def test_sector_map_overrides_heuristic_without_db_access(self, sample_fundamentals):
+        """Testa que o sector_map é usado sem consultar o banco."""
+        from app.ingestion.asset_info_service import SectorClassification
+        
+        class ExplodingSession:
+            def query(self, *args, **kwargs):
+                raise AssertionError("factor loop must not query the database")
+        
+        sector_map = {
+            'ITUB4.SA': SectorClassification('ITUB4.SA', 'Financial Services', 'Banks', True)
+        }
+        calculator = FundamentalFactorCalculator(sector_map=sector_map)
+        
+        # Dados com EBITDA válido: a heurística diria "industrial"
+        assert calculator._is_financial_institution(
+            'ITUB4.SA', sample_fundamentals, db_session=ExplodingSession()
+        ) is True
+    
+    def test_sector_map_miss_falls_back_to_heuristic(self, sample_fundamentals):
+        """Testa que ticker ausente do mapa usa a heurística, nunca o banco."""
+        class ExplodingSession:
+            def query(self, *args, **kwargs):
+                raise AssertionError("factor loop must not query the database")
+        
+        calculator = FundamentalFactorCalculator(sector_map={})
+        
+        bank_like = dict(sample_fundamentals, ebitda=None)
+        assert calculator._is_financial_institution(
+            'BANK.SA', bank_like, db_session=ExplodingSession()
+        ) is True
+        assert calculator._is_financial_institution(
+            'INDU.SA', sample_fundamentals, db_session=ExplodingSession()
+        ) is False
@@ -211,3 +211,168 @@ class TestWinsorization:
             check_exact=False,
             rtol=1e-10
         )
+
+
+class TestMatrixWinsorization:
+    """Testes para winsorização vetorizada de múltiplas colunas."""
+    
+    @given(factor_dataframe())
+    @settings(max_examples=20, deadline=None)
+    def test_winsorize_frame_matches_column_by_column(self, data):
+        """
+        Teste: winsorize_frame produz o mesmo resultado que winsorize_series
+        aplicado coluna a coluna.
+        """
+        factors_df, factor_columns = data
+        
+        normalizer = CrossSectionalNormalizer()
+        winsorized = normalizer.winsorize_frame(factors_df, factor_columns, 0.05, 0.95)
+        
+        for col in factor_columns:
+            expected = normalizer.winsorize_series(factors_df[col], 0.05, 0.95)
+            np.testing.assert_allclose(
+                winsorized[col].to_numpy(), expected.to_numpy(), rtol=1e-12, atol=1e-12
+            )
+    
+    def test_winsorize_matrix_preserves_nan(self):
+        """Teste: valores NaN são ignorados no cálculo e preservados."""
+        values = np.array([
+            [1.0, np.nan],
+            [2.0, np.nan],
+            [np.nan, np.nan],
+            [100.0, np.nan]
+        ])
+        
+        normalizer = CrossSectionalNormalizer()
+        clipped = normalizer.winsorize_matrix(values, 0.05, 0.95)
+        
+        expected_upper = pd.Series([1.0, 2.0, 100.0]).quantile(0.95)
+        assert np.isnan(clipped[2, 0])
+        assert np.isnan(clipped[:, 1]).all()
+        assert clipped[3, 0] == pytest.approx(expected_upper)
+    
+    def test_winsorize_frame_grouped_matches_per_group(self):
+        """Teste: variante agrupada equivale a winsorizar cada data separadamente."""
+        rng = np.random.default_rng(42)
+        factor_columns = ['roe', 'pe_ratio', 'momentum']
+        
+        history_df = pd.DataFrame(
+            rng.standard_t(df=3, size=(60, 3)),
+            columns=factor_columns
+        )
+        # Grupos de tamanhos diferentes (painel desbalanceado)
+        history_df['date'] = ['2024-01-31'] * 25 + ['2024-02-29'] * 20 + ['2024-03-29'] * 15
+        history_df.loc[[3, 30, 50], 'roe'] = np.nan
+        history_df = history_df.sample(frac=1.0, random_state=7)
+        
+        normalizer = CrossSectionalNormalizer()
+        grouped = normalizer.winsorize_frame(
+            history_df, factor_columns, 0.05, 0.95, group_col='date'
+        )
+        
+        for _, group in history_df.groupby('date'):
+            expected = normalizer.winsorize_frame(group, factor_columns, 0.05, 0.95)
+            pd.testing.assert_frame_equal(grouped.loc[group.index], expected)
+    
+    def test_winsorize_frame_invalid_percentiles(self):
+        """Teste: percentis inválidos geram ValueError."""
+        df = pd.DataFrame({'roe': [0.1, 0.2, 0.3]})
+        normalizer = CrossSectionalNormalizer()
+        
+        with pytest.raises(ValueError):
+            normalizer.winsorize_frame(df, ['roe'], 0.9, 0.1)
+
+
+class TestNormalizationMethods:
+    """Testes para os modos de normalização configuráveis."""
+    
+    @given(factor_dataframe())
+    @settings(max_examples=20, deadline=None)
+    def test_percentile_rank_matches_normalize_factors(self, data):
+        """
+        Teste: percentile_rank vetorizado equivale a normalize_factors.
+        """
+        factors_df, factor_columns = data
+        
+        normalizer = CrossSectionalNormalizer()
+        expected = normalizer.normalize_factors(factors_df, factor_columns)
+        result = normalizer.normalize_factors_by_method(
+            factors_df, factor_columns, method='percentile_rank'
+        )
+        
+        pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-12)
+    
+    @given(factor_dataframe())
+    @settings(max_examples=20, deadline=None)
+    def test_rank_methods_preserve_order(self, data):
+        """
+        Teste: rank_gaussian e robust_zscore preservam a ordem relativa.
+        """
+        factors_df, factor_columns = data
+        normalizer = CrossSectionalNormalizer()
+        
+        for method in ['rank_gaussian', 'robust_zscore']:
+            result = normalizer.normalize_factors_by_method(
+                factors_df, factor_columns, method=method
+            )
+            for col in factor_columns:
+                order = np.argsort(factors_df[col].to_numpy(), kind='stable')
+                normalized_sorted = result[col].to_numpy()[order]
+                assert np.all(np.diff(normalized_sorted) >= -1e-12)
+    
+    def test_rank_gaussian_is_symmetric(self):
+        """Teste: ranks gaussianizados são simétricos em torno de zero."""
+        df = pd.DataFrame({'roe': [0.05, 0.10, 0.15, 0.20, 0.25, 0.30]})
+        normalizer = CrossSectionalNormalizer()
+        
+        result = normalizer.normalize_factors_by_method(df, ['roe'], method='rank_gaussian')
+        
+        assert result['roe'].sum() == pytest.approx(0.0, abs=1e-9)
+        assert result['roe'].iloc[-1] == pytest.approx(1.3829941, abs=1e-6)
+    
+    def test_robust_zscore_uses_median_and_mad(self):
+        """Teste: robust_zscore usa mediana e MAD (outlier não afeta escala)."""
+        df = pd.DataFrame({'pe_ratio': [10.0, 12.0, 14.0, 16.0, 1000.0]})
+        normalizer = CrossSectionalNormalizer()
+        
+        result = normalizer.normalize_factors_by_method(df, ['pe_ratio'], method='robust_zscore')
+        
+        # mediana = 14, MAD = 2
+        expected = (df['pe_ratio'] - 14.0) / (1.4826 * 2.0)
+        np.testing.assert_allclose(result['pe_ratio'], expected)
+    
+    def test_grouped_normalization_per_date_and_sector(self):
+        """Teste: normalização agrupada equivale a normalizar cada corte isolado."""
+        rng = np.random.default_rng(3)
+        df = pd.DataFrame(rng.normal(size=(48, 2)), columns=['roe', 'momentum'])
+        df['date'] = np.repeat(['2024-01-31', '2024-02-29'], 24)
+        df['sector'] = np.tile(['Tech', 'Finance', 'Energy'], 16)
+        
+        normalizer = CrossSectionalNormalizer()
+        for method in ['percentile_rank', 'rank_gaussian', 'robust_zscore']:
+            grouped = normalizer.normalize_factors_by_method(
+                df, ['roe', 'momentum'], method=method, group_cols=['date', 'sector']
+            )
+            for _, group in df.groupby(['date', 'sector']):
+                expected = normalizer.normalize_factors_by_method(
+                    group, ['roe', 'momentum'], method=method
+                )
+                pd.testing.assert_frame_equal(grouped.loc[group.index], expected)
+    
+    def test_constant_column_normalizes_to_zero(self):
+        """Teste: coluna sem dispersão é normalizada para zero em todos os métodos."""
+        df = pd.DataFrame({'roe': [0.1, 0.1, 0.1, np.nan]})
+        normalizer = CrossSectionalNormalizer()
+        
+        for method in ['percentile_rank', 'rank_gaussian', 'robust_zscore']:
+            result = normalizer.normalize_factors_by_method(df, ['roe'], method=method)
+            assert (result['roe'].iloc[:3] == 0.0).all()
+            assert np.isnan(result['roe'].iloc[3])
+    
+    def test_unknown_method_raises(self):
+        """Teste: método desconhecido gera ValueError."""
+        df = pd.DataFrame({'roe': [0.1, 0.2, 0.3]})
+        normalizer = CrossSectionalNormalizer()
+        
+        with pytest.raises(ValueError):
+            normalizer.normalize_factors_by_method(df, ['roe'], method='minmax')
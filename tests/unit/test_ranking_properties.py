@@ -365,3 +365,74 @@ class TestRankingProperties:
             assert entry.quality_score == original.quality_score
             assert entry.value_score == original.value_score
             assert entry.confidence == original.confidence
+
+
+class TestIndexedRanking:
+    """
+    Testes para o ranking indexado (IndexedRanking).
+    
+    Garante equivalência com o ranking em lista de generate_ranking.
+    """
+    
+    @given(
+        scores=score_results_list(min_size=1, max_size=50),
+        n=st.integers(min_value=1, max_value=60)
+    )
+    @settings(max_examples=30, deadline=None)
+    def test_top_n_matches_full_ranking(self, scores, n):
+        """
+        Para qualquer lista de scores (inclusive com empates), top_n por
+        seleção parcial retorna o mesmo prefixo do ranking completo.
+        """
+        ranker = Ranker()
+        ranking_date = date(2024, 1, 15)
+        
+        full = ranker.generate_ranking(scores, ranking_date)
+        indexed = ranker.index_ranking(scores, ranking_date)
+        
+        top = ranker.get_top_n(indexed, n)
+        
+        assert [(e.ticker, e.rank) for e in top] == [(e.ticker, e.rank) for e in full[:n]]
+    
+    @given(scores=score_results_list(min_size=1, max_size=50))
+    @settings(max_examples=30, deadline=None)
+    def test_lookup_matches_full_ranking(self, scores):
+        """
+        Para qualquer ticker, a busca indexada retorna a mesma entrada da
+        busca linear, e o percentil é coerente com o rank.
+        """
+        ranker = Ranker()
+        ranking_date = date(2024, 1, 15)
+        
+        full = ranker.generate_ranking(scores, ranking_date)
+        indexed = ranker.index_ranking(scores, ranking_date)
+        
+        assert len(indexed) == len(full)
+        assert list(indexed) == full
+        
+        for entry in full:
+            assert ranker.get_asset_rank(indexed, entry.ticker) == entry
+            assert indexed.rank_of(entry.ticker) == entry.rank
+            
+            percentile = indexed.percentile_of(entry.ticker)
+            assert 0.0 <= percentile <= 100.0
+        
+        assert indexed.percentile_of(full[0].ticker) == 100.0
+        assert ranker.get_asset_rank(indexed, "MISSING") is None
+        assert indexed.percentile_of("MISSING") is None
+    
+    def test_top_percentile(self):
+        """Testa seleção do topo do ranking por percentual."""
+        scores = [
+            ScoreResult(f"T{i}", float(i), 0.0, 0.0, 0.0, 0.5, {})
+            for i in range(10)
+        ]
+        indexed = Ranker().index_ranking(scores, date(2024, 1, 15))
+        
+        assert [e.ticker for e in indexed.top_percentile(20)] == ["T9", "T8"]
+        assert [e.ticker for e in indexed.top_percentile(25)] == ["T9", "T8", "T7"]
+        assert indexed.top_percentile(0) == []
+        assert indexed[-1].ticker == "T0"
+        
+        with pytest.raises(ValueError):
+            indexed.top_percentile(150)
@@ -4,7 +4,9 @@ Testes de propriedade para o gerador de relatórios.
 Valida: Requisitos 7.1, 7.2, 7.3, 7.4
 """
 
+import numpy as np
 import pytest
+from datetime import date
 from hypothesis import given, strategies as st, settings
 from app.report.report_generator import ReportGenerator
 from app.scoring.scoring_engine import ScoreResult
@@ -404,3 +406,109 @@ class TestReportGeneratorProperties:
             assert len(generator.FACTOR_DESCRIPTIONS[factor]) > 0, (
                 f"Description for {factor} should not be empty"
             )
+
+
+class TestBatchExplanations:
+    """Testes para o modo batch de explicações."""
+    
+    @given(
+        rows=st.lists(
+            st.tuples(
+                st.lists(
+                    # Poucos valores distintos para forçar empates
+                    st.one_of(st.sampled_from([-2.5, -1.0, 0.0, 0.6, 1.0]), normalized_factor),
+                    min_size=12, max_size=12
+                ),
+                st.tuples(*[st.one_of(st.just(float('nan')), normalized_factor)] * 3),
+                st.integers(min_value=1, max_value=500)
+            ),
+            min_size=1, max_size=8
+        ),
+        n=st.integers(min_value=0, max_value=14)
+    )
+    @settings(max_examples=100, deadline=None)
+    def test_batch_matches_single_explanation(self, rows, n):
+        """generate_batch_explanations reproduz generate_asset_explanation, inclusive em empates."""
+        generator = ReportGenerator()
+        factor_names = list(ReportGenerator.FACTOR_DESCRIPTIONS)
+        tickers = [f"T{i}" for i in range(len(rows))]
+        matrix = np.array([values for values, _, _ in rows])
+        categories = np.array([scores for _, scores, _ in rows])
+        ranks = [rank for _, _, rank in rows]
+        final_scores = matrix.mean(axis=1)
+        
+        batch = generator.generate_batch_explanations(
+            tickers, matrix, factor_names, final_scores,
+            categories[:, 0], categories[:, 1], categories[:, 2], ranks, n=n
+        )
+        
+        for i, ticker in enumerate(tickers):
+            score_result = ScoreResult(
+                ticker=ticker,
+                final_score=final_scores[i],
+                momentum_score=categories[i, 0],
+                quality_score=categories[i, 1],
+                value_score=categories[i, 2],
+                confidence=0.5,
+                raw_factors=dict(zip(factor_names, matrix[i]))
+            )
+            ranking_entry = RankingEntry(
+                ticker=ticker, score=final_scores[i], rank=ranks[i], confidence=0.5,
+                momentum_score=categories[i, 0], quality_score=categories[i, 1],
+                value_score=categories[i, 2]
+            )
+            # generate_asset_explanation usa sempre n=3
+            top = generator._identify_top_factors(score_result.raw_factors, n=n)
+            bottom = generator._identify_bottom_factors(score_result.raw_factors, n=n)
+            expected = generator._generate_header(ticker, score_result, ranking_entry)
+            expected += "\n\nPontos Fortes:\n" + "".join(
+                f"- {generator._format_factor_description(name, value, True)}\n" for name, value in top
+            )
+            expected += "\nPontos de Atenção:\n" + "".join(
+                f"- {generator._format_factor_description(name, value, False)}\n" for name, value in bottom
+            )
+            expected += "\n" + generator._generate_conclusion(score_result)
+            
+            assert batch[ticker] == expected
+            if n == 3:
+                assert batch[ticker] == generator.generate_asset_explanation(
+                    ticker, score_result, ranking_entry
+                )
+    
+    def test_missing_factors_are_skipped(self):
+        """Fatores NaN não aparecem em nenhuma seção."""
+        generator = ReportGenerator()
+        matrix = np.array([[2.5, np.nan, -1.5, np.nan]])
+        
+        explanation = generator.generate_batch_explanations(
+            ['AAA'], matrix, ['roe', 'net_margin', 'pe_ratio', 'ev_ebitda'],
+            [1.0], [0.0], [1.0], [np.nan], [1]
+        )['AAA']
+        
+        assert 'Margem Líquida' not in explanation
+        assert 'EV/EBITDA' not in explanation
+        assert explanation.count('\n- ') == 4
+    
+    def test_explanations_are_cached_per_ticker_and_date(self):
+        """O cache devolve a explicação da mesma versão e descarta as antigas."""
+        generator = ReportGenerator(max_cache_size=2)
+        score_date = date(2024, 6, 3)
+        
+        batch = generator.generate_batch_explanations(
+            ['AAA', 'BBB'], np.array([[1.0], [-1.0]]), ['roe'],
+            [0.5, -0.5], [0.0, 0.0], [1.0, -1.0], [0.0, 0.0], [1, 2],
+            score_date=score_date
+        )
+        
+        assert generator.get_cached_explanation('AAA', score_date) == batch['AAA']
+        assert generator.get_cached_explanation('AAA', score_date, version=(0.5, 1)) == batch['AAA']
+        assert generator.get_cached_explanation('AAA', score_date, version=(0.7, 1)) is None
+        assert generator.get_cached_explanation('AAA', date(2024, 6, 4)) is None
+        
+        generator.cache_explanation('CCC', score_date, 'texto')
+        assert generator.get_cached_explanation('AAA', score_date) is None
+        assert generator.get_cached_explanation('CCC', score_date) == 'texto'
+        
+        generator.clear_cache(score_date)
+        assert generator.get_cached_explanation('BBB', score_date) is None
+
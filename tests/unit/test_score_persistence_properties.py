@@ -13,7 +13,7 @@ from sqlalchemy.orm import sessionmaker
 
 from app.models.database import Base
 from app.models.schemas import ScoreDaily
-from app.scoring import ScoringEngine, ScoreResult, ScoreService
+from app.scoring import ScoringEngine, ScoreResult, ScoreService, ScoreBatch
 
 
 # Estratégias para gerar dados de teste
@@ -209,6 +209,118 @@ class TestScorePersistenceProperties:
                 assert retrieved is not None
                 assert abs(retrieved.final_score - original.final_score) < 1e-10
     
+    @given(
+        score_results=st.lists(score_result_strategy(), min_size=1, max_size=12, unique_by=lambda x: x.ticker),
+        score_date=date_strategy,
+        chunk_size=st.integers(min_value=1, max_value=5)
+    )
+    @settings(max_examples=20, deadline=None)
+    def test_batch_save_upserts_with_ranks(self, score_results, score_date, chunk_size):
+        """
+        Testa que save_batch_scores atualiza registros existentes e grava
+        ranks no mesmo passo, independentemente do tamanho do chunk.
+        
+        Valida: Requisitos 4.5, 4.6
+        """
+        with get_test_db() as test_db:
+            service = ScoreService(test_db)
+            
+            # Primeiro registro já existe com outro score
+            service.save_score(score_results[0], score_date, rank=999)
+            
+            ranks = {s.ticker: i for i, s in enumerate(score_results, start=1)}
+            modified = [
+                ScoreResult(
+                    ticker=s.ticker,
+                    final_score=s.final_score + 1.0,
+                    momentum_score=s.momentum_score,
+                    quality_score=s.quality_score,
+                    value_score=s.value_score,
+                    confidence=s.confidence,
+                    raw_factors=s.raw_factors
+                )
+                for s in score_results
+            ]
+            
+            results = service.save_batch_scores(
+                modified, score_date, ranks=ranks, chunk_size=chunk_size
+            )
+            
+            assert results["total_records"] == len(score_results)
+            assert len(service.get_all_scores_for_date(score_date)) == len(score_results)
+            
+            for original in modified:
+                retrieved = service.get_score(original.ticker, score_date)
+                assert abs(retrieved.final_score - original.final_score) < 1e-10
+                assert retrieved.rank == ranks[original.ticker]
+    
+    def test_batch_save_reports_failed_rows(self, test_db):
+        """
+        Testa que falhas de linhas individuais são reportadas sem abortar
+        o restante do batch.
+        
+        Valida: Requisitos 4.5, 4.6
+        """
+        service = ScoreService(test_db)
+        score_date = date(2024, 1, 2)
+        
+        def make_score(ticker, final_score):
+            return ScoreResult(
+                ticker=ticker,
+                final_score=final_score,
+                momentum_score=0.5,
+                quality_score=0.3,
+                value_score=0.2,
+                confidence=0.5,
+                raw_factors={}
+            )
+        
+        scores = [make_score("AAA", 1.0), make_score("BAD", None), make_score("CCC", 2.0)]
+        
+        results = service.save_batch_scores(scores, score_date, chunk_size=2)
+        
+        assert sorted(results["success"]) == ["AAA", "CCC"]
+        assert [f["ticker"] for f in results["failed"]] == ["BAD"]
+        assert results["total_records"] == 2
+        assert service.get_score("BAD", score_date) is None
+        assert service.get_score("AAA", score_date).final_score == 1.0
+        assert service.get_score("CCC", score_date).final_score == 2.0
+    
+    @given(
+        score_results=st.lists(score_result_strategy(), min_size=1, max_size=10, unique_by=lambda x: x.ticker),
+        score_date=date_strategy
+    )
+    @settings(max_examples=20, deadline=None)
+    def test_batch_save_from_score_batch(self, score_results, score_date):
+        """
+        Testa que um ScoreBatch colunar é gravado com os mesmos valores de
+        uma lista de ScoreResult.
+        
+        Valida: Requisitos 4.5, 4.6
+        """
+        with get_test_db() as test_db:
+            service = ScoreService(test_db)
+            
+            batch = ScoreBatch(
+                tickers=[s.ticker for s in score_results],
+                final_score=[s.final_score for s in score_results],
+                momentum_score=[s.momentum_score for s in score_results],
+                quality_score=[s.quality_score for s in score_results],
+                value_score=[s.value_score for s in score_results],
+                confidence=[s.confidence for s in score_results]
+            )
+            ranks = {s.ticker: i for i, s in enumerate(score_results, start=1)}
+            
+            results = service.save_batch_scores(batch, score_date, ranks=ranks)
+            
+            assert results["total_records"] == len(score_results)
+            for original in score_results:
+                retrieved = service.get_score(original.ticker, score_date)
+                assert abs(retrieved.final_score - original.final_score) < 1e-10
+                assert abs(retrieved.confidence - original.confidence) < 1e-10
+                assert retrieved.rank == ranks[original.ticker]
+                assert retrieved.risk_penalties is None
+    
     @given(
         score_result=score_result_strategy(),
         score_date=date_strategy,
@@ -344,6 +456,104 @@ class TestScorePersistenceProperties:
             for i, score in enumerate(scores, start=1):
                 assert score.rank == i, f"Rank should match position in ordered list"
     
+    @given(
+        score_results=st.lists(score_result_strategy(), min_size=1, max_size=10, unique_by=lambda x: x.ticker),
+        score_date=date_strategy
+    )
+    @settings(max_examples=20, deadline=None)
+    def test_indexed_ranking_matches_update_ranks(self, score_results, score_date):
+        """
+        Testa que o ranking indexado reproduz os ranks 'ordinal' persistidos.
+        
+        Valida: Requisitos 5.1, 5.2
+        """
+        with get_test_db() as test_db:
+            service = ScoreService(test_db)
+            service.save_batch_scores(score_results, score_date)
+            service.update_ranks(score_date)
+            
+            ranking = service.get_indexed_ranking(score_date)
+            
+            assert len(ranking) == len(score_results)
+            for score in service.get_all_scores_for_date(score_date):
+                assert ranking.rank_of(score.ticker) == score.rank
+    
+    def test_update_ranks_tie_methods(self, test_db):
+        """
+        Testa tratamento de empates (ordinal, competition, dense) e ranking
+        de várias datas numa única chamada.
+        
+        Valida: Requisitos 5.1, 5.2
+        """
+        service = ScoreService(test_db)
+        dates = [date(2024, 1, 1), date(2024, 1, 2)]
+        
+        for d in dates:
+            scores = [
+                ScoreResult(
+                    ticker=ticker,
+                    final_score=final_score,
+                    momentum_score=0.0,
+                    quality_score=0.0,
+                    value_score=0.0,
+                    confidence=0.5,
+                    raw_factors={}
+                )
+                for ticker, final_score in [("AAA", 2.0), ("BBB", 1.0), ("CCC", 1.0), ("DDD", 0.5)]
+            ]
+            service.save_batch_scores(scores, d)
+        
+        def ranks_for(d):
+            return {s.ticker: s.rank for s in service.get_all_scores_for_date(d)}
+        
+        assert service.update_ranks(dates) == 8
+        for d in dates:
+            assert ranks_for(d) == {"AAA": 1, "BBB": 2, "CCC": 3, "DDD": 4}
+        
+        service.update_ranks(dates, tie_method='competition')
+        for d in dates:
+            assert ranks_for(d) == {"AAA": 1, "BBB": 2, "CCC": 2, "DDD": 4}
+        
+        service.update_ranks(dates[0], tie_method='dense')
+        assert ranks_for(dates[0]) == {"AAA": 1, "BBB": 2, "CCC": 2, "DDD": 3}
+        assert ranks_for(dates[1]) == {"AAA": 1, "BBB": 2, "CCC": 2, "DDD": 4}
+        
+        with pytest.raises(ValueError):
+            service.update_ranks(dates[0], tie_method='average')
+    
+    def test_update_ranks_on_smoothed_score(self, test_db):
+        """
+        Testa ranking pelo score suavizado, usando final_score quando o
+        suavizado não existe.
+        
+        Valida: Requisitos 5.1, 5.2
+        """
+        service = ScoreService(test_db)
+        score_date = date(2024, 1, 1)
+        
+        scores = [
+            ScoreResult(
+                ticker=ticker,
+                final_score=final_score,
+                momentum_score=0.0,
+                quality_score=0.0,
+                value_score=0.0,
+                confidence=0.5,
+                raw_factors={}
+            )
+            for ticker, final_score in [("AAA", 2.0), ("BBB", 1.0), ("CCC", 0.0)]
+        ]
+        service.save_batch_scores(scores, score_date)
+        
+        service.get_score("AAA", score_date).final_score_smoothed = 0.5
+        service.get_score("CCC", score_date).final_score_smoothed = 1.5
+        test_db.commit()
+        
+        service.update_ranks(score_date, use_smoothed=True)
+        
+        ranks = {s.ticker: s.rank for s in service.get_all_scores_for_date(score_date)}
+        assert ranks == {"CCC": 1, "BBB": 2, "AAA": 3}
+    
     def test_get_latest_date(self, test_db):
         """
         Testa que get_latest_date retorna a data mais recente.
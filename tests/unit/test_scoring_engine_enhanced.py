@@ -284,3 +284,41 @@ class TestScoringEngineEnhanced:
         assert len(result.exclusion_reasons) == 2
         assert 'negative_equity' in result.exclusion_reasons
         assert 'low_volume' in result.exclusion_reasons
+    
+    def test_sector_aware_scoring_uses_sector_map(self):
+        """Testa que score_asset_sector_aware usa a classificação pré-carregada."""
+        from app.ingestion.asset_info_service import SectorClassification
+        
+        # Fatores com métricas de EBITDA: a heurística classificaria como industrial
+        fundamental_factors = {
+            'roe': 0.5,
+            'roe_mean_3y': 0.5,
+            'net_margin': 0.2,
+            'pe_ratio': -0.3,
+            'pb_ratio': 0.1,
+            'price_to_book': 0.1,
+            'debt_to_ebitda': 0.4,
+            'ev_ebitda': 0.2
+        }
+        momentum_factors = {
+            'momentum_6m_ex_1m': 0.3,
+            'momentum_12m_ex_1m': 0.2
+        }
+        sector_map = {
+            'BBAS3.SA': SectorClassification('BBAS3.SA', 'Financial Services', 'Banks', True)
+        }
+        
+        engine = ScoringEngine(sector_map=sector_map)
+        result = engine.score_asset_sector_aware(
+            'BBAS3.SA', fundamental_factors, momentum_factors, confidence=1.0
+        )
+        
+        assert result.value_score == pytest.approx(
+            engine.calculate_value_score_financial(fundamental_factors)
+        )
+        assert result.quality_score == pytest.approx(
+            engine.calculate_quality_score_financial(fundamental_factors)
+        )
+        
+        # Sem o mapa, cai na heurística (industrial)
+        assert ScoringEngine()._is_financial_institution(fundamental_factors, 'BBAS3.SA') is False
@@ -0,0 +1,172 @@
+"""
+Testes para suavização temporal de scores.
+"""
+
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.schemas import ScoreDaily
+from app.scoring.temporal_smoothing import TemporalSmoothing
+
+
+@pytest.fixture
+def db_engine():
+    """Engine SQLite em memória com schema criado."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def db_session(db_engine):
+    """Sessão de banco de dados para testes."""
+    SessionLocal = sessionmaker(bind=db_engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def add_score(db, ticker, score_date, final_score, smoothed=None, eligible=True):
+    """Adiciona um ScoreDaily mínimo."""
+    db.add(ScoreDaily(
+        ticker=ticker,
+        date=score_date,
+        final_score=final_score,
+        final_score_smoothed=smoothed,
+        momentum_score=0.0,
+        quality_score=0.0,
+        value_score=0.0,
+        confidence=0.5,
+        passed_eligibility=eligible
+    ))
+
+
+class TestBatchSmoothing:
+    """Testes para a suavização em batch."""
+    
+    @pytest.fixture
+    def history(self, db_session):
+        """Histórico com smoothed, sem smoothed, inelegível e fora do lookback."""
+        current = date(2024, 3, 1)
+        add_score(db_session, "AAA", current - timedelta(days=1), 1.0, smoothed=0.8)
+        add_score(db_session, "AAA", current - timedelta(days=5), 0.1, smoothed=0.1)
+        add_score(db_session, "BBB", current - timedelta(days=2), 0.4)
+        add_score(db_session, "CCC", current - timedelta(days=1), 2.0, eligible=False)
+        add_score(db_session, "DDD", current - timedelta(days=40), 1.5)
+        for ticker, score in [("AAA", 1.0), ("BBB", 0.0), ("CCC", 0.5), ("DDD", -0.5)]:
+            add_score(db_session, ticker, current, score)
+        db_session.commit()
+        return current
+    
+    def test_previous_scores_match_per_ticker_lookup(self, db_session, history):
+        """get_previous_scores equivale a get_previous_score ticker a ticker."""
+        smoother = TemporalSmoothing()
+        tickers = ["AAA", "BBB", "CCC", "DDD", "EEE"]
+        
+        batch = smoother.get_previous_scores(db_session, history, tickers)
+        
+        for ticker in tickers:
+            single = smoother.get_previous_score(db_session, ticker, history)
+            if single is None:
+                assert ticker not in batch
+            else:
+                assert batch[ticker] == pytest.approx(single)
+        assert batch == {"AAA": pytest.approx(0.8), "BBB": pytest.approx(0.4)}
+    
+    def test_smooth_scores_batch_uses_constant_queries(self, db_engine, db_session, history):
+        """smooth_scores_batch faz uma única consulta, qualquer que seja o universo."""
+        smoother = TemporalSmoothing(alpha=0.7)
+        scores = {"AAA": 1.0, "BBB": 0.0, "CCC": 0.5, "DDD": -0.5, "EEE": 0.3}
+        
+        statements = []
+        event.listen(db_engine, "before_cursor_execute",
+                     lambda *args: statements.append(args[2]))
+        
+        smoothed = smoother.smooth_scores_batch(db_session, scores, history)
+        
+        assert len(statements) == 1
+        assert smoothed["AAA"] == pytest.approx(0.7 * 1.0 + 0.3 * 0.8)
+        assert smoothed["BBB"] == pytest.approx(0.7 * 0.0 + 0.3 * 0.4)
+        assert smoothed["CCC"] == pytest.approx(0.5)
+        assert smoothed["DDD"] == pytest.approx(-0.5)
+        assert smoothed["EEE"] == pytest.approx(0.3)
+    
+    def test_update_smoothed_scores_bulk(self, db_session, history):
+        """update_smoothed_scores grava o suavizado de todos os elegíveis da data."""
+        smoother = TemporalSmoothing(alpha=0.7)
+        
+        updated = smoother.update_smoothed_scores(db_session, history)
+        
+        assert updated == 4
+        rows = {
+            s.ticker: s.final_score_smoothed
+            for s in db_session.query(ScoreDaily).filter(ScoreDaily.date == history)
+        }
+        assert rows["AAA"] == pytest.approx(0.94)
+        assert rows["BBB"] == pytest.approx(0.12)
+        assert rows["CCC"] == pytest.approx(0.5)
+        assert rows["DDD"] == pytest.approx(-0.5)
+
+
+class TestHistoryBackfill:
+    """Testes para o backfill vetorizado do histórico."""
+    
+    def test_smooth_history_handles_gaps(self):
+        """Lacunas dentro do lookback mantêm o anterior; maiores recomeçam."""
+        smoother = TemporalSmoothing(alpha=0.5)
+        nan = float("nan")
+        dates = [date(2024, 1, 1), date(2024, 1, 2), date(2024, 1, 20), date(2024, 3, 1)]
+        matrix = [
+            [1.0, nan],
+            [nan, 2.0],   # AAA sem score; BBB listado
+            [3.0, 4.0],   # AAA volta dentro do lookback
+            [5.0, 6.0],   # lacuna > 30 dias: recomeça
+        ]
+        
+        smoothed = smoother.smooth_history(matrix, dates)
+        
+        assert smoothed[0, 0] == pytest.approx(1.0)
+        assert smoothed[1, 1] == pytest.approx(2.0)
+        assert smoothed[2, 0] == pytest.approx(2.0)
+        assert smoothed[2, 1] == pytest.approx(3.0)
+        assert smoothed[3, 0] == pytest.approx(5.0)
+        assert smoothed[3, 1] == pytest.approx(6.0)
+        assert smoothed[1, 0] != smoothed[1, 0]  # NaN preservado
+    
+    def test_backfill_matches_day_by_day(self, db_engine):
+        """backfill_smoothed_scores produz o mesmo resultado que o loop por data."""
+        SessionLocal = sessionmaker(bind=db_engine)
+        smoother = TemporalSmoothing(alpha=0.6)
+        
+        def populate(db):
+            start = date(2024, 1, 1)
+            for i in range(40):
+                day = start + timedelta(days=i)
+                for j, ticker in enumerate(["AAA", "BBB", "CCC"]):
+                    # Lacunas diferentes por ticker e um registro inelegível
+                    if (i + j) % (j + 2) == 0 or (ticker == "CCC" and i < 10):
+                        continue
+                    add_score(db, ticker, day, ((i * 7 + j * 3) % 11) / 10.0,
+                              eligible=not (ticker == "BBB" and i == 15))
+            db.commit()
+        
+        db = SessionLocal()
+        populate(db)
+        for (d,) in db.query(ScoreDaily.date).distinct().order_by(ScoreDaily.date):
+            smoother.update_smoothed_scores(db, d)
+        expected = {
+            (s.ticker, s.date): s.final_score_smoothed
+            for s in db.query(ScoreDaily).filter(ScoreDaily.passed_eligibility == True)
+        }
+        db.query(ScoreDaily).update({ScoreDaily.final_score_smoothed: None})
+        db.commit()
+        
+        updated = smoother.backfill_smoothed_scores(db)
+        
+        assert updated == len(expected)
+        for s in db.query(ScoreDaily).filter(ScoreDaily.passed_eligibility == True):
+            assert s.final_score_smoothed == pytest.approx(expected[(s.ticker, s.date)])
+        db.close()
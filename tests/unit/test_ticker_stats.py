@@ -0,0 +1,127 @@
+"""
+Testes para os agregados por ticker (ticker_stats).
+"""
+
+import pytest
+from datetime import date, timedelta
+from unittest.mock import Mock
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.schemas import RawPriceDaily, RawFundamental, TickerStats
+from app.ingestion.ingestion_service import IngestionService
+from app.ingestion.ticker_stats_service import TickerStatsService
+
+
+@pytest.fixture
+def db_session():
+    """Sessão SQLite em memória com schema criado."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_prices(db, ticker, start, volumes, close=10.0):
+    """Adiciona um pregão por dia a partir de start."""
+    for i, volume in enumerate(volumes):
+        db.add(RawPriceDaily(
+            ticker=ticker,
+            date=start + timedelta(days=i),
+            close=close,
+            adj_close=close,
+            volume=volume
+        ))
+
+
+class TestTickerStatsService:
+    """Testes para TickerStatsService."""
+    
+    def test_refresh_computes_price_and_fundamental_aggregates(self, db_session):
+        """ADV e volume financeiro usam só a janela; contagens usam todo o histórico."""
+        start = date(2024, 1, 1)
+        add_prices(db_session, "AAA", start, [1000] * 5 + [100, 200, 300])
+        add_prices(db_session, "BBB", start, [50, None], close=2.0)
+        for period_end, period_type in [(date(2022, 12, 31), 'annual'),
+                                        (date(2023, 12, 31), 'annual'),
+                                        (date(2023, 12, 31), 'quarterly')]:
+            db_session.add(RawFundamental(
+                ticker="AAA", period_end_date=period_end, period_type=period_type
+            ))
+        db_session.add(RawFundamental(
+            ticker="CCC", period_end_date=date(2021, 12, 31), period_type='annual'
+        ))
+        db_session.commit()
+        
+        updated = TickerStatsService(db_session, adv_window=3).refresh()
+        stats = TickerStatsService(db_session).get_stats()
+        
+        assert updated == 2
+        assert set(stats) == {"AAA", "BBB", "CCC"}
+        
+        aaa = stats["AAA"]
+        assert aaa.first_price_date == start
+        assert aaa.last_price_date == start + timedelta(days=7)
+        assert aaa.price_bar_count == 8
+        assert aaa.adv_window == 3
+        assert aaa.avg_daily_volume == pytest.approx(200.0)
+        assert aaa.avg_traded_value == pytest.approx(2000.0)
+        assert aaa.fundamental_period_count == 2
+        assert aaa.last_fundamental_date == date(2023, 12, 31)
+        
+        assert stats["BBB"].avg_daily_volume == pytest.approx(50.0)
+        assert stats["BBB"].avg_traded_value == pytest.approx(100.0)
+        assert stats["BBB"].fundamental_period_count == 0
+        assert stats["CCC"].price_bar_count == 0
+        assert stats["CCC"].avg_daily_volume is None
+    
+    def test_refresh_prices_only_touches_given_tickers(self, db_session):
+        """Atualizar preços preserva os agregados de fundamentos e de outros tickers."""
+        start = date(2024, 1, 1)
+        add_prices(db_session, "AAA", start, [100, 100])
+        add_prices(db_session, "BBB", start, [500])
+        db_session.add(RawFundamental(
+            ticker="AAA", period_end_date=date(2023, 12, 31), period_type='annual'
+        ))
+        db_session.commit()
+        service = TickerStatsService(db_session)
+        service.refresh()
+        
+        add_prices(db_session, "AAA", start + timedelta(days=2), [400])
+        add_prices(db_session, "BBB", start + timedelta(days=1), [900])
+        service.refresh_prices(["AAA"])
+        db_session.commit()
+        db_session.expire_all()
+        
+        stats = service.get_stats(["AAA", "BBB"])
+        assert stats["AAA"].price_bar_count == 3
+        assert stats["AAA"].avg_daily_volume == pytest.approx(200.0)
+        assert stats["AAA"].fundamental_period_count == 1
+        assert stats["BBB"].price_bar_count == 1
+        assert db_session.query(TickerStats).count() == 2
+
+
+def test_ingestion_refreshes_ticker_stats(db_session):
+    """IngestionService atualiza ticker_stats dos tickers ingeridos."""
+    yahoo_client = Mock()
+    yahoo_client.fetch_daily_prices.return_value = pd.DataFrame({
+        'date': [date(2024, 1, 15), date(2024, 1, 16)],
+        'open': [35.5, 35.8],
+        'high': [36.2, 36.0],
+        'low': [35.1, 35.2],
+        'close': [35.8, 35.9],
+        'volume': [1000, 3000],
+        'adj_close': [35.8, 35.9]
+    })
+    service = IngestionService(yahoo_client, Mock(), db_session)
+    
+    service.ingest_prices(["PETR4.SA"], lookback_days=5)
+    
+    stats = service.stats_service.get_stats(["PETR4.SA"])["PETR4.SA"]
+    assert stats.price_bar_count == 2
+    assert stats.last_price_date == date(2024, 1, 16)
+    assert stats.avg_daily_volume == pytest.approx(2000.0)